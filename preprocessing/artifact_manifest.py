@@ -0,0 +1,177 @@
+"""
+Manifeste des artefacts du preprocessing
+
+Écrit par le pipeline dans preprocessing_metadata.json (clé "manifest"):
+liste des fichiers avec taille et empreinte SHA-256, schéma (colonnes et
+dtypes) et nombre de lignes des tables, version du code et des données.
+
+La validation rapide (existence et taille des fichiers, quelques
+millisecondes) remplace la relecture complète des pickles; la validation
+approfondie (deep) recalcule en plus les empreintes.
+
+Usage (script de démarrage, --deep implicite si MANGETAMAIN_DEEP_VERIFY=1):
+    python artifact_manifest.py /app/data [--deep]
+"""
+
+import os
+import sys
+import json
+import glob
+import hashlib
+import argparse
+from typing import Any, Dict, Iterable, List, Optional
+
+MANIFEST_VERSION = 1
+METADATA_FILE = "preprocessing_metadata.json"
+
+_CHUNK_SIZE = 1 << 20
+
+
+def file_digest(path: str) -> str:
+    """Empreinte SHA-256 (hexadécimale) d'un fichier, lu par blocs"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def table_schema(df) -> Dict[str, Any]:
+    """Nombre de lignes et dtypes des colonnes d'un DataFrame"""
+    return {"rows": int(len(df)),
+            "columns": {str(column): str(dtype) for column, dtype in df.dtypes.items()}}
+
+
+def code_version(source_dir: Optional[str] = None) -> str:
+    """
+    Version du code du preprocessing: MANGETAMAIN_CODE_VERSION si défini
+    (commit git en CI), sinon empreinte des sources Python du répertoire
+    """
+    version = os.getenv("MANGETAMAIN_CODE_VERSION")
+    if version:
+        return version
+    source_dir = source_dir or os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for path in sorted(glob.glob(os.path.join(source_dir, "*.py"))):
+        digest.update(os.path.basename(path).encode())
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def build_manifest(output_dir: str, files: Iterable[str], tables: Dict[str, tuple],
+                   source: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Manifeste des fichiers (chemins relatifs à output_dir) et des tables
+    ({nom: (fichier, DataFrame)}). La version des données est l'empreinte
+    des empreintes des fichiers.
+    """
+    entries = {}
+    for name in sorted(set(files)):
+        path = os.path.join(output_dir, name)
+        entries[name] = {"size": os.path.getsize(path), "sha256": file_digest(path)}
+
+    data_digest = hashlib.sha256()
+    for name, entry in entries.items():
+        data_digest.update(f"{name}:{entry['sha256']}\n".encode())
+
+    return {
+        "manifest_version": MANIFEST_VERSION,
+        "code_version": code_version(),
+        "data_version": data_digest.hexdigest()[:16],
+        "source": dict(source or {}),
+        "files": entries,
+        "tables": {name: {"file": file, **table_schema(df)}
+                   for name, (file, df) in tables.items()},
+    }
+
+
+def load_manifest(metadata_path: str) -> Optional[Dict[str, Any]]:
+    """Manifeste contenu dans les métadonnées (None si absent)"""
+    try:
+        with open(metadata_path) as f:
+            return json.load(f).get("manifest")
+    except FileNotFoundError:
+        return None
+
+
+def verify_files(directory: str, manifest: Dict[str, Any], deep: bool = False) -> List[str]:
+    """
+    Compare les fichiers de directory au manifeste: existence et taille,
+    empreintes si deep. Retourne les écarts (liste vide si conforme).
+    """
+    if manifest.get("manifest_version") != MANIFEST_VERSION:
+        return [f"version de manifeste non supportée: {manifest.get('manifest_version')}"]
+
+    problems = []
+    for name, entry in manifest["files"].items():
+        path = os.path.join(directory, name)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            problems.append(f"{name}: fichier manquant")
+            continue
+        if size != entry["size"]:
+            problems.append(f"{name}: taille {size} au lieu de {entry['size']}")
+        elif deep and file_digest(path) != entry["sha256"]:
+            problems.append(f"{name}: empreinte SHA-256 différente")
+    return problems
+
+
+def verify_tables(manifest: Dict[str, Any], tables: Dict[str, Any]) -> List[str]:
+    """Compare le schéma et les lignes de DataFrames déjà chargés ({nom: DataFrame})"""
+    problems = []
+    for name, df in tables.items():
+        expected = manifest.get("tables", {}).get(name)
+        if expected is None:
+            continue
+        schema = table_schema(df)
+        if schema["rows"] != expected["rows"]:
+            problems.append(f"{name}: {schema['rows']} lignes au lieu de {expected['rows']}")
+        if schema["columns"] != expected["columns"]:
+            problems.append(f"{name}: schéma différent du manifeste")
+    return problems
+
+
+def verify_manifest(directory: str, manifest: Dict[str, Any], deep: bool = False,
+                    tables: Optional[Dict[str, Any]] = None) -> List[str]:
+    """Écarts des fichiers puis, si fournies, des tables chargées"""
+    problems = verify_files(directory, manifest, deep)
+    if not problems and tables:
+        problems += verify_tables(manifest, tables)
+    return problems
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Validation des artefacts MangeTaMain")
+    parser.add_argument("directory", help="Répertoire des artefacts")
+    parser.add_argument("--deep", action="store_true",
+                        default=os.getenv("MANGETAMAIN_DEEP_VERIFY", "0") == "1",
+                        help="Recalcule les empreintes SHA-256 (MANGETAMAIN_DEEP_VERIFY=1)")
+    parser.add_argument("--require", nargs="*", default=["recipes_processed.pkl", "interactions.pkl"],
+                        help="Fichiers exigés en l'absence de manifeste")
+    args = parser.parse_args(argv)
+
+    manifest = load_manifest(os.path.join(args.directory, METADATA_FILE))
+    if manifest is None:
+        # Artefacts d'un pipeline antérieur au manifeste: présence seulement
+        missing = [name for name in args.require
+                   if not os.path.exists(os.path.join(args.directory, name))]
+        for name in missing:
+            print(f" {name}: fichier manquant")
+        print(" Pas de manifeste: présence des fichiers vérifiée seulement")
+        return 1 if missing else 0
+
+    problems = verify_manifest(args.directory, manifest, deep=args.deep)
+    for problem in problems:
+        print(f" {problem}")
+    if problems:
+        return 1
+    print(f" Manifeste valide: {len(manifest['files'])} fichiers, données "
+          f"{manifest['data_version']}, code {manifest['code_version']}"
+          f"{' (empreintes vérifiées)' if args.deep else ''}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
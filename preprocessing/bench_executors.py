@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark des exécuteurs du pipeline (serial, threads, processes)
+sur un dataset synthétique au format RAW_recipes.csv
+
+Usage: python bench_executors.py [n_recettes] [n_workers]
+"""
+
+import sys
+import time
+import random
+
+import pandas as pd
+
+from pipeline import SerialExecutor, ThreadExecutor, ProcessExecutor, preprocess_chunks
+
+INGREDIENTS = ['chicken', 'onion', 'garlic', 'tomato', 'olive oil', 'salt', 'pepper',
+               'flour', 'sugar', 'butter', 'egg', 'milk', 'rice', 'basil', 'lemon']
+STEPS = ['chop the onion', 'heat the oil in a pan', 'stir constantly for 5 minutes',
+         'bake for 30 minutes', 'meanwhile boil the rice', 'season carefully and serve']
+TAGS = ['dinner', 'main-dish', 'healthy', 'vegetarian', 'italian', '30-minutes-or-less']
+
+
+def make_synthetic_recipes(n_recipes, seed=42):
+    """Génère n recettes synthétiques avec les colonnes brutes attendues"""
+    rng = random.Random(seed)
+    rows = []
+    for recipe_id in range(1, n_recipes + 1):
+        steps = rng.sample(STEPS, rng.randint(1, len(STEPS)))
+        rows.append({
+            'id': recipe_id,
+            'name': f'recipe {recipe_id}',
+            'minutes': rng.randint(5, 180),
+            'ingredients': str(rng.sample(INGREDIENTS, rng.randint(2, 8))),
+            'nutrition': str([round(rng.uniform(0, 900), 1) for _ in range(7)]),
+            'tags': str(rng.sample(TAGS, rng.randint(1, 4))),
+            'steps': str(steps),
+            'n_steps': len(steps),
+            'description': 'a quick and tasty weeknight dinner with fresh herbs',
+            'n_ingredients': 0,
+        })
+    return pd.DataFrame(rows)
+
+
+def run_benchmark(n_recipes=20000, n_workers=4):
+    """Chronomètre chaque backend et vérifie que les sorties sont identiques"""
+    recipes_df = make_synthetic_recipes(n_recipes)
+    chunk_size = max(500, n_recipes // (n_workers * 3))
+    backends = [
+        SerialExecutor(),
+        ThreadExecutor(n_workers),
+        ProcessExecutor(n_workers, 'fork'),
+        ProcessExecutor(n_workers, 'spawn'),
+    ]
+
+    reference = None
+    results = []
+    for executor in backends:
+        label = executor.name + (f" ({executor.start_method})"
+                                 if isinstance(executor, ProcessExecutor) else "")
+        start = time.perf_counter()
+        chunks = preprocess_chunks(recipes_df, executor, chunk_size)
+        elapsed = time.perf_counter() - start
+
+        output = pd.concat(chunks, ignore_index=True)
+        if reference is None:
+            reference = output
+        identical = output.equals(reference)
+        results.append((label, elapsed, n_recipes / elapsed, identical))
+
+    print(f"\n{n_recipes:,} recettes, {n_workers} workers, chunks de {chunk_size}")
+    print(f"{'Backend':<22}{'Durée (s)':>12}{'Recettes/s':>14}{'Identique':>12}")
+    for label, elapsed, speed, identical in results:
+        print(f"{label:<22}{elapsed:>12.2f}{speed:>14,.0f}{str(identical):>12}")
+    return results
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    run_benchmark(n, workers)
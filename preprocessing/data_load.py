@@ -1,22 +1,165 @@
 import os
+import json
+import shutil
+import hashlib
+import logging
 import pandas as pd
-import kagglehub
 
+logger = logging.getLogger(__name__)
+
+# Format binaire colonne: Parquet si pyarrow est installé, sinon pickle
+try:
+    import pyarrow  # noqa: F401
+    COLUMNAR_EXTENSION = ".parquet"
+except ImportError:
+    COLUMNAR_EXTENSION = ".pkl"
+
+MANIFEST_FILE = "manifest.json"
+
+
+def file_checksum(file_path, chunk_size=1 << 20):
+    """Calcule le SHA-256 d'un fichier par blocs"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_entry_dir(cache_dir, dataset_name, version=None):
+    """Répertoire du cache local pour un dataset et une version donnés"""
+    return os.path.join(cache_dir, dataset_name.replace('/', '__'),
+                        str(version) if version else 'latest')
+
+
+def verify_cache_entry(entry_dir):
+    """Vérifie qu'une entrée du cache est complète et que les checksums concordent"""
+    manifest_path = os.path.join(entry_dir, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return False
+    with open(manifest_path, 'r') as f:
+        manifest = json.load(f)
+    for file_name, expected in manifest['files'].items():
+        file_path = os.path.join(entry_dir, file_name)
+        if not os.path.exists(file_path) or file_checksum(file_path) != expected:
+            logger.warning(f"Checksum invalide pour {file_name} dans {entry_dir}")
+            return False
+    return True
+
+
+def _populate_cache_entry(source_path, entry_dir, dataset_name, version,
+                          files=None):
+    """Copie les fichiers d'un dataset dans le cache et écrit le manifeste"""
+    tmp_dir = f"{entry_dir}.tmp.{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    checksums = {}
+    for file_name in sorted(os.listdir(source_path)):
+        src = os.path.join(source_path, file_name)
+        if files is not None and file_name not in files:
+            continue
+        if os.path.isfile(src) and file_name != MANIFEST_FILE:
+            shutil.copy2(src, os.path.join(tmp_dir, file_name))
+            checksums[file_name] = file_checksum(os.path.join(tmp_dir, file_name))
+
+    with open(os.path.join(tmp_dir, MANIFEST_FILE), 'w') as f:
+        json.dump({'dataset': dataset_name, 'version': version,
+                   'files': checksums}, f, indent=2)
+
+    # Remplacement atomique de l'entrée
+    shutil.rmtree(entry_dir, ignore_errors=True)
+    os.replace(tmp_dir, entry_dir)
+
+
+def fetch_data(dataset_name, version=None, cache_dir=None, offline=False,
+               source_dir=None, files=None):
+    """
+    Télécharge un dataset depuis Kaggle, via un cache local vérifié.
+
+    Args:
+        dataset_name: identifiant Kaggle du dataset
+        version: version du dataset (None = dernière version, cachée sous 'latest')
+        cache_dir: répertoire du cache local (None = pas de cache)
+        offline: si True, n'accède jamais au réseau (le cache doit exister)
+        source_dir: répertoire local utilisé à la place de Kaggle
+        files: fichiers à conserver dans le cache (None = tous)
+
+    Returns:
+        Chemin du répertoire contenant les fichiers du dataset
+    """
+    if cache_dir is None:
+        if source_dir:
+            return source_dir
+        if offline:
+            raise FileNotFoundError(
+                f"Mode hors-ligne sans cache: impossible de récupérer {dataset_name}")
+        return _download(dataset_name, version)
+
+    entry_dir = cache_entry_dir(cache_dir, dataset_name, version)
+    if verify_cache_entry(entry_dir):
+        logger.info(f"Dataset {dataset_name} servi depuis le cache: {entry_dir}")
+        return entry_dir
+
+    if offline and not source_dir:
+        raise FileNotFoundError(
+            f"Dataset {dataset_name} absent ou corrompu dans le cache {cache_dir} "
+            f"(mode hors-ligne)")
+
+    source_path = source_dir or _download(dataset_name, version)
+    _populate_cache_entry(source_path, entry_dir, dataset_name, version, files)
+    logger.info(f"Dataset {dataset_name} mis en cache: {entry_dir}")
+    return entry_dir
+
+
+def _download(dataset_name, version=None):
+    """Téléchargement effectif via kagglehub (import différé)"""
+    import kagglehub
 
-def fetch_data(dataset_name, version=None):
-    """Télécharge un dataset depuis Kaggle"""
     if version:
         dataset_name = f"{dataset_name}:{version}"
     return kagglehub.dataset_download(dataset_name)
 
 
-def load_data(path, files):
-    """Charge les fichiers CSV depuis un répertoire"""
+def _read_columnar(path):
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path)
+    return pd.read_pickle(path)
+
+
+def _write_columnar(df, path):
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    if path.endswith('.parquet'):
+        df.to_parquet(tmp_path, index=False)
+    else:
+        df.to_pickle(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def load_data(path, files, columnar_cache=True):
+    """
+    Charge les fichiers CSV depuis un répertoire.
+
+    Si columnar_cache est activé, chaque CSV est converti une seule fois en
+    format binaire colonne à côté du fichier source; les chargements suivants
+    lisent directement cette copie sans reparser le CSV.
+    """
     data_frames = {}
     for file in files:
         file_path = os.path.join(path, file)
-        if os.path.exists(file_path):
-            data_frames[file] = pd.read_csv(file_path)
-        else:
+        if not os.path.exists(file_path):
             raise FileNotFoundError(f"Fichier {file} introuvable dans {path}")
+
+        binary_path = os.path.splitext(file_path)[0] + COLUMNAR_EXTENSION
+        if (columnar_cache and os.path.exists(binary_path)
+                and os.path.getmtime(binary_path) >= os.path.getmtime(file_path)):
+            data_frames[file] = _read_columnar(binary_path)
+            continue
+
+        data_frames[file] = pd.read_csv(file_path)
+        if columnar_cache:
+            try:
+                _write_columnar(data_frames[file], binary_path)
+            except (OSError, ValueError, ImportError) as e:
+                logger.warning(f"Conversion binaire impossible pour {file}: {e}")
     return data_frames
@@ -1,11 +1,17 @@
+import os
+import json
 import pandas as pd
 import numpy as np
 import ast
 import re
 import logging
 from dataclasses import dataclass
-from typing import List, Set, Dict, Optional
+from typing import List, Set, Dict, Optional, Sequence, Tuple
 from collections import defaultdict, Counter
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer
+
+from ingredient_map import load_ingredient_map
 
 # configuration du logger
 logging.basicConfig(level=logging.INFO)
@@ -19,6 +25,7 @@ class RecipeFeatures:
     ingredient_categories: Dict[str, List[str]]
     normalized_ingredients_list: List[str]
     nutrition_dict: Dict[str, float]
+    health_score: float  # Score nutritionnel (0-1)
     tags: Set[str]
     meal_type: Optional[str]
     dietary_restrictions: List[str]
@@ -115,12 +122,9 @@ class IngredientPreprocessor:
 
     def _load_ingredient_map(self, ingr_map_path: str):
         try:
-            # Charger le fichier CSV au lieu du fichier PKL
-            self.ingr_map = pd.read_csv(ingr_map_path)
-            for _, row in self.ingr_map.iterrows():
-                raw = row['raw_ingr'].lower().strip()
-                normalized = row.get('replaced', row.get('normalized', raw))
-                self.raw_to_normalized[raw] = normalized.lower().strip()
+            # Carte précompilée (pickle), partagée et mémorisée par processus
+            self.raw_to_normalized = load_ingredient_map(ingr_map_path)
+            self.ingr_map = self.raw_to_normalized
             logger.info("Ingredient map loaded successfully.")
         except Exception as e:
             logger.error(f"Error loading ingredient map: {e}")
@@ -170,8 +174,9 @@ class IngredientPreprocessor:
                 if normalized_ing and len(normalized_ing) > 2:
                     cleaned.append(normalized_ing)
             # Dédupliquer (car plusieurs variantes peuvent donner le même
-            # normalisé)
-            return list(set(cleaned))
+            # normalisé) en gardant l'ordre: indépendant du hash seed, donc
+            # identique quel que soit l'exécuteur (fork, spawn, threads)
+            return list(dict.fromkeys(cleaned))
         except (ValueError, SyntaxError) as e:
             logger.error(f"Erreur parsing ingredients: {e}")
             return []
@@ -228,6 +233,31 @@ class NutritionPreprocessor:
         score = max(0, min(1, 1 - penalties + protein_bonus))
         return round(score, 2)
 
+    @classmethod
+    def compute_health_scores(
+            cls, nutrition_dicts: Sequence[Dict[str, float]]) -> np.ndarray:
+        """
+        Version vectorisée de compute_health_score sur tout un lot de recettes.
+        Les dictionnaires sont empilés en une matrice (recettes x nutriments)
+        puis le score est calculé colonne par colonne avec NumPy.
+        """
+        nutrition = pd.DataFrame.from_records(
+            list(nutrition_dicts), columns=cls.NUTRITION_FIELDS)
+        if nutrition.empty:
+            return np.empty(0, dtype=np.float32)
+        has_data = nutrition.notna().any(axis=1).to_numpy()
+        values = nutrition.fillna(0.0).astype(np.float64)
+
+        penalties = (
+            np.maximum(0, (values['calories'].to_numpy() - 600) / 2000)
+            + np.maximum(0, (values['sugar'].to_numpy() - 50) / 200)
+            + np.maximum(0, (values['sodium'].to_numpy() - 1000) / 4000)
+        )
+        protein_bonus = np.minimum(values['protein'].to_numpy() / 50, 0.3)
+        scores = np.clip(1 - penalties + protein_bonus, 0, 1)
+        # score neutre (0.5) si pas de données, comme la version unitaire
+        return np.where(has_data, np.round(scores, 2), 0.5).astype(np.float32)
+
 
 class TagsPreprocessor:
     """extraction de l'information structurées a partir des tags"""
@@ -300,6 +330,8 @@ class StepsPreprocessor:
         'simmer', 'mix', 'blend', 'whisk', 'chop', 'dice', 'marinate',
         'season', 'garnish', 'broil', 'poach', 'braise', 'stir-fry'
     }
+    COMPLEX_WORDS = ['carefully', 'slowly', 'constantly', 'meanwhile',
+                     'simultaneously', 'gradually']
 
     @staticmethod
     def parse_steps(steps_str: str) -> List[str]:
@@ -326,16 +358,84 @@ class StepsPreprocessor:
         avg_length = np.mean([len(step.split())
                              for step in steps]) if steps else 0
         length_factor = min(avg_length / 30, 1.0) * 0.3
-        complex_words = ['carefully', 'slowly', 'constantly', 'meanwhile',
-                         'simultaneously', 'gradually']
-        complexity_count = sum(any(word in step for word in complex_words)
-                               for step in steps)
+        complexity_count = sum(
+            any(word in step for word in StepsPreprocessor.COMPLEX_WORDS)
+            for step in steps)
         complexity_factor = min(complexity_count / 5, 1.0) * 0.1
 
         return step_factor + length_factor + complexity_factor
 
+    @classmethod
+    def compute_step_stats(
+            cls, steps_lists: Sequence[List[str]]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Statistiques des étapes pour tout un lot de recettes en une passe:
+        longueur moyenne (en mots) des étapes et nombre d'étapes contenant
+        un mot de complexité. Les recettes sans étapes valent 0.
+        """
+        n_recipes = len(steps_lists)
+        steps = pd.Series(list(steps_lists), dtype=object).explode().dropna()
+        if steps.empty:
+            return np.zeros(n_recipes), np.zeros(n_recipes)
+        steps = steps.astype(str)
+
+        token_counts = steps.str.split().str.len()
+        avg_lengths = token_counts.groupby(level=0).mean()
+
+        complex_pattern = '|'.join(re.escape(w) for w in cls.COMPLEX_WORDS)
+        complexity_counts = steps.str.contains(
+            complex_pattern, regex=True).groupby(level=0).sum()
+
+        index = pd.RangeIndex(n_recipes)
+        return (avg_lengths.reindex(index, fill_value=0.0).to_numpy(dtype=np.float64),
+                complexity_counts.reindex(index, fill_value=0).to_numpy(dtype=np.float64))
+
+    @staticmethod
+    def compute_effort_scores(n_steps, avg_lengths, complexity_counts) -> np.ndarray:
+        """Version vectorisée de compute_effort_score (float32)."""
+        n_steps = np.asarray(n_steps, dtype=np.float64)
+        step_factor = np.minimum(n_steps / 20, 1.0) * 0.6
+        length_factor = np.minimum(
+            np.asarray(avg_lengths, dtype=np.float64) / 30, 1.0) * 0.3
+        complexity_factor = np.minimum(
+            np.asarray(complexity_counts, dtype=np.float64) / 5, 1.0) * 0.1
+        return (step_factor + length_factor + complexity_factor).astype(np.float32)
+
 
 class DescriptionPreprocessor:
+    # Stop words basiques (construits une seule fois)
+    STOP_WORDS = frozenset({
+        'the',
+        'a',
+        'an',
+        'and',
+        'or',
+        'but',
+        'in',
+        'on',
+        'at',
+        'to',
+        'for',
+        'of',
+        'with',
+        'by',
+        'from',
+        'this',
+        'that',
+        'is',
+        'are',
+        'was',
+        'were',
+        'be',
+        'been',
+        'being',
+        'recipe'})
+    # Après nettoyage le texte ne contient que des \w et des espaces: les
+    # mots de plus de 3 caractères sont exactement les suites de \w de 4+
+    TOKEN_PATTERN = r'(?u)\b\w\w\w\w+\b'
+    MATRIX_FILE = "description_matrix.npz"
+    VOCABULARY_FILE = "description_vocabulary.json"
+
     @staticmethod
     def extract_keywords(description: str, top_n: int = 5) -> List[str]:
 
@@ -347,51 +447,93 @@ class DescriptionPreprocessor:
         text = re.sub(r'[^\w\s]', '', text)
         words = text.split()
 
-        # Stop words basiques
-        stop_words = {
-            'the',
-            'a',
-            'an',
-            'and',
-            'or',
-            'but',
-            'in',
-            'on',
-            'at',
-            'to',
-            'for',
-            'of',
-            'with',
-            'by',
-            'from',
-            'this',
-            'that',
-            'is',
-            'are',
-            'was',
-            'were',
-            'be',
-            'been',
-            'being',
-            'recipe'}
-
         # Filtrer et compter
         filtered_words = [
-            w for w in words if w not in stop_words and len(w) > 3]
+            w for w in words
+            if w not in DescriptionPreprocessor.STOP_WORDS and len(w) > 3]
         word_counts = Counter(filtered_words)
 
         # Retourner les plus fréquents
         return [word for word, _ in word_counts.most_common(top_n)]
 
+    @classmethod
+    def extract_keywords_batch(cls, descriptions: Sequence[str], top_n: int = 5
+                               ) -> Tuple[List[List[str]], sparse.csr_matrix, np.ndarray]:
+        """
+        Mode batch de extract_keywords: toutes les descriptions sont nettoyées
+        puis tokenisées en une passe par un CountVectorizer partagé.
+
+        Returns:
+            (mots-clés par recette, matrice creuse recettes x termes,
+            vocabulaire aligné sur les colonnes de la matrice)
+
+        En cas d'égalité de fréquence, les mots sont départagés par ordre
+        alphabétique (et non par ordre d'apparition comme la version unitaire).
+        """
+        texts = pd.Series([d if isinstance(d, str) else '' for d in descriptions],
+                          dtype=object)
+        texts = texts.str.lower().str.replace(r'[^\w\s]', '', regex=True)
+
+        vectorizer = CountVectorizer(
+            lowercase=False,
+            token_pattern=cls.TOKEN_PATTERN,
+            stop_words=sorted(cls.STOP_WORDS),
+            dtype=np.int32,
+        )
+        try:
+            matrix = vectorizer.fit_transform(texts).tocsr()
+            vocabulary = vectorizer.get_feature_names_out()
+        except ValueError:
+            # Vocabulaire vide (aucune description exploitable)
+            matrix = sparse.csr_matrix((len(texts), 0), dtype=np.int32)
+            vocabulary = np.array([], dtype=object)
+
+        return cls.top_keywords(matrix, vocabulary, top_n), matrix, vocabulary
+
+    @staticmethod
+    def top_keywords(matrix: sparse.csr_matrix, vocabulary: np.ndarray,
+                     top_n: int = 5) -> List[List[str]]:
+        """Extrait les top_n termes de chaque ligne de la matrice de comptage"""
+        keywords = []
+        indptr, indices, counts = matrix.indptr, matrix.indices, matrix.data
+        for row in range(matrix.shape[0]):
+            start, end = indptr[row], indptr[row + 1]
+            if start == end:
+                keywords.append([])
+                continue
+            row_terms = indices[start:end]
+            # Tri par fréquence décroissante puis par index (ordre alphabétique)
+            order = np.lexsort((row_terms, -counts[start:end]))[:top_n]
+            keywords.append(vocabulary[row_terms[order]].tolist())
+        return keywords
+
+    @classmethod
+    def save_artifacts(cls, matrix: sparse.csr_matrix, vocabulary: np.ndarray,
+                       output_dir: str):
+        """Sauvegarde la matrice des descriptions (réutilisable pour la recherche texte)"""
+        sparse.save_npz(os.path.join(output_dir, cls.MATRIX_FILE), matrix)
+        with open(os.path.join(output_dir, cls.VOCABULARY_FILE), 'w') as f:
+            json.dump([str(term) for term in vocabulary], f)
+
+    @classmethod
+    def load_artifacts(cls, output_dir: str) -> Tuple[sparse.csr_matrix, np.ndarray]:
+        """Recharge la matrice des descriptions et son vocabulaire"""
+        matrix = sparse.load_npz(os.path.join(output_dir, cls.MATRIX_FILE)).tocsr()
+        with open(os.path.join(output_dir, cls.VOCABULARY_FILE), 'r') as f:
+            vocabulary = np.array(json.load(f), dtype=object)
+        return matrix, vocabulary
+
 
 class RecipePreprocessor:
     """Orchestrateur principal du prétraitement."""
 
+    # Colonnes des recettes brutes conservées pour l'application
+    DISPLAY_COLUMNS = ['id', 'name', 'minutes', 'n_steps', 'description', 'n_ingredients']
+
     def __init__(self, ingr_map_path=None):
         # ✅ CORRECTION: Gérer les chemins de façon robuste
         if ingr_map_path is None:
             # Chemin par défaut relatif au fichier actuel
-            import os
             current_dir = os.path.dirname(__file__)
             ingr_map_path = os.path.join(current_dir, 'ingr_map.csv')
 
@@ -412,7 +554,12 @@ class RecipePreprocessor:
 
         logger.info("RecipePreprocessor initialisé avec succès")
 
-    def preprocess_recipe(self, row: pd.Series) -> RecipeFeatures:
+    def _extract_features(self, row: pd.Series) -> Tuple[RecipeFeatures, List[str]]:
+        """
+        Extrait les features d'une recette sans les scores (santé, effort) ni
+        les mots-clés, calculés ensuite soit ligne par ligne soit vectorisés
+        sur le lot. Retourne aussi les étapes parsées, nécessaires au score d'effort.
+        """
 
         # Ingrédients
         ingredients_list = self.ingredients_prep.parse_and_clean(
@@ -433,36 +580,59 @@ class RecipePreprocessor:
         # Steps
         steps = self.steps_prep.parse_steps(row['steps'])
         n_steps = row['n_steps']
-        effort_score = self.steps_prep.compute_effort_score(n_steps, steps)
         techniques = self.steps_prep.extract_techniques(steps)
 
-        # Description
-        keywords = self.description_prep.extract_keywords(
-            row.get('description', ''))
-
-        return RecipeFeatures(
+        features = RecipeFeatures(
             recipe_id=row['id'],
             ingredients=ingredients_set,
             ingredient_categories=ingredient_categories,
             normalized_ingredients_list=ingredients_list,
             nutrition_dict=nutrition_dict,
+            health_score=np.nan,
             tags=tags,
             meal_type=meal_type,
             dietary_restrictions=dietary,
             cuisine_type=cuisine,
             n_steps=n_steps,
-            effort_score=effort_score,
+            effort_score=np.nan,
             cooking_techniques=techniques,
-            description_keywords=keywords
+            description_keywords=[]
         )
+        return features, steps
+
+    def preprocess_recipe(self, row: pd.Series) -> RecipeFeatures:
+        """
+        Prétraite une recette isolée. Les scores sont calculés ligne par
+        ligne (implémentation de référence des versions vectorisées).
+        """
+        features, steps = self._extract_features(row)
+        features.health_score = self.nutrition_prep.compute_health_score(
+            features.nutrition_dict)
+        features.effort_score = self.steps_prep.compute_effort_score(
+            features.n_steps, steps)
+        features.description_keywords = self.description_prep.extract_keywords(
+            row.get('description', ''))
+        return features
+
+    def preprocess_dataframe(self, df: pd.DataFrame,
+                             extract_keywords: bool = True) -> pd.DataFrame:
+        """
+        Prétraite un lot de recettes.
 
-    def preprocess_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
+        Args:
+            extract_keywords: si False, les mots-clés sont laissés vides pour
+                être extraits au niveau du corpus (cf. pipeline)
+        """
         logger.info(f"Début du prétraitement de {len(df)} recettes")
         features_list = []
+        steps_list = []
+        descriptions = []
         for idx, row in df.iterrows():
             try:
-                features = self.preprocess_recipe(row)
+                features, steps = self._extract_features(row)
                 features_list.append(features)
+                steps_list.append(steps)
+                descriptions.append(row.get('description', ''))
 
                 if (idx + 1) % 1000 == 0:
                     logger.info(f"Prétraitement: {idx + 1}/{len(df)} recettes")
@@ -474,10 +644,55 @@ class RecipePreprocessor:
         # Conversion en DataFrame
         processed_df = pd.DataFrame([vars(f) for f in features_list])
 
+        # Scores vectorisés sur tout le lot (float32 pour l'artefact)
+        if not processed_df.empty:
+            processed_df['health_score'] = self.nutrition_prep.compute_health_scores(
+                processed_df['nutrition_dict'])
+            avg_lengths, complexity_counts = self.steps_prep.compute_step_stats(
+                steps_list)
+            processed_df['effort_score'] = self.steps_prep.compute_effort_scores(
+                processed_df['n_steps'].to_numpy(), avg_lengths, complexity_counts)
+            if extract_keywords:
+                keywords, _, _ = self.description_prep.extract_keywords_batch(
+                    descriptions)
+                processed_df['description_keywords'] = keywords
+
         logger.info(f"Prétraitement terminé: {len(processed_df)} recettes traitées")
 
         return processed_df
 
+    @classmethod
+    def merge_display_columns(cls, processed_df: pd.DataFrame,
+                              raw_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Ajoute aux features les colonnes d'affichage des recettes brutes et
+        les colonnes attendues par le système de recommandation (id,
+        normalized_ingredients)
+        """
+        merged = processed_df.merge(
+            raw_df[cls.DISPLAY_COLUMNS].rename(columns={'id': 'recipe_id'}),
+            on='recipe_id',
+            how='left'
+        )
+        merged['id'] = merged['recipe_id']
+        if 'normalized_ingredients_list' in merged.columns:
+            merged['normalized_ingredients'] = merged['normalized_ingredients_list']
+        return merged
+
+    def prepare_recipes(self, raw_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Recettes brutes (format RAW_recipes.csv) prêtes à servir, comme en
+        sortie du pipeline: features, colonnes d'affichage et mots-clés des
+        descriptions (extraits sur le lot)
+        """
+        processed = self.preprocess_dataframe(raw_df, extract_keywords=False)
+        if processed.empty:
+            return processed
+        prepared = self.merge_display_columns(processed, raw_df)
+        keywords, _, _ = DescriptionPreprocessor.extract_keywords_batch(prepared['description'])
+        prepared['description_keywords'] = keywords
+        return prepared
+
 
 # Exemple d'utilisation
 if __name__ == "__main__":
@@ -0,0 +1,106 @@
+"""
+Profil du dataset écrit dans preprocessing_metadata.json
+
+Statistiques calculées une seule fois par le pipeline (comptes, couverture,
+distributions) et lues telles quelles par la sidebar de l'application
+Streamlit, sans parcourir les recettes à chaque affichage.
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+PROFILE_VERSION = 1
+
+# Bornes [début, fin) des histogrammes (alignées sur les filtres de l'app)
+INGREDIENT_COUNT_BINS = [0, 1, 5, 10, 15, 20, np.inf]
+MINUTES_BINS = [0, 15, 30, 45, 60, 90, 120, 180, np.inf]
+
+
+def _bin_label(start: float, end: float) -> str:
+    if np.isinf(end):
+        return f"{int(start)}+"
+    if end - start == 1:
+        return f"{int(start)}"
+    return f"{int(start)}-{int(end) - 1}"
+
+
+def histogram(values: pd.Series, bins: List[float]) -> Dict[str, int]:
+    """Effectifs par intervalle [début, fin) (valeurs manquantes ignorées)"""
+    values = pd.to_numeric(values, errors='coerce').dropna()
+    counts, _ = np.histogram(values, bins=bins)
+    return {_bin_label(start, end): int(count)
+            for start, end, count in zip(bins[:-1], bins[1:], counts)}
+
+
+def _describe(values: pd.Series) -> Dict[str, Optional[float]]:
+    values = pd.to_numeric(values, errors='coerce').dropna()
+    if values.empty:
+        return {"mean": None, "median": None, "p90": None, "max": None}
+    return {
+        "mean": round(float(values.mean()), 2),
+        "median": float(values.median()),
+        "p90": float(values.quantile(0.9)),
+        "max": float(values.max()),
+    }
+
+
+def build_dataset_profile(recipes_df: pd.DataFrame, interactions_df: pd.DataFrame,
+                          built_at: Optional[str] = None) -> Dict:
+    """
+    Profil JSON-sérialisable du dataset preprocessé: comptes, couverture des
+    ingrédients et des notes, distributions (ingrédients par recette, temps
+    de préparation, notes) et date de construction des artefacts.
+    """
+    n_recipes = int(len(recipes_df))
+    n_interactions = int(len(interactions_df))
+
+    # Nombre d'ingrédients normalisés par recette (0 si liste absente)
+    if 'normalized_ingredients' in recipes_df.columns:
+        ingredients = recipes_df['normalized_ingredients']
+        counts = ingredients.map(lambda x: len(x) if isinstance(x, list) else 0)
+        unique_ingredients = int(ingredients[counts > 0].explode().nunique())
+    else:
+        counts = pd.Series(0, index=recipes_df.index)
+        unique_ingredients = 0
+    with_ingredients = int((counts > 0).sum())
+
+    # Recettes notées au moins une fois
+    rated_recipes = 0
+    ratings = pd.Series(dtype=float)
+    if 'recipe_id' in interactions_df.columns and 'id' in recipes_df.columns:
+        rated_recipes = int(recipes_df['id'].isin(interactions_df['recipe_id']).sum())
+    if 'rating' in interactions_df.columns:
+        ratings = pd.to_numeric(interactions_df['rating'], errors='coerce').dropna()
+
+    minutes = recipes_df['minutes'] if 'minutes' in recipes_df.columns else pd.Series(dtype=float)
+
+    def coverage(count: int) -> float:
+        return round(count / n_recipes * 100, 2) if n_recipes else 0.0
+
+    return {
+        "profile_version": PROFILE_VERSION,
+        "built_at": built_at or datetime.now().isoformat(timespec='seconds'),
+        "recipes": n_recipes,
+        "interactions": n_interactions,
+        "recipes_with_ingredients": with_ingredients,
+        "ingredient_coverage": coverage(with_ingredients),
+        "unique_ingredients": unique_ingredients,
+        "rated_recipes": rated_recipes,
+        "rating_coverage": coverage(rated_recipes),
+        "ingredients_per_recipe": {
+            **_describe(counts[counts > 0]),
+            "histogram": histogram(counts, INGREDIENT_COUNT_BINS),
+        },
+        "minutes": {
+            **_describe(minutes),
+            "histogram": histogram(minutes, MINUTES_BINS),
+        },
+        "ratings": {
+            "mean": round(float(ratings.mean()), 3) if not ratings.empty else None,
+            "distribution": {str(int(rating)): int(count) for rating, count
+                             in ratings.round().value_counts().sort_index().items()},
+        },
+    }
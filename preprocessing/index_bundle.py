@@ -0,0 +1,330 @@
+"""
+Bundle binaire versionné de l'index des recettes (recipe_index.bundle)
+
+Écrit par le pipeline à côté de recipes_processed.pkl et ouvert par
+l'application avec numpy.memmap: aucune désérialisation, les pages sont lues
+à la demande et le cache de pages de l'OS est partagé entre les processus et
+les conteneurs d'un même hôte.
+
+Format (little-endian):
+    MAGIC (8 octets) | taille de l'en-tête (uint32) | CRC32 de l'en-tête (uint32)
+    en-tête JSON: versions, attributs et table des sections
+        (nom -> dtype, forme, offset, taille, CRC32)
+    sections: tableaux numpy contigus, alignés sur 64 octets
+
+Sections: incidence CSR recettes x ingrédients et vocabulaire, TF-IDF CSR
+des recettes (termes et idf), stats (rating, popularité), minutes et
+bitmaps des filtres de temps proposés par l'application.
+
+Scoring scatter-gather: partition_index_arrays découpe l'index par
+identifiant de recette (id % n_shards), un bundle par shard. Vocabulaire,
+idf et stats restent ceux du corpus complet (scores identiques); la section
+positions donne le rang de chaque recette dans le corpus (départage des
+égalités lors de la fusion).
+"""
+
+import os
+import json
+import zlib
+import struct
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_FILE = "recipe_index.bundle"
+SHARD_BUNDLE_FILE = "recipe_index.shard-{shard}-of-{n_shards}.bundle"
+
+MAGIC = b"MTMINDEX"
+# Disposition du fichier (en-tête, sections)
+FORMAT_VERSION = 1
+# Contenu des tableaux: à incrémenter à chaque changement de build_index_arrays
+INDEX_VERSION = 1
+
+ALIGNMENT = 64
+_PREAMBLE = struct.Struct("<8sII")
+
+# Limites de temps proposées par l'application (un bitmap précalculé chacune)
+TIME_FILTER_LIMITS = (15, 30, 45, 60, 90, 120, 180)
+
+
+class IndexBundleError(ValueError):
+    """Bundle illisible, corrompu ou incompatible avec le code courant"""
+
+
+def encode_strings(values: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Chaînes -> (octets UTF-8 concaténés, offsets de début et de fin)"""
+    encoded = [str(value).encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(value) for value in encoded])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def decode_strings(blob: np.ndarray, offsets: np.ndarray) -> List[str]:
+    data = blob.tobytes()
+    return [data[start:end].decode('utf-8')
+            for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+
+
+def _ingredient_set(ingredients) -> set:
+    if isinstance(ingredients, (list, set, tuple, np.ndarray)):
+        return {ing for ing in ingredients if ing}
+    return set()
+
+
+def build_index_arrays(recipes_df: pd.DataFrame, interactions_df: pd.DataFrame
+                       ) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """
+    Tableaux de l'index (préparation des textes et stats identiques à
+    RecipeScorer) et attributs (formes des matrices creuses).
+    """
+    from scipy.sparse import csr_matrix
+    import reco_score
+
+    _, TfidfVectorizer, _ = reco_score.import_sklearn()
+    scorer = reco_score.RecipeScorer()
+
+    ingredient_col = ('normalized_ingredients' if 'normalized_ingredients' in recipes_df.columns
+                      else 'ingredients')
+    ingredient_lists = recipes_df[ingredient_col].tolist()
+    n_recipes = len(ingredient_lists)
+
+    # Incidence binaire recettes x ingrédients (CSR)
+    vocabulary: Dict[str, int] = {}
+    indptr = [0]
+    indices: List[int] = []
+    for ingredients in ingredient_lists:
+        for ingredient in _ingredient_set(ingredients):
+            indices.append(vocabulary.setdefault(ingredient, len(vocabulary)))
+        indptr.append(len(indices))
+    incidence = csr_matrix(
+        (np.ones(len(indices), dtype=np.float32), indices, indptr),
+        shape=(n_recipes, len(vocabulary)))
+    vocabulary_blob, vocabulary_offsets = encode_strings(vocabulary)
+
+    arrays: Dict[str, np.ndarray] = {
+        "recipe_ids": recipes_df['id'].to_numpy(dtype=np.int64),
+        "incidence_data": incidence.data,
+        "incidence_indices": incidence.indices,
+        "incidence_indptr": incidence.indptr,
+        "sizes": np.diff(indptr).astype(np.float32),
+        "vocabulary_blob": vocabulary_blob,
+        "vocabulary_offsets": vocabulary_offsets,
+    }
+    attrs: Dict[str, Any] = {
+        "n_recipes": n_recipes,
+        "incidence_shape": list(incidence.shape),
+        "tfidf_shape": None,
+    }
+
+    # TF-IDF des recettes: mêmes paramètres que RecipeScorer.cosine_similarity_batch
+    vectorizer = TfidfVectorizer(lowercase=True, stop_words=None, max_features=1000,
+                                 ngram_range=(1, 1), dtype=np.float32)
+    texts = scorer._prepare_ingredients_for_tfidf(
+        [ing if ing is not None else "" for ing in ingredient_lists])
+    try:
+        tfidf = vectorizer.fit_transform(texts).tocsr()
+    except ValueError:
+        # Corpus sans aucun terme: cosine nulle partout
+        tfidf = None
+    if tfidf is not None:
+        terms_blob, terms_offsets = encode_strings(vectorizer.get_feature_names_out())
+        arrays.update({
+            "tfidf_data": tfidf.data,
+            "tfidf_indices": tfidf.indices,
+            "tfidf_indptr": tfidf.indptr,
+            "tfidf_terms_blob": terms_blob,
+            "tfidf_terms_offsets": terms_offsets,
+            "tfidf_idf": np.asarray(vectorizer.idf_, dtype=np.float32),
+        })
+        attrs["tfidf_shape"] = list(tfidf.shape)
+
+    # Rating moyen et popularité normalisés (0.5 / 0.0 sans interaction)
+    stats = scorer.compute_base_score(recipes_df, interactions_df).set_index('id')
+    arrays["mean_rating_norm"] = (recipes_df['id'].map(stats['mean_rating_norm'])
+                                  .fillna(0.5).to_numpy(dtype=np.float32))
+    arrays["popularity"] = (recipes_df['id'].map(stats['popularity'])
+                            .fillna(0.0).to_numpy(dtype=np.float32))
+
+    # Minutes et bitmaps des filtres de temps (minutes <= limite, NaN exclus)
+    if 'minutes' in recipes_df.columns:
+        minutes = pd.to_numeric(recipes_df['minutes'], errors='coerce').to_numpy(dtype=np.float64)
+        arrays["minutes"] = minutes
+        arrays["time_filter_limits"] = np.array(TIME_FILTER_LIMITS, dtype=np.int32)
+        arrays["time_filter_bitmaps"] = np.packbits(
+            minutes[None, :] <= np.array(TIME_FILTER_LIMITS)[:, None], axis=1)
+
+    return arrays, attrs
+
+
+def partition_index_arrays(arrays: Dict[str, np.ndarray], attrs: Dict[str, Any],
+                           n_shards: int) -> List[Tuple[Dict[str, np.ndarray], Dict[str, Any]]]:
+    """Tableaux et attributs de chaque shard (recettes d'identifiant id % n_shards == shard)"""
+    from scipy.sparse import csr_matrix
+
+    incidence = csr_matrix((arrays["incidence_data"], arrays["incidence_indices"],
+                            arrays["incidence_indptr"]), shape=attrs["incidence_shape"])
+    tfidf = (csr_matrix((arrays["tfidf_data"], arrays["tfidf_indices"], arrays["tfidf_indptr"]),
+                        shape=attrs["tfidf_shape"])
+             if attrs.get("tfidf_shape") is not None else None)
+
+    shards = []
+    for shard in range(n_shards):
+        rows = np.flatnonzero(arrays["recipe_ids"] % n_shards == shard)
+        # Vocabulaire, termes, idf et limites de temps: partagés par tous les shards
+        shard_arrays = dict(arrays)
+        shard_incidence = incidence[rows]
+        shard_arrays.update({
+            "recipe_ids": arrays["recipe_ids"][rows],
+            "positions": rows.astype(np.int64),
+            "incidence_data": shard_incidence.data,
+            "incidence_indices": shard_incidence.indices,
+            "incidence_indptr": shard_incidence.indptr,
+            "sizes": arrays["sizes"][rows],
+            "mean_rating_norm": arrays["mean_rating_norm"][rows],
+            "popularity": arrays["popularity"][rows],
+        })
+        shard_attrs = {**attrs, "n_recipes": len(rows),
+                       "incidence_shape": list(shard_incidence.shape),
+                       "shard": shard, "n_shards": n_shards,
+                       "corpus_recipes": attrs["n_recipes"]}
+
+        if tfidf is not None:
+            shard_tfidf = tfidf[rows]
+            shard_arrays.update({
+                "tfidf_data": shard_tfidf.data,
+                "tfidf_indices": shard_tfidf.indices,
+                "tfidf_indptr": shard_tfidf.indptr,
+            })
+            shard_attrs["tfidf_shape"] = list(shard_tfidf.shape)
+
+        if "minutes" in arrays:
+            minutes = arrays["minutes"][rows]
+            shard_arrays["minutes"] = minutes
+            shard_arrays["time_filter_bitmaps"] = np.packbits(
+                minutes[None, :] <= arrays["time_filter_limits"][:, None], axis=1)
+
+        shards.append((shard_arrays, shard_attrs))
+    return shards
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def write_index_bundle(path: str, arrays: Dict[str, np.ndarray], attrs: Dict[str, Any],
+                       built_at: Optional[str] = None) -> Dict[str, Any]:
+    """Écrit le bundle de façon atomique et retourne son en-tête"""
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+
+    sections = []
+    offset = 0
+    for name, array in arrays.items():
+        sections.append({
+            "name": name,
+            "dtype": array.dtype.newbyteorder('<').str,
+            "shape": list(array.shape),
+            "offset": offset,
+            "nbytes": int(array.nbytes),
+            "crc32": zlib.crc32(array.astype(array.dtype.newbyteorder('<'), copy=False)),
+        })
+        offset = _aligned(offset + array.nbytes)
+
+    header = {
+        "format_version": FORMAT_VERSION,
+        "index_version": INDEX_VERSION,
+        "built_at": built_at or datetime.now().isoformat(timespec='seconds'),
+        "attrs": attrs,
+        "sections": sections,
+    }
+
+    # Offsets absolus dans l'en-tête: début des données repoussé jusqu'à ce qu'il tienne
+    data_start = 0
+    while True:
+        header_bytes = json.dumps({**header, "sections": [
+            {**section, "offset": section["offset"] + data_start} for section in sections
+        ]}).encode('utf-8')
+        if _PREAMBLE.size + len(header_bytes) <= data_start:
+            break
+        data_start = _aligned(_PREAMBLE.size + len(header_bytes))
+    header = json.loads(header_bytes)
+    # Remplissage (blancs JSON) jusqu'au début des données
+    header_bytes += b" " * (data_start - _PREAMBLE.size - len(header_bytes))
+
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        f.write(_PREAMBLE.pack(MAGIC, len(header_bytes), zlib.crc32(header_bytes)))
+        f.write(header_bytes)
+        for section, array in zip(header["sections"], arrays.values()):
+            f.seek(section["offset"])
+            f.write(array.astype(array.dtype.newbyteorder('<'), copy=False).tobytes())
+    os.replace(tmp_path, path)
+
+    size = os.path.getsize(path)
+    logger.info(f"Bundle d'index écrit: {len(sections)} sections, {size / 1e6:.1f} Mo -> {path}")
+    return header
+
+
+class IndexBundle:
+    """Bundle ouvert: tableaux en lecture seule adossés au fichier (memmap)"""
+
+    def __init__(self, path: str, header: Dict[str, Any], arrays: Dict[str, np.ndarray]):
+        self.path = path
+        self.header = header
+        self.arrays = arrays
+
+    @property
+    def attrs(self) -> Dict[str, Any]:
+        return self.header["attrs"]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.arrays
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.arrays[name]
+
+
+def read_index_bundle(path: str, verify: bool = True) -> IndexBundle:
+    """
+    Ouvre le bundle avec numpy.memmap (aucune copie des sections).
+
+    verify: contrôle le CRC32 de chaque section (lit tout le fichier une fois).
+
+    Raises:
+        IndexBundleError: fichier tronqué, corrompu ou versions incompatibles
+    """
+    if os.path.getsize(path) < _PREAMBLE.size:
+        raise IndexBundleError(f"Bundle tronqué: {path}")
+    raw = np.memmap(path, dtype=np.uint8, mode='r')
+
+    magic, header_size, header_crc = _PREAMBLE.unpack(raw[:_PREAMBLE.size].tobytes())
+    if magic != MAGIC:
+        raise IndexBundleError(f"Pas un bundle d'index: {path}")
+    header_bytes = raw[_PREAMBLE.size:_PREAMBLE.size + header_size].tobytes()
+    if len(header_bytes) != header_size or zlib.crc32(header_bytes) != header_crc:
+        raise IndexBundleError(f"En-tête du bundle corrompu: {path}")
+    header = json.loads(header_bytes)
+
+    if header.get("format_version") != FORMAT_VERSION:
+        raise IndexBundleError(
+            f"Format de bundle {header.get('format_version')} incompatible (attendu {FORMAT_VERSION})")
+    if header.get("index_version") != INDEX_VERSION:
+        raise IndexBundleError(
+            f"Bundle construit pour l'index v{header.get('index_version')} "
+            f"(code: v{INDEX_VERSION}), à reconstruire")
+
+    arrays: Dict[str, np.ndarray] = {}
+    for section in header["sections"]:
+        start, nbytes = section["offset"], section["nbytes"]
+        if start + nbytes > len(raw):
+            raise IndexBundleError(f"Section {section['name']} hors du fichier: {path}")
+        data = raw[start:start + nbytes]
+        if verify and zlib.crc32(data) != section["crc32"]:
+            raise IndexBundleError(f"Somme de contrôle invalide pour la section {section['name']}")
+        arrays[section["name"]] = data.view(np.dtype(section["dtype"])).reshape(section["shape"])
+
+    return IndexBundle(path, header, arrays)
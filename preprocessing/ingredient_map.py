@@ -0,0 +1,96 @@
+"""
+Carte des ingrédients précompilée (ingrédient brut -> ingrédient normalisé)
+
+Le CSV ingr_map.csv (~11.6k lignes) est compilé une seule fois en un
+dictionnaire sérialisé (pickle), partagé par le pipeline de preprocessing et
+par le normaliseur de requêtes de l'application Streamlit.
+"""
+
+import os
+import pickle
+import logging
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+MAP_FORMAT_VERSION = 1
+
+# Cache par processus: (chemin absolu, mtime) -> dictionnaire
+_LOADED_MAPS: Dict[tuple, Dict[str, str]] = {}
+
+
+def compiled_map_path(csv_path: str) -> str:
+    """Chemin du pickle compilé associé à un CSV (ingr_map.csv -> ingr_map.pkl)"""
+    return os.path.splitext(csv_path)[0] + ".pkl"
+
+
+def compile_ingredient_map(csv_path: str, output_path: str = None) -> Dict[str, str]:
+    """
+    Compile le CSV en dictionnaire avec des opérations vectorisées et,
+    si output_path est fourni, l'écrit de façon atomique en pickle.
+    """
+    import pandas as pd
+
+    ingr_map = pd.read_csv(csv_path)
+    ingr_map = ingr_map.dropna(subset=['raw_ingr'])
+    raw = ingr_map['raw_ingr'].astype(str).str.lower().str.strip()
+
+    if 'replaced' in ingr_map.columns:
+        normalized = ingr_map['replaced']
+    elif 'normalized' in ingr_map.columns:
+        normalized = ingr_map['normalized']
+    else:
+        normalized = raw
+    normalized = normalized.fillna(raw).astype(str).str.lower().str.strip()
+
+    mapping = dict(zip(raw, normalized))
+
+    if output_path:
+        tmp_path = f"{output_path}.tmp.{os.getpid()}"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'version': MAP_FORMAT_VERSION, 'mapping': mapping},
+                        f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, output_path)
+        logger.info(f"Carte des ingrédients compilée: {len(mapping):,} entrées -> {output_path}")
+
+    return mapping
+
+
+def _read_compiled(path: str) -> Dict[str, str]:
+    with open(path, 'rb') as f:
+        payload = pickle.load(f)
+    if payload.get('version') != MAP_FORMAT_VERSION:
+        raise ValueError(f"Version de carte incompatible: {payload.get('version')}")
+    return payload['mapping']
+
+
+def load_ingredient_map(path: str) -> Dict[str, str]:
+    """
+    Charge la carte des ingrédients (mémorisée par processus).
+
+    Accepte soit le pickle compilé, soit le CSV source: dans ce cas le pickle
+    voisin est utilisé s'il est à jour, sinon il est (re)compilé.
+    """
+    key = (os.path.abspath(path), os.stat(path).st_mtime_ns)
+    if key in _LOADED_MAPS:
+        return _LOADED_MAPS[key]
+
+    if path.endswith('.csv'):
+        compiled = compiled_map_path(path)
+        mapping = None
+        if os.path.exists(compiled) and os.path.getmtime(compiled) >= os.path.getmtime(path):
+            try:
+                mapping = _read_compiled(compiled)
+            except Exception as e:
+                logger.warning(f"Carte compilée illisible ({e}), recompilation")
+        if mapping is None:
+            try:
+                mapping = compile_ingredient_map(path, compiled)
+            except OSError:
+                # Répertoire en lecture seule: compilation en mémoire seulement
+                mapping = compile_ingredient_map(path)
+    else:
+        mapping = _read_compiled(path)
+
+    _LOADED_MAPS[key] = mapping
+    return mapping
@@ -7,14 +7,23 @@ Injection directe dans Streamlit
 
 import os
 import sys
+import json
+import shutil
 from datetime import datetime
 import logging
-from multiprocessing import Pool, cpu_count
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import cpu_count
 import pandas as pd
 import yaml
 
-from data_prepro import RecipePreprocessor
+from data_prepro import RecipePreprocessor, DescriptionPreprocessor
 from data_load import fetch_data, load_data
+from dataset_profile import build_dataset_profile
+from artifact_manifest import build_manifest, verify_manifest
+from ingredient_map import compile_ingredient_map, compiled_map_path
+from index_bundle import (BUNDLE_FILE, SHARD_BUNDLE_FILE, build_index_arrays,
+                          partition_index_arrays, write_index_bundle)
 # Configuration logging
 logging.basicConfig(
     level=logging.INFO,
@@ -35,7 +44,9 @@ def process_chunk(chunk_data):
 
     try:
         preprocessor = RecipePreprocessor()
-        processed = preprocessor.preprocess_dataframe(chunk)
+        # Les mots-clés sont extraits ensuite sur le corpus complet
+        processed = preprocessor.preprocess_dataframe(
+            chunk, extract_keywords=False)
 
         logger.info(f" Chunk {chunk_id}: {len(processed)} recettes traitées")
         return processed
@@ -45,6 +56,135 @@ def process_chunk(chunk_data):
         return pd.DataFrame()
 
 
+class SerialExecutor:
+    """Exécution séquentielle dans le processus courant (débogage)"""
+    name = "serial"
+
+    def __init__(self, n_workers=1):
+        self.n_workers = 1
+
+    def map(self, fn, items):
+        return [fn(item) for item in items]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class ThreadExecutor(SerialExecutor):
+    """Pool de threads: utile quand le travail libère le GIL (NumPy, I/O)"""
+    name = "threads"
+
+    def __init__(self, n_workers):
+        self.n_workers = n_workers
+        self._pool = None
+
+    def map(self, fn, items):
+        return list(self._pool.map(fn, items))
+
+    def __enter__(self):
+        self._pool = ThreadPoolExecutor(max_workers=self.n_workers)
+        return self
+
+    def __exit__(self, *exc):
+        self._pool.shutdown(wait=True)
+        return False
+
+
+class ProcessExecutor(SerialExecutor):
+    """Pool de processus (fork ou spawn): étapes lourdes en regex / Python pur"""
+    name = "processes"
+
+    def __init__(self, n_workers, start_method="fork"):
+        self.n_workers = n_workers
+        self.start_method = start_method
+        self._pool = None
+
+    def map(self, fn, items):
+        return self._pool.map(fn, items)
+
+    def __enter__(self):
+        context = multiprocessing.get_context(self.start_method)
+        self._pool = context.Pool(self.n_workers)
+        return self
+
+    def __exit__(self, *exc):
+        self._pool.close()
+        self._pool.join()
+        return False
+
+
+EXECUTORS = {
+    SerialExecutor.name: SerialExecutor,
+    ThreadExecutor.name: ThreadExecutor,
+    ProcessExecutor.name: ProcessExecutor,
+}
+
+
+def write_atomic(path, write):
+    """
+    Écrit via write(chemin temporaire) puis remplace path d'un bloc: les
+    lecteurs (application en cours d'exécution) ne voient jamais un fichier
+    à moitié écrit
+    """
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def create_executor(preprocessing_config):
+    """
+    Construit l'exécuteur à partir de la section 'preprocessing' de config.yaml
+    (enable_parallel, max_cores, executor, start_method)
+    """
+    if not preprocessing_config.get('enable_parallel', True):
+        return SerialExecutor()
+
+    backend = preprocessing_config.get('executor', ProcessExecutor.name)
+    if backend not in EXECUTORS:
+        raise ValueError(f"Exécuteur inconnu: {backend} (attendu: {list(EXECUTORS)})")
+
+    max_cores = preprocessing_config.get('max_cores', 8)
+    n_workers = max(1, min(cpu_count() - 1, max_cores))  # Tous les cores - 1
+
+    if backend == ProcessExecutor.name:
+        return ProcessExecutor(
+            n_workers, preprocessing_config.get('start_method', 'fork'))
+    return EXECUTORS[backend](n_workers)
+
+
+def make_chunks(recipes_df, chunk_size):
+    """Découpe le DataFrame en chunks numérotés (chunk, chunk_id)"""
+    chunks = []
+    for i in range(0, len(recipes_df), chunk_size):
+        end_idx = min(i + chunk_size, len(recipes_df))
+        chunk = recipes_df.iloc[i:end_idx].copy()
+        chunks.append((chunk, i // chunk_size + 1))
+    return chunks
+
+
+def preprocess_chunks(recipes_df, executor, chunk_size=None):
+    """
+    Prétraite toutes les recettes par chunks avec l'exécuteur donné.
+    L'ordre des chunks est conservé: tous les backends produisent le même
+    résultat.
+    """
+    if chunk_size is None:
+        # Chunks optimaux
+        chunk_size = max(2000, len(recipes_df) // (executor.n_workers * 3))
+    chunks = make_chunks(recipes_df, chunk_size)
+
+    logger.info(f" {len(chunks)} chunks créés pour {len(recipes_df):,} recettes")
+
+    with executor:
+        processed_chunks = executor.map(process_chunk, chunks)
+
+    # Filtrer les chunks vides
+    return [chunk for chunk in processed_chunks if not chunk.empty]
+
+
 def run_complete_preprocessing():
     """
     Pipeline complet pour tout le dataset
@@ -60,16 +200,32 @@ def run_complete_preprocessing():
     with open('config.yaml', 'r') as f:
         config = yaml.safe_load(f)
 
-    # Télécharger et charger
+    # Télécharger (via le cache local vérifié) et charger
     dataset_id = config['datasets']['recipes']['dataset_id']
-    dataset_path = fetch_data(dataset_id)
+    cache_config = config.get('cache', {})
+    offline = (cache_config.get('offline', False)
+               or os.getenv('MANGETAMAIN_OFFLINE', '').lower() in ('1', 'true'))
 
     files_to_load = [
         config['datasets']['recipes']['file_name'],
         config['datasets']['interactions']['file_name']
     ]
 
-    dfs = load_data(dataset_path, files_to_load)
+    # Cache hors du répertoire du code (MANGETAMAIN_CACHE_DIR dans Dockerfile.data)
+    cache_dir = os.getenv('MANGETAMAIN_CACHE_DIR') or cache_config.get('dir')
+
+    dataset_path = fetch_data(
+        dataset_id,
+        version=config['datasets']['recipes'].get('version'),
+        cache_dir=cache_dir,
+        offline=offline,
+        source_dir=os.getenv('MANGETAMAIN_DATASET_DIR'),
+        files=files_to_load
+    )
+
+    # Sans cache, la copie binaire serait écrite dans le répertoire source
+    dfs = load_data(dataset_path, files_to_load,
+                    columnar_cache=bool(cache_dir) and cache_config.get('columnar_format', True))
     recipes_df = dfs['RAW_recipes.csv'].copy()
     interactions_df = dfs['RAW_interactions.csv'].copy()
 
@@ -89,32 +245,28 @@ def run_complete_preprocessing():
 
     logger.info(f" Filtrage: {initial_count:,} → {len(recipes_df):,} recettes")
 
+    # Carte des ingrédients compilée une seule fois: les workers chargent
+    # ensuite le pickle au lieu de reparser le CSV à chaque chunk
+    ingr_map_csv = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        config['preprocessing']['ingredient_mapping']['file_path'])
+    ingr_map_pkl = compiled_map_path(ingr_map_csv)
+    ingredient_map = compile_ingredient_map(ingr_map_csv, ingr_map_pkl)
+    logger.info(f" Carte des ingrédients compilée: {len(ingredient_map):,} entrées")
+
     # === ÉTAPE 3: PREPROCESSING PARALLÈLE ===
     logger.info("⚡ 3. Preprocessing parallèle du dataset complet...")
 
-    # Configuration parallèle
-    n_cores = min(cpu_count() - 1, 8)  # Utiliser tous les cores - 1
-    chunk_size = max(2000, len(recipes_df) // (n_cores * 3))  # Chunks optimaux
-
-    logger.info(f" Configuration: {n_cores} cores, chunks de {chunk_size}")
-
-    # Créer les chunks
-    chunks = []
-    for i in range(0, len(recipes_df), chunk_size):
-        end_idx = min(i + chunk_size, len(recipes_df))
-        chunk = recipes_df.iloc[i:end_idx].copy()
-        chunks.append((chunk, i // chunk_size + 1))
+    # Configuration parallèle (serial, threads ou processes)
+    executor = create_executor(config['preprocessing'])
 
-    logger.info(f" {len(chunks)} chunks créés pour {len(recipes_df):,} recettes")
+    logger.info(f" Configuration: exécuteur {executor.name}, "
+                f"{executor.n_workers} workers")
 
     # Traitement parallèle
     logger.info(" Démarrage du traitement parallèle...")
 
-    with Pool(n_cores) as pool:
-        processed_chunks = pool.map(process_chunk, chunks)
-
-    # Filtrer les chunks vides
-    processed_chunks = [chunk for chunk in processed_chunks if not chunk.empty]
+    processed_chunks = preprocess_chunks(recipes_df, executor)
 
     logger.info(f" {len(processed_chunks)} chunks traités avec succès")
 
@@ -127,26 +279,20 @@ def run_complete_preprocessing():
         ignore_index=True,
         sort=False)
 
-    # Merger avec les données originales nécessaires pour Streamlit
-    merge_columns = [
-        'id',
-        'name',
-        'minutes',
-        'n_steps',
-        'description',
-        'n_ingredients']
-    processed_recipes = processed_recipes.merge(
-        recipes_df[merge_columns].rename(columns={'id': 'recipe_id'}),
-        on='recipe_id',
-        how='left'
-    )
-
-    # Colonnes pour compatibilité avec le système de recommandation
-    processed_recipes['id'] = processed_recipes['recipe_id']
-
-    # S'assurer que la colonne normalized_ingredients existe
-    if 'normalized_ingredients_list' in processed_recipes.columns:
-        processed_recipes['normalized_ingredients'] = processed_recipes['normalized_ingredients_list']
+    # Merger avec les données originales nécessaires pour Streamlit, puis
+    # colonnes pour compatibilité avec le système de recommandation (id,
+    # normalized_ingredients): même assemblage que les insertions en ligne
+    processed_recipes = RecipePreprocessor.merge_display_columns(
+        processed_recipes, recipes_df)
+
+    # Mots-clés des descriptions: une seule passe sur tout le corpus
+    logger.info(" Extraction des mots-clés (vocabulaire partagé)...")
+    keywords, description_matrix, description_vocabulary = \
+        DescriptionPreprocessor.extract_keywords_batch(
+            processed_recipes['description'])
+    processed_recipes['description_keywords'] = keywords
+    logger.info(f" Matrice des descriptions: {description_matrix.shape[0]:,} x "
+                f"{description_matrix.shape[1]:,} termes")
 
     logger.info(f" Dataset final: {len(processed_recipes):,} recettes preprocessées")
     logger.info(f" Colonnes: {list(processed_recipes.columns)}")
@@ -160,10 +306,40 @@ def run_complete_preprocessing():
 
     # Sauvegarde principale (Pickle pour rapidité)
     recipes_path = os.path.join(output_dir, "recipes_processed.pkl")
-    processed_recipes.to_pickle(recipes_path)
+    write_atomic(recipes_path, processed_recipes.to_pickle)
 
     interactions_path = os.path.join(output_dir, "interactions.pkl")
-    interactions_df.to_pickle(interactions_path)
+    write_atomic(interactions_path, interactions_df.to_pickle)
+
+    # Index de scoring en bundle binaire (ouvert par l'app avec numpy.memmap)
+    index_arrays, index_attrs = build_index_arrays(processed_recipes, interactions_df)
+    bundle_header = write_index_bundle(os.path.join(output_dir, BUNDLE_FILE),
+                                       index_arrays, index_attrs)
+
+    # Bundles partitionnés par identifiant (serveurs de shards scatter-gather)
+    index_shards = int(config['preprocessing'].get('index_shards', 0))
+    if index_shards > 1:
+        for shard, (shard_arrays, shard_attrs) in enumerate(
+                partition_index_arrays(index_arrays, index_attrs, index_shards)):
+            write_index_bundle(
+                os.path.join(output_dir, SHARD_BUNDLE_FILE.format(
+                    shard=shard, n_shards=index_shards)),
+                shard_arrays, shard_attrs, built_at=bundle_header['built_at'])
+
+    # Carte des ingrédients compilée (normaliseur de requêtes de l'app)
+    shutil.copyfile(ingr_map_pkl, os.path.join(output_dir, "ingr_map.pkl"))
+
+    # Matrice creuse des descriptions (réutilisable pour la recherche texte)
+    DescriptionPreprocessor.save_artifacts(
+        description_matrix, description_vocabulary, output_dir)
+
+    # Fichiers servis, décrits par le manifeste (les CSV de debug n'y sont pas)
+    artifact_files = [
+        "recipes_processed.pkl", "interactions.pkl", BUNDLE_FILE, "ingr_map.pkl",
+        DescriptionPreprocessor.MATRIX_FILE, DescriptionPreprocessor.VOCABULARY_FILE]
+    if index_shards > 1:
+        artifact_files += [SHARD_BUNDLE_FILE.format(shard=shard, n_shards=index_shards)
+                           for shard in range(index_shards)]
 
     # Sauvegarde CSV pour debug
     processed_recipes.to_csv(
@@ -182,10 +358,9 @@ def run_complete_preprocessing():
     # === ÉTAPE 6: MÉTADONNÉES ET VALIDATION ===
     logger.info(" 6. Génération des métadonnées...")
 
-    # Validation rapide
-    has_ingredients = processed_recipes['normalized_ingredients'].apply(
-        lambda x: isinstance(x, list) and len(x) > 0
-    ).sum()
+    # Profil du dataset (lu tel quel par la sidebar de l'application)
+    dataset_profile = build_dataset_profile(processed_recipes, interactions_df)
+    has_ingredients = dataset_profile['recipes_with_ingredients']
 
     duration = datetime.now() - start_time
     # 6. Génération des métadonnées
@@ -196,26 +371,43 @@ def run_complete_preprocessing():
         'total_recipes_processed': int(
             len(processed_recipes)),
         'recipes_with_ingredients': int(has_ingredients),
+        'description_vocabulary_size': int(len(description_vocabulary)),
         'total_interactions': int(
             len(interactions_df)),
         'processing_time_minutes': float(
             round(
                 duration.total_seconds() / 60,
                 2)),
-        'cores_used': int(n_cores),
+        'cores_used': int(executor.n_workers),
+        'executor': executor.name,
         'chunks_processed': int(
             len(processed_chunks)),
         'success_rate': float(
             round(
                 (len(processed_recipes) / len(recipes_df)) * 100,
                 2)),
-        'ready_for_streamlit': True}
-
-    # Sauvegarder les métadonnées (format JSON plus fiable)
+        'ready_for_streamlit': True,
+        'index_bundle': {
+            'file': BUNDLE_FILE,
+            'format_version': bundle_header['format_version'],
+            'index_version': bundle_header['index_version'],
+            'shards': index_shards if index_shards > 1 else 0},
+        'dataset_profile': dataset_profile,
+        'manifest': build_manifest(
+            output_dir, artifact_files,
+            {'recipes': ("recipes_processed.pkl", processed_recipes),
+             'interactions': ("interactions.pkl", interactions_df)},
+            source={'dataset_id': dataset_id,
+                    'version': config['datasets']['recipes'].get('version')})}
+
+    # Sauvegarder les métadonnées (format JSON plus fiable), en dernier: le
+    # manifeste publie la nouvelle version (bascule à chaud dans l'application)
     metadata_path = os.path.join(output_dir, "preprocessing_metadata.json")
-    import json
-    with open(metadata_path, 'w') as f:
-        json.dump(metadata, f, indent=2)
+
+    def write_metadata(path):
+        with open(path, 'w') as f:
+            json.dump(metadata, f, indent=2)
+    write_atomic(metadata_path, write_metadata)
 
     # === RÉSUMÉ FINAL ===
     logger.info("🎉 PREPROCESSING COMPLET TERMINÉ !")
@@ -231,46 +423,61 @@ def run_complete_preprocessing():
     return metadata
 
 
-def verify_streamlit_data():
-    """Vérification que les données sont prêtes pour Streamlit"""
+REQUIRED_COLUMNS = ['id', 'recipe_id', 'name', 'normalized_ingredients']
+
+
+def verify_streamlit_data(output_dir="/shared_data", deep=None):
+    """
+    Vérification que les données sont prêtes pour Streamlit
+
+    Avec manifeste (preprocessing_metadata.json), validation en quelques
+    millisecondes: fichiers et tailles, colonnes et lignes déclarées. deep
+    (ou MANGETAMAIN_DEEP_VERIFY=1) recalcule aussi les empreintes SHA-256.
+    Sans manifeste, les pickles sont relus intégralement.
+    """
 
     logger.info("🔍 Vérification des données pour Streamlit...")
 
+    if deep is None:
+        deep = os.getenv('MANGETAMAIN_DEEP_VERIFY', '').lower() in ('1', 'true')
+
     try:
-        # Charger les données
-        recipes_path = "/shared_data/recipes_processed.pkl"
-        interactions_path = "/shared_data/interactions.pkl"
+        recipes_path = os.path.join(output_dir, "recipes_processed.pkl")
+        interactions_path = os.path.join(output_dir, "interactions.pkl")
 
         if not os.path.exists(recipes_path) or not os.path.exists(
                 interactions_path):
             logger.error("❌ Fichiers de données manquants")
             return False
 
-        recipes = pd.read_pickle(recipes_path)
-        interactions = pd.read_pickle(interactions_path)
-
-        # Vérifications essentielles
-        required_columns = [
-            'id',
-            'recipe_id',
-            'name',
-            'normalized_ingredients']
-        missing = [
-            col for col in required_columns if col not in recipes.columns]
+        metadata = {}
+        metadata_path = os.path.join(output_dir, "preprocessing_metadata.json")
+        if os.path.exists(metadata_path):
+            with open(metadata_path) as f:
+                metadata = json.load(f)
+        manifest = metadata.get('manifest')
+        if manifest is None:
+            return _verify_streamlit_data_full(recipes_path, interactions_path)
+
+        problems = verify_manifest(output_dir, manifest, deep=deep)
+        if problems:
+            for problem in problems:
+                logger.error(f"❌ {problem}")
+            return False
 
+        recipes = manifest['tables']['recipes']
+        missing = [col for col in REQUIRED_COLUMNS if col not in recipes['columns']]
         if missing:
             logger.error(f"❌ Colonnes manquantes: {missing}")
             return False
 
-        # Vérifier les ingrédients
-        has_ingredients = recipes['normalized_ingredients'].apply(
-            lambda x: isinstance(x, list) and len(x) > 0
-        ).sum()
+        has_ingredients = metadata.get('recipes_with_ingredients', 0)
 
-        logger.info("✅ Validation réussie:")
-        logger.info(f"   - Recettes: {len(recipes):,}")
+        logger.info(f"✅ Validation réussie (manifeste{', empreintes vérifiées' if deep else ''}):")
+        logger.info(f"   - Recettes: {recipes['rows']:,}")
         logger.info(f"   - Avec ingrédients: {has_ingredients:,}")
-        logger.info(f"   - Interactions: {len(interactions):,}")
+        logger.info(f"   - Interactions: {manifest['tables']['interactions']['rows']:,}")
+        logger.info(f"   - Données {manifest['data_version']}, code {manifest['code_version']}")
 
         return True
 
@@ -279,6 +486,32 @@ def verify_streamlit_data():
         return False
 
 
+def _verify_streamlit_data_full(recipes_path, interactions_path):
+    """Validation par relecture des pickles (artefacts sans manifeste)"""
+    recipes = pd.read_pickle(recipes_path)
+    interactions = pd.read_pickle(interactions_path)
+
+    # Vérifications essentielles
+    missing = [
+        col for col in REQUIRED_COLUMNS if col not in recipes.columns]
+
+    if missing:
+        logger.error(f"❌ Colonnes manquantes: {missing}")
+        return False
+
+    # Vérifier les ingrédients
+    has_ingredients = recipes['normalized_ingredients'].apply(
+        lambda x: isinstance(x, list) and len(x) > 0
+    ).sum()
+
+    logger.info("✅ Validation réussie:")
+    logger.info(f"   - Recettes: {len(recipes):,}")
+    logger.info(f"   - Avec ingrédients: {has_ingredients:,}")
+    logger.info(f"   - Interactions: {len(interactions):,}")
+
+    return True
+
+
 if __name__ == "__main__":
     """Exécution du pipeline complet"""
 
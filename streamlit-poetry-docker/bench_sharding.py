@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark du scoring par shards (threads) sur un dataset synthétique
+
+Latence d'une requête (similarités + top-k) de 1 à N threads, avec
+vérification que les résultats sont identiques au scoring sur un seul shard.
+
+Usage: python bench_sharding.py [n_recettes] [max_threads]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+if len(sys.argv) > 2:
+    # Taille du pool de threads lue à l'import de la configuration
+    os.environ['MANGETAMAIN_SCORING_THREADS'] = sys.argv[2]
+
+from src.engines.ranking import sharded_top_k  # noqa: E402
+from src.engines.recipe_index import RecipeIndex  # noqa: E402
+
+N_INGREDIENTS = 5000
+QUERIES = [(5, None), (3, 60), (8, None), (4, 30), (6, 120)]
+
+
+def make_synthetic_data(n_recipes, seed=42):
+    """Recettes (3 à 15 ingrédients parmi N_INGREDIENTS) et interactions synthétiques"""
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array([f"ingredient {i}" for i in range(N_INGREDIENTS)])
+    recipes = pd.DataFrame({
+        'id': np.arange(n_recipes),
+        'minutes': rng.integers(5, 200, n_recipes),
+        'normalized_ingredients': [list(vocabulary[rng.integers(0, N_INGREDIENTS, size)])
+                                   for size in rng.integers(3, 16, n_recipes)],
+    })
+    interactions = pd.DataFrame({'recipe_id': rng.integers(0, n_recipes, 2 * n_recipes),
+                                 'rating': rng.integers(1, 6, 2 * n_recipes)})
+    queries = [(list(vocabulary[rng.integers(0, N_INGREDIENTS, size)]), time_limit)
+               for size, time_limit in QUERIES]
+    return recipes, interactions, queries
+
+
+def score_query(index, query, n_shards, k=20):
+    positions, jaccard, cosine = index.score_arrays([query], n_shards=n_shards)[0]
+    top = sharded_top_k(0.7 * jaccard + 0.3 * cosine, k, n_shards=n_shards)
+    return top, jaccard, cosine
+
+
+def run_benchmark(n_recipes=200000, max_threads=None, repeats=5):
+    """Latence médiane par requête pour 1, 2, 4... threads (un shard par thread)"""
+    max_threads = max_threads or os.cpu_count() or 1
+    recipes, interactions, queries = make_synthetic_data(n_recipes)
+    index = RecipeIndex.build(recipes, interactions)
+
+    threads = sorted({1, *(2 ** i for i in range(1, max_threads.bit_length())), max_threads})
+    threads = [t for t in threads if t <= max_threads]
+    reference = [score_query(index, query, 1) for query in queries]
+
+    results = []
+    for n_shards in threads:
+        timings = []
+        identical = True
+        for _ in range(repeats):
+            for query, expected in zip(queries, reference):
+                start = time.perf_counter()
+                output = score_query(index, query, n_shards)
+                timings.append(time.perf_counter() - start)
+                identical &= all(np.array_equal(a, b) for a, b in zip(output, expected))
+        results.append((n_shards, float(np.median(timings)), identical))
+
+    baseline = results[0][1]
+    print(f"\n{n_recipes:,} recettes, {len(queries)} requêtes x {repeats}, {os.cpu_count()} cœurs")
+    print(f"{'Threads':>8}{'Latence (ms)':>15}{'Accélération':>15}{'Identique':>12}")
+    for n_shards, latency, identical in results:
+        print(f"{n_shards:>8}{latency * 1000:>15.1f}{baseline / latency:>15.2f}{str(identical):>12}")
+    return results
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    max_threads = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    run_benchmark(n, max_threads)
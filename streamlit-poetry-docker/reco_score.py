@@ -1,13 +1,18 @@
+import importlib.util
+
 import pandas as pd
 
-# Import conditionnel de sklearn avec fallback
-try:
+# Import conditionnel de sklearn avec fallback. L'import effectif (~1 s) est
+# différé au premier scoring: seule la présence du paquet est vérifiée ici.
+SKLEARN_AVAILABLE = importlib.util.find_spec("sklearn") is not None
+
+
+def import_sklearn():
+    """Importe à la demande (MinMaxScaler, TfidfVectorizer, cosine_similarity)"""
     from sklearn.preprocessing import MinMaxScaler
     from sklearn.feature_extraction.text import TfidfVectorizer
     from sklearn.metrics.pairwise import cosine_similarity
-    SKLEARN_AVAILABLE = True
-except ImportError:
-    SKLEARN_AVAILABLE = False
+    return MinMaxScaler, TfidfVectorizer, cosine_similarity
 
 
 class RecipeScorer:
@@ -28,6 +33,7 @@ class RecipeScorer:
 
         # Utiliser sklearn si disponible, sinon normalisation manuelle
         if SKLEARN_AVAILABLE:
+            MinMaxScaler, _, _ = import_sklearn()
             self.scaler = MinMaxScaler()
             self.tfidf_vectorizer = None  # Initialisé lors du premier usage
         else:
@@ -80,6 +86,8 @@ class RecipeScorer:
             recipes_texts = self._prepare_ingredients_for_tfidf(
                 recipes_ingredients_list)
 
+            _, TfidfVectorizer, cosine_similarity = import_sklearn()
+
             # Créer le corpus complet (utilisateur + toutes les recettes)
             corpus = [user_text] + recipes_texts
 
@@ -129,6 +137,8 @@ class RecipeScorer:
             else:
                 recipe_text = str(recipe_ingredients).lower().strip()
 
+            _, TfidfVectorizer, cosine_similarity = import_sklearn()
+
             # Créer corpus minimal
             corpus = [user_text, recipe_text]
 
@@ -190,15 +200,16 @@ class RecipeScorer:
 
         return stats
 
-    def recommend(
+    def score_components(
             self,
             recipes_df,
             interactions_df,
             user_ingredients,
-            time_limit=None,
-            top_n=10):
+            time_limit=None):
         """
-         CORRECTION: Recommande des recettes avec gestion d'erreurs robuste
+        Calcule les composantes du score (jaccard, cosine, mean_rating_norm,
+        popularity) pour toutes les recettes candidates, sans pondération ni
+        tri. L'index de recipes_df est conservé.
         """
         # Copier pour éviter les modifications
         df = recipes_df.copy()
@@ -221,17 +232,16 @@ class RecipeScorer:
 
         #  Calculer la similarité cosine avec TF-IDF
         print("🔬 Calcul cosine similarity TF-IDF...")
-        valid_ingredients = df[ingredient_col].dropna().tolist()
+        valid_mask = df[ingredient_col].notna()
+        valid_ingredients = df.loc[valid_mask, ingredient_col].tolist()
         if valid_ingredients and SKLEARN_AVAILABLE:
             try:
                 cosine_scores = self.cosine_similarity_batch(
                     user_ingredients, valid_ingredients)
-                df_temp = df[df[ingredient_col].notna()].copy()
-                df_temp["cosine"] = cosine_scores
 
-                # Merger les scores cosine dans df principal
-                df = df.merge(df_temp[['id', 'cosine']], on='id', how='left')
-                df["cosine"] = df["cosine"].fillna(0.0)
+                # Assigner les scores cosine par position (l'index est conservé)
+                df["cosine"] = 0.0
+                df.loc[valid_mask, "cosine"] = cosine_scores
                 print(f" Cosine similarity calculée pour {len(cosine_scores)} recettes")
             except Exception as e:
                 print(f" Erreur cosine similarity: {e}, utilisation Jaccard seulement")
@@ -244,25 +254,29 @@ class RecipeScorer:
         stats = self.compute_base_score(recipes_df, interactions_df)
         print(f" Stats calculées pour {len(stats)} recettes")
 
-        # 🔥 MERGER CORRIGÉ: maintenant les deux ont 'id'
-        df = df.merge(stats, on="id", how="left")
+        # Jointure sur 'id' en conservant l'index des recettes
+        df = df.join(stats.set_index('id')[['mean_rating_norm', 'popularity']], on='id')
         print(f" Après fusion: {len(df)} recettes")
 
         # Remplir les valeurs manquantes
         df["mean_rating_norm"] = df["mean_rating_norm"].fillna(0.5)
         df["popularity"] = df["popularity"].fillna(0.0)
 
-        #  Score final hybride: Jaccard + Cosine + Rating + Popularité
-        df["score"] = (
+        return df
+
+    def combine_scores(self, df):
+        """Score final hybride: Jaccard + Cosine + Rating + Popularité"""
+        return (
             self.alpha * df['jaccard'] +
             self.delta * df['cosine'] +  # Nouveau: cosine similarity
             self.beta * df['mean_rating_norm'] +
             self.gamma * df['popularity']
         )
 
-        print(f" Score hybride calculé: {self.alpha:.1f}*Jaccard + "
-              f"{self.delta:.1f}*Cosine + {self.beta:.1f}*Rating + "
-              f"{self.gamma:.1f}*Popularité")
+    @staticmethod
+    def result_columns(df):
+        """Colonnes retournées par recommend(), dans l'ordre d'affichage"""
+        ingredient_col = 'normalized_ingredients' if 'normalized_ingredients' in df.columns else 'ingredients'
 
         #  COLONNES CORRIGÉES: utiliser 'id' partout + ajouter cosine
         columns_to_return = [
@@ -278,9 +292,34 @@ class RecipeScorer:
         if 'minutes' in df.columns:
             columns_to_return.append('minutes')
 
+        # Scores précalculés par le pipeline (float32), sans coût supplémentaire
+        for score_col in ('health_score', 'effort_score'):
+            if score_col in df.columns:
+                columns_to_return.append(score_col)
+
         # Filtrer les colonnes existantes
-        existing_columns = [
-            col for col in columns_to_return if col in df.columns]
+        return [col for col in columns_to_return if col in df.columns]
+
+    def recommend(
+            self,
+            recipes_df,
+            interactions_df,
+            user_ingredients,
+            time_limit=None,
+            top_n=10):
+        """
+         CORRECTION: Recommande des recettes avec gestion d'erreurs robuste
+        """
+        df = self.score_components(
+            recipes_df, interactions_df, user_ingredients, time_limit)
+
+        df["score"] = self.combine_scores(df)
+
+        print(f" Score hybride calculé: {self.alpha:.1f}*Jaccard + "
+              f"{self.delta:.1f}*Cosine + {self.beta:.1f}*Rating + "
+              f"{self.gamma:.1f}*Popularité")
+
+        existing_columns = self.result_columns(df)
 
         result = df.sort_values("score", ascending=False).head(top_n)
         print(f" Retour de {len(result)} recommandations")
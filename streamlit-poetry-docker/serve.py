@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+MangeTaMain - Lanceur de production
+
+Exécute le warm-up (artefacts, scoring, requêtes types) dans le processus
+du serveur, puis démarre Streamlit: le port n'est ouvert qu'une fois les
+caches prêts. Les arguments sont transmis à `streamlit run app.py`.
+
+Usage: python serve.py --server.address=0.0.0.0 --server.port=8080
+"""
+
+import os
+import sys
+import logging
+
+from streamlit.web import cli as stcli
+
+from src.core.warmup import ensure_warm
+
+
+def main():
+    """Warm-up puis démarrage du serveur Streamlit"""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    if not ensure_warm():
+        sys.exit(1)
+
+    app_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+    sys.argv = ["streamlit", "run", app_path, *sys.argv[1:]]
+    sys.exit(stcli.main())
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ Packages disponibles:
 - managers: Gestion des ressources (données, etc.)
 - engines: Moteurs de traitement (recommandations, etc.)
 - ui: Composants interface utilisateur
+- service: Service HTTP de recommandation (sans Streamlit)
 - utils: Utilitaires et helpers
 
 Exemple d'utilisation:
@@ -22,5 +23,6 @@ __all__ = [
     "managers",
     "engines",
     "ui",
+    "service",
     "utils",
 ]
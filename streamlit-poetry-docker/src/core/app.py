@@ -3,13 +3,37 @@ Application principale MangeTaMain
 """
 
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 from typing import List
 
-from ..managers.data_manager import DataManager
+from ..managers.data_manager import DataManager, add_swap_listener
 from ..engines.recommendation_engine import RecommendationEngine
 from ..ui.components import UIComponents
 from ..utils.styles import StyleManager
 
+# Clé de session de la dernière requête (page servie par les caches du moteur)
+RESULTS_STATE_KEY = "ranked_results"
+
+# Intervalle (secondes) de vérification du chargement en arrière-plan
+LOADING_POLL_SECONDS = 0.5
+
+# Clé de session des statistiques de la sidebar (calculées une fois)
+DATASET_STATS_KEY = "dataset_stats"
+
+# Nouvelle version des artefacts publiée: caches du moteur invalidés
+add_swap_listener(RecommendationEngine.release_data_version)
+
+
+def run_fragment(func, *args):
+    """
+    Exécute func dans un fragment Streamlit: les interactions avec ses
+    widgets ne réexécutent que cette région de la page. Hors du serveur
+    Streamlit (tests, scripts), func est appelée directement.
+    """
+    if get_script_run_ctx(suppress_warning=True) is None:
+        return func(*args)
+    return st.fragment(func)(*args)
+
 
 class MangeTaMainApp:
     """Application principale de MangeTaMain"""
@@ -24,6 +48,13 @@ class MangeTaMainApp:
         """Parse les ingrédients saisis par l'utilisateur"""
         return [ing.strip().lower() for ing in user_input.split(",") if ing.strip()]
 
+    def _normalize_user_ingredients(self, user_ingredients: List[str]) -> List[str]:
+        """Normalise les ingrédients saisis avec la carte partagée avec le pipeline"""
+        ingredient_map = self.data_manager.load_ingredient_map()
+        normalized = [ingredient_map.get(ing, ing) for ing in user_ingredients]
+        # Dédupliquer en gardant l'ordre de saisie
+        return list(dict.fromkeys(normalized))
+
     def _display_recommendations_stats(self, recommendations, user_ingredients, sort_mode="score"):
         """Affiche les statistiques des recommandations avec info sur le tri"""
         if not recommendations.empty:
@@ -65,8 +96,11 @@ class MangeTaMainApp:
             st.warning("❌ Aucune recommandation trouvée avec ces critères")
             st.info("💡 Essayez avec des ingrédients plus communs ou supprimez la limite de temps")
 
-    def _handle_user_input_section(self):
-        """Gère la section de saisie utilisateur et retourne les paramètres"""
+    def _handle_user_input_section(self, ready=True):
+        """
+        Gère la section de saisie utilisateur et retourne les paramètres.
+        Le bouton reste désactivé tant que le moteur n'est pas prêt.
+        """
         st.header("🥄 Vos Ingrédients Disponibles")
 
         # Zone de saisie des ingrédients
@@ -109,7 +143,9 @@ class MangeTaMainApp:
             recommend_button = st.button(
                 "🔍 Obtenir les Recommandations",
                 type="primary",
-                use_container_width=True
+                use_container_width=True,
+                disabled=not ready,
+                help=None if ready else "⏳ Chargement des données en cours..."
             )
 
         # Slider pour le nombre de recommandations
@@ -141,67 +177,109 @@ class MangeTaMainApp:
 
         return user_input, time_limit, n_recommendations, recommend_button, sort_mode
 
-    def _handle_recommendations(self, recipes_df, interactions_df, user_input,
-                                time_limit, n_recommendations, recommend_button, sort_mode):
-        """Gère la logique des recommandations avec le mode de tri"""
-        if recommend_button and user_input.strip():
-
-            # Parser les ingrédients
-            user_ingredients = self._parse_user_ingredients(user_input)
-
-            st.markdown("---")
-
-            # Afficher info sur le mode de tri
-            sort_info = {
-                "intelligent": "🎯 Tri intelligent hybride (Jaccard + Cosine + Score)",
-                "jaccard": "🥄 Priorise les correspondances exactes (Jaccard)",
-                "cosine": "🧠 Priorise la similarité sémantique (Cosine TF-IDF)",
-                "score": "⭐ Tri par score global uniquement"
-            }
-            st.info(f"**Mode de tri :** {sort_info[sort_mode]}")
-
-            st.subheader(f"🎯 Recommandations pour: {', '.join(user_ingredients[:5])}"
-                         + (f" + {len(user_ingredients) - 5} autres..." if len(user_ingredients) > 5 else ""))
-
-            # Déterminer les paramètres de tri
-            if sort_mode == "intelligent":
-                prioritize_jaccard = True
-                custom_sort = False
-            elif sort_mode == "jaccard":
-                prioritize_jaccard = False  # On fera le tri nous-mêmes
-                custom_sort = "jaccard"
-            elif sort_mode == "cosine":
-                prioritize_jaccard = False  # On fera le tri nous-mêmes
-                custom_sort = "cosine"
-            else:  # score
-                prioritize_jaccard = False
-                custom_sort = "score"
-
-            # Obtenir les recommandations
+    def _display_query_header(self, user_ingredients, sort_mode):
+        """Affiche le mode de tri et les ingrédients de la requête"""
+        st.markdown("---")
+
+        # Afficher info sur le mode de tri
+        sort_info = {
+            "intelligent": "🎯 Tri intelligent hybride (Jaccard + Cosine + Score)",
+            "jaccard": "🥄 Priorise les correspondances exactes (Jaccard)",
+            "cosine": "🧠 Priorise la similarité sémantique (Cosine TF-IDF)",
+            "score": "⭐ Tri par score global uniquement"
+        }
+        st.info(f"**Mode de tri :** {sort_info[sort_mode]}")
+
+        st.subheader(f"🎯 Recommandations pour: {', '.join(user_ingredients[:5])}"
+                     + (f" + {len(user_ingredients) - 5} autres..." if len(user_ingredients) > 5 else ""))
+
+    def _show_more(self, step):
+        """Callback du bouton "Afficher plus": agrandit la page courante"""
+        state = st.session_state.get(RESULTS_STATE_KEY)
+        if state is not None:
+            state["extra"] += step
+
+    def _display_ranked_results(self, recipes_df, interactions_df, state, time_limit,
+                                n_recommendations, sort_mode, data_version):
+        """
+        Affiche les n (+ "Afficher plus") premiers résultats de la requête
+        gardée en session. Le moteur les sert depuis ses caches (mémoire puis
+        disque) ou les re-classe depuis les composantes du score mises en
+        cache: la session ne garde que la requête, pas le classement.
+        """
+        n_requested = n_recommendations + state["extra"]
+        try:
             with st.spinner("🔄 Génération des recommandations personnalisées..."):
                 recommendations = self.recommendation_engine.get_recommendations(
-                    recipes_df, interactions_df, user_ingredients, time_limit,
-                    n_recommendations, prioritize_jaccard
+                    recipes_df, interactions_df, state["user_ingredients"], time_limit,
+                    n_requested, sort_mode == "intelligent",
+                    data_version=data_version, sort_mode=sort_mode, raise_errors=True
                 )
+        except Exception as e:
+            st.session_state.pop(RESULTS_STATE_KEY, None)
+            st.error(f"❌ Erreur recommandation: {e}")
+            return
+        st.session_state[RESULTS_STATE_KEY] = state
+
+        # Service saturé: classement simplifié servi à la place du calcul complet
+        degraded = recommendations.attrs.get("degraded")
+        if degraded is not None:
+            st.info("⚡ Forte affluence : classement simplifié "
+                    + ("(ingrédients communs uniquement)" if degraded["mode"] == "jaccard_only"
+                       else "(recettes populaires)")
+                    + ". Relancez la recherche dans quelques instants pour le classement complet.")
+
+        self._display_recommendations_stats(recommendations, state["user_ingredients"], sort_mode)
+
+        # Page complète: d'autres recettes peuvent suivre
+        if not recommendations.empty and len(recommendations) >= n_requested:
+            st.button("➕ Afficher plus de recettes", key="show_more_button",
+                      on_click=self._show_more, args=(n_recommendations,))
 
-                # Appliquer tri personnalisé si nécessaire
-                if custom_sort and not recommendations.empty:
-                    if custom_sort == "jaccard":
-                        recommendations = recommendations.sort_values('jaccard', ascending=False)
-                    elif custom_sort == "cosine":
-                        recommendations = recommendations.sort_values('cosine', ascending=False)
-                    elif custom_sort == "score":
-                        recommendations = recommendations.sort_values('score', ascending=False)
+    def _handle_recommendations(self, recipes_df, interactions_df, user_input,
+                                time_limit, n_recommendations, recommend_button, sort_mode,
+                                data_version=None):
+        """
+        Gère la logique des recommandations avec le mode de tri
+
+        data_version: version des DataFrames reçus (instantané de run); lue
+        dans le DataManager si absente
+        """
+        query = (user_input.strip(), time_limit, sort_mode)
+        if data_version is None:
+            data_version = self.data_manager.get_data_version()
+
+        if recommend_button and user_input.strip():
+
+            # Parser puis normaliser les ingrédients (même carte que le pipeline)
+            user_ingredients = self._normalize_user_ingredients(
+                self._parse_user_ingredients(user_input))
 
-                    # Garder seulement le nombre demandé
-                    recommendations = recommendations.head(n_recommendations)
+            self._display_query_header(user_ingredients, sort_mode)
 
-            # Afficher les résultats
-            self._display_recommendations_stats(recommendations, user_ingredients, sort_mode)
+            # Le moteur classe l'ensemble des recettes candidates selon le mode
+            # de tri; la requête est gardée en session pour les réexécutions
+            state = {"query": query, "version": data_version,
+                     "user_ingredients": user_ingredients, "extra": 0}
+            self._display_ranked_results(recipes_df, interactions_df, state, time_limit,
+                                         n_recommendations, sort_mode, data_version)
 
         elif recommend_button and not user_input.strip():
             st.warning("⚠️ Veuillez entrer au moins un ingrédient")
 
+        else:
+            # Réexécution du script (slider, "Afficher plus"): même requête,
+            # servie par les caches du moteur
+            state = st.session_state.get(RESULTS_STATE_KEY)
+            if state is not None and state.get("version") != data_version:
+                # Artefacts basculés: la recherche sera relancée
+                del st.session_state[RESULTS_STATE_KEY]
+                state = None
+            if state is not None and state["query"] == query:
+                self._display_query_header(state["user_ingredients"], sort_mode)
+                self._display_ranked_results(recipes_df, interactions_df, state, time_limit,
+                                             n_recommendations, sort_mode, data_version)
+
     def run(self):
         """Lance l'application principale"""
 
@@ -211,25 +289,88 @@ class MangeTaMainApp:
         # Header principal
         self.ui_components.display_main_header()
 
-        # === CHARGEMENT DES DONNÉES ===
-        data_result = self.data_manager.load_preprocessed_data()
+        # === CHARGEMENT DES DONNÉES (arrière-plan) ===
+        status = self.data_manager.start_background_load()
 
-        if data_result is None or data_result[0] is None:
+        if status == "missing":
+            st.error("❌ Données preprocessées non trouvées. Exécutez d'abord le preprocessing.")
+            st.stop()
+        if status == "error":
+            st.error(f"❌ Erreur de chargement: {self.data_manager.get_load_error()}")
             st.stop()
 
-        recipes_df, interactions_df = data_result
+        # Version et DataFrames lus ensemble pour la sidebar
+        snapshot = self.data_manager.get_snapshot() if status == "ready" else None
+        ready = snapshot is not None
 
-        # === SIDEBAR - INFORMATIONS ===
-        self.ui_components.display_sidebar_stats(recipes_df, interactions_df)
+        data_version, recipes_df, interactions_df = snapshot if ready else (None, None, None)
 
-        # === INTERFACE PRINCIPALE ===
-        user_input, time_limit, n_recommendations, recommend_button, sort_mode = self._handle_user_input_section()
+        # === SIDEBAR - INFORMATIONS ===
+        if ready:
+            self.ui_components.display_sidebar_stats(
+                recipes_df, interactions_df,
+                stats=self._session_dataset_stats(recipes_df, interactions_df, data_version))
+        else:
+            self.ui_components.display_sidebar_loading()
 
-        # === RECOMMANDATIONS ===
-        self._handle_recommendations(
-            recipes_df, interactions_df, user_input,
-            time_limit, n_recommendations, recommend_button, sort_mode
-        )
+        # === INTERFACE PRINCIPALE ET RECOMMANDATIONS (fragment) ===
+        # Saisie, slider, mode de tri et "Afficher plus" ne réexécutent que
+        # cette région: ni styles, ni chargement, ni sidebar. Seule la version
+        # est passée: Streamlit conserve les arguments du fragment par session,
+        # des DataFrames y retiendraient l'ancienne version après une bascule
+        run_fragment(self._render_main, data_version)
 
         # === FOOTER ===
         self.ui_components.display_footer()
+
+        if not ready:
+            self._rerun_when_loaded()
+
+    def _render_main(self, data_version):
+        """Saisie des ingrédients puis recommandations (data_version: None pendant le chargement)"""
+        ready = data_version is not None
+        snapshot = self.data_manager.get_snapshot() if ready else None
+        # Une réexécution du fragment rejoue la version de la dernière
+        # exécution complète: après une bascule, toute la page est relancée
+        # pour que sidebar et recommandations restent sur la même version
+        if ready and (snapshot is None or snapshot[0] != data_version):
+            st.rerun()
+
+        # Affichée immédiatement, même pendant le chargement des données
+        user_input, time_limit, n_recommendations, recommend_button, sort_mode = \
+            self._handle_user_input_section(ready)
+
+        if ready:
+            _, recipes_df, interactions_df = snapshot
+            self._handle_recommendations(
+                recipes_df, interactions_df, user_input,
+                time_limit, n_recommendations, recommend_button, sort_mode,
+                data_version=data_version
+            )
+        else:
+            st.info("⏳ Chargement des données en cours... "
+                    "Le bouton sera activé dès que le moteur est prêt.")
+
+    def _session_dataset_stats(self, recipes_df, interactions_df, version=None):
+        """
+        Statistiques de la sidebar, lues une fois par session et par version:
+        profil précalculé par le pipeline, ou calcul de repli s'il est absent
+        ou ne correspond pas aux données chargées
+        """
+        if version is None:
+            version = self.data_manager.get_data_version()
+        cached = st.session_state.get(DATASET_STATS_KEY)
+        if cached is None or cached["version"] != version:
+            stats = self.data_manager.load_dataset_profile()
+            if stats is None or stats.get("recipes") != len(recipes_df):
+                stats = self.ui_components.compute_dataset_stats(
+                    recipes_df, interactions_df,
+                    built_at=self.data_manager.get_artifacts_built_at())
+            cached = {"version": version, "stats": stats}
+            st.session_state[DATASET_STATS_KEY] = cached
+        return cached["stats"]
+
+    def _rerun_when_loaded(self):
+        """Réexécute la page dès la fin du chargement (ou après un court délai)"""
+        self.data_manager.wait_for_artifacts(timeout=LOADING_POLL_SECONDS)
+        st.rerun()
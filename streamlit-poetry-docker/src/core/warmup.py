@@ -0,0 +1,125 @@
+"""
+Warm-up de l'application MangeTaMain au démarrage du processus
+
+Charge les artefacts, prépare le scoring et exécute quelques requêtes types
+pour remplir les caches avant d'accepter du trafic. Un fichier de
+disponibilité est écrit à la fin; le healthcheck du conteneur le surveille.
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+from ..utils.config import WARMUP_CONFIG
+
+logger = logging.getLogger(__name__)
+
+_WARMUP_LOCK = threading.Lock()
+_WARMUP_REPORT: Optional[Dict[str, Any]] = None
+
+
+def ready_file_path() -> str:
+    return WARMUP_CONFIG["ready_file"]
+
+
+def is_ready() -> bool:
+    """True si le warm-up de ce conteneur est terminé"""
+    return os.path.exists(ready_file_path())
+
+
+def clear_ready_flag():
+    try:
+        os.remove(ready_file_path())
+    except FileNotFoundError:
+        pass
+
+
+def write_ready_flag(report: Dict[str, Any]):
+    """Écrit le rapport de warm-up de façon atomique (fichier de disponibilité)"""
+    path = ready_file_path()
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def run_warmup(app=None) -> Dict[str, Any]:
+    """
+    Exécute le warm-up complet et écrit le fichier de disponibilité.
+
+    Raises:
+        FileNotFoundError: si les artefacts preprocessés sont absents
+    """
+    if app is None:
+        from .app import MangeTaMainApp
+        app = MangeTaMainApp()
+
+    start = time.perf_counter()
+    clear_ready_flag()
+
+    # 1. Artefacts (mémoire partagée par toutes les sessions du processus)
+    recipes_df, interactions_df = app.data_manager.load_artifacts()
+    data_version = app.data_manager.get_data_version()
+    ingredient_map = app.data_manager.load_ingredient_map()
+    loaded_at = time.perf_counter()
+
+    # 2. Modules de scoring: sklearn (import différé dans reco_score) est
+    #    chargé maintenant plutôt qu'au premier clic
+    sys.path.append('/preprocessing')
+    import reco_score
+    if reco_score.SKLEARN_AVAILABLE:
+        reco_score.import_sklearn()
+
+    # 3. Requêtes types: composantes du score et caches de résultats
+    n_recommendations = WARMUP_CONFIG["n_recommendations"]
+    warmed = 0
+    for query in WARMUP_CONFIG["queries"]:
+        user_ingredients = app._normalize_user_ingredients(
+            app._parse_user_ingredients(query))
+        for sort_mode in WARMUP_CONFIG["sort_modes"]:
+            results = app.recommendation_engine.get_recommendations(
+                recipes_df, interactions_df, user_ingredients, None,
+                n_recommendations, sort_mode == "intelligent",
+                data_version=data_version, sort_mode=sort_mode)
+            if not results.empty:
+                warmed += 1
+
+    report = {
+        "data_version": data_version,
+        "recipes": len(recipes_df),
+        "interactions": len(interactions_df),
+        "ingredient_map_entries": len(ingredient_map),
+        "queries_warmed": warmed,
+        "load_seconds": round(loaded_at - start, 3),
+        "total_seconds": round(time.perf_counter() - start, 3),
+        "pid": os.getpid(),
+    }
+    write_ready_flag(report)
+    logger.info(f"🔥 Warm-up terminé en {report['total_seconds']:.1f}s "
+                f"({warmed} requêtes préchauffées)")
+    return report
+
+
+def ensure_warm(app=None) -> bool:
+    """
+    Exécute le warm-up une seule fois par processus (appels concurrents
+    bloqués jusqu'à la fin). Retourne False si les artefacts sont absents.
+    """
+    global _WARMUP_REPORT
+    with _WARMUP_LOCK:
+        if _WARMUP_REPORT is None:
+            try:
+                _WARMUP_REPORT = run_warmup(app)
+            except Exception as e:
+                logger.error(f"❌ Warm-up impossible: {e}")
+                return False
+    return True
+
+
+def warmup_report() -> Optional[Dict[str, Any]]:
+    """Rapport du warm-up de ce processus (None s'il n'a pas eu lieu)"""
+    return _WARMUP_REPORT
@@ -6,8 +6,10 @@ comme la génération des recommandations.
 
 Classes principales:
     - RecommendationEngine: Moteur de recommandations avec cache Streamlit
+    - ResultCache: Cache LRU/TTL des résultats, partagé par le processus
 """
 
 from .recommendation_engine import RecommendationEngine
+from .result_cache import ResultCache
 
-__all__ = ["RecommendationEngine"]
+__all__ = ["RecommendationEngine", "ResultCache"]
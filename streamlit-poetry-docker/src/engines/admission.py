@@ -0,0 +1,112 @@
+"""
+Contrôle d'admission devant le scoring complet
+
+Au plus max_concurrent calculs complets simultanés; les requêtes suivantes
+attendent dans une file d'au plus max_queue requêtes. Une requête est
+refusée (et servie en mode dégradé par le moteur) si:
+- la file est pleine ("queue_full");
+- son budget de latence ne permet plus d'attendre un créneau puis de faire
+  un calcul complet, estimé par moyenne mobile ("deadline").
+
+Un créneau libre est toujours accordé sans file d'attente: le mode dégradé
+ne sert qu'en cas de saturation.
+"""
+
+import time
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+REASONS = ("queue_full", "deadline")
+
+
+class AdmissionController:
+    """Limiteur de concurrence avec file bornée et échéances"""
+
+    def __init__(self, max_concurrent: int = 4, max_queue: int = 16, smoothing: float = 0.2):
+        if max_concurrent < 1:
+            raise ValueError("max_concurrent doit être >= 1")
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.smoothing = smoothing
+        self._cond = threading.Condition()
+        self.in_flight = 0
+        self.waiting = 0
+        # Durée estimée d'un calcul complet (secondes, moyenne mobile exponentielle)
+        self.expected_cost = 0.0
+        self.admitted = 0
+        self.peak_waiting = 0
+        self.rejected = {reason: 0 for reason in REASONS}
+
+    def acquire(self, deadline: Optional[float] = None) -> Optional[str]:
+        """
+        Attend un créneau jusqu'à l'échéance (time.monotonic) moins le coût
+        estimé du calcul. None si admis, sinon la raison du refus.
+        """
+        with self._cond:
+            if self.in_flight >= self.max_concurrent or self.waiting:
+                if self.waiting >= self.max_queue:
+                    self.rejected["queue_full"] += 1
+                    return "queue_full"
+
+                self.waiting += 1
+                self.peak_waiting = max(self.peak_waiting, self.waiting)
+                try:
+                    while self.in_flight >= self.max_concurrent:
+                        timeout = None
+                        if deadline is not None:
+                            timeout = deadline - self.expected_cost - time.monotonic()
+                            if timeout <= 0:
+                                self.rejected["deadline"] += 1
+                                return "deadline"
+                        self._cond.wait(timeout)
+                finally:
+                    self.waiting -= 1
+
+            self.in_flight += 1
+            self.admitted += 1
+            return None
+
+    def release(self, duration: Optional[float] = None):
+        """Libère le créneau et met à jour le coût estimé (durée du calcul en secondes)"""
+        with self._cond:
+            self.in_flight -= 1
+            if duration is not None:
+                self.expected_cost = (duration if self.admitted <= 1 else
+                                      (1 - self.smoothing) * self.expected_cost
+                                      + self.smoothing * duration)
+            self._cond.notify()
+
+    @contextmanager
+    def admit(self, deadline: Optional[float] = None) -> Iterator[Optional[str]]:
+        """
+        with controller.admit(deadline) as refused: None si admis (le créneau
+        est libéré à la sortie), sinon la raison du refus.
+        """
+        refused = self.acquire(deadline)
+        if refused is not None:
+            yield refused
+            return
+        start = time.monotonic()
+        try:
+            yield None
+        finally:
+            self.release(time.monotonic() - start)
+
+    def reset_stats(self):
+        with self._cond:
+            self.admitted = self.peak_waiting = 0
+            self.rejected = {reason: 0 for reason in REASONS}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "in_flight": self.in_flight,
+                "waiting": self.waiting,
+                "peak_waiting": self.peak_waiting,
+                "admitted": self.admitted,
+                "rejected": dict(self.rejected),
+                "expected_cost_ms": round(self.expected_cost * 1000, 1),
+            }
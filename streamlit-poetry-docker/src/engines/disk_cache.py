@@ -0,0 +1,193 @@
+"""
+Cache disque (niveau 2) des résultats de recommandation
+
+Base SQLite placée sur le volume de données: les résultats survivent aux
+redémarrages du conteneur et sont partagés entre les répliques qui montent
+le même volume. Le mode WAL et le busy_timeout permettent l'accès concurrent
+de plusieurs processus; l'éviction LRU borne la taille totale stockée.
+
+Les clés incluent la version du format (code du moteur, pandas): après un
+redéploiement, les entrées picklées par l'ancien code ne sont plus lues.
+Une entrée illisible malgré tout est supprimée et traitée comme absente.
+"""
+
+import os
+import time
+import pickle
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    data_version TEXT,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_accessed ON results(accessed_at);
+"""
+
+
+def hash_key(key: Hashable, data_version: Optional[str],
+             format_version: Optional[str] = None) -> str:
+    """Empreinte stable (entre processus) d'une clé de requête, des données et du format"""
+    return hashlib.sha256(repr((key, data_version, format_version)).encode('utf-8')).hexdigest()
+
+
+class DiskCache:
+    """Cache clé/valeur SQLite borné en octets, sûr entre processus"""
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024,
+                 ttl: Optional[float] = None, busy_timeout_ms: int = 5000,
+                 clock=time.time, format_version: Optional[str] = None):
+        self.path = path
+        self.format_version = format_version
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.busy_timeout_ms = busy_timeout_ms
+        self._clock = clock
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Connexion propre au thread (et au processus, en cas de fork)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000,
+                               isolation_level=None)
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key: Hashable, data_version: Optional[str] = None) -> Optional[Any]:
+        """Retourne la valeur stockée ou None (absente, expirée ou illisible)"""
+        digest = hash_key(key, data_version, self.format_version)
+        now = self._clock()
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT value, created_at FROM results WHERE key = ?", (digest,)
+            ).fetchone()
+            if row is None or (self.ttl is not None and now - row[1] >= self.ttl):
+                self.misses += 1
+                return None
+            conn.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, digest))
+        except sqlite3.Error as e:
+            self.errors += 1
+            self.misses += 1
+            logger.warning(f"⚠️ Cache disque illisible: {e}")
+            return None
+
+        try:
+            value = pickle.loads(row[0])
+        except Exception as e:
+            # Entrée corrompue ou d'un format incompatible (classes, pandas...)
+            self.errors += 1
+            self.misses += 1
+            logger.warning(f"⚠️ Entrée du cache disque illisible, supprimée: {e!r}")
+            self._discard(digest)
+            return None
+
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any, data_version: Optional[str] = None):
+        """Stocke une valeur puis évince les entrées les moins récemment lues"""
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) > self.max_bytes:
+            return
+        now = self._clock()
+        try:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO results "
+                    "(key, data_version, value, size, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (hash_key(key, data_version, self.format_version), data_version, blob,
+                     len(blob), now, now))
+                self._evict(conn)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning(f"⚠️ Écriture impossible dans le cache disque: {e}")
+
+    def _discard(self, digest: str):
+        try:
+            self._connect().execute("DELETE FROM results WHERE key = ?", (digest,))
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Suppression impossible dans le cache disque: {e}")
+
+    def _evict(self, conn: sqlite3.Connection):
+        if self.ttl is not None:
+            conn.execute("DELETE FROM results WHERE created_at <= ?",
+                         (self._clock() - self.ttl,))
+        # Supprime les entrées les plus anciennes au-delà du budget en octets
+        conn.execute(
+            "DELETE FROM results WHERE key IN ("
+            " SELECT key FROM ("
+            "  SELECT key, SUM(size) OVER (ORDER BY accessed_at DESC, key) AS total"
+            "  FROM results)"
+            " WHERE total > ?)",
+            (self.max_bytes,))
+
+    def clear(self):
+        """Supprime toutes les entrées et remet les compteurs à zéro"""
+        try:
+            self._connect().execute("DELETE FROM results")
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Nettoyage du cache disque impossible: {e}")
+        self.hits = self.misses = self.errors = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Compteurs du cache disque (hits, misses, taille...)"""
+        try:
+            entries, total = self._connect().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        except sqlite3.Error:
+            entries, total = None, None
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "entries": entries,
+            "bytes": total,
+            "path": self.path,
+            "format_version": self.format_version,
+        }
+
+
+def open_disk_cache(path: str, **kwargs) -> Optional[DiskCache]:
+    """
+    Ouvre le cache disque si le répertoire de données existe et est
+    accessible en écriture; retourne None sinon (cache mémoire seul).
+    """
+    directory = os.path.dirname(path) or "."
+    if not os.path.isdir(directory) or not os.access(directory, os.W_OK):
+        return None
+    try:
+        return DiskCache(path, **kwargs)
+    except sqlite3.Error as e:
+        logger.warning(f"⚠️ Cache disque désactivé ({path}): {e}")
+        return None
@@ -0,0 +1,256 @@
+"""
+Index des recettes modifiable en ligne (insertions et mises à jour)
+
+Un LiveRecipeIndex est immuable comme RecipeIndex: chaque upsert retourne un
+nouvel index, les requêtes en cours gardent l'ancien. Il combine:
+- le segment principal (RecipeIndex du bundle ou construit), jamais modifié;
+- un segment delta en mémoire: recettes insérées ou modifiées depuis,
+  incidence sur son propre vocabulaire d'ingrédients et lignes TF-IDF
+  calculées avec l'idf figé du segment principal (termes absents du
+  vocabulaire TF-IDF ignorés jusqu'à la prochaine exécution du pipeline);
+- les positions du segment principal remplacées par le delta.
+
+Les positions suivent l'ordre des recettes servies: une recette modifiée
+garde sa position, une recette insérée est ajoutée à la fin (comme dans le
+DataFrame de la version dérivée). Au-delà de compact_rows recettes, le delta
+est fusionné dans un nouveau segment principal en mémoire (copie des
+matrices creuses, sans réajuster le vocabulaire TF-IDF ni l'idf).
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .ranking import ScoreComponents
+from .recipe_index import RecipeIndex, _csr, _ingredient_set, _reco_score
+
+logger = logging.getLogger(__name__)
+
+# Rating et popularité d'une recette sans interaction (cf. build_index_arrays)
+_DEFAULT_RATING_NORM = 0.5
+_DEFAULT_POPULARITY = 0.0
+
+
+def _delta_segment(main: RecipeIndex, labels: np.ndarray, ingredient_lists: Sequence,
+                   minutes: np.ndarray, mean_rating_norm: np.ndarray,
+                   popularity: np.ndarray) -> RecipeIndex:
+    """Segment des recettes modifiées en ligne (vectorizer et idf du segment principal)"""
+    from scipy.sparse import csr_matrix
+
+    vocabulary: Dict[str, int] = {}
+    indptr = [0]
+    indices: List[int] = []
+    for ingredients in ingredient_lists:
+        for ingredient in _ingredient_set(ingredients):
+            indices.append(vocabulary.setdefault(ingredient, len(vocabulary)))
+        indptr.append(len(indices))
+    incidence = csr_matrix((np.ones(len(indices), dtype=np.float32), indices, indptr),
+                           shape=(len(labels), len(vocabulary)))
+
+    tfidf = None
+    if main.vectorizer is not None:
+        texts = _reco_score().RecipeScorer()._prepare_ingredients_for_tfidf(
+            [ing if ing is not None else "" for ing in ingredient_lists])
+        tfidf = main.vectorizer.transform(texts).tocsr().astype(np.float32)
+
+    return RecipeIndex(labels, vocabulary, incidence, np.diff(indptr).astype(np.float32),
+                       main.vectorizer, tfidf, mean_rating_norm, popularity,
+                       minutes if main.minutes is not None else None)
+
+
+class LiveRecipeIndex:
+    """Segment principal + segment delta des recettes modifiées en ligne"""
+
+    def __init__(self, main: RecipeIndex, delta_recipes: Optional[pd.DataFrame] = None,
+                 main_labels: Optional[pd.Index] = None, compactions: int = 0):
+        self.main = main
+        # Recettes du delta: label, position, ingrédients, minutes
+        if delta_recipes is None:
+            delta_recipes = pd.DataFrame({
+                "label": np.array([], dtype=main.labels.dtype),
+                "position": np.array([], dtype=np.int64),
+                "ingredients": np.array([], dtype=object),
+                "minutes": np.array([], dtype=np.float64)})
+        self.delta_recipes = delta_recipes
+        self._main_labels = main_labels if main_labels is not None else pd.Index(main.labels)
+        self.compactions = compactions
+        self.vocabulary = main.vocabulary
+        self.vectorizer = main.vectorizer
+
+        n_main = len(main)
+        positions = self.delta_recipes["position"].to_numpy(dtype=np.int64)
+        inserted = positions >= n_main
+        # Positions du segment principal remplacées par le delta
+        self.replaced = np.sort(positions[~inserted])
+        self._kept = None
+        if len(self.replaced):
+            self._kept = np.ones(n_main, dtype=bool)
+            self._kept[self.replaced] = False
+
+        # Tableaux alignés sur les positions (segment principal puis insertions)
+        order = np.argsort(positions[inserted], kind="stable")
+        n_inserted = int(inserted.sum())
+        self.labels = np.concatenate(
+            [main.labels, self.delta_recipes["label"].to_numpy()[inserted][order]]
+        ) if n_inserted else main.labels
+        self.mean_rating_norm = np.concatenate(
+            [main.mean_rating_norm, np.full(n_inserted, _DEFAULT_RATING_NORM, np.float32)])
+        self.popularity = np.concatenate(
+            [main.popularity, np.full(n_inserted, _DEFAULT_POPULARITY, np.float32)])
+        self.minutes = None
+        delta_minutes = self.delta_recipes["minutes"].to_numpy(dtype=np.float64)
+        if main.minutes is not None:
+            self.minutes = np.concatenate([main.minutes, delta_minutes[inserted][order]])
+            self.minutes[positions[~inserted]] = delta_minutes[~inserted]
+
+        self.delta = None
+        if len(positions):
+            self.delta = _delta_segment(
+                main, self.delta_recipes["label"].to_numpy(),
+                self.delta_recipes["ingredients"].tolist(), delta_minutes,
+                self.mean_rating_norm[positions], self.popularity[positions])
+        self._delta_positions = positions
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    @classmethod
+    def wrap(cls, index) -> "LiveRecipeIndex":
+        """LiveRecipeIndex sans delta autour d'un RecipeIndex (inchangé si déjà live)"""
+        return index if isinstance(index, cls) else cls(index)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"main_recipes": len(self.main), "delta_recipes": len(self._delta_positions),
+                "replaced": len(self.replaced), "compactions": self.compactions}
+
+    def upsert(self, labels: Sequence, ingredient_lists: Sequence,
+               minutes: Sequence[float], compact_rows: Optional[int] = None) -> "LiveRecipeIndex":
+        """
+        Nouvel index où les recettes labels (existantes: modifiées, sinon
+        insérées à la fin dans l'ordre reçu) ont ces ingrédients et minutes.
+        Le delta est compacté s'il atteint compact_rows recettes.
+        """
+        labels = np.asarray(labels)
+        delta = self.delta_recipes
+        known = dict(zip(delta["label"].tolist(), delta["position"].tolist()))
+        main_positions = self._main_labels.get_indexer(labels)
+
+        positions = []
+        next_position = len(self)
+        for label, main_position in zip(labels.tolist(), main_positions.tolist()):
+            if main_position >= 0:
+                positions.append(main_position)
+            elif label in known:
+                positions.append(known[label])
+            else:
+                positions.append(next_position)
+                next_position += 1
+
+        updates = pd.DataFrame({"label": labels, "position": np.array(positions, dtype=np.int64),
+                                "ingredients": list(ingredient_lists),
+                                "minutes": np.asarray(minutes, dtype=np.float64)})
+        delta = pd.concat([delta[~delta["label"].isin(updates["label"])], updates],
+                          ignore_index=True)
+        index = LiveRecipeIndex(self.main, delta, self._main_labels, self.compactions)
+        if compact_rows is not None and len(delta) >= compact_rows:
+            index = index.compact()
+        return index
+
+    def compact(self) -> "LiveRecipeIndex":
+        """
+        Fusionne le delta dans un nouveau segment principal (ordre des
+        positions conservé, vocabulaire des ingrédients étendu)
+        """
+        if self.delta is None:
+            return self
+        from scipy.sparse import vstack
+
+        main, delta = self.main, self.delta
+        n_main = len(main)
+        vocabulary = dict(main.vocabulary)
+        remap = np.array([vocabulary.setdefault(ingredient, len(vocabulary))
+                          for ingredient in delta.vocabulary], dtype=np.int32)
+
+        # Lignes du delta substituées aux lignes remplacées, insertions à la fin
+        rows = np.arange(len(self), dtype=np.int64)
+        rows[self._delta_positions] = n_main + np.arange(len(self._delta_positions))
+        shape = (n_main, len(vocabulary))
+        incidence = vstack([
+            _csr(main.incidence.data, main.incidence.indices, main.incidence.indptr, shape),
+            _csr(delta.incidence.data, remap[delta.incidence.indices], delta.incidence.indptr,
+                 (len(delta), len(vocabulary))),
+        ]).tocsr()[rows]
+        tfidf = (vstack([main.tfidf, delta.tfidf]).tocsr()[rows]
+                 if main.tfidf is not None else None)
+        sizes = np.concatenate([main.sizes, delta.sizes])[rows]
+
+        time_filter_bitmaps = None
+        if main.time_filter_limits is not None and self.minutes is not None:
+            time_filter_bitmaps = np.packbits(
+                self.minutes[None, :] <= np.asarray(main.time_filter_limits)[:, None], axis=1)
+
+        compacted = RecipeIndex(self.labels, vocabulary, incidence, sizes, main.vectorizer, tfidf,
+                                self.mean_rating_norm, self.popularity, self.minutes,
+                                main.time_filter_limits, time_filter_bitmaps)
+        logger.info(f"🗜️ Delta de {len(delta):,} recettes compacté dans l'index "
+                    f"({len(compacted):,} recettes)")
+        return LiveRecipeIndex(compacted, compactions=self.compactions + 1)
+
+    def score_arrays(self, queries: Sequence[Tuple[Sequence[str], Optional[int]]],
+                     n_shards: Optional[int] = None
+                     ) -> List[Tuple[Optional[np.ndarray], np.ndarray, np.ndarray]]:
+        """Comme RecipeIndex.score_arrays: segment principal (lignes remplacées exclues) et delta"""
+        scored = self.main.score_arrays(queries, n_shards)
+        if self.delta is None:
+            return scored
+
+        results = []
+        for (positions, jaccard, cosine), (delta_positions, delta_jaccard, delta_cosine) in zip(
+                scored, self.delta.score_arrays(queries, n_shards=1)):
+            if positions is None:
+                positions = np.arange(len(self.main), dtype=np.int64)
+            if self._kept is not None:
+                keep = self._kept[positions]
+                positions, jaccard, cosine = positions[keep], jaccard[keep], cosine[keep]
+            delta_positions = (self._delta_positions if delta_positions is None
+                               else self._delta_positions[delta_positions])
+
+            positions = np.concatenate([positions, delta_positions])
+            # Ordre des positions rétabli (départage des égalités du classement)
+            order = np.argsort(positions, kind="stable")
+            results.append((positions[order], np.concatenate([jaccard, delta_jaccard])[order],
+                            np.concatenate([cosine, delta_cosine])[order]))
+        return results
+
+    def components(self, positions: Optional[np.ndarray], jaccard: np.ndarray,
+                   cosine: np.ndarray) -> ScoreComponents:
+        selection = slice(None) if positions is None else positions
+        return ScoreComponents(self.labels[selection], jaccard, cosine,
+                               self.mean_rating_norm[selection], self.popularity[selection])
+
+    def score_batch(self, queries: Sequence[Tuple[Sequence[str], Optional[int]]]
+                    ) -> List[ScoreComponents]:
+        return [self.components(*arrays) for arrays in self.score_arrays(queries)]
+
+    def jaccard_components(self, ingredients: Sequence[str],
+                           time_limit: Optional[int]) -> Optional[ScoreComponents]:
+        """Mode dégradé (listes inversées) sur les deux segments"""
+        parts = []
+        main = self.main.jaccard_components(ingredients, time_limit)
+        if main is not None and len(self.replaced):
+            keep = ~np.isin(main.labels, self.main.labels[self.replaced])
+            main = ScoreComponents(main.labels[keep], main.jaccard[keep], main.cosine[keep],
+                                   main.mean_rating_norm[keep], main.popularity[keep])
+        for components in (main, self.delta.jaccard_components(ingredients, time_limit)
+                           if self.delta is not None else None):
+            if components is not None and len(components):
+                parts.append(components)
+        if not parts:
+            return None
+        if len(parts) == 1:
+            return parts[0]
+        return ScoreComponents(*(np.concatenate([getattr(part, name) for part in parts])
+                                 for name in ("labels", "jaccard", "cosine",
+                                              "mean_rating_norm", "popularity")))
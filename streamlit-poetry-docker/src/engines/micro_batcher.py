@@ -0,0 +1,111 @@
+"""
+Micro-batching des requêtes de scoring
+
+Les requêtes soumises pendant une courte fenêtre (max_wait) ou jusqu'à
+max_batch_size requêtes sont regroupées et traitées par un seul appel de
+batch_fn, exécuté dans un thread dédié. Chaque appelant récupère son propre
+résultat (ou l'exception du lot) via un futur. max_wait et max_batch_size
+arbitrent entre latence et débit.
+"""
+
+import os
+import time
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+
+class MicroBatcher:
+    """Regroupe les soumissions concurrentes en lots pour batch_fn"""
+
+    def __init__(self, batch_fn: Callable[[List[Any]], Sequence[Any]],
+                 max_batch_size: int = 32, max_wait: float = 0.005,
+                 name: str = "micro-batcher"):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size doit être >= 1")
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.name = name
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+
+    def _ensure_worker(self):
+        """Démarre le thread de traitement (une fois par processus, fork compris)"""
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            if self._pid is not None and self._pid != os.getpid():
+                # Après un fork: la file du parent (et son thread) sont inutilisables
+                self._queue = queue.Queue()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def submit(self, item: Any) -> Future:
+        """Ajoute item au prochain lot; le futur reçoit son résultat"""
+        self._ensure_worker()
+        future: Future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def do(self, item: Any, timeout: Optional[float] = None) -> Any:
+        """Soumet item et attend son résultat"""
+        return self.submit(item).result(timeout)
+
+    def _collect(self) -> List[tuple]:
+        """Attend une première requête puis complète le lot jusqu'à la fin de la fenêtre"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0
+                             else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            items = [item for item, _ in batch]
+            try:
+                results = self.batch_fn(items)
+                if len(results) != len(items):
+                    raise RuntimeError(
+                        f"{self.name}: {len(results)} résultats pour {len(items)} requêtes")
+            except BaseException as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            else:
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+
+            with self._lock:
+                self.batches += 1
+                self.items += len(batch)
+                self.largest_batch = max(self.largest_batch, len(batch))
+
+    def reset_stats(self):
+        with self._lock:
+            self.batches = self.items = self.largest_batch = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Compteurs: lots traités, requêtes, taille moyenne et maximale des lots"""
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "items": self.items,
+                "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+                "largest_batch": self.largest_batch,
+                "pending": self._queue.qsize(),
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+            }
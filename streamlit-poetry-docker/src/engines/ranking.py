@@ -0,0 +1,269 @@
+"""
+Re-classement vectorisé à partir des composantes du score
+
+Pour une requête (ingrédients + limite de temps), les composantes du score
+(jaccard, cosine, rating, popularité) sont calculées une seule fois pour
+toutes les recettes candidates. Tout mode de tri ou vecteur de poids est
+ensuite appliqué en une passe numpy sur l'ensemble des candidates, sans
+recalcul des similarités.
+"""
+
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .sharding import map_shards, shard_bounds, shard_count
+
+SORT_MODES = ("intelligent", "jaccard", "cosine", "score")
+
+COMPONENT_COLUMNS = ("jaccard", "cosine", "mean_rating_norm", "popularity")
+
+
+def composite_scores(normalized_score, jaccard=None, cosine=None):
+    """
+    Score composite du tri intelligent: 0.6 * score normalisé
+    + 0.25 * bonus Jaccard + 0.15 * bonus Cosine
+    """
+    jaccard_bonus = 0.0
+    if jaccard is not None:
+        jaccard_bonus = (jaccard > 0.3) * 0.1 + jaccard * 0.3
+
+    cosine_bonus = 0.0
+    if cosine is not None:
+        cosine_bonus = (cosine > 0.3) * 0.05 + cosine * 0.2
+
+    return 0.6 * normalized_score + 0.25 * jaccard_bonus + 0.15 * cosine_bonus
+
+
+def top_k_indices(primary: np.ndarray, k: int,
+                  secondary: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Positions des k plus grandes valeurs de primary, triées par ordre
+    décroissant (égalités départagées par secondary puis par position).
+    """
+    n = len(primary)
+    if n == 0 or k <= 0:
+        return np.empty(0, dtype=np.intp)
+
+    if k < n:
+        # Présélection O(n): toutes les valeurs >= k-ième plus grande
+        kth = np.partition(primary, n - k)[n - k]
+        candidates = np.flatnonzero(primary >= kth)
+    else:
+        candidates = np.arange(n)
+
+    keys = [candidates]
+    if secondary is not None:
+        keys.append(-secondary[candidates])
+    keys.append(-primary[candidates])
+    return candidates[np.lexsort(keys)][:k]
+
+
+def sharded_top_k(primary: np.ndarray, k: int, secondary: Optional[np.ndarray] = None,
+                  n_shards: Optional[int] = None) -> np.ndarray:
+    """
+    Même résultat que top_k_indices (ordre et égalités compris): top-k
+    partiel de chaque shard en parallèle, puis top-k des candidates retenues.
+    """
+    n_shards = shard_count(len(primary)) if n_shards is None else n_shards
+    if n_shards <= 1 or k <= 0:
+        return top_k_indices(primary, k, secondary)
+
+    def partial(start: int, stop: int) -> np.ndarray:
+        shard_secondary = secondary[start:stop] if secondary is not None else None
+        return top_k_indices(primary[start:stop], k, shard_secondary) + start
+
+    # Positions croissantes: les égalités restent départagées par position
+    candidates = np.sort(np.concatenate(map_shards(partial, shard_bounds(len(primary), n_shards))))
+    merged = top_k_indices(primary[candidates], k,
+                           secondary[candidates] if secondary is not None else None)
+    return candidates[merged]
+
+
+class ScoreComponents:
+    """
+    Composantes du score d'une requête pour toutes les recettes candidates.
+
+    degraded: None pour un scoring complet, sinon {"mode": ..., "reason": ...}
+    (composantes simplifiées servies par le contrôle d'admission)
+    """
+
+    def __init__(self, labels: np.ndarray, jaccard: np.ndarray, cosine: np.ndarray,
+                 mean_rating_norm: np.ndarray, popularity: np.ndarray,
+                 degraded: Optional[Dict[str, str]] = None):
+        self.labels = labels
+        self.jaccard = jaccard
+        self.cosine = cosine
+        self.mean_rating_norm = mean_rating_norm
+        self.popularity = popularity
+        self.degraded = degraded
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "ScoreComponents":
+        """Construit les vecteurs (float32) depuis RecipeScorer.score_components"""
+        return cls(df.index.to_numpy(),
+                   *(df[col].to_numpy(dtype=np.float32) for col in COMPONENT_COLUMNS))
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.labels.nbytes + sum(
+            getattr(self, col).nbytes for col in COMPONENT_COLUMNS))
+
+    def scores(self, weights: Dict[str, float], positions=slice(None)) -> np.ndarray:
+        """Score hybride pondéré (alpha, beta, gamma, delta) des candidates"""
+        return (weights["alpha"] * self.jaccard[positions].astype(np.float64)
+                + weights["delta"] * self.cosine[positions].astype(np.float64)
+                + weights["beta"] * self.mean_rating_norm[positions].astype(np.float64)
+                + weights["gamma"] * self.popularity[positions].astype(np.float64))
+
+    def sort_keys(self, sort_mode: str, weights: Dict[str, float],
+                  score_bounds: Optional[Tuple[float, float]] = None) -> "SortKeys":
+        """
+        Clés de tri globales (une passe vectorisée sur toutes les candidates).
+
+        score_bounds: (minimum, étendue) du score sur un ensemble plus large
+        de candidates (shards d'un scoring scatter-gather); par défaut,
+        calculés sur ces candidates.
+        """
+        if sort_mode not in SORT_MODES:
+            raise ValueError(f"Mode de tri inconnu: {sort_mode}")
+
+        score = self.scores(weights)
+        if score_bounds is not None:
+            score_min, score_range = score_bounds
+        else:
+            score_min = float(score.min()) if len(score) else 0.0
+            score_range = float(score.max()) - score_min if len(score) else 0.0
+
+        if sort_mode == "intelligent":
+            primary = composite_scores(
+                self._normalize(score, score_min, score_range),
+                self.jaccard.astype(np.float64), self.cosine.astype(np.float64))
+            secondary = None
+        elif sort_mode in ("jaccard", "cosine"):
+            primary = getattr(self, sort_mode).astype(np.float64)
+            secondary = score
+        else:
+            primary, secondary = score, None
+        return SortKeys(sort_mode, weights, primary, secondary, score_min, score_range)
+
+    @staticmethod
+    def _normalize(score: np.ndarray, score_min: float, score_range: float) -> np.ndarray:
+        if score_range > 0:
+            return (score - score_min) / score_range
+        return np.ones_like(score)
+
+    def frame(self, positions: np.ndarray, keys: "SortKeys") -> pd.DataFrame:
+        """
+        Lignes classées (DataFrame indexé par les labels des recettes) avec les
+        composantes, le score et, en mode intelligent, le score normalisé et
+        le score composite.
+        """
+        score = self.scores(keys.weights, positions)
+        columns = {
+            "jaccard": self.jaccard[positions].astype(np.float64),
+            "cosine": self.cosine[positions].astype(np.float64),
+            "mean_rating_norm": self.mean_rating_norm[positions].astype(np.float64),
+            "popularity": self.popularity[positions].astype(np.float64),
+            "score": score,
+        }
+        if keys.sort_mode == "intelligent":
+            columns["normalized_score"] = self._normalize(
+                score, keys.score_min, keys.score_range)
+            columns["composite_score"] = keys.primary[positions]
+        return pd.DataFrame(columns, index=self.labels[positions])
+
+    def rank(self, sort_mode: str, weights: Dict[str, float], top_k: int) -> pd.DataFrame:
+        """Classement global des top_k candidates pour un mode de tri et des poids"""
+        keys = self.sort_keys(sort_mode, weights)
+        return self.frame(keys.top(top_k), keys)
+
+
+class SortKeys:
+    """Clés de tri d'un classement (ordre total et déterministe)"""
+
+    def __init__(self, sort_mode: str, weights: Dict[str, float], primary: np.ndarray,
+                 secondary: Optional[np.ndarray], score_min: float, score_range: float):
+        self.sort_mode = sort_mode
+        self.weights = weights
+        self.primary = primary
+        self.secondary = secondary
+        self.score_min = score_min
+        self.score_range = score_range
+
+    def top(self, k: int) -> np.ndarray:
+        return sharded_top_k(self.primary, k, self.secondary)
+
+
+class RankedCursor:
+    """
+    Curseur paresseux sur le classement global d'une requête.
+
+    Seul le préfixe demandé est trié (argpartition); il est agrandi par
+    doublement quand on demande plus de résultats, sans recalculer les
+    similarités. Les lignes sont complétées par materialize (colonnes
+    d'affichage des recettes) au moment où elles sont lues.
+    """
+
+    def __init__(self, components: ScoreComponents, sort_mode: str,
+                 weights: Dict[str, float],
+                 materialize: Callable[[pd.DataFrame], pd.DataFrame]):
+        self.components = components
+        self.keys = components.sort_keys(sort_mode, weights)
+        self._materialize = materialize
+        self._order = np.empty(0, dtype=np.intp)
+        self.position = 0
+
+    def __len__(self) -> int:
+        return len(self.components)
+
+    @property
+    def sort_mode(self) -> str:
+        return self.keys.sort_mode
+
+    @property
+    def degraded(self) -> Optional[Dict[str, str]]:
+        return self.components.degraded
+
+    @property
+    def exhausted(self) -> bool:
+        return self.position >= len(self)
+
+    def _ensure(self, k: int):
+        k = min(k, len(self))
+        if k > len(self._order):
+            # Le préfixe des k meilleurs est stable: l'agrandir ne change pas
+            # l'ordre des éléments déjà servis
+            self._order = self.keys.top(max(k, 2 * len(self._order)))
+
+    def _rows(self, start: int, stop: int) -> pd.DataFrame:
+        self._ensure(stop)
+        return self._materialize(self.components.frame(self._order[start:stop], self.keys))
+
+    def take(self, n: int) -> pd.DataFrame:
+        """Les n premiers résultats du classement (ne déplace pas le curseur)"""
+        return self._rows(0, n)
+
+    def next(self, n: int) -> pd.DataFrame:
+        """Les n résultats suivants, puis avance le curseur"""
+        start = self.position
+        self.position = min(start + n, len(self))
+        return self._rows(start, self.position)
+
+    def reset(self):
+        self.position = 0
+
+    def iter_batches(self, batch_size: int = 20) -> Iterator[pd.DataFrame]:
+        """Générateur de lots successifs jusqu'à épuisement des candidates"""
+        while not self.exhausted:
+            yield self.next(batch_size)
+
+    def __iter__(self) -> Iterator[pd.Series]:
+        """Itère paresseusement sur les recettes, une à une"""
+        for batch in self.iter_batches():
+            for _, row in batch.iterrows():
+                yield row
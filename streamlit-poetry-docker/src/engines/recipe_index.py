@@ -0,0 +1,372 @@
+"""
+Index matriciel des recettes pour le scoring par lots
+
+Construit une fois par version des données (ou lu dans le bundle binaire
+écrit par le pipeline, voir index_bundle.py):
+- matrice creuse d'incidence recettes x ingrédients (Jaccard exact par
+  produit matriciel: intersection = R @ q, union = |r| + |q| - intersection);
+- matrice TF-IDF des recettes (normes L2), ajustée une fois sur le corpus
+  des recettes: la similarité cosine d'un lot est un seul produit creux;
+- composantes rating et popularité alignées sur les recettes;
+- bitmaps des filtres de temps proposés par l'application.
+
+Les grandes tables sont scorées par shards de recettes contigus en
+parallèle (voir sharding.py).
+
+Un lot de requêtes est empilé en matrices requêtes creuses et scoré en deux
+produits (Jaccard et cosine), puis découpé en ScoreComponents par requête.
+"""
+
+import os
+import sys
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .ranking import ScoreComponents
+from .sharding import map_shards, shard_bounds, shard_count
+from ..utils.config import DATA_PATHS
+
+logger = logging.getLogger(__name__)
+
+# Index de la version courante des données (une seule version gardée)
+_INDEXES: Dict[str, "RecipeIndex"] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def _reco_score():
+    sys.path.append('/preprocessing')
+    import reco_score
+    return reco_score
+
+
+def _index_bundle():
+    sys.path.append('/preprocessing')
+    import index_bundle
+    return index_bundle
+
+
+def index_available() -> bool:
+    """True si scipy/scikit-learn sont installés (scoring par lots possible)"""
+    return _reco_score().SKLEARN_AVAILABLE
+
+
+def _ingredient_set(ingredients) -> set:
+    if isinstance(ingredients, (list, set, tuple, np.ndarray)):
+        return {ing for ing in ingredients if ing}
+    return set()
+
+
+def _csr(data: np.ndarray, indices: np.ndarray, indptr: np.ndarray, shape):
+    """Matrice CSR sur des tableaux existants (memmap ou mémoire partagée), sans copie"""
+    from scipy.sparse import csr_matrix
+
+    matrix = csr_matrix(tuple(shape), dtype=data.dtype)
+    # Affectation directe: le constructeur pourrait copier ou convertir les indices
+    matrix.data, matrix.indices, matrix.indptr = data, indices, indptr
+    return matrix
+
+
+class RecipeIndex:
+    """Matrices creuses des recettes et composantes indépendantes de la requête"""
+
+    def __init__(self, labels: np.ndarray, vocabulary: Dict[str, int], incidence,
+                 sizes: np.ndarray, vectorizer, tfidf, mean_rating_norm: np.ndarray,
+                 popularity: np.ndarray, minutes: Optional[np.ndarray],
+                 time_filter_limits: Optional[np.ndarray] = None,
+                 time_filter_bitmaps: Optional[np.ndarray] = None):
+        self.labels = labels
+        self.vocabulary = vocabulary
+        self.incidence = incidence
+        self.sizes = sizes
+        self.vectorizer = vectorizer
+        self.tfidf = tfidf
+        self.mean_rating_norm = mean_rating_norm
+        self.popularity = popularity
+        self.minutes = minutes
+        self.time_filter_limits = time_filter_limits
+        self.time_filter_bitmaps = time_filter_bitmaps
+        # Lignes de chaque shard (vues sur les matrices), par bornes
+        self._shards: Dict[Tuple[int, int], tuple] = {}
+        # Listes inversées ingrédient -> recettes (mode dégradé, au premier usage)
+        self._postings = None
+        self._time_filters = ({int(limit): row for limit, row
+                               in zip(time_filter_limits, time_filter_bitmaps)}
+                              if time_filter_bitmaps is not None else {})
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    @classmethod
+    def build(cls, recipes_df: pd.DataFrame, interactions_df: pd.DataFrame) -> "RecipeIndex":
+        """Construit l'index (préparation des textes et stats identiques à RecipeScorer)"""
+        arrays, attrs = _index_bundle().build_index_arrays(recipes_df, interactions_df)
+        return cls.from_arrays(arrays, attrs, recipes_df.index.to_numpy())
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], attrs: Dict[str, Any],
+                    labels: np.ndarray) -> "RecipeIndex":
+        """Index sur les tableaux de build_index_arrays ou d'un bundle (sans copie)"""
+        index_bundle = _index_bundle()
+        vocabulary = {ingredient: position for position, ingredient in enumerate(
+            index_bundle.decode_strings(arrays["vocabulary_blob"], arrays["vocabulary_offsets"]))}
+
+        vectorizer, tfidf = None, None
+        if attrs.get("tfidf_shape") is not None:
+            # Vectorizer reconstruit à partir des termes et de l'idf du corpus
+            _, TfidfVectorizer, _ = _reco_score().import_sklearn()
+            terms = index_bundle.decode_strings(arrays["tfidf_terms_blob"],
+                                                arrays["tfidf_terms_offsets"])
+            vectorizer = TfidfVectorizer(lowercase=True, stop_words=None, ngram_range=(1, 1),
+                                         vocabulary={term: i for i, term in enumerate(terms)},
+                                         dtype=np.float32)
+            vectorizer.idf_ = np.asarray(arrays["tfidf_idf"])
+            tfidf = _csr(arrays["tfidf_data"], arrays["tfidf_indices"], arrays["tfidf_indptr"],
+                         attrs["tfidf_shape"])
+
+        return cls(labels, vocabulary,
+                   _csr(arrays["incidence_data"], arrays["incidence_indices"],
+                        arrays["incidence_indptr"], attrs["incidence_shape"]),
+                   arrays["sizes"], vectorizer, tfidf,
+                   arrays["mean_rating_norm"], arrays["popularity"], arrays.get("minutes"),
+                   arrays.get("time_filter_limits"), arrays.get("time_filter_bitmaps"))
+
+    @classmethod
+    def from_bundle(cls, path: str, recipes_df: Optional[pd.DataFrame] = None,
+                    verify: bool = True) -> "RecipeIndex":
+        """
+        Index adossé au bundle du pipeline (memmap). Le bundle doit décrire
+        exactement les recettes chargées (mêmes identifiants, même ordre).
+        Sans recipes_df (serveur de shard), les recettes sont désignées par
+        leur identifiant.
+
+        Raises:
+            IndexBundleError: bundle corrompu, incompatible ou d'autres recettes
+        """
+        index_bundle = _index_bundle()
+        bundle = index_bundle.read_index_bundle(path, verify=verify)
+        if recipes_df is None:
+            labels = np.asarray(bundle["recipe_ids"])
+        elif (bundle.attrs.get("n_recipes") != len(recipes_df)
+                or not np.array_equal(bundle["recipe_ids"], recipes_df['id'].to_numpy())):
+            raise index_bundle.IndexBundleError(
+                "Bundle d'index construit pour d'autres recettes, à reconstruire")
+        else:
+            labels = recipes_df.index.to_numpy()
+        index = cls.from_arrays(bundle.arrays, bundle.attrs, labels)
+        # Le fichier reste projeté tant que l'index existe
+        index._bundle = bundle
+        return index
+
+    def _candidates(self, time_limit: Optional[int]) -> Optional[np.ndarray]:
+        """Positions des recettes sous la limite de temps (None: toutes)"""
+        if not time_limit or self.minutes is None:
+            return None
+        bitmap = self._time_filters.get(time_limit)
+        if bitmap is not None:
+            return np.flatnonzero(np.unpackbits(bitmap, count=len(self))).astype(np.int32)
+        return np.flatnonzero(self.minutes <= time_limit).astype(np.int32)
+
+    def _query_incidence(self, ingredient_sets: Sequence[set]):
+        """Matrice ingrédients x requêtes (binaire) et taille de chaque requête"""
+        from scipy.sparse import csr_matrix
+
+        rows, cols = [], []
+        for j, ingredients in enumerate(ingredient_sets):
+            for ingredient in ingredients:
+                position = self.vocabulary.get(ingredient)
+                if position is not None:
+                    rows.append(position)
+                    cols.append(j)
+        matrix = csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, cols)),
+                            shape=(len(self.vocabulary), len(ingredient_sets)))
+        sizes = np.array([len(ingredients) for ingredients in ingredient_sets], dtype=np.float32)
+        return matrix, sizes
+
+    def _shard(self, start: int, stop: int):
+        """Matrices d'incidence et TF-IDF des lignes [début, fin) (vues, sans copie des données)"""
+        if start == 0 and stop == len(self):
+            return self.incidence, self.tfidf
+        key = (start, stop)
+        shard = self._shards.get(key)
+        if shard is None:
+            def rows(matrix):
+                if matrix is None:
+                    return None
+                lo, hi = int(matrix.indptr[start]), int(matrix.indptr[stop])
+                return _csr(matrix.data[lo:hi], matrix.indices[lo:hi],
+                            matrix.indptr[start:stop + 1] - lo, (stop - start, matrix.shape[1]))
+            shard = self._shards[key] = (rows(self.incidence), rows(self.tfidf))
+        return shard
+
+    def score_arrays(self, queries: Sequence[Tuple[Sequence[str], Optional[int]]],
+                     n_shards: Optional[int] = None
+                     ) -> List[Tuple[Optional[np.ndarray], np.ndarray, np.ndarray]]:
+        """
+        Pour chaque requête (ingrédients, limite de temps): positions des
+        recettes candidates (None: toutes), Jaccard et cosine, à partir de
+        deux produits creux pour tout le lot, par shards de recettes scorés
+        en parallèle (n_shards: voir sharding.shard_count).
+        """
+        if not queries:
+            return []
+
+        ingredient_sets = [_ingredient_set(list(ingredients)) for ingredients, _ in queries]
+        query_matrix, query_sizes = self._query_incidence(ingredient_sets)
+
+        # Vecteurs TF-IDF des requêtes (normes L2)
+        query_vectors = None
+        if self.vectorizer is not None:
+            user_texts = [' '.join(str(ing).lower().strip() for ing in ingredients if ing)
+                          for ingredients, _ in queries]
+            query_vectors = self.vectorizer.transform(user_texts).T.tocsr()
+
+        candidates = [self._candidates(time_limit) for _, time_limit in queries]
+
+        def score_shard(start: int, stop: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+            incidence, tfidf = self._shard(start, stop)
+            # Jaccard et cosine de toutes les requêtes: un produit creux chacun
+            intersections = (incidence @ query_matrix).tocsc()
+            cosines = (tfidf @ query_vectors).tocsc() if query_vectors is not None else None
+
+            scored = []
+            for j, positions in enumerate(candidates):
+                if positions is None:
+                    selection = slice(None)
+                else:
+                    lo, hi = np.searchsorted(positions, (start, stop))
+                    selection = positions[lo:hi] - start
+
+                sizes = self.sizes[start:stop][selection]
+                intersection = intersections[:, j].toarray().ravel()[selection]
+                union = sizes + query_sizes[j] - intersection
+                jaccard = np.divide(intersection, union, out=np.zeros_like(intersection),
+                                    where=(union > 0) & (sizes > 0))
+                cosine = (np.clip(cosines[:, j].toarray().ravel()[selection], 0.0, 1.0)
+                          if cosines is not None else jaccard.copy())
+                scored.append((jaccard.astype(np.float32), cosine.astype(np.float32)))
+            return scored
+
+        n_shards = shard_count(len(self)) if n_shards is None else n_shards
+        shards = map_shards(score_shard, shard_bounds(len(self), n_shards))
+
+        results = []
+        for j, positions in enumerate(candidates):
+            if len(shards) == 1:
+                jaccard, cosine = shards[0][j]
+            else:
+                jaccard = np.concatenate([shard[j][0] for shard in shards])
+                cosine = np.concatenate([shard[j][1] for shard in shards])
+            results.append((positions, jaccard, cosine))
+        return results
+
+    def jaccard_components(self, ingredients: Sequence[str],
+                           time_limit: Optional[int]) -> Optional[ScoreComponents]:
+        """
+        Mode dégradé: Jaccard seul (cosine nulle) sur les seules recettes
+        partageant au moins un ingrédient, trouvées par listes inversées.
+        None si aucune recette candidate.
+        """
+        ingredient_set = _ingredient_set(list(ingredients))
+        columns = [self.vocabulary[ing] for ing in ingredient_set if ing in self.vocabulary]
+        if not columns:
+            return None
+
+        if self._postings is None:
+            self._postings = self.incidence.tocsc()
+        postings = self._postings
+        hits = np.concatenate([postings.indices[postings.indptr[c]:postings.indptr[c + 1]]
+                               for c in columns])
+        # Intersection = nombre d'apparitions de la recette dans les listes
+        candidates, intersection = np.unique(hits, return_counts=True)
+        if time_limit and self.minutes is not None:
+            keep = self.minutes[candidates] <= time_limit
+            candidates, intersection = candidates[keep], intersection[keep]
+        if len(candidates) == 0:
+            return None
+
+        union = self.sizes[candidates] + len(ingredient_set) - intersection
+        jaccard = (intersection / union).astype(np.float32)
+        return ScoreComponents(self.labels[candidates], jaccard, np.zeros_like(jaccard),
+                               self.mean_rating_norm[candidates], self.popularity[candidates])
+
+    def components(self, positions: Optional[np.ndarray], jaccard: np.ndarray,
+                   cosine: np.ndarray) -> ScoreComponents:
+        """Composantes d'une requête (rating et popularité lus dans l'index)"""
+        selection = slice(None) if positions is None else positions
+        return ScoreComponents(self.labels[selection], jaccard, cosine,
+                               self.mean_rating_norm[selection], self.popularity[selection])
+
+    def score_batch(self, queries: Sequence[Tuple[Sequence[str], Optional[int]]]
+                    ) -> List[ScoreComponents]:
+        """Composantes du score de chaque requête du lot"""
+        return [self.components(*arrays) for arrays in self.score_arrays(queries)]
+
+
+def load_recipe_index(recipes_df: pd.DataFrame, interactions_df: pd.DataFrame,
+                      bundle_path: Optional[str] = None,
+                      build: bool = True) -> Optional[RecipeIndex]:
+    """
+    Index lu dans le bundle du pipeline s'il correspond aux recettes, sinon
+    construit (build=False: None plutôt que de construire)
+    """
+    bundle_path = bundle_path if bundle_path is not None else DATA_PATHS["index_bundle"]
+    if bundle_path and os.path.exists(bundle_path):
+        try:
+            index = RecipeIndex.from_bundle(bundle_path, recipes_df)
+            logger.info(f"✅ Index des recettes ouvert depuis {bundle_path}")
+            return index
+        except (ValueError, OSError) as e:
+            # IndexBundleError (ValueError) ou fichier illisible
+            logger.warning(f"⚠️ Bundle d'index ignoré, reconstruction: {e}")
+    return RecipeIndex.build(recipes_df, interactions_df) if build else None
+
+
+def get_recipe_index(recipes_df: pd.DataFrame, interactions_df: pd.DataFrame,
+                     data_version: str, build: bool = True) -> Optional[RecipeIndex]:
+    """
+    Index de la version des données (chargé une seule fois par processus).
+    build=False: seulement s'il est déjà chargé ou ouvrable depuis le bundle
+    (quelques millisecondes), sinon None.
+    """
+    with _INDEXES_LOCK:
+        index = _INDEXES.get(data_version)
+        if index is None:
+            index = load_recipe_index(recipes_df, interactions_df, build=build)
+            if index is None:
+                return None
+            _INDEXES.clear()
+            _INDEXES[data_version] = index
+            logger.info(f"✅ Index des recettes prêt ({len(index):,} recettes, "
+                        f"{len(index.vocabulary):,} ingrédients)")
+        return index
+
+
+def register_recipe_index(data_version: str, index) -> None:
+    """
+    Index d'une version dérivée sans chargement (insertions en ligne, voir
+    live_index.py). Celui de la version servie reste disponible jusqu'à la
+    bascule.
+    """
+    with _INDEXES_LOCK:
+        _INDEXES[data_version] = index
+
+
+def registered_recipe_index(data_version: str):
+    """Index déjà chargé ou enregistré pour la version (None sinon)"""
+    with _INDEXES_LOCK:
+        return _INDEXES.get(data_version)
+
+
+def release_recipe_indexes(keep: Sequence[str] = ()):
+    """
+    Oublie les index chargés (bascule des artefacts), sauf ceux des versions
+    keep: chacun est libéré dès que les requêtes en cours qui l'utilisent
+    sont terminées
+    """
+    with _INDEXES_LOCK:
+        for data_version in [v for v in _INDEXES if v not in keep]:
+            del _INDEXES[data_version]
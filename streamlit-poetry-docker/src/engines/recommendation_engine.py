@@ -1,16 +1,269 @@
 """
 Moteur de recommandations pour l'application MangeTaMain
+
+Indépendant de Streamlit: utilisé par l'application et par le service HTTP
+(src/service). Les erreurs sont journalisées; l'appelant choisit de les
+afficher (raise_errors=True) ou de recevoir un résultat vide.
 """
 
-import streamlit as st
+import hashlib
+import json
+import logging
+import os
+import time
+import numpy as np
 import pandas as pd
 import sys
-from typing import List, Optional
+from collections import defaultdict
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from .result_cache import ResultCache, make_query_key
+from .ranking import SORT_MODES, RankedCursor, ScoreComponents, composite_scores
+from .disk_cache import open_disk_cache
+from .single_flight import SingleFlight
+from .micro_batcher import MicroBatcher
+from .recipe_index import (get_recipe_index, index_available, register_recipe_index,
+                           release_recipe_indexes)
+from .live_index import LiveRecipeIndex
+from .shared_index import acquire_worker_pool, worker_pool_stats
+from .admission import AdmissionController
+from .scatter_gather import ScatterGatherCoordinator, parse_addresses
+from ..utils.config import (ADMISSION_CONFIG, BATCH_CONFIG, CACHE_CONFIG, DATA_PATHS,
+                            LIVE_INDEX_CONFIG, SCATTER_CONFIG, SHARD_CONFIG, WORKER_CONFIG)
+
+logger = logging.getLogger(__name__)
+
+# Cache des résultats partagé par toutes les sessions du processus (niveau 1)
+RESULT_CACHE = ResultCache(
+    max_entries=CACHE_CONFIG["recommendations_max_entries"],
+    max_bytes=CACHE_CONFIG["recommendations_max_bytes"],
+    ttl=CACHE_CONFIG["recommendations_ttl"],
+)
+
+# Composantes du score par requête (ingrédients + limite de temps): un
+# changement de mode de tri ou de poids re-classe sans recalculer
+COMPONENT_CACHE = ResultCache(
+    max_entries=CACHE_CONFIG["components_max_entries"],
+    max_bytes=CACHE_CONFIG["components_max_bytes"],
+    ttl=CACHE_CONFIG["recommendations_ttl"],
+)
+
+
+def _cache_format_version() -> str:
+    """Version du format des résultats picklés: code du moteur et version de pandas"""
+    sys.path.append('/preprocessing')
+    from artifact_manifest import code_version
+    return f"{code_version(os.path.dirname(os.path.abspath(__file__)))}-pandas{pd.__version__}"
+
+
+# Cache disque partagé entre processus et répliques (niveau 2), activé
+# seulement si le volume de données est monté
+DISK_CACHE = open_disk_cache(
+    DATA_PATHS["result_cache"],
+    max_bytes=CACHE_CONFIG["disk_cache_max_bytes"],
+    ttl=CACHE_CONFIG["disk_cache_ttl"],
+    format_version=_cache_format_version(),
+) if CACHE_CONFIG["disk_cache_enabled"] else None
+
+# Les requêtes identiques simultanées partagent un seul calcul
+SINGLE_FLIGHT = SingleFlight()
+
+# Processus de scoring partageant l'index (0: index dans ce processus)
+SCORING_WORKERS = WORKER_CONFIG["workers"] if index_available() else 0
+
+# Scoring de chaque requête par l'index, en shards parallèles (voir sharding.py)
+SHARDED_SCORING = SHARD_CONFIG["enabled"] and index_available()
+
+
+# Serveurs de shards: chaque requête est répartie puis les top-k fusionnés
+SCATTER_GATHER = ScatterGatherCoordinator(
+    parse_addresses(SCATTER_CONFIG["shards"]),
+    timeout=SCATTER_CONFIG["timeout_ms"] / 1000,
+) if SCATTER_CONFIG["shards"] else None
+
+# Identifiants -> labels des recettes (version courante des données)
+_RECIPE_IDS: Dict[str, pd.Index] = {}
+
+# Versions dérivées par les insertions en ligne ("<version>+live<empreinte>"):
+# l'empreinte couvre la version parente et les recettes reçues, jamais
+# réutilisée pour un autre contenu (clés du cache disque partagé)
+LIVE_VERSION_SEPARATOR = "+live"
+
+
+def _json_default(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+def _live_version(data_version: str, labels: np.ndarray, recipes: pd.DataFrame) -> str:
+    """Version dérivée de data_version par l'insertion de recipes (aux positions labels)"""
+    digest = hashlib.sha256(data_version.encode('utf-8'))
+    digest.update(json.dumps([labels.tolist(), recipes.to_dict('records')], sort_keys=True,
+                             default=_json_default).encode('utf-8'))
+    base_version = data_version.split(LIVE_VERSION_SEPARATOR)[0]
+    return f"{base_version}{LIVE_VERSION_SEPARATOR}{digest.hexdigest()[:16]}"
+
+
+# Contrôle d'admission: au-delà, réponse dégradée plutôt qu'attente
+ADMISSION = AdmissionController(
+    max_concurrent=ADMISSION_CONFIG["max_concurrent"],
+    max_queue=ADMISSION_CONFIG["max_queue"],
+) if ADMISSION_CONFIG["enabled"] else None
+
+
+def _deadline(latency_budget: Optional[float]) -> float:
+    """Échéance (time.monotonic) d'une requête de budget latency_budget secondes"""
+    if latency_budget is None:
+        latency_budget = ADMISSION_CONFIG["latency_budget_ms"] / 1000
+    return time.monotonic() + latency_budget
+
+
+def _score_batch(items: List[tuple]) -> List[ScoreComponents]:
+    """
+    Scoring d'un lot de requêtes (recipes_df, interactions_df, ingrédients,
+    limite de temps, version): un passage par l'index par version des données,
+    réparti entre les processus de scoring si SCORING_WORKERS > 0
+    """
+    results: List[Optional[ScoreComponents]] = [None] * len(items)
+    groups = defaultdict(list)
+    for position, item in enumerate(items):
+        groups[item[4]].append(position)
+
+    for data_version, positions in groups.items():
+        recipes_df, interactions_df = items[positions[0]][:2]
+        queries = [items[p][2:4] for p in positions]
+        if SCORING_WORKERS:
+            # Pool réservé: une bascule de version ne l'arrête pas sous ce lot
+            with acquire_worker_pool(recipes_df, interactions_df, data_version,
+                                     SCORING_WORKERS) as scorer:
+                scored = scorer.score_batch(queries)
+        else:
+            scored = get_recipe_index(recipes_df, interactions_df, data_version).score_batch(queries)
+        for position, components in zip(positions, scored):
+            results[position] = components
+    return results
+
+
+# Micro-batching: les requêtes distinctes reçues dans la même fenêtre sont
+# scorées ensemble (désactivé par défaut, voir BATCH_CONFIG)
+BATCHER = MicroBatcher(
+    _score_batch,
+    max_batch_size=BATCH_CONFIG["max_batch_size"],
+    max_wait=BATCH_CONFIG["max_wait_ms"] / 1000,
+    name="scoring-batcher",
+) if BATCH_CONFIG["enabled"] and index_available() else None
+
+
+def _index_scoring() -> bool:
+    """True si les requêtes sont scorées par l'index des recettes plutôt que par RecipeScorer"""
+    return (BATCHER is not None or bool(SCORING_WORKERS) or SHARDED_SCORING
+            or SCATTER_GATHER is not None)
 
 
 class RecommendationEngine:
     """Moteur de recommandations"""
 
+    # 🆕 Paramètres optimisés pour système hybride Jaccard+Cosine
+    SCORER_WEIGHTS = {
+        "alpha": 0.4,  # Jaccard similarity
+        "beta": 0.3,   # Rating moyen
+        "gamma": 0.2,  # Popularité
+        "delta": 0.1,  # Cosine similarity (TF-IDF)
+    }
+
+    @staticmethod
+    def compute_data_version(recipes_df: pd.DataFrame, interactions_df: pd.DataFrame) -> str:
+        """Empreinte légère des données, utilisée quand aucune version n'est fournie"""
+        id_col = 'id' if 'id' in recipes_df.columns else 'recipe_id'
+        ids_hash = 0
+        if id_col in recipes_df.columns:
+            ids_hash = int(pd.util.hash_pandas_object(recipes_df[id_col], index=False).sum())
+        return f"{len(recipes_df)}-{len(interactions_df)}-{ids_hash}"
+
+    @staticmethod
+    def cache_stats() -> Dict[str, Any]:
+        """Compteurs des caches de résultats (mémoire et disque)"""
+        stats = RESULT_CACHE.stats()
+        stats["components"] = COMPONENT_CACHE.stats()
+        stats["disk"] = DISK_CACHE.stats() if DISK_CACHE is not None else None
+        stats["single_flight"] = SINGLE_FLIGHT.stats()
+        stats["micro_batching"] = BATCHER.stats() if BATCHER is not None else None
+        stats["scoring_workers"] = worker_pool_stats()
+        stats["sharded_scoring"] = ({"max_threads": SHARD_CONFIG["max_threads"],
+                                     "min_shard_size": SHARD_CONFIG["min_shard_size"]}
+                                    if SHARDED_SCORING else None)
+        stats["admission"] = ADMISSION.stats() if ADMISSION is not None else None
+        stats["scatter_gather"] = SCATTER_GATHER.stats() if SCATTER_GATHER is not None else None
+        return stats
+
+    @staticmethod
+    def release_data_version(previous_version: Optional[str], data_version: Optional[str]):
+        """
+        Bascule des artefacts: vide les caches de l'ancienne version (résultats,
+        composantes, index). Les requêtes en cours terminent sur leurs propres
+        références; le pool de scoring est remplacé à la première requête de
+        la nouvelle version.
+        """
+        RESULT_CACHE.clear()
+        COMPONENT_CACHE.clear()
+        # Index déjà dérivé pour la nouvelle version (insertions en ligne) conservé
+        release_recipe_indexes(keep=(data_version, f"{data_version}+index"))
+        _RECIPE_IDS.clear()
+        logger.info(f"🔄 Caches de la version {previous_version} invalidés")
+
+    @staticmethod
+    def upsert_recipes(recipes_df: pd.DataFrame,
+                       interactions_df: pd.DataFrame,
+                       recipes: pd.DataFrame,
+                       data_version: Optional[str] = None) -> Tuple[pd.DataFrame, str]:
+        """
+        Insère ou met à jour des recettes prétraitées
+        (RecipePreprocessor.prepare_recipes), identifiées par 'id', sans
+        reconstruire l'index: les recettes modifiées gardent leur position,
+        les nouvelles sont ajoutées à la fin; l'index de la version courante
+        reçoit un segment delta (voir live_index.py).
+
+        La version courante n'est pas modifiée: retourne le DataFrame et la
+        version dérivés, à publier par l'appelant (DataManager.publish_update).
+        """
+        if data_version is None:
+            data_version = RecommendationEngine.compute_data_version(recipes_df, interactions_df)
+        recipes = recipes.drop_duplicates('id', keep='last')
+
+        rows = pd.Index(recipes_df['id']).get_indexer(recipes['id'])
+        updated = rows >= 0
+        labels = np.empty(len(recipes), dtype=recipes_df.index.dtype)
+        labels[updated] = recipes_df.index.to_numpy()[rows[updated]]
+        first_label = recipes_df.index.max() + 1 if len(recipes_df) else 0
+        labels[~updated] = first_label + np.arange(int((~updated).sum()))
+
+        recipes = recipes.set_axis(labels).reindex(columns=recipes_df.columns)
+        updated_recipes_df = pd.concat(
+            [recipes_df.drop(index=labels[updated]), recipes]
+        ).reindex(recipes_df.index.append(pd.Index(labels[~updated])))
+
+        new_version = _live_version(data_version, labels, recipes)
+
+        if _index_scoring():
+            index = LiveRecipeIndex.wrap(get_recipe_index(
+                recipes_df, interactions_df, f"{data_version}+index"))
+            ingredient_col = ('normalized_ingredients' if 'normalized_ingredients' in recipes.columns
+                              else 'ingredients')
+            minutes = (pd.to_numeric(recipes['minutes'], errors='coerce')
+                       if 'minutes' in recipes.columns else pd.Series(np.nan, index=recipes.index))
+            index = index.upsert(labels, recipes[ingredient_col].tolist(), minutes.to_numpy(),
+                                 compact_rows=LIVE_INDEX_CONFIG["compact_rows"])
+            register_recipe_index(f"{new_version}+index", index)
+            logger.info(f"🧩 Index dérivé pour {new_version}: {index.stats()}")
+
+        logger.info(f"✅ {int(updated.sum())} recettes modifiées, {int((~updated).sum())} "
+                    f"insérées ({data_version} -> {new_version})")
+        return updated_recipes_df, new_version
+
     @staticmethod
     def _calculate_composite_score(recommendations: pd.DataFrame) -> pd.DataFrame:
         """Calculate composite score combining similarity score and Jaccard index."""
@@ -37,76 +290,341 @@ class RecommendationEngine:
         else:
             recommendations['normalized_score'] = 1.0
 
-        # Calculate Jaccard bonus if jaccard column exists
-        jaccard_bonus = 0.0
-        if 'jaccard' in recommendations.columns:
-            high_jaccard_bonus = (recommendations['jaccard'] > 0.3).astype(float) * 0.1
-            jaccard_weight = recommendations['jaccard'] * 0.3
-            jaccard_bonus = high_jaccard_bonus + jaccard_weight
-
-        # Calculate Cosine bonus if cosine column exists
-        cosine_bonus = 0.0
-        if 'cosine' in recommendations.columns:
-            high_cosine_bonus = (recommendations['cosine'] > 0.3).astype(float) * 0.05
-            cosine_weight = recommendations['cosine'] * 0.2
-            cosine_bonus = high_cosine_bonus + cosine_weight
-
         # Composite score: 0.6 * normalized similarity + 0.25 * jaccard + 0.15 * cosine
-        recommendations['composite_score'] = (
-            0.6 * recommendations['normalized_score']
-            + 0.25 * jaccard_bonus
-            + 0.15 * cosine_bonus
+        recommendations['composite_score'] = composite_scores(
+            recommendations['normalized_score'],
+            recommendations['jaccard'] if 'jaccard' in recommendations.columns else None,
+            recommendations['cosine'] if 'cosine' in recommendations.columns else None,
         )
 
         return recommendations
 
     @staticmethod
-    def get_recommendations(recipes_df: pd.DataFrame,
+    def _resolve_query(recipes_df: pd.DataFrame,
+                       interactions_df: pd.DataFrame,
+                       prioritize_jaccard: bool,
+                       data_version: Optional[str],
+                       sort_mode: Optional[str],
+                       weights: Optional[Dict[str, float]]) -> Tuple[str, Dict[str, float], str]:
+        """Mode de tri, poids complets et version des données d'une requête"""
+        if sort_mode is None:
+            sort_mode = "intelligent" if prioritize_jaccard else "score"
+        if sort_mode not in SORT_MODES:
+            raise ValueError(f"Mode de tri inconnu: {sort_mode}")
+        weights = {**RecommendationEngine.SCORER_WEIGHTS, **(weights or {})}
+        if data_version is None:
+            data_version = RecommendationEngine.compute_data_version(
+                recipes_df, interactions_df)
+        if _index_scoring():
+            # Scores issus de l'index (TF-IDF ajusté sur tout le corpus): clés
+            # de cache distinctes de celles du scoring requête par requête
+            data_version = f"{data_version}+index"
+        return sort_mode, weights, data_version
+
+    @staticmethod
+    def _popular_components(recipes_df: pd.DataFrame,
                             interactions_df: pd.DataFrame,
-                            user_ingredients: List[str],
                             time_limit: Optional[int],
-                            n_recommendations: int,
-                            prioritize_jaccard: bool = True) -> pd.DataFrame:
+                            data_version: str) -> ScoreComponents:
+        """Rating et popularité seuls, similarités nulles (calculés une fois par version)"""
+        key = ("popular",)
+        popular = COMPONENT_CACHE.get(key, data_version)
+        if popular is None:
+            index = get_recipe_index(recipes_df, interactions_df, data_version, build=False)
+            if index is not None:
+                mean_rating_norm, popularity = index.mean_rating_norm, index.popularity
+            else:
+                sys.path.append('/preprocessing')
+                from reco_score import RecipeScorer
+
+                stats = RecipeScorer().compute_base_score(
+                    recipes_df, interactions_df).set_index('id')
+                mean_rating_norm = (recipes_df['id'].map(stats['mean_rating_norm'])
+                                    .fillna(0.5).to_numpy(dtype=np.float32))
+                popularity = (recipes_df['id'].map(stats['popularity'])
+                              .fillna(0.0).to_numpy(dtype=np.float32))
+            zeros = np.zeros(len(recipes_df), dtype=np.float32)
+            popular = ScoreComponents(recipes_df.index.to_numpy(), zeros, zeros,
+                                      mean_rating_norm, popularity)
+            COMPONENT_CACHE.put(key, popular, data_version)
+
+        keep = slice(None)
+        if time_limit and 'minutes' in recipes_df.columns:
+            keep = pd.to_numeric(recipes_df['minutes'], errors='coerce').to_numpy() <= time_limit
+        return ScoreComponents(popular.labels[keep], popular.jaccard[keep], popular.cosine[keep],
+                               popular.mean_rating_norm[keep], popular.popularity[keep])
+
+    @staticmethod
+    def _degraded_components(recipes_df: pd.DataFrame,
+                             interactions_df: pd.DataFrame,
+                             ingredients: tuple,
+                             time_limit: Optional[int],
+                             data_version: str,
+                             reason: str) -> ScoreComponents:
         """
-        Système de recommandation avec cache et tri intelligent
+        Composantes servies sans scoring complet (requête refusée par le
+        contrôle d'admission): Jaccard seul sur les listes inversées si l'index
+        est déjà chargé (ou ouvrable depuis le bundle), sinon recettes populaires
+        """
+        components = None
+        if index_available():
+            index = get_recipe_index(recipes_df, interactions_df, data_version, build=False)
+            if index is not None:
+                components = index.jaccard_components(ingredients, time_limit)
+        mode = "jaccard_only"
+        if components is None:
+            components = RecommendationEngine._popular_components(
+                recipes_df, interactions_df, time_limit, data_version)
+            mode = "popular"
+        components.degraded = {"mode": mode, "reason": reason}
+        logger.warning(f"⚠️ Scoring dégradé ({mode}, {reason})")
+        return components
 
-        Args:
-            prioritize_jaccard: Si True, donne plus d'importance à l'indice Jaccard
+    @staticmethod
+    def _get_components(recipes_df: pd.DataFrame,
+                        interactions_df: pd.DataFrame,
+                        ingredients: tuple,
+                        time_limit: Optional[int],
+                        data_version: str,
+                        deadline: Optional[float] = None) -> ScoreComponents:
         """
-        try:
+        Composantes du score de la requête (cache, sinon calcul unique admis
+        par le contrôle d'admission, sinon composantes dégradées non mises en cache)
+        """
+        key = ("components", ingredients, time_limit)
+        components = COMPONENT_CACHE.get(key, data_version)
+        if components is not None:
+            return components
+
+        def compute() -> ScoreComponents:
+            with ADMISSION.admit(deadline) if ADMISSION is not None else nullcontext() as refused:
+                if refused is None:
+                    return full_compute()
+            return RecommendationEngine._degraded_components(
+                recipes_df, interactions_df, ingredients, time_limit, data_version, refused)
+
+        def full_compute() -> ScoreComponents:
+            item = (recipes_df, interactions_df, ingredients, time_limit, data_version)
+            if _index_scoring():
+                result = BATCHER.do(item) if BATCHER is not None else _score_batch([item])[0]
+                COMPONENT_CACHE.put(key, result, data_version)
+                return result
+
             # Import du système de scoring
             sys.path.append('/preprocessing')
             from reco_score import RecipeScorer
 
-            # Créer le scorer et obtenir les recommandations
-            # 🆕 Paramètres optimisés pour système hybride Jaccard+Cosine
-            scorer = RecipeScorer(
-                alpha=0.4,  # Jaccard similarity
-                beta=0.3,   # Rating moyen
-                gamma=0.2,  # Popularité
-                delta=0.1   # Cosine similarity (TF-IDF)
-            )
-
-            recommendations = scorer.recommend(
+            scorer = RecipeScorer(**RecommendationEngine.SCORER_WEIGHTS)
+            frame = scorer.score_components(
                 recipes_df=recipes_df,
                 interactions_df=interactions_df,
-                user_ingredients=user_ingredients,
-                time_limit=time_limit,
-                top_n=n_recommendations * 2  # Récupérer plus pour mieux trier
+                user_ingredients=list(ingredients),
+                time_limit=time_limit
             )
+            result = ScoreComponents.from_frame(frame)
+            COMPONENT_CACHE.put(key, result, data_version)
+            return result
 
-            if not recommendations.empty and prioritize_jaccard:
-                # Appliquer le tri composite intelligent
-                recommendations = RecommendationEngine._calculate_composite_score(
-                    recommendations
-                )
+        return SINGLE_FLIGHT.do((key, data_version), compute)
 
-                # Trier par score composite et retourner le nombre demandé
-                recommendations = recommendations.sort_values(
-                    'composite_score', ascending=False).head(n_recommendations)
+    @staticmethod
+    def _gathered_components(recipes_df: pd.DataFrame,
+                             ingredients: tuple,
+                             time_limit: Optional[int],
+                             data_version: str,
+                             sort_mode: str,
+                             weights: Dict[str, float],
+                             depth: int) -> ScoreComponents:
+        """Top-depth global des serveurs de shards, désignés par les labels de recipes_df"""
+        gathered = SCATTER_GATHER.gather(ingredients, time_limit, sort_mode, weights, depth)
 
-            return recommendations
+        recipe_ids = _RECIPE_IDS.get(data_version)
+        if recipe_ids is None:
+            recipe_ids = pd.Index(recipes_df['id'])
+            _RECIPE_IDS.clear()
+            _RECIPE_IDS[data_version] = recipe_ids
+        rows = recipe_ids.get_indexer(gathered.labels)
+        if (rows < 0).any():
+            # Shards construits sur d'autres recettes: lignes inconnues ignorées
+            logger.warning(f"⚠️ {int((rows < 0).sum())} recettes des shards absentes des données")
+            gathered = gathered.subset(rows >= 0)
+            rows = rows[rows >= 0]
+        gathered.labels = recipes_df.index.to_numpy()[rows]
+        return gathered
+
+    @staticmethod
+    def _query_components(recipes_df: pd.DataFrame,
+                          interactions_df: pd.DataFrame,
+                          ingredients: tuple,
+                          time_limit: Optional[int],
+                          data_version: str,
+                          deadline: Optional[float],
+                          sort_mode: str,
+                          weights: Dict[str, float],
+                          depth: int) -> ScoreComponents:
+        """
+        Composantes à classer: celles de toutes les candidates (scoring local),
+        ou le top-depth fusionné des serveurs de shards (scatter-gather)
+        """
+        if SCATTER_GATHER is not None:
+            return RecommendationEngine._gathered_components(
+                recipes_df, ingredients, time_limit, data_version, sort_mode, weights, depth)
+        return RecommendationEngine._get_components(
+            recipes_df, interactions_df, ingredients, time_limit, data_version, deadline)
+
+    @staticmethod
+    def _materialize(recipes_df: pd.DataFrame, ranked: pd.DataFrame) -> pd.DataFrame:
+        """Ajoute aux lignes classées les colonnes d'affichage des recettes"""
+        sys.path.append('/preprocessing')
+        from reco_score import RecipeScorer
+
+        recipes = recipes_df.loc[ranked.index]
+        recommendations = pd.concat(
+            [recipes.drop(columns=ranked.columns, errors='ignore'), ranked], axis=1)
+        columns = RecipeScorer.result_columns(recommendations)
+        columns += [col for col in ('normalized_score', 'composite_score')
+                    if col in recommendations.columns]
+        return recommendations[columns]
+
+    @staticmethod
+    def _compute_and_store(recipes_df: pd.DataFrame,
+                           interactions_df: pd.DataFrame,
+                           time_limit: Optional[int],
+                           n_recommendations: int,
+                           sort_mode: str,
+                           weights: Dict[str, float],
+                           cache_key: tuple,
+                           data_version: str,
+                           deadline: Optional[float] = None) -> pd.DataFrame:
+        """
+        Re-classement depuis les composantes (ou lecture du cache disque) puis
+        mise en cache (sauf résultat dégradé, signalé dans attrs["degraded"])
+        """
+        if DISK_CACHE is not None:
+            cached = DISK_CACHE.get(cache_key, data_version)
+            if cached is not None:
+                RESULT_CACHE.put(cache_key, cached, data_version)
+                return cached
+
+        # cache_key[0]: ingrédients canoniques (triés, normalisés)
+        components = RecommendationEngine._query_components(
+            recipes_df, interactions_df, cache_key[0], time_limit, data_version, deadline,
+            sort_mode, weights, n_recommendations)
+
+        # Classement global en une passe vectorisée (aucun recalcul des similarités)
+        ranked = components.rank(sort_mode, weights, n_recommendations)
+        recommendations = RecommendationEngine._materialize(recipes_df, ranked)
+
+        if components.degraded is not None:
+            recommendations.attrs["degraded"] = components.degraded
+        elif not recommendations.empty:
+            RESULT_CACHE.put(cache_key, recommendations, data_version)
+            if DISK_CACHE is not None:
+                DISK_CACHE.put(cache_key, recommendations, data_version)
+
+        return recommendations
+
+    @staticmethod
+    def get_recommendations(recipes_df: pd.DataFrame,
+                            interactions_df: pd.DataFrame,
+                            user_ingredients: List[str],
+                            time_limit: Optional[int],
+                            n_recommendations: int,
+                            prioritize_jaccard: bool = True,
+                            data_version: Optional[str] = None,
+                            sort_mode: Optional[str] = None,
+                            weights: Optional[Dict[str, float]] = None,
+                            lazy: bool = False,
+                            raise_errors: bool = False,
+                            latency_budget: Optional[float] = None) -> Union[pd.DataFrame, RankedCursor]:
+        """
+        Système de recommandation avec cache et tri intelligent
+
+        Args:
+            prioritize_jaccard: Si True, donne plus d'importance à l'indice Jaccard
+            data_version: version des artefacts (calculée si absente); un
+                changement de version invalide le cache des résultats
+            sort_mode: "intelligent", "jaccard", "cosine" ou "score"
+                (par défaut déduit de prioritize_jaccard)
+            weights: poids alpha/beta/gamma/delta remplaçant SCORER_WEIGHTS
+            lazy: si True, retourne un RankedCursor sur tout le classement
+                (pagination, "afficher plus") au lieu des n premiers résultats
+            raise_errors: si True, l'erreur est propagée à l'appelant (qui
+                l'affiche); sinon elle est journalisée et un DataFrame vide
+                est retourné
+            latency_budget: budget de latence en secondes (par défaut
+                ADMISSION_CONFIG); dépassé ou file pleine, le résultat est
+                dégradé et signalé (attrs["degraded"] ou RankedCursor.degraded)
+        """
+        try:
+            deadline = _deadline(latency_budget)
+            sort_mode, weights, data_version = RecommendationEngine._resolve_query(
+                recipes_df, interactions_df, prioritize_jaccard, data_version,
+                sort_mode, weights)
+            cache_key = make_query_key(
+                user_ingredients, time_limit, n_recommendations,
+                weights.values(), sort_mode)
+
+            if lazy:
+                # Scatter-gather: curseur sur les cursor_depth meilleures recettes
+                components = RecommendationEngine._query_components(
+                    recipes_df, interactions_df, cache_key[0], time_limit, data_version,
+                    deadline, sort_mode, weights,
+                    max(n_recommendations, SCATTER_CONFIG["cursor_depth"]))
+                return RankedCursor(
+                    components, sort_mode, weights,
+                    lambda ranked: RecommendationEngine._materialize(recipes_df, ranked))
+
+            cached = RESULT_CACHE.get(cache_key, data_version)
+            if cached is not None:
+                return cached.copy()
+
+            # Les appels concurrents identiques attendent le calcul en cours
+            recommendations = SINGLE_FLIGHT.do(
+                (cache_key, data_version),
+                lambda: RecommendationEngine._compute_and_store(
+                    recipes_df, interactions_df, time_limit, n_recommendations,
+                    sort_mode, weights, cache_key, data_version, deadline))
+            return recommendations.copy()
 
         except Exception as e:
-            st.error(f"❌ Erreur recommandation: {e}")
+            logger.error(f"❌ Erreur recommandation: {e}")
+            if raise_errors:
+                raise
             return pd.DataFrame()
+
+    @staticmethod
+    async def get_recommendations_async(recipes_df: pd.DataFrame,
+                                        interactions_df: pd.DataFrame,
+                                        user_ingredients: List[str],
+                                        time_limit: Optional[int],
+                                        n_recommendations: int,
+                                        prioritize_jaccard: bool = True,
+                                        data_version: Optional[str] = None,
+                                        sort_mode: Optional[str] = None,
+                                        weights: Optional[Dict[str, float]] = None,
+                                        latency_budget: Optional[float] = None) -> pd.DataFrame:
+        """
+        Variante asyncio de get_recommendations: le calcul s'exécute hors de la
+        boucle d'événements et est partagé avec les appelants concurrents
+        (threads ou coroutines) de la même requête. Les erreurs sont propagées
+        à l'appelant.
+        """
+        deadline = _deadline(latency_budget)
+        sort_mode, weights, data_version = RecommendationEngine._resolve_query(
+            recipes_df, interactions_df, prioritize_jaccard, data_version,
+            sort_mode, weights)
+        cache_key = make_query_key(
+            user_ingredients, time_limit, n_recommendations,
+            weights.values(), sort_mode)
+
+        cached = RESULT_CACHE.get(cache_key, data_version)
+        if cached is not None:
+            return cached.copy()
+
+        recommendations = await SINGLE_FLIGHT.do_async(
+            (cache_key, data_version),
+            lambda: RecommendationEngine._compute_and_store(
+                recipes_df, interactions_df, time_limit, n_recommendations,
+                sort_mode, weights, cache_key, data_version, deadline))
+        return recommendations.copy()
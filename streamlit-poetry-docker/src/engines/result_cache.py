@@ -0,0 +1,144 @@
+"""
+Cache des résultats de recommandation pour l'application MangeTaMain
+
+Cache LRU partagé par tout le processus, borné en nombre d'entrées et en
+octets, avec expiration (TTL) et invalidation au changement de version des
+données.
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional
+
+
+def canonical_ingredients(user_ingredients: Iterable[str]) -> tuple:
+    """Ensemble trié des ingrédients normalisés (minuscules, sans espaces)"""
+    return tuple(sorted({
+        str(ing).strip().lower() for ing in (user_ingredients or []) if str(ing).strip()
+    }))
+
+
+def make_query_key(user_ingredients: Iterable[str],
+                   time_limit: Optional[int],
+                   top_k: int,
+                   weights: Iterable[float],
+                   *extra: Hashable) -> tuple:
+    """
+    Clé canonique d'une requête: ensemble trié des ingrédients normalisés,
+    limite de temps, top-k et vecteur de poids.
+    """
+    return (canonical_ingredients(user_ingredients), time_limit, int(top_k),
+            tuple(round(float(w), 6) for w in weights)) + tuple(extra)
+
+
+def estimate_size(value: Any) -> int:
+    """Taille approximative d'une valeur en octets"""
+    if hasattr(value, 'memory_usage'):
+        # DataFrame pandas: inclut le contenu des listes d'ingrédients
+        return int(value.memory_usage(deep=True).sum())
+    if hasattr(value, 'nbytes'):
+        # Tableaux numpy et composantes de score
+        return int(value.nbytes)
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    """Cache LRU thread-safe avec TTL et compteurs de hits/misses"""
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024,
+                 ttl: float = 1800, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._data_version: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def data_version(self) -> Optional[str]:
+        return self._data_version
+
+    def set_data_version(self, data_version: Optional[str]):
+        """Invalide tout le cache si la version des données a changé"""
+        with self._lock:
+            self._check_version(data_version)
+
+    def _check_version(self, data_version: Optional[str]):
+        if data_version is not None and data_version != self._data_version:
+            self._entries.clear()
+            self._bytes = 0
+            self._data_version = data_version
+
+    def _remove(self, key: Hashable):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key: Hashable, data_version: Optional[str] = None) -> Optional[Any]:
+        """Retourne la valeur en cache ou None (miss, expirée ou version périmée)"""
+        with self._lock:
+            self._check_version(data_version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires_at, _ = entry
+            if self._clock() >= expires_at:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any, data_version: Optional[str] = None):
+        """Ajoute une valeur puis évince les entrées les moins récentes si besoin"""
+        size = estimate_size(value)
+        with self._lock:
+            self._check_version(data_version)
+            if size > self.max_bytes:
+                return
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (value, self._clock() + self.ttl, size)
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        """Vide le cache et remet les compteurs à zéro"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Compteurs du cache (hits, misses, taille...)"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "data_version": self._data_version,
+            }
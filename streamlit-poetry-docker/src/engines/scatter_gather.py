@@ -0,0 +1,363 @@
+"""
+Scoring scatter-gather sur des serveurs de shards (processus ou nœuds)
+
+Le corpus est partitionné par identifiant de recette (id % n_shards, voir
+index_bundle.partition_index_arrays); chaque shard est servi par un
+processus (src/service/shard_service.py) qui ouvre son bundle. Le
+coordinateur envoie la requête à tous les shards, reçoit de chacun son
+top-k avec les composantes du score et fusionne en un top-k global.
+
+Fusion exacte (même classement que l'index complet):
+- idf et stats du corpus complet dans chaque bundle de shard;
+- tri intelligent: le score normalisé dépend du minimum et de l'étendue du
+  score sur toutes les candidates, obtenus par une première passe (k = 0);
+- égalités départagées par le rang de la recette dans le corpus.
+
+Format sur le réseau (TCP, trames préfixées par leur longueur en uint32):
+- requête: JSON (ingrédients, limite de temps, mode de tri, poids, k,
+  bornes du score);
+- réponse: en-tête binaire (statut, lignes, candidates, min et max du
+  score) puis colonnes contiguës: identifiants et rangs (int64), jaccard,
+  cosine, rating et popularité (float32), soit 32 octets par recette.
+
+Un shard injoignable ou hors délai (timeout par shard) est ignoré: la
+réponse est partielle et signalée comme dégradée.
+"""
+
+import json
+import time
+import socket
+import struct
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .ranking import ScoreComponents
+from .recipe_index import RecipeIndex
+from .result_cache import ResultCache
+
+logger = logging.getLogger(__name__)
+
+_LENGTH = struct.Struct("<I")
+# Statut, lignes, candidates du shard, minimum et maximum du score
+_REPLY_HEADER = struct.Struct("<BIIdd")
+_REPLY_COLUMNS = (("ids", np.int64), ("positions", np.int64), ("jaccard", np.float32),
+                  ("cosine", np.float32), ("mean_rating_norm", np.float32),
+                  ("popularity", np.float32))
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+
+class ShardError(Exception):
+    """Shard injoignable, hors délai ou en erreur"""
+
+
+class ShardReply:
+    """Top-k d'un shard: lignes classées et statistiques de toutes ses candidates"""
+
+    def __init__(self, ids: np.ndarray, positions: np.ndarray, jaccard: np.ndarray,
+                 cosine: np.ndarray, mean_rating_norm: np.ndarray, popularity: np.ndarray,
+                 n_candidates: int, score_min: float, score_max: float):
+        self.ids = ids
+        self.positions = positions
+        self.jaccard = jaccard
+        self.cosine = cosine
+        self.mean_rating_norm = mean_rating_norm
+        self.popularity = popularity
+        self.n_candidates = n_candidates
+        self.score_min = score_min
+        self.score_max = score_max
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def encode_reply(reply: ShardReply) -> bytes:
+    header = _REPLY_HEADER.pack(STATUS_OK, len(reply), reply.n_candidates,
+                                reply.score_min, reply.score_max)
+    return header + b"".join(
+        np.ascontiguousarray(getattr(reply, name), dtype=np.dtype(dtype).newbyteorder('<')).tobytes()
+        for name, dtype in _REPLY_COLUMNS)
+
+
+def encode_error(message: str) -> bytes:
+    return _REPLY_HEADER.pack(STATUS_ERROR, 0, 0, 0.0, 0.0) + message.encode('utf-8')
+
+
+def decode_reply(payload: bytes) -> ShardReply:
+    """
+    Raises:
+        ShardError: le shard a répondu par une erreur ou la trame est invalide
+    """
+    status, n_rows, n_candidates, score_min, score_max = _REPLY_HEADER.unpack_from(payload)
+    if status != STATUS_OK:
+        raise ShardError(payload[_REPLY_HEADER.size:].decode('utf-8', errors='replace'))
+
+    columns = {}
+    offset = _REPLY_HEADER.size
+    for name, dtype in _REPLY_COLUMNS:
+        dtype = np.dtype(dtype).newbyteorder('<')
+        columns[name] = np.frombuffer(payload, dtype=dtype, count=n_rows, offset=offset)
+        offset += n_rows * dtype.itemsize
+    if offset != len(payload):
+        raise ShardError(f"Réponse de shard invalide ({len(payload)} octets)")
+    return ShardReply(**columns, n_candidates=n_candidates,
+                      score_min=score_min, score_max=score_max)
+
+
+def send_frame(sock: socket.socket, payload: bytes):
+    sock.sendall(_LENGTH.pack(len(payload)) + payload)
+
+
+def recv_frame(sock: socket.socket, deadline: Optional[float] = None,
+               max_size: Optional[int] = None) -> Optional[bytes]:
+    """
+    Trame suivante (None si la connexion est fermée avant une nouvelle trame)
+
+    Raises:
+        ShardError: trame annoncée plus grande que max_size (refusée avant
+            lecture) ou connexion fermée au milieu d'une trame
+    """
+    header = _recv_exact(sock, _LENGTH.size, deadline)
+    if header is None:
+        return None
+    size = _LENGTH.unpack(header)[0]
+    if max_size is not None and size > max_size:
+        raise ShardError(f"Trame de {size:,} octets refusée (maximum {max_size:,})")
+    payload = _recv_exact(sock, size, deadline)
+    if payload is None:
+        raise ShardError("Connexion fermée au milieu d'une trame")
+    return payload
+
+
+def _recv_exact(sock: socket.socket, size: int, deadline: Optional[float]) -> Optional[bytes]:
+    chunks = bytearray()
+    while len(chunks) < size:
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise socket.timeout("Délai du shard dépassé")
+            sock.settimeout(remaining)
+        chunk = sock.recv(min(size - len(chunks), 1 << 20))
+        if not chunk:
+            return None
+        chunks += chunk
+    return bytes(chunks)
+
+
+class ShardScorer:
+    """Scoring d'une requête sur les recettes d'un shard (côté serveur)"""
+
+    def __init__(self, index: RecipeIndex, positions: Optional[np.ndarray] = None,
+                 max_entries: int = 256):
+        self.index = index
+        # Rang de chaque recette du shard dans le corpus complet
+        self.positions = (np.asarray(positions) if positions is not None
+                          else np.arange(len(index), dtype=np.int64))
+        # Composantes par requête: la passe des bornes et celle du top-k
+        # (tri intelligent) ne scorent qu'une fois
+        self._cache = ResultCache(max_entries=max_entries)
+
+    @classmethod
+    def from_bundle(cls, path: str, verify: bool = True) -> "ShardScorer":
+        index = RecipeIndex.from_bundle(path, verify=verify)
+        bundle = index._bundle
+        return cls(index, bundle["positions"] if "positions" in bundle else None)
+
+    def _components(self, ingredients: tuple, time_limit: Optional[int]
+                    ) -> Tuple[ScoreComponents, np.ndarray]:
+        key = (ingredients, time_limit)
+        cached = self._cache.get(key)
+        if cached is None:
+            positions, jaccard, cosine = self.index.score_arrays([(list(ingredients), time_limit)])[0]
+            components = self.index.components(positions, jaccard, cosine)
+            cached = (components, self.positions if positions is None else self.positions[positions])
+            self._cache.put(key, cached)
+        return cached
+
+    def top(self, request: Dict[str, Any]) -> ShardReply:
+        """Top-k du shard pour une requête décodée (k = 0: bornes du score seulement)"""
+        components, positions = self._components(
+            tuple(request["ingredients"]), request.get("time_limit"))
+        weights = request["weights"]
+        score = components.scores(weights)
+        score_min = float(score.min()) if len(score) else 0.0
+        score_max = float(score.max()) if len(score) else 0.0
+
+        order = np.empty(0, dtype=np.intp)
+        if request["k"] > 0 and len(components):
+            bounds = request.get("score_bounds")
+            keys = components.sort_keys(request["sort_mode"], weights,
+                                        tuple(bounds) if bounds is not None else None)
+            order = keys.top(request["k"])
+        return ShardReply(components.labels[order], positions[order],
+                          components.jaccard[order], components.cosine[order],
+                          components.mean_rating_norm[order], components.popularity[order],
+                          len(components), score_min, score_max)
+
+    def handle(self, payload: bytes) -> bytes:
+        """Trame de requête -> trame de réponse (erreurs renvoyées au coordinateur)"""
+        try:
+            return encode_reply(self.top(json.loads(payload)))
+        except Exception as e:
+            logger.error(f"❌ Erreur de scoring du shard: {e}")
+            return encode_error(str(e))
+
+
+class GatheredComponents(ScoreComponents):
+    """
+    Top-k fusionnés des shards, dans l'ordre du corpus. Le score est
+    normalisé sur toutes les candidates des shards (score_bounds), pas
+    seulement sur les lignes reçues.
+    """
+
+    def __init__(self, labels: np.ndarray, jaccard: np.ndarray, cosine: np.ndarray,
+                 mean_rating_norm: np.ndarray, popularity: np.ndarray,
+                 score_bounds: Tuple[float, float], n_candidates: int,
+                 degraded: Optional[Dict[str, str]] = None):
+        super().__init__(labels, jaccard, cosine, mean_rating_norm, popularity, degraded)
+        self.score_bounds = score_bounds
+        self.n_candidates = n_candidates
+
+    def sort_keys(self, sort_mode: str, weights: Dict[str, float],
+                  score_bounds: Optional[Tuple[float, float]] = None):
+        return super().sort_keys(sort_mode, weights, score_bounds or self.score_bounds)
+
+    def subset(self, mask: np.ndarray) -> "GatheredComponents":
+        return GatheredComponents(self.labels[mask], self.jaccard[mask], self.cosine[mask],
+                                  self.mean_rating_norm[mask], self.popularity[mask],
+                                  self.score_bounds, self.n_candidates, self.degraded)
+
+
+def parse_addresses(addresses: Sequence[str]) -> List[Tuple[str, int]]:
+    """["hôte:port", ...] -> [(hôte, port), ...]"""
+    parsed = []
+    for address in addresses:
+        host, _, port = address.strip().rpartition(":")
+        if not host or not port.isdigit():
+            raise ValueError(f"Adresse de shard invalide: {address!r} (attendu hôte:port)")
+        parsed.append((host, int(port)))
+    return parsed
+
+
+class ScatterGatherCoordinator:
+    """Envoie chaque requête à tous les shards et fusionne leurs top-k"""
+
+    def __init__(self, shards: Sequence[Tuple[str, int]], timeout: float = 0.5):
+        if not shards:
+            raise ValueError("Au moins un shard est requis")
+        self.shards = list(shards)
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=len(self.shards),
+                                            thread_name_prefix="scatter-gather")
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.partial = 0
+        self.failures = {"shard_timeout": 0, "shard_error": 0}
+
+    def _call(self, address: Tuple[str, int], request: bytes, deadline: float) -> ShardReply:
+        with socket.create_connection(address, timeout=self.timeout) as sock:
+            send_frame(sock, request)
+            payload = recv_frame(sock, deadline)
+        if payload is None:
+            raise ShardError(f"Connexion fermée par le shard {address[0]}:{address[1]}")
+        return decode_reply(payload)
+
+    def _fan_out(self, request: Dict[str, Any]) -> Tuple[List[ShardReply], Dict[str, str]]:
+        """Réponses des shards joignables et raison de l'échec des autres (par adresse)"""
+        payload = json.dumps(request).encode('utf-8')
+        deadline = time.monotonic() + self.timeout
+        futures = [(address, self._executor.submit(self._call, address, payload, deadline))
+                   for address in self.shards]
+
+        replies, failures = [], {}
+        for (host, port), future in futures:
+            try:
+                replies.append(future.result())
+            except (socket.timeout, TimeoutError):
+                failures[f"{host}:{port}"] = "shard_timeout"
+            except (OSError, ShardError) as e:
+                logger.warning(f"⚠️ Shard {host}:{port} ignoré: {e}")
+                failures[f"{host}:{port}"] = "shard_error"
+        return replies, failures
+
+    def gather(self, ingredients: Sequence[str], time_limit: Optional[int], sort_mode: str,
+               weights: Dict[str, float], k: int) -> GatheredComponents:
+        """
+        Top-k global (au plus k lignes par shard) avec les composantes du score.
+
+        Raises:
+            ShardError: aucun shard n'a répondu
+        """
+        request = {"ingredients": list(ingredients), "time_limit": time_limit,
+                   "sort_mode": sort_mode, "weights": dict(weights), "k": 0,
+                   "score_bounds": None}
+        failures: Dict[str, str] = {}
+
+        if sort_mode == "intelligent":
+            # Passe 1: bornes du score sur toutes les candidates de tous les shards
+            replies, failures = self._fan_out(request)
+            if not replies:
+                self._record(failures)
+                raise ShardError(f"Aucun shard n'a répondu ({len(self.shards)} shards)")
+            request["score_bounds"] = list(self._bounds(replies))
+
+        # Passe 2: top-k de chaque shard, classés avec les mêmes bornes
+        request["k"] = int(k)
+        replies, second_failures = self._fan_out(request)
+        failures.update(second_failures)
+        self._record(failures)
+        if not replies:
+            raise ShardError(f"Aucun shard n'a répondu ({len(self.shards)} shards)")
+
+        # Lignes dans l'ordre du corpus: égalités départagées comme l'index complet
+        positions = np.concatenate([reply.positions for reply in replies])
+        order = np.argsort(positions, kind='stable')
+
+        def column(name: str) -> np.ndarray:
+            return np.concatenate([getattr(reply, name) for reply in replies])[order]
+
+        degraded = None
+        if failures:
+            reason = "shard_timeout" if "shard_timeout" in failures.values() else "shard_error"
+            degraded = {"mode": "partial", "reason": reason}
+        return GatheredComponents(
+            column("ids"), column("jaccard"), column("cosine"),
+            column("mean_rating_norm"), column("popularity"),
+            score_bounds=(tuple(request["score_bounds"]) if request["score_bounds"] is not None
+                          else self._bounds(replies)),
+            n_candidates=sum(reply.n_candidates for reply in replies),
+            degraded=degraded)
+
+    @staticmethod
+    def _bounds(replies: List[ShardReply]) -> Tuple[float, float]:
+        """(minimum, étendue) du score sur les candidates de tous les shards"""
+        replies = [reply for reply in replies if reply.n_candidates]
+        if not replies:
+            return 0.0, 0.0
+        score_min = min(reply.score_min for reply in replies)
+        return score_min, max(reply.score_max for reply in replies) - score_min
+
+    def _record(self, failures: Dict[str, str]):
+        with self._lock:
+            self.requests += 1
+            self.partial += bool(failures)
+            for reason in failures.values():
+                self.failures[reason] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "shards": [f"{host}:{port}" for host, port in self.shards],
+                "timeout_ms": round(self.timeout * 1000, 1),
+                "requests": self.requests,
+                "partial": self.partial,
+                "failures": dict(self.failures),
+            }
+
+    def close(self):
+        self._executor.shutdown(wait=False)
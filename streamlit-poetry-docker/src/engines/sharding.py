@@ -0,0 +1,59 @@
+"""
+Scoring parallèle d'une requête par shards de recettes (threads)
+
+Les recettes sont découpées en K shards contigus. Chaque shard est scoré
+dans un thread d'un ThreadPoolExecutor partagé: les noyaux numpy/scipy
+(produits creux, ufuncs, partition) libèrent le GIL, les shards s'exécutent
+donc réellement en parallèle. Utilisé par RecipeIndex.score_arrays
+(similarités) et ranking.sharded_top_k (top-k partiels fusionnés).
+
+K s'adapte au nombre de cœurs et au volume de candidates: un shard d'au
+moins min_shard_size recettes, au plus max_threads shards (K = 1: aucun
+thread, aucun surcoût).
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple, TypeVar
+
+import numpy as np
+
+from ..utils.config import SHARD_CONFIG
+
+T = TypeVar("T")
+
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def shard_count(n_items: int, max_threads: Optional[int] = None,
+                min_shard_size: Optional[int] = None) -> int:
+    """Nombre de shards pour n_items candidates (1 si le parallélisme est désactivé)"""
+    max_threads = SHARD_CONFIG["max_threads"] if max_threads is None else max_threads
+    min_shard_size = SHARD_CONFIG["min_shard_size"] if min_shard_size is None else min_shard_size
+    if not SHARD_CONFIG["enabled"] or max_threads <= 1:
+        return 1
+    return max(1, min(max_threads, n_items // max(min_shard_size, 1)))
+
+
+def shard_bounds(n_items: int, n_shards: int) -> List[Tuple[int, int]]:
+    """Bornes [début, fin) de n_shards shards contigus de tailles équilibrées"""
+    n_shards = max(1, min(n_shards, n_items)) if n_items else 1
+    edges = np.linspace(0, n_items, n_shards + 1).astype(int)
+    return list(zip(edges[:-1].tolist(), edges[1:].tolist()))
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(max_workers=max(SHARD_CONFIG["max_threads"], 1),
+                                           thread_name_prefix="scoring-shard")
+        return _EXECUTOR
+
+
+def map_shards(fn: Callable[[int, int], T], bounds: List[Tuple[int, int]]) -> List[T]:
+    """fn(début, fin) pour chaque shard, dans l'ordre des shards (en parallèle si K > 1)"""
+    if len(bounds) == 1:
+        return [fn(*bounds[0])]
+    return list(_executor().map(lambda shard: fn(*shard), bounds))
@@ -0,0 +1,378 @@
+"""
+Index des recettes en mémoire partagée et pool de processus de scoring
+
+Les tableaux de l'index (incidence CSR, tailles, TF-IDF CSR, rating,
+popularité, minutes, bitmaps des filtres de temps) sont copiés une seule
+fois dans des blocs multiprocessing.shared_memory. Les processus de scoring s'y attachent sans
+copie (tableaux numpy et matrices scipy construits sur les buffers partagés):
+la mémoire totale reste proche d'une seule copie quel que soit le nombre de
+processus.
+
+Si l'index est adossé au bundle du pipeline (memmap), les processus
+projettent directement le même fichier: le cache de pages de l'OS en garde
+une seule copie, sans mémoire partagée.
+
+Les requêtes sont réparties entre les processus; chacun renvoie seulement
+positions, Jaccard et cosine, le parent complète les ScoreComponents avec
+sa propre vue des tableaux partagés.
+
+À la bascule des données, le pool de l'ancienne version est retiré: il
+n'accepte plus de nouveaux utilisateurs mais n'est arrêté qu'à la fin du
+dernier scoring en cours (compteur d'utilisateurs, voir acquire_worker_pool).
+"""
+
+import atexit
+import logging
+import threading
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .ranking import ScoreComponents
+from .recipe_index import (RecipeIndex, _csr, _index_bundle, load_recipe_index,
+                           registered_recipe_index)
+from .live_index import LiveRecipeIndex
+
+logger = logging.getLogger(__name__)
+
+# Pool de la version courante des données (un seul gardé par processus)
+_POOLS: Dict[str, "ScoringWorkerPool"] = {}
+_POOLS_LOCK = threading.Lock()
+# Pools des versions précédentes encore utilisés par des scorings en cours
+_RETIRED_POOLS: List["ScoringWorkerPool"] = []
+
+# Index attaché par chaque processus de scoring (voir _init_worker)
+_WORKER_INDEX: Optional[RecipeIndex] = None
+
+
+def _index_arrays(index: RecipeIndex) -> Dict[str, Optional[np.ndarray]]:
+    """
+    Tableaux copiés en mémoire partagée (les labels restent dans le parent:
+    ils peuvent être de type objet et les processus n'en ont pas besoin)
+    """
+    incidence, tfidf = index.incidence, index.tfidf
+    return {
+        "incidence_data": incidence.data,
+        "incidence_indices": incidence.indices,
+        "incidence_indptr": incidence.indptr,
+        "sizes": index.sizes,
+        "tfidf_data": tfidf.data if tfidf is not None else None,
+        "tfidf_indices": tfidf.indices if tfidf is not None else None,
+        "tfidf_indptr": tfidf.indptr if tfidf is not None else None,
+        "mean_rating_norm": index.mean_rating_norm,
+        "popularity": index.popularity,
+        "minutes": index.minutes,
+        "time_filter_limits": index.time_filter_limits,
+        "time_filter_bitmaps": index.time_filter_bitmaps,
+    }
+
+
+class SharedRecipeIndex:
+    """
+    Copie d'un RecipeIndex en mémoire partagée, possédée par le processus
+    qui l'a créée (close() libère les blocs).
+
+    handle: description picklable (noms des blocs, dtypes, formes, petits
+    objets: vocabulaire et vectorizer) transmise aux processus de scoring.
+    """
+
+    def __init__(self, index: RecipeIndex):
+        self._blocks: List[shared_memory.SharedMemory] = []
+        arrays: Dict[str, Optional[Tuple[str, str, Tuple[int, ...]]]] = {}
+        try:
+            for name, array in _index_arrays(index).items():
+                if array is None:
+                    arrays[name] = None
+                    continue
+                array = np.ascontiguousarray(array)
+                # Bloc d'au moins un octet (tableaux vides acceptés)
+                block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                self._blocks.append(block)
+                np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+                arrays[name] = (block.name, array.dtype.str, array.shape)
+        except BaseException:
+            self.close()
+            raise
+
+        self.handle: Dict[str, Any] = {
+            "arrays": arrays,
+            "incidence_shape": index.incidence.shape,
+            "tfidf_shape": index.tfidf.shape if index.tfidf is not None else None,
+            "vocabulary": index.vocabulary,
+            "vectorizer": index.vectorizer,
+        }
+        self.labels = index.labels
+
+    @property
+    def nbytes(self) -> int:
+        return sum(block.size for block in self._blocks)
+
+    @staticmethod
+    def attach(handle: Dict[str, Any], labels: Optional[np.ndarray] = None) -> RecipeIndex:
+        """RecipeIndex dont les tableaux pointent sur les blocs partagés (aucune copie)"""
+        blocks = []
+        views: Dict[str, Optional[np.ndarray]] = {}
+        for name, spec in handle["arrays"].items():
+            if spec is None:
+                views[name] = None
+                continue
+            block_name, dtype, shape = spec
+            block = shared_memory.SharedMemory(name=block_name)
+            blocks.append(block)
+            views[name] = np.ndarray(shape, np.dtype(dtype), buffer=block.buf)
+
+        tfidf = None
+        if handle["tfidf_shape"] is not None:
+            tfidf = _csr(views["tfidf_data"], views["tfidf_indices"], views["tfidf_indptr"],
+                         handle["tfidf_shape"])
+
+        n_recipes = handle["incidence_shape"][0]
+        index = RecipeIndex(
+            labels if labels is not None else np.arange(n_recipes),
+            handle["vocabulary"],
+            _csr(views["incidence_data"], views["incidence_indices"], views["incidence_indptr"],
+                 handle["incidence_shape"]),
+            views["sizes"],
+            handle["vectorizer"],
+            tfidf,
+            views["mean_rating_norm"],
+            views["popularity"],
+            views["minutes"],
+            views["time_filter_limits"],
+            views["time_filter_bitmaps"],
+        )
+        # Les blocs restent ouverts tant que l'index existe
+        index._shared_blocks = blocks
+        return index
+
+    def close(self):
+        """Ferme et supprime les blocs partagés"""
+        for block in self._blocks:
+            try:
+                block.close()
+                block.unlink()
+            except (BufferError, FileNotFoundError):
+                # Vue encore référencée ou bloc déjà supprimé
+                pass
+        self._blocks = []
+
+
+def _attach_bundle(handle: Dict[str, Any]) -> RecipeIndex:
+    """Projette le même bundle que le parent (cache de pages de l'OS partagé)"""
+    bundle = _index_bundle().read_index_bundle(handle["bundle_path"], verify=False)
+    if bundle.header["sections"] != handle["sections"]:
+        # Fichier remplacé par un nouveau pipeline depuis le démarrage du pool
+        raise _index_bundle().IndexBundleError("Bundle d'index modifié depuis le démarrage du pool")
+    index = RecipeIndex.from_arrays(bundle.arrays, bundle.attrs, np.arange(bundle.attrs["n_recipes"]))
+    index._bundle = bundle
+    return index
+
+
+def _init_worker(handle: Dict[str, Any]):
+    """
+    Initialisation d'un processus de scoring: projette le bundle de l'index
+    ou attache les blocs partagés (le resource_tracker est celui du parent,
+    seul close() supprime les blocs)
+    """
+    global _WORKER_INDEX
+    _WORKER_INDEX = (_attach_bundle(handle) if "bundle_path" in handle
+                     else SharedRecipeIndex.attach(handle))
+
+
+def _score_chunk(queries: List[Tuple[List[str], Optional[int]]]):
+    return _WORKER_INDEX.score_arrays(queries)
+
+
+class ScoringWorkerPool:
+    """
+    Processus de scoring attachés à un index unique: le bundle du pipeline
+    s'il est projeté (memmap), sinon une copie en mémoire partagée.
+    """
+
+    def __init__(self, index: RecipeIndex, n_workers: int):
+        if n_workers < 1:
+            raise ValueError("n_workers doit être >= 1")
+        self.n_workers = n_workers
+        self.shared: Optional[SharedRecipeIndex] = None
+        bundle = getattr(index, "_bundle", None)
+        try:
+            if bundle is not None:
+                # Les processus projettent le même fichier: aucune copie
+                self.index = index
+                handle = {"bundle_path": bundle.path, "sections": bundle.header["sections"]}
+            else:
+                self.shared = SharedRecipeIndex(index)
+                # Vue du parent sur les blocs partagés: l'index construit peut être libéré
+                self.index = SharedRecipeIndex.attach(self.shared.handle, labels=index.labels)
+                handle = self.shared.handle
+            # spawn: pas de fork d'un processus multi-thread (Streamlit, serveur HTTP)
+            self._executor = ProcessPoolExecutor(
+                max_workers=n_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(handle,),
+            )
+        except BaseException:
+            if self.shared is not None:
+                self.shared.close()
+            raise
+        self._lock = threading.Lock()
+        self.tasks = 0
+        self.queries = 0
+        # Scorings en cours; un pool retiré est arrêté quand le dernier se termine
+        self._active = 0
+        self._retired = False
+        self._closed = False
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def acquire(self):
+        """Enregistre un utilisateur: le pool ne sera pas arrêté avant release()"""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Pool de scoring arrêté")
+            self._active += 1
+
+    def release(self):
+        """Fin d'utilisation; arrête le pool s'il est retiré et n'a plus d'utilisateur"""
+        with self._lock:
+            self._active -= 1
+            close = self._retired and self._active == 0
+        if close:
+            self.close()
+
+    def retire(self):
+        """Plus de nouveaux utilisateurs: arrêt dès la fin des scorings en cours"""
+        with self._lock:
+            self._retired = True
+            close = self._active == 0
+        if close:
+            self.close()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def score_batch(self, queries: Sequence[Tuple[Sequence[str], Optional[int]]]
+                    ) -> List[ScoreComponents]:
+        """Répartit le lot entre les processus et assemble les composantes"""
+        queries = [(list(ingredients), time_limit) for ingredients, time_limit in queries]
+        if not queries:
+            return []
+
+        self.acquire()
+        try:
+            return self._score(queries)
+        finally:
+            self.release()
+
+    def _score(self, queries: List[Tuple[List[str], Optional[int]]]) -> List[ScoreComponents]:
+        n_chunks = min(self.n_workers, len(queries))
+        chunks = [chunk.tolist() for chunk in np.array_split(np.arange(len(queries)), n_chunks)]
+        futures = [self._executor.submit(_score_chunk, [queries[i] for i in chunk])
+                   for chunk in chunks]
+        with self._lock:
+            self.tasks += len(futures)
+            self.queries += len(queries)
+
+        results: List[ScoreComponents] = []
+        for future in futures:
+            results.extend(self.index.components(*arrays) for arrays in future.result())
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.n_workers,
+                "bundle": self.index._bundle.path if self.shared is None else None,
+                "shared_bytes": self.shared.nbytes if self.shared is not None else 0,
+                "tasks": self.tasks,
+                "queries": self.queries,
+            }
+
+    def close(self):
+        """Arrête les processus puis libère la mémoire partagée (sans annuler les tâches soumises)"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._executor.shutdown(wait=True)
+        self.index = None
+        if self.shared is not None:
+            self.shared.close()
+        with _POOLS_LOCK:
+            if self in _RETIRED_POOLS:
+                _RETIRED_POOLS.remove(self)
+
+
+def _current_pool(recipes_df: pd.DataFrame, interactions_df: pd.DataFrame,
+                  data_version: str, n_workers: int
+                  ) -> Tuple[ScoringWorkerPool, List[ScoringWorkerPool]]:
+    """Pool de la version des données, démarré si besoin, et pools remplacés (_POOLS_LOCK tenu)"""
+    pool = _POOLS.get(data_version)
+    if pool is None:
+        index = registered_recipe_index(data_version)
+        if index is None:
+            index = load_recipe_index(recipes_df, interactions_df)
+        elif isinstance(index, LiveRecipeIndex):
+            # Version dérivée en ligne: segments fusionnés, sans reconstruction
+            index = index.compact().main
+        pool = ScoringWorkerPool(index, n_workers)
+        del index
+        # Les scorings en cours sur l'ancienne version se terminent sur leur pool
+        previous = list(_POOLS.values())
+        _POOLS.clear()
+        _POOLS[data_version] = pool
+        _RETIRED_POOLS.extend(previous)
+        logger.info(f"✅ Index partagé entre {n_workers} processus de scoring "
+                    f"({len(pool):,} recettes)")
+    else:
+        previous = []
+    return pool, previous
+
+
+@contextmanager
+def acquire_worker_pool(recipes_df: pd.DataFrame, interactions_df: pd.DataFrame,
+                        data_version: str, n_workers: int) -> Iterator[ScoringWorkerPool]:
+    """
+    Pool de la version des données (index chargé et partagé une fois),
+    réservé pendant le bloc: une bascule vers une autre version ne l'arrête
+    qu'après la sortie de tous ses utilisateurs
+    """
+    with _POOLS_LOCK:
+        pool, previous = _current_pool(recipes_df, interactions_df, data_version, n_workers)
+        pool.acquire()
+    # Hors du verrou: close() d'un pool libre attend la fin de ses processus
+    for retired in previous:
+        retired.retire()
+    try:
+        yield pool
+    finally:
+        pool.release()
+
+
+def worker_pool_stats() -> Optional[Dict[str, Any]]:
+    """Compteurs du pool courant (None si aucun pool démarré)"""
+    with _POOLS_LOCK:
+        for pool in _POOLS.values():
+            return pool.stats()
+    return None
+
+
+def close_worker_pools():
+    """Arrête les pools de scoring du processus (y compris ceux retirés)"""
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values()) + _RETIRED_POOLS
+        _POOLS.clear()
+    for pool in pools:
+        pool.close()
+
+
+# Blocs partagés supprimés à l'arrêt normal du processus
+atexit.register(close_worker_pools)
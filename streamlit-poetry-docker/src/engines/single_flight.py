@@ -0,0 +1,97 @@
+"""
+Regroupement des requêtes identiques concurrentes (single-flight)
+
+Le premier appelant d'une clé exécute le calcul; les appelants concurrents
+avec la même clé attendent le même futur et partagent son résultat (ou son
+exception). Utilisable depuis des threads et depuis des coroutines asyncio.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Coalescence des calculs en vol, avec compteurs de calculs économisés"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight: Dict[Hashable, Future] = {}
+        self.calls = 0
+        self.executions = 0
+        self.shared = 0
+
+    def _join_or_lead(self, key: Hashable):
+        """Retourne (futur, True si l'appelant doit exécuter le calcul)"""
+        with self._lock:
+            self.calls += 1
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.shared += 1
+                return future, False
+            future = Future()
+            self._in_flight[key] = future
+            self.executions += 1
+            return future, True
+
+    def _finish(self, key: Hashable, future: Future, result: Any = None,
+                error: BaseException = None):
+        with self._lock:
+            self._in_flight.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Exécute fn une seule fois pour tous les appelants concurrents de key"""
+        future, leader = self._join_or_lead(key)
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Variante asyncio: fn (fonction bloquante) est exécutée dans l'exécuteur
+        par défaut de la boucle; les appelants, threads ou coroutines, partagent
+        le même calcul.
+        """
+        future, leader = self._join_or_lead(key)
+        if not leader:
+            return await asyncio.wrap_future(future)
+
+        loop = asyncio.get_running_loop()
+        try:
+            result = await loop.run_in_executor(None, fn)
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    def in_flight(self) -> int:
+        """Nombre de calculs actuellement en cours"""
+        with self._lock:
+            return len(self._in_flight)
+
+    def reset_stats(self):
+        with self._lock:
+            self.calls = self.executions = self.shared = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Compteurs: appels, calculs exécutés et calculs économisés"""
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "executions": self.executions,
+                "saved": self.shared,
+                "in_flight": len(self._in_flight),
+            }
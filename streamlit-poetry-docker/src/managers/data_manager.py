@@ -1,12 +1,60 @@
 """
 Gestionnaire des données pour l'application MangeTaMain
+
+Les artefacts servis sont un instantané (version, recettes, interactions)
+partagé par tout le processus. Quand le pipeline publie une nouvelle
+version (manifeste preprocessing_metadata.json, écrit en dernier), elle est
+chargée en arrière-plan pendant que l'ancienne reste servie, puis publiée
+d'un bloc (read-copy-update): les lecteurs en cours gardent leur référence
+à l'ancienne version, libérée dès qu'ils ont terminé. Les écouteurs de
+bascule (caches du moteur) sont alors invalidés.
+
+Une version n'est publiée que si elle est conforme au manifeste des
+artefacts (fichiers et tailles avant lecture, schéma et lignes après).
+
+Les insertions de recettes en ligne publient des versions dérivées
+("<version du manifeste>+live<empreinte>", voir RecommendationEngine.upsert_recipes),
+servies jusqu'à la publication d'une nouvelle version par le pipeline.
 """
 
-import streamlit as st
 import pandas as pd
 import os
-from typing import Optional, Tuple
-from ..utils.config import DATA_PATHS
+import json
+import logging
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from ..utils.config import DATA_PATHS, MANIFEST_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Artefacts servis, partagés par toutes les sessions du processus (une seule
+# version): version des données -> (recipes_df, interactions_df)
+_ARTIFACTS: Dict[str, Tuple[pd.DataFrame, pd.DataFrame]] = {}
+_ARTIFACTS_LOCK = threading.Lock()
+# Un seul chargement à la fois (warm-up, thread d'arrière-plan, sessions)
+_LOAD_LOCK = threading.Lock()
+# Chargements en arrière-plan lancés et erreurs rencontrées, par version
+_BACKGROUND_LOADS: Dict[str, threading.Thread] = {}
+_LOAD_ERRORS: Dict[str, str] = {}
+# Appelés (ancienne version, nouvelle version) après chaque bascule
+_SWAP_LISTENERS: List[Callable[[str, str], None]] = []
+# Lectures recommencées si le manifeste change pendant le chargement
+_MAX_LOAD_ATTEMPTS = 3
+
+
+def base_version(version: Optional[str]) -> Optional[str]:
+    """Version du manifeste dont dérive une version (elle-même si non dérivée)"""
+    return version.split("+live")[0] if version is not None else None
+
+
+def add_swap_listener(listener: Callable[[str, str], None]):
+    """Enregistre (une fois) un écouteur de bascule des artefacts"""
+    with _ARTIFACTS_LOCK:
+        if listener not in _SWAP_LISTENERS:
+            _SWAP_LISTENERS.append(listener)
 
 
 class DataManager:
@@ -15,22 +63,28 @@ class DataManager:
     def __init__(self):
         self.recipes_path = DATA_PATHS["recipes"]
         self.interactions_path = DATA_PATHS["interactions"]
+        self.ingredient_map_path = DATA_PATHS["ingredient_map"]
+        self.metadata_path = DATA_PATHS["metadata"]
 
-    @st.cache_data(ttl=3600, show_spinner=False)
-    def load_preprocessed_data(_self) -> Tuple[Optional[pd.DataFrame], Optional[pd.DataFrame]]:
+    def load_preprocessed_data(self) -> Tuple[Optional[pd.DataFrame], Optional[pd.DataFrame]]:
         """
         Chargement automatique des données preprocessées - VERSION SIMPLIFIÉE
+
+        Pas de st.cache_data: les artefacts sont déjà partagés par le
+        processus et suivent la version du manifeste (aucune copie, aucun TTL)
         """
+        # Import différé: le service HTTP utilise le DataManager sans Streamlit
+        import streamlit as st
+
         try:
             # Vérifier que les données existent
-            if not os.path.exists(_self.recipes_path):
+            if not os.path.exists(self.recipes_path):
                 st.error("❌ Données preprocessées non trouvées. Exécutez d'abord le preprocessing.")
                 return None, None
 
-            # Charger les données
+            # Charger les données (instantané si le warm-up les a déjà chargées)
             with st.spinner("⚡ Chargement des données preprocessées..."):
-                recipes_df = pd.read_pickle(_self.recipes_path)
-                interactions_df = pd.read_pickle(_self.interactions_path)
+                recipes_df, interactions_df = self.load_artifacts()
 
             st.success(f"✅ Données chargées: {len(recipes_df):,} recettes avec {len(interactions_df):,} interactions")
 
@@ -39,3 +93,272 @@ class DataManager:
         except Exception as e:
             st.error(f"❌ Erreur de chargement: {e}")
             return None, None
+
+    def load_artifacts(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Charge les pickles une seule fois par processus et par version du
+        manifeste, puis les publie (sans affichage Streamlit, utilisable par
+        le warm-up et le chargement en arrière-plan).
+
+        Raises:
+            FileNotFoundError: si les artefacts sont absents
+            ValueError: si les artefacts ne sont pas conformes au manifeste
+            RuntimeError: si le manifeste change à chaque lecture
+        """
+        version = self.get_manifest_version()
+        if version is None:
+            raise FileNotFoundError(
+                f"Artefacts introuvables: {self.recipes_path}, {self.interactions_path}")
+
+        artifacts = self.get_loaded_artifacts(version)
+        if artifacts is not None:
+            return artifacts
+
+        with _LOAD_LOCK:
+            for _ in range(_MAX_LOAD_ATTEMPTS):
+                artifacts = self.get_loaded_artifacts(version)
+                if artifacts is not None:
+                    return artifacts
+
+                # L'ancienne version reste servie pendant la lecture
+                manifest = self._load_manifest()
+                self._check_manifest(manifest)
+                recipes_df, interactions_df = self._read_artifacts()
+                current = self.get_manifest_version()
+                if current == version:
+                    self._check_manifest(manifest, {"recipes": recipes_df,
+                                                    "interactions": interactions_df})
+                    self._publish(version, recipes_df, interactions_df)
+                    return recipes_df, interactions_df
+
+                # Pipeline en cours d'écriture: lecture recommencée
+                logger.warning(f"⚠️ Artefacts modifiés pendant le chargement ({version} -> {current})")
+                del recipes_df, interactions_df
+                if current is None:
+                    raise FileNotFoundError(
+                        f"Artefacts supprimés pendant le chargement: {self.recipes_path}")
+                version = current
+
+        raise RuntimeError("Artefacts modifiés pendant chaque chargement, réessayer plus tard")
+
+    def _load_manifest(self) -> Optional[Dict[str, Any]]:
+        """Manifeste des artefacts (None si absent ou illisible: non validés)"""
+        try:
+            sys.path.append('/preprocessing')
+            from artifact_manifest import load_manifest
+            return load_manifest(self.metadata_path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Manifeste des artefacts illisible: {e}")
+            return None
+
+    def _check_manifest(self, manifest: Optional[Dict[str, Any]],
+                        tables: Optional[Dict[str, pd.DataFrame]] = None):
+        """
+        Valide les fichiers (tables None, avant lecture) ou les DataFrames lus
+        contre le manifeste. Lève ValueError au premier écart.
+        """
+        if manifest is None:
+            return
+        from artifact_manifest import verify_files, verify_tables
+        if tables is None:
+            problems = verify_files(os.path.dirname(self.metadata_path), manifest,
+                                    deep=MANIFEST_CONFIG["deep_verify"])
+        else:
+            problems = verify_tables(manifest, tables)
+        if problems:
+            raise ValueError(f"Artefacts non conformes au manifeste: {'; '.join(problems)}")
+
+    @staticmethod
+    def _publish(version: str, recipes_df: pd.DataFrame, interactions_df: pd.DataFrame):
+        """Remplace d'un bloc les artefacts servis puis prévient les écouteurs"""
+        with _ARTIFACTS_LOCK:
+            previous = next(iter(_ARTIFACTS), None)
+            # Une seule version gardée en mémoire: l'ancienne n'est plus
+            # référencée que par les lecteurs en cours
+            _ARTIFACTS.clear()
+            _ARTIFACTS[version] = (recipes_df, interactions_df)
+            _LOAD_ERRORS.clear()
+            listeners = list(_SWAP_LISTENERS)
+
+        if previous is None:
+            logger.info(f"✅ Artefacts chargés (version {version})")
+            return
+        logger.info(f"🔄 Artefacts basculés sans interruption ({previous} -> {version})")
+        for listener in listeners:
+            try:
+                listener(previous, version)
+            except Exception as e:
+                logger.error(f"❌ Invalidation après bascule des artefacts: {e}")
+
+    def publish_update(self, expected_version: str, version: str,
+                       recipes_df: pd.DataFrame, interactions_df: pd.DataFrame) -> bool:
+        """
+        Publie une version dérivée (insertions en ligne) si expected_version
+        est toujours servie; False sinon (autre mise à jour ou bascule entre-temps)
+        """
+        with _LOAD_LOCK:
+            snapshot = self.get_snapshot()
+            if snapshot is None or snapshot[0] != expected_version:
+                return False
+            self._publish(version, recipes_df, interactions_df)
+            return True
+
+    def preprocess_recipes(self, raw_recipes: pd.DataFrame) -> pd.DataFrame:
+        """
+        Recettes brutes (format RAW_recipes.csv) prétraitées comme par le
+        pipeline, avec la carte des ingrédients des artefacts
+        """
+        sys.path.append('/preprocessing')
+        from data_prepro import RecipePreprocessor
+
+        ingr_map_path = (self.ingredient_map_path if os.path.exists(self.ingredient_map_path)
+                         else None)
+        return RecipePreprocessor(ingr_map_path=ingr_map_path).prepare_recipes(raw_recipes)
+
+    def _read_artifacts(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Lit les pickles des recettes et des interactions en parallèle"""
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="artifacts") as pool:
+            recipes = pool.submit(pd.read_pickle, self.recipes_path)
+            interactions = pool.submit(pd.read_pickle, self.interactions_path)
+            return recipes.result(), interactions.result()
+
+    def get_snapshot(self) -> Optional[Tuple[str, pd.DataFrame, pd.DataFrame]]:
+        """(version, recipes_df, interactions_df) servis, lus ensemble (None si rien n'est chargé)"""
+        with _ARTIFACTS_LOCK:
+            for version, (recipes_df, interactions_df) in _ARTIFACTS.items():
+                return version, recipes_df, interactions_df
+        return None
+
+    def get_loaded_artifacts(self, version: Optional[str] = None
+                             ) -> Optional[Tuple[pd.DataFrame, pd.DataFrame]]:
+        """
+        Artefacts en mémoire, sans bloquer: ceux servis (version None, y
+        compris pendant le chargement d'une version plus récente) ou ceux
+        d'une version précise (ou d'une version qui en dérive)
+        """
+        with _ARTIFACTS_LOCK:
+            if version is None:
+                return next(iter(_ARTIFACTS.values()), None)
+            # Une version dérivée en ligne tient lieu de sa version de base
+            for served, artifacts in _ARTIFACTS.items():
+                if served == version or base_version(served) == version:
+                    return artifacts
+            return None
+
+    def start_background_load(self) -> str:
+        """
+        Compare la version servie à celle du manifeste et lance (une fois par
+        version) le chargement dans un thread d'arrière-plan. Retourne l'état:
+        "missing", "loading", "ready" (une version est servie, éventuellement
+        pendant le chargement de la suivante) ou "error" (message disponible
+        via get_load_error).
+        """
+        version = self.get_manifest_version()
+        snapshot = self.get_snapshot()
+        served = snapshot is not None
+        if version is None:
+            # Artefacts en cours de remplacement: la version servie reste en place
+            return "ready" if served else "missing"
+        if served and base_version(snapshot[0]) == version:
+            return "ready"
+
+        with _ARTIFACTS_LOCK:
+            if version in _LOAD_ERRORS:
+                return "ready" if served else "error"
+            thread = _BACKGROUND_LOADS.get(version)
+            if thread is None:
+                thread = threading.Thread(target=self._background_load, args=(version,),
+                                          name="artifacts-loader", daemon=True)
+                _BACKGROUND_LOADS[version] = thread
+                thread.start()
+        return "ready" if served else "loading"
+
+    def _background_load(self, version: str):
+        try:
+            self.load_artifacts()
+        except Exception as e:
+            logger.error(f"❌ Erreur de chargement en arrière-plan: {e}")
+            with _ARTIFACTS_LOCK:
+                _LOAD_ERRORS[version] = str(e)
+        finally:
+            with _ARTIFACTS_LOCK:
+                _BACKGROUND_LOADS.pop(version, None)
+
+    def wait_for_artifacts(self, timeout: Optional[float] = None) -> bool:
+        """Attend la fin du chargement en arrière-plan (True si prêt)"""
+        with _ARTIFACTS_LOCK:
+            thread = _BACKGROUND_LOADS.get(self.get_manifest_version())
+        if thread is not None:
+            thread.join(timeout)
+        return self.get_loaded_artifacts() is not None
+
+    def get_load_error(self) -> Optional[str]:
+        with _ARTIFACTS_LOCK:
+            return _LOAD_ERRORS.get(self.get_manifest_version())
+
+    def get_data_version(self) -> Optional[str]:
+        """
+        Version des artefacts servis (clé des caches du moteur), sinon celle
+        du manifeste sur disque
+        """
+        with _ARTIFACTS_LOCK:
+            served = next(iter(_ARTIFACTS), None)
+        return served if served is not None else self.get_manifest_version()
+
+    def get_manifest_version(self) -> Optional[str]:
+        """
+        Version des artefacts sur disque: taille et date du manifeste
+        (preprocessing_metadata.json, écrit en dernier par le pipeline) et des
+        pickles. Sans manifeste, seuls les pickles comptent.
+        """
+        try:
+            parts = []
+            for path in (self.recipes_path, self.interactions_path):
+                stat = os.stat(path)
+                parts.append(f"{stat.st_size}:{stat.st_mtime_ns}")
+        except OSError:
+            return None
+        try:
+            stat = os.stat(self.metadata_path)
+        except OSError:
+            return "-".join(parts)
+        # Manifeste présent: lui seul marque une version publiée (les pickles
+        # peuvent être réécrits avant lui)
+        return f"m{stat.st_size}:{stat.st_mtime_ns}"
+
+    def load_ingredient_map(self) -> Dict[str, str]:
+        """
+        Carte des ingrédients précompilée par le pipeline (brut -> normalisé),
+        utilisée pour normaliser les ingrédients saisis. Vide si indisponible.
+        """
+        try:
+            if not os.path.exists(self.ingredient_map_path):
+                return {}
+            sys.path.append('/preprocessing')
+            from ingredient_map import load_ingredient_map
+            return load_ingredient_map(self.ingredient_map_path)
+        except Exception as e:
+            logger.warning(f"Carte des ingrédients indisponible: {e}")
+            return {}
+
+    def load_dataset_profile(self) -> Optional[Dict[str, Any]]:
+        """
+        Profil du dataset précalculé par le pipeline (preprocessing_metadata.json).
+        None si les métadonnées sont absentes, illisibles ou sans profil.
+        """
+        try:
+            with open(self.metadata_path) as f:
+                return json.load(f).get("dataset_profile")
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Métadonnées du preprocessing illisibles: {e}")
+            return None
+
+    def get_artifacts_built_at(self) -> Optional[str]:
+        """Date de construction des artefacts (modification du pickle des recettes)"""
+        try:
+            mtime = os.path.getmtime(self.recipes_path)
+        except OSError:
+            return None
+        return datetime.fromtimestamp(mtime).isoformat(timespec='seconds')
@@ -0,0 +1,13 @@
+"""
+Package service: Service HTTP de recommandation
+
+Ce package expose le moteur de recommandation en JSON, sans session
+Streamlit, pour les autres systèmes internes et les tests de charge.
+
+Classes principales:
+    - RecommendationService: Validation des requêtes et appel du moteur
+"""
+
+from .http_service import RecommendationService, create_server
+
+__all__ = ["RecommendationService", "create_server"]
@@ -0,0 +1,426 @@
+"""
+Service HTTP de recommandation, indépendant de Streamlit
+
+Expose le moteur de recommandation en JSON pour les autres systèmes internes
+(et pour les tests de charge), avec les mêmes artefacts et les mêmes caches
+que l'application:
+
+    GET  /healthz          état du service et des artefacts
+    POST /recommend        une requête
+    POST /recommend/batch  plusieurs requêtes en un appel
+    POST /recipes          insertion ou mise à jour de recettes, cherchables
+                           aussitôt (sans relancer le pipeline)
+
+Les routes d'écriture (POST /recipes) exigent le jeton MANGETAMAIN_WRITE_TOKEN
+(en-tête "Authorization: Bearer <jeton>"); sans jeton configuré, elles ne
+sont accessibles qu'aux clients locaux (127.0.0.1, ::1).
+
+Serveur de la bibliothèque standard (un thread par connexion).
+
+Usage: python -m src.service.http_service --port 8081
+"""
+
+import sys
+import hmac
+import json
+import logging
+import argparse
+import ipaddress
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from ..engines.ranking import SORT_MODES
+from ..engines.recommendation_engine import RecommendationEngine
+from ..managers.data_manager import DataManager, add_swap_listener, base_version
+from ..utils.config import SERVICE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Nouvelle version des artefacts publiée: caches du moteur invalidés
+add_swap_listener(RecommendationEngine.release_data_version)
+
+# Corps des réponses 500: le détail (messages, chemins) reste dans les logs
+INTERNAL_ERROR = "Erreur interne du service"
+
+# Routes modifiant les données servies (voir _check_write_access)
+WRITE_ROUTES = frozenset({"/recipes"})
+
+
+class ServiceError(Exception):
+    """Erreur renvoyée au client avec un code HTTP"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class RecommendationService:
+    """Validation des requêtes JSON et appel du moteur de recommandation"""
+
+    def __init__(self, data_manager: Optional[DataManager] = None,
+                 engine: Optional[RecommendationEngine] = None):
+        self.data_manager = data_manager or DataManager()
+        self.engine = engine or RecommendationEngine()
+        # Une mise à jour des recettes à la fois (chacune dérive de la précédente)
+        self._upsert_lock = threading.Lock()
+
+    def start(self) -> str:
+        """Lance le chargement des artefacts en arrière-plan et retourne son état"""
+        return self.data_manager.start_background_load()
+
+    def _artifacts(self) -> Tuple[str, pd.DataFrame, pd.DataFrame]:
+        """Version et artefacts servis, lus ensemble (cohérents pendant une bascule)"""
+        self.data_manager.start_background_load()
+        snapshot = self.data_manager.get_snapshot()
+        if snapshot is None:
+            raise ServiceError(503, "Artefacts en cours de chargement ou absents")
+        return snapshot
+
+    def health(self) -> Tuple[int, Dict[str, Any]]:
+        """État du service: 200 si les artefacts sont chargés, 503 sinon"""
+        status = self.data_manager.start_background_load()
+        snapshot = self.data_manager.get_snapshot() if status == "ready" else None
+        body: Dict[str, Any] = {"status": status,
+                                "data_version": (snapshot[0] if snapshot is not None
+                                                 else self.data_manager.get_data_version())}
+        if status == "error":
+            body["error"] = self.data_manager.get_load_error()
+        if snapshot is None:
+            return 503, body
+
+        data_version, recipes_df, interactions_df = snapshot
+        manifest_version = self.data_manager.get_manifest_version()
+        if manifest_version not in (None, base_version(data_version)):
+            # Nouvelle version en cours de chargement, l'ancienne reste servie
+            body["pending_version"] = manifest_version
+        body.update({
+            "status": "ok",
+            "recipes": len(recipes_df),
+            "interactions": len(interactions_df),
+            "cache": self.engine.cache_stats(),
+        })
+        return 200, body
+
+    def parse_query(self, payload: Any) -> Dict[str, Any]:
+        """
+        Valide une requête: ingredients (liste ou chaîne séparée par des
+        virgules), time_limit, n, sort_mode, weights et latency_budget_ms
+        optionnels.
+
+        Raises:
+            ServiceError: 400 si la requête est invalide
+        """
+        if not isinstance(payload, dict):
+            raise ServiceError(400, "Objet JSON attendu")
+
+        ingredients = payload.get("ingredients")
+        if isinstance(ingredients, str):
+            ingredients = ingredients.split(",")
+        if not isinstance(ingredients, list) or not all(isinstance(i, str) for i in ingredients):
+            raise ServiceError(400, "'ingredients' doit être une liste de chaînes")
+        ingredients = [ing.strip().lower() for ing in ingredients if ing.strip()]
+        if not ingredients:
+            raise ServiceError(400, "Au moins un ingrédient est requis")
+
+        time_limit = payload.get("time_limit")
+        if time_limit is not None and (not self._is_int(time_limit) or time_limit <= 0):
+            raise ServiceError(400, "'time_limit' doit être un entier positif ou null")
+
+        n = payload.get("n", SERVICE_CONFIG["default_recommendations"])
+        if not self._is_int(n) or not 1 <= n <= SERVICE_CONFIG["max_recommendations"]:
+            raise ServiceError(
+                400, f"'n' doit être un entier entre 1 et {SERVICE_CONFIG['max_recommendations']}")
+
+        sort_mode = payload.get("sort_mode", "intelligent")
+        if sort_mode not in SORT_MODES:
+            raise ServiceError(400, f"'sort_mode' doit être parmi {list(SORT_MODES)}")
+
+        weights = payload.get("weights")
+        if weights is not None:
+            if (not isinstance(weights, dict)
+                    or not set(weights) <= set(RecommendationEngine.SCORER_WEIGHTS)
+                    or not all(isinstance(w, (int, float)) and not isinstance(w, bool)
+                               for w in weights.values())):
+                raise ServiceError(
+                    400, f"'weights' accepte les clés {list(RecommendationEngine.SCORER_WEIGHTS)}")
+
+        latency_budget_ms = payload.get("latency_budget_ms")
+        if latency_budget_ms is not None and (
+                not isinstance(latency_budget_ms, (int, float)) or isinstance(latency_budget_ms, bool)
+                or latency_budget_ms <= 0):
+            raise ServiceError(400, "'latency_budget_ms' doit être un nombre positif ou null")
+
+        # Même normalisation que l'application (carte partagée avec le pipeline)
+        ingredient_map = self.data_manager.load_ingredient_map()
+        ingredients = list(dict.fromkeys(ingredient_map.get(ing, ing) for ing in ingredients))
+
+        return {"ingredients": ingredients, "time_limit": time_limit, "n": n,
+                "sort_mode": sort_mode, "weights": weights,
+                "latency_budget_ms": latency_budget_ms}
+
+    @staticmethod
+    def _is_int(value: Any) -> bool:
+        return isinstance(value, int) and not isinstance(value, bool)
+
+    @staticmethod
+    def to_records(recommendations: pd.DataFrame) -> List[Dict[str, Any]]:
+        """Lignes JSON (types numpy convertis, NaN -> null)"""
+        return json.loads(recommendations.to_json(orient="records"))
+
+    def _recommend(self, query: Dict[str, Any], recipes_df: pd.DataFrame,
+                   interactions_df: pd.DataFrame, data_version: Optional[str]) -> Dict[str, Any]:
+        recommendations = self.engine.get_recommendations(
+            recipes_df, interactions_df, query["ingredients"], query["time_limit"],
+            query["n"], query["sort_mode"] == "intelligent",
+            data_version=data_version, sort_mode=query["sort_mode"],
+            weights=query["weights"], raise_errors=True,
+            latency_budget=(query["latency_budget_ms"] / 1000
+                            if query["latency_budget_ms"] is not None else None))
+        # Mode dégradé (contrôle d'admission): {"mode", "reason"}, sinon null
+        return {"query": query, "count": len(recommendations),
+                "degraded": recommendations.attrs.get("degraded"),
+                "results": self.to_records(recommendations)}
+
+    def recommend(self, payload: Any) -> Dict[str, Any]:
+        """POST /recommend"""
+        query = self.parse_query(payload)
+        data_version, recipes_df, interactions_df = self._artifacts()
+        return {"data_version": data_version,
+                **self._recommend(query, recipes_df, interactions_df, data_version)}
+
+    def recommend_batch(self, payload: Any) -> Dict[str, Any]:
+        """
+        POST /recommend/batch: {"queries": [...]}. Chaque requête a sa
+        réponse ou son erreur, dans l'ordre d'envoi.
+        """
+        queries = payload.get("queries") if isinstance(payload, dict) else None
+        if not isinstance(queries, list) or not queries:
+            raise ServiceError(400, "'queries' doit être une liste non vide")
+        if len(queries) > SERVICE_CONFIG["max_batch_size"]:
+            raise ServiceError(
+                400, f"Au plus {SERVICE_CONFIG['max_batch_size']} requêtes par appel")
+
+        data_version, recipes_df, interactions_df = self._artifacts()
+
+        responses = []
+        for item in queries:
+            try:
+                query = self.parse_query(item)
+                responses.append(self._recommend(query, recipes_df, interactions_df, data_version))
+            except ServiceError as e:
+                responses.append({"error": e.message, "status": e.status})
+            except Exception:
+                logger.exception("❌ Erreur recommandation (batch)")
+                responses.append({"error": INTERNAL_ERROR, "status": 500})
+        return {"data_version": data_version, "responses": responses}
+
+    def parse_recipe(self, payload: Any) -> Dict[str, Any]:
+        """
+        Valide une recette: id (entier), name, ingredients (liste de
+        chaînes), minutes, steps, tags, nutrition (7 valeurs) et description
+        optionnels. Retourne la ligne au format RAW_recipes.csv.
+
+        Raises:
+            ServiceError: 400 si la recette est invalide
+        """
+        if not isinstance(payload, dict):
+            raise ServiceError(400, "Objet JSON attendu pour chaque recette")
+        if not self._is_int(payload.get("id")):
+            raise ServiceError(400, "'id' doit être un entier")
+        if not isinstance(payload.get("name"), str) or not payload["name"].strip():
+            raise ServiceError(400, "'name' doit être une chaîne non vide")
+
+        lists = {}
+        for field in ("ingredients", "steps", "tags"):
+            values = payload.get(field, [])
+            if not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+                raise ServiceError(400, f"'{field}' doit être une liste de chaînes")
+            lists[field] = values
+        if not lists["ingredients"]:
+            raise ServiceError(400, "Au moins un ingrédient est requis")
+
+        minutes = payload.get("minutes")
+        if minutes is not None and (not self._is_int(minutes) or minutes < 0):
+            raise ServiceError(400, "'minutes' doit être un entier positif ou null")
+
+        nutrition = payload.get("nutrition", [])
+        if (not isinstance(nutrition, list) or len(nutrition) not in (0, 7)
+                or not all(isinstance(v, (int, float)) and not isinstance(v, bool)
+                           for v in nutrition)):
+            raise ServiceError(400, "'nutrition' doit être une liste de 7 nombres")
+
+        description = payload.get("description", "")
+        if not isinstance(description, str):
+            raise ServiceError(400, "'description' doit être une chaîne")
+
+        # Listes sérialisées comme dans le CSV brut (parsées par RecipePreprocessor)
+        return {"id": payload["id"], "name": payload["name"].strip(), "minutes": minutes,
+                "ingredients": repr(lists["ingredients"]), "steps": repr(lists["steps"]),
+                "tags": repr(lists["tags"]), "nutrition": repr(nutrition),
+                "n_steps": len(lists["steps"]), "n_ingredients": len(lists["ingredients"]),
+                "description": description}
+
+    def upsert_recipes(self, payload: Any) -> Dict[str, Any]:
+        """
+        POST /recipes: {"recipes": [...]}. Les recettes sont prétraitées comme
+        par le pipeline puis insérées (ou mises à jour, même id) dans une
+        version dérivée des artefacts servis, publiée d'un bloc.
+        """
+        recipes = payload.get("recipes") if isinstance(payload, dict) else None
+        if not isinstance(recipes, list) or not recipes:
+            raise ServiceError(400, "'recipes' doit être une liste non vide")
+        if len(recipes) > SERVICE_CONFIG["max_upsert_recipes"]:
+            raise ServiceError(
+                400, f"Au plus {SERVICE_CONFIG['max_upsert_recipes']} recettes par appel")
+        rows = [self.parse_recipe(recipe) for recipe in recipes]
+        if len({row["id"] for row in rows}) != len(rows):
+            raise ServiceError(400, "Identifiants de recettes en double")
+
+        prepared = self.data_manager.preprocess_recipes(pd.DataFrame(rows))
+        if len(prepared) != len(rows):
+            raise ServiceError(400, "Recettes impossibles à prétraiter")
+
+        with self._upsert_lock:
+            data_version, recipes_df, interactions_df = self._artifacts()
+            updated = int(recipes_df['id'].isin(prepared['id']).sum())
+            recipes_df, new_version = self.engine.upsert_recipes(
+                recipes_df, interactions_df, prepared, data_version)
+            if not self.data_manager.publish_update(data_version, new_version,
+                                                    recipes_df, interactions_df):
+                raise ServiceError(409, "Artefacts remplacés pendant la mise à jour, réessayer")
+        return {"data_version": new_version, "recipes": len(recipes_df),
+                "inserted": len(rows) - updated, "updated": updated}
+
+
+class RecommendationRequestHandler(BaseHTTPRequestHandler):
+    """Routage des requêtes HTTP vers le RecommendationService du serveur"""
+
+    server_version = "MangeTaMain/2.0"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def service(self) -> RecommendationService:
+        return self.server.service
+
+    def _send_json(self, status: int, body: Dict[str, Any]):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _check_write_access(self):
+        """
+        Jeton Bearer des routes d'écriture, comparé en temps constant; sans
+        jeton configuré, écriture réservée aux clients locaux
+
+        Raises:
+            ServiceError: 401 (jeton absent ou invalide) ou 403 (client distant)
+        """
+        token = SERVICE_CONFIG["write_token"]
+        if token is None:
+            if not ipaddress.ip_address(self.client_address[0]).is_loopback:
+                raise ServiceError(403, "Écriture réservée aux clients locaux "
+                                        "(MANGETAMAIN_WRITE_TOKEN non défini)")
+            return
+        scheme, _, provided = self.headers.get("Authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not hmac.compare_digest(
+                provided.strip().encode('utf-8'), token.encode('utf-8')):
+            raise ServiceError(401, "Jeton d'écriture absent ou invalide")
+
+    def _read_json(self) -> Any:
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            raise ServiceError(400, "Content-Length invalide")
+        if length < 0:
+            # rfile.read(-n) lirait jusqu'à la fermeture de la connexion
+            raise ServiceError(400, "Content-Length invalide")
+        if length > SERVICE_CONFIG["max_body_bytes"]:
+            raise ServiceError(413, "Requête trop volumineuse")
+        try:
+            return json.loads(self.rfile.read(length) or b"null")
+        except ValueError:
+            raise ServiceError(400, "JSON invalide")
+
+    def do_GET(self):
+        if self.path.split("?")[0] == "/healthz":
+            status, body = self.service.health()
+            self._send_json(status, body)
+        else:
+            self._send_json(404, {"error": f"Route inconnue: {self.path}"})
+
+    def do_POST(self):
+        routes = {
+            "/recommend": self.service.recommend,
+            "/recommend/batch": self.service.recommend_batch,
+            "/recipes": self.service.upsert_recipes,
+        }
+        path = self.path.split("?")[0]
+        handler = routes.get(path)
+        try:
+            if handler is None:
+                # Corps non lu: la connexion ne peut pas être réutilisée
+                self.close_connection = True
+                raise ServiceError(404, f"Route inconnue: {self.path}")
+            if path in WRITE_ROUTES:
+                try:
+                    self._check_write_access()
+                except ServiceError:
+                    self.close_connection = True
+                    raise
+            self._send_json(200, handler(self._read_json()))
+        except ServiceError as e:
+            self._send_json(e.status, {"error": e.message})
+        except Exception:
+            logger.exception("❌ Erreur du service")
+            self._send_json(500, {"error": INTERNAL_ERROR})
+
+    def log_message(self, format, *args):
+        logger.info("%s - %s", self.address_string(), format % args)
+
+
+def create_server(service: RecommendationService, host: str = None,
+                  port: int = None) -> ThreadingHTTPServer:
+    """Serveur HTTP multi-thread lié au service (port 0: port libre)"""
+    server = ThreadingHTTPServer(
+        (host if host is not None else SERVICE_CONFIG["host"],
+         port if port is not None else SERVICE_CONFIG["port"]),
+        RecommendationRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def main(argv=None) -> int:
+    """Démarre le service: chargement des artefacts en arrière-plan puis écoute"""
+    parser = argparse.ArgumentParser(description="Service HTTP de recommandation MangeTaMain")
+    parser.add_argument("--host", default=SERVICE_CONFIG["host"])
+    parser.add_argument("--port", type=int, default=SERVICE_CONFIG["port"])
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    service = RecommendationService()
+    if service.start() == "missing":
+        logger.error("❌ Données preprocessées non trouvées. Exécutez d'abord le preprocessing.")
+        return 1
+
+    server = create_server(service, args.host, args.port)
+    logger.info(f"🚀 Service de recommandation sur http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""
+Serveur d'un shard de recettes pour le scoring scatter-gather
+
+Ouvre le bundle d'un shard (écrit par le pipeline avec index_shards > 1)
+et répond aux requêtes du coordinateur (src/engines/scatter_gather.py)
+sur une connexion TCP (trames binaires, une réponse par requête).
+Écoute par défaut sur 127.0.0.1: l'exposer au réseau (--host) suppose un
+réseau privé entre coordinateur et shards, le protocole n'étant pas authentifié.
+
+Usage (un processus par shard, sur un ou plusieurs nœuds):
+    python -m src.service.shard_service \\
+        --bundle /shared_data/recipe_index.shard-0-of-4.bundle --port 9100
+
+puis côté application ou service HTTP:
+    MANGETAMAIN_SCORING_SHARDS=hote-a:9100,hote-b:9100,...
+"""
+
+import sys
+import socket
+import logging
+import argparse
+import socketserver
+
+from ..engines.scatter_gather import ShardError, ShardScorer, recv_frame, send_frame
+from ..utils.config import SCATTER_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class ShardRequestHandler(socketserver.BaseRequestHandler):
+    """Requêtes successives d'une connexion du coordinateur"""
+
+    def handle(self):
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        # Connexion inactive fermée: un client muet ne garde pas un thread
+        self.request.settimeout(self.server.idle_timeout)
+        while True:
+            try:
+                payload = recv_frame(self.request, max_size=self.server.max_request_bytes)
+            except OSError:
+                return
+            except ShardError as e:
+                logger.warning(f"⚠️ Requête de {self.client_address[0]} rejetée: {e}")
+                return
+            if payload is None:
+                return
+            send_frame(self.request, self.server.scorer.handle(payload))
+
+
+class ShardServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, scorer: ShardScorer,
+                 max_request_bytes: int = SCATTER_CONFIG["max_request_bytes"],
+                 idle_timeout: float = SCATTER_CONFIG["idle_timeout_s"]):
+        super().__init__(address, ShardRequestHandler)
+        self.scorer = scorer
+        self.max_request_bytes = max_request_bytes
+        self.idle_timeout = idle_timeout
+
+
+def create_server(scorer: ShardScorer, host: str = "127.0.0.1", port: int = 0,
+                  **limits) -> ShardServer:
+    """Serveur multi-thread lié au scorer du shard (port 0: port libre)"""
+    return ShardServer((host, port), scorer, **limits)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Serveur de shard de recettes MangeTaMain")
+    parser.add_argument("--bundle", required=True, help="Bundle d'index du shard")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=SCATTER_CONFIG["shard_port"])
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    scorer = ShardScorer.from_bundle(args.bundle)
+    server = create_server(scorer, args.host, args.port)
+    # Ligne lue par les lanceurs de shards locaux (port 0: port attribué)
+    print(f"listening {server.server_address[0]}:{server.server_address[1]}", flush=True)
+    logger.info(f"🚀 Shard de {len(scorer.index):,} recettes sur "
+                f"{args.host}:{server.server_address[1]} ({args.bundle})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,7 +5,7 @@ Composants d'interface utilisateur pour l'application MangeTaMain
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-from typing import List
+from typing import Dict, List, Optional
 
 
 class UIComponents:
@@ -96,25 +96,83 @@ class UIComponents:
         """, unsafe_allow_html=True)
 
     @staticmethod
-    def display_sidebar_stats(recipes_df: pd.DataFrame, interactions_df: pd.DataFrame):
-        """Affiche les statistiques dans la sidebar"""
+    def compute_dataset_stats(recipes_df: pd.DataFrame, interactions_df: pd.DataFrame,
+                              built_at: Optional[str] = None) -> Dict:
+        """
+        Statistiques minimales de la sidebar calculées depuis les données
+        (repli quand le profil du pipeline est absent des métadonnées)
+        """
+        with_ingredients = None
+        if 'normalized_ingredients' in recipes_df.columns:
+            with_ingredients = int(recipes_df['normalized_ingredients'].apply(
+                lambda x: isinstance(x, list) and len(x) > 0
+            ).sum())
+        return {
+            "recipes": len(recipes_df),
+            "interactions": len(interactions_df),
+            "recipes_with_ingredients": with_ingredients,
+            "ingredient_coverage": (with_ingredients / len(recipes_df) * 100
+                                    if with_ingredients is not None and len(recipes_df) else None),
+            "built_at": built_at,
+        }
+
+    @staticmethod
+    def _format_built_at(built_at: Optional[str]) -> str:
+        try:
+            return datetime.fromisoformat(built_at).strftime('%d/%m/%Y %H:%M')
+        except (TypeError, ValueError):
+            return "inconnue"
+
+    @staticmethod
+    def _distribution_table(title: str, counts: Dict[str, int]) -> str:
+        """Tableau markdown d'une distribution (effectifs et parts)"""
+        total = sum(counts.values()) or 1
+        rows = [f"| {label} | {count:,} | {count / total:.0%} |" for label, count in counts.items()]
+        return "\n".join([f"**{title}**", "", "| | Effectif | Part |", "|---|---:|---:|", *rows])
+
+    @staticmethod
+    def display_sidebar_stats(recipes_df: pd.DataFrame, interactions_df: pd.DataFrame,
+                              stats: Optional[Dict] = None):
+        """
+        Affiche les statistiques dans la sidebar: profil précalculé par le
+        pipeline (stats) ou, à défaut, statistiques calculées ici
+        """
+        if stats is None:
+            stats = UIComponents.compute_dataset_stats(recipes_df, interactions_df)
+
         with st.sidebar:
             st.header("📊 Statistiques du Dataset")
 
             # Métriques du dataset
             st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-            st.metric("🍽️ Recettes Disponibles", f"{len(recipes_df):,}")
-            st.metric("👥 Interactions Utilisateurs", f"{len(interactions_df):,}")
-
-            # Calculer quelques stats en temps réel
-            if 'normalized_ingredients' in recipes_df.columns:
-                has_ingredients = recipes_df['normalized_ingredients'].apply(
-                    lambda x: isinstance(x, list) and len(x) > 0
-                ).sum()
-                st.metric("✅ Recettes avec Ingrédients", f"{has_ingredients:,}")
-
-            st.metric("📈 Taux de Couverture", "100%")
-            st.info(f"📅 Dernière mise à jour: {datetime.now().strftime('%d/%m/%Y %H:%M')}")
+            st.metric("🍽️ Recettes Disponibles", f"{stats['recipes']:,}")
+            st.metric("👥 Interactions Utilisateurs", f"{stats['interactions']:,}")
+
+            if stats.get("recipes_with_ingredients") is not None:
+                st.metric("✅ Recettes avec Ingrédients", f"{stats['recipes_with_ingredients']:,}")
+            if stats.get("ingredient_coverage") is not None:
+                st.metric("📈 Taux de Couverture", f"{stats['ingredient_coverage']:.1f}%")
+            if stats.get("unique_ingredients"):
+                st.metric("🥕 Ingrédients Distincts", f"{stats['unique_ingredients']:,}")
+
+            ratings = stats.get("ratings") or {}
+            if ratings.get("mean") is not None:
+                st.metric("⭐ Note Moyenne", f"{ratings['mean']:.2f} / 5",
+                          help=f"{stats.get('rating_coverage', 0):.1f}% des recettes notées")
+
+            # Distributions précalculées (profil du pipeline uniquement)
+            distributions = {
+                "🥄 Ingrédients par recette": (stats.get("ingredients_per_recipe") or {}).get("histogram"),
+                "⏱️ Temps de préparation (min)": (stats.get("minutes") or {}).get("histogram"),
+                "⭐ Répartition des notes": ratings.get("distribution"),
+            }
+            distributions = {title: counts for title, counts in distributions.items() if counts}
+            if distributions:
+                with st.expander("📊 Distributions"):
+                    for title, counts in distributions.items():
+                        st.markdown(UIComponents._distribution_table(title, counts))
+
+            st.info(f"📅 Données construites le: {UIComponents._format_built_at(stats.get('built_at'))}")
 
             st.markdown('</div>', unsafe_allow_html=True)
 
@@ -127,6 +185,13 @@ class UIComponents:
             4. **Cliquez sur Recommander** 🚀
             """)
 
+    @staticmethod
+    def display_sidebar_loading():
+        """Sidebar affichée pendant le chargement des données en arrière-plan"""
+        with st.sidebar:
+            st.header("📊 Statistiques du Dataset")
+            st.info("⏳ Chargement des données en cours...")
+
     @staticmethod
     def display_footer():
         """Affiche le footer de l'application"""
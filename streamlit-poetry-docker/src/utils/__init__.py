@@ -13,6 +13,12 @@ Modules:
     - config.py: Configuration de l'application
 """
 
-from .styles import StyleManager
-
 __all__ = ["StyleManager"]
+
+
+def __getattr__(name):
+    # Import différé: config est utilisé sans Streamlit (service HTTP)
+    if name == "StyleManager":
+        from .styles import StyleManager
+        return StyleManager
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
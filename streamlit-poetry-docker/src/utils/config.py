@@ -10,18 +10,117 @@ IS_RAILWAY = os.getenv('RAILWAY_ENVIRONMENT') is not None
 if IS_RAILWAY:
     DATA_PATHS = {
         "recipes": "/app/data/recipes_processed.pkl",
-        "interactions": "/app/data/interactions.pkl"
+        "interactions": "/app/data/interactions.pkl",
+        "ingredient_map": "/app/data/ingr_map.pkl",
+        "metadata": "/app/data/preprocessing_metadata.json",
+        "index_bundle": "/app/data/recipe_index.bundle",
+        "result_cache": "/app/data/result_cache.sqlite"
     }
 else:
     DATA_PATHS = {
         "recipes": "/shared_data/recipes_processed.pkl",
-        "interactions": "/shared_data/interactions.pkl"
+        "interactions": "/shared_data/interactions.pkl",
+        "ingredient_map": "/shared_data/ingr_map.pkl",
+        "metadata": "/shared_data/preprocessing_metadata.json",
+        "index_bundle": "/shared_data/recipe_index.bundle",
+        "result_cache": "/shared_data/result_cache.sqlite"
     }
 
 # Configuration du cache Streamlit
 CACHE_CONFIG = {
     "data_ttl": 3600,  # 1 heure
-    "recommendations_ttl": 1800  # 30 minutes
+    "recommendations_ttl": 1800,  # 30 minutes
+    "recommendations_max_entries": 256,  # Requêtes distinctes gardées en mémoire
+    "recommendations_max_bytes": 64 * 1024 * 1024,  # 64 Mo
+    "components_max_entries": 32,  # Composantes de score par requête (re-tri sans recalcul)
+    "components_max_bytes": 256 * 1024 * 1024,  # 256 Mo
+    "disk_cache_enabled": True,  # Cache disque partagé (survit aux redémarrages)
+    "disk_cache_max_bytes": 256 * 1024 * 1024,  # 256 Mo
+    "disk_cache_ttl": 7 * 24 * 3600  # 7 jours (clés déjà versionnées par les données)
+}
+
+# Micro-batching du scoring (service sous charge): les requêtes reçues dans
+# la même fenêtre sont scorées ensemble par produits matriciels creux
+BATCH_CONFIG = {
+    "enabled": os.getenv('MANGETAMAIN_MICRO_BATCHING', '0') == '1',
+    "max_wait_ms": float(os.getenv('MANGETAMAIN_BATCH_MAX_WAIT_MS', '5')),  # Latence ajoutée max
+    "max_batch_size": int(os.getenv('MANGETAMAIN_BATCH_MAX_SIZE', '32'))  # Requêtes par lot
+}
+
+# Processus de scoring attachés à l'index en mémoire partagée (0: scoring
+# dans le processus de l'application)
+WORKER_CONFIG = {
+    "workers": int(os.getenv('MANGETAMAIN_SCORING_WORKERS', '0')),
+}
+
+# Scoring d'une requête par shards de recettes en parallèle (threads)
+SHARD_CONFIG = {
+    "enabled": os.getenv('MANGETAMAIN_SHARDED_SCORING', '0') == '1',
+    "max_threads": int(os.getenv('MANGETAMAIN_SCORING_THREADS', str(os.cpu_count() or 1))),
+    "min_shard_size": int(os.getenv('MANGETAMAIN_MIN_SHARD_SIZE', '25000')),  # Recettes par shard (min)
+}
+
+# Scoring scatter-gather: serveurs de shards (hôte:port, séparés par des
+# virgules) partitionnant le corpus par identifiant; vide: scoring local
+SCATTER_CONFIG = {
+    "shards": [address for address in os.getenv('MANGETAMAIN_SCORING_SHARDS', '').split(',')
+               if address.strip()],
+    "timeout_ms": float(os.getenv('MANGETAMAIN_SHARD_TIMEOUT_MS', '500')),  # Par shard
+    "cursor_depth": int(os.getenv('MANGETAMAIN_SHARD_CURSOR_DEPTH', '200')),  # Top-k du mode paginé
+    "shard_port": int(os.getenv('MANGETAMAIN_SHARD_PORT', '9100')),
+    # Côté serveur de shard: taille maximale d'une requête et inactivité tolérée
+    "max_request_bytes": int(os.getenv('MANGETAMAIN_SHARD_MAX_REQUEST_BYTES', str(1 << 20))),
+    "idle_timeout_s": float(os.getenv('MANGETAMAIN_SHARD_IDLE_TIMEOUT_S', '60')),
+}
+
+# Contrôle d'admission devant le scoring complet: au-delà de la concurrence,
+# de la file ou du budget de latence, réponse en mode dégradé (signalée)
+ADMISSION_CONFIG = {
+    "enabled": os.getenv('MANGETAMAIN_ADMISSION_CONTROL', '1') == '1',
+    "max_concurrent": int(os.getenv('MANGETAMAIN_MAX_CONCURRENT_SCORING', '4')),
+    "max_queue": int(os.getenv('MANGETAMAIN_MAX_SCORING_QUEUE', '16')),
+    "latency_budget_ms": float(os.getenv('MANGETAMAIN_LATENCY_BUDGET_MS', '3000')),  # Par requête
+}
+
+# Insertions et mises à jour de recettes en ligne: le segment delta de
+# l'index est fusionné dans le segment principal à partir de compact_rows recettes
+LIVE_INDEX_CONFIG = {
+    "compact_rows": int(os.getenv('MANGETAMAIN_DELTA_COMPACT_ROWS', '1000')),
+}
+
+# Validation des artefacts contre le manifeste du pipeline avant publication:
+# tailles, schéma et lignes (rapide), empreintes SHA-256 en plus si deep_verify
+MANIFEST_CONFIG = {
+    "deep_verify": os.getenv('MANGETAMAIN_DEEP_VERIFY', '0') == '1',
+}
+
+# Configuration du warm-up au démarrage du processus
+WARMUP_CONFIG = {
+    # Fichier de disponibilité lu par le healthcheck du conteneur
+    "ready_file": os.getenv('MANGETAMAIN_READY_FILE', '/tmp/mangetamain.ready'),
+    # Requêtes types exécutées pour remplir les caches
+    "queries": [
+        "chicken, onion, garlic",
+        "pasta, tomato, cheese",
+        "egg, flour, sugar, butter",
+        "beef, potato, carrot",
+    ],
+    "sort_modes": ["intelligent"],
+    "n_recommendations": 8
+}
+
+# Configuration du service HTTP de recommandation (sans Streamlit)
+SERVICE_CONFIG = {
+    "host": os.getenv('MANGETAMAIN_SERVICE_HOST', '0.0.0.0'),
+    "port": int(os.getenv('MANGETAMAIN_SERVICE_PORT', '8081')),
+    "default_recommendations": 8,
+    "max_recommendations": 100,
+    "max_batch_size": 32,  # Requêtes par appel /recommend/batch
+    "max_upsert_recipes": 500,  # Recettes par appel /recipes
+    # Jeton des routes d'écriture (POST /recipes, en-tête "Authorization: Bearer
+    # <jeton>"); sans jeton, seuls les clients locaux (loopback) peuvent écrire
+    "write_token": os.getenv('MANGETAMAIN_WRITE_TOKEN') or None,
+    "max_body_bytes": 1024 * 1024  # 1 Mo
 }
 
 # Configuration du moteur de recommandations
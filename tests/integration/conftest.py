@@ -0,0 +1,23 @@
+"""
+Fixtures partagées: isolation des caches de résultats de recommandation
+entre les tests (les caches sont globaux au processus)
+"""
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clear_result_cache(monkeypatch):
+    """Vide le cache mémoire et désactive le cache disque pour chaque test"""
+    try:
+        from src.engines import recommendation_engine
+    except ImportError:
+        yield
+        return
+    monkeypatch.setattr(recommendation_engine, "DISK_CACHE", None)
+    recommendation_engine.RESULT_CACHE.clear()
+    recommendation_engine.COMPONENT_CACHE.clear()
+    recommendation_engine.SINGLE_FLIGHT.reset_stats()
+    yield
+    recommendation_engine.RESULT_CACHE.clear()
+    recommendation_engine.COMPONENT_CACHE.clear()
@@ -0,0 +1,171 @@
+"""
+Tests unitaires pour le contrôle d'admission et le scoring dégradé
+(src/engines/admission.py et RecommendationEngine)
+"""
+
+import threading
+import time
+
+import numpy as np
+import pytest
+import pandas as pd
+
+try:
+    from src.engines import recipe_index, recommendation_engine
+    from src.engines.admission import AdmissionController
+    from src.engines.recipe_index import RecipeIndex, index_available
+    from src.engines.recommendation_engine import RecommendationEngine
+except ImportError:
+    pytest.skip("Module admission non accessible", allow_module_level=True)
+
+
+VOCABULARY = ['chicken breast', 'onion', 'garlic', 'tomato', 'pasta', 'egg',
+              'flour', 'sugar', 'butter', 'milk', 'salt', 'beef', 'carrot']
+
+
+@pytest.fixture
+def dataset():
+    rng = np.random.default_rng(5)
+    recipes = pd.DataFrame({
+        'id': np.arange(200) + 1,
+        'name': [f"recipe {i}" for i in range(200)],
+        'normalized_ingredients': [list(rng.choice(VOCABULARY, rng.integers(1, 6), replace=False))
+                                   for _ in range(200)],
+        'minutes': rng.integers(5, 200, 200),
+    })
+    interactions = pd.DataFrame({'recipe_id': rng.integers(1, 201, 600),
+                                 'rating': rng.integers(1, 6, 600)})
+    return recipes, interactions
+
+
+@pytest.fixture
+def saturated(monkeypatch):
+    """Contrôleur sans file dont l'unique créneau est occupé"""
+    controller = AdmissionController(max_concurrent=1, max_queue=0)
+    assert controller.acquire() is None
+    monkeypatch.setattr(recommendation_engine, 'ADMISSION', controller)
+    return controller
+
+
+class TestAdmissionController:
+    """Tests du limiteur de concurrence"""
+
+    def test_free_slot_is_admitted(self):
+        controller = AdmissionController(max_concurrent=2, max_queue=0)
+        with controller.admit(time.monotonic() - 1) as refused:
+            # Créneau libre: admis même avec une échéance dépassée
+            assert refused is None
+            assert controller.stats()["in_flight"] == 1
+        assert controller.stats()["in_flight"] == 0
+
+    def test_queue_full(self):
+        controller = AdmissionController(max_concurrent=1, max_queue=0)
+        assert controller.acquire() is None
+        assert controller.acquire() == "queue_full"
+        assert controller.stats()["rejected"]["queue_full"] == 1
+
+    def test_deadline_while_waiting(self):
+        controller = AdmissionController(max_concurrent=1, max_queue=4)
+        assert controller.acquire() is None
+
+        start = time.monotonic()
+        assert controller.acquire(time.monotonic() + 0.05) == "deadline"
+        assert time.monotonic() - start < 1
+        assert controller.stats()["waiting"] == 0
+
+    def test_waiter_gets_released_slot(self):
+        controller = AdmissionController(max_concurrent=1, max_queue=4)
+        assert controller.acquire() is None
+        results = []
+        waiter = threading.Thread(target=lambda: results.append(controller.acquire()))
+        waiter.start()
+        while controller.stats()["waiting"] == 0:
+            time.sleep(0.001)
+
+        controller.release(0.01)
+        waiter.join(timeout=5)
+        assert results == [None]
+        assert controller.stats()["peak_waiting"] == 1
+
+    def test_expected_cost_shortens_wait(self):
+        controller = AdmissionController(max_concurrent=1, max_queue=4, smoothing=0.5)
+        controller.acquire()
+        controller.release(2.0)
+        controller.acquire()
+        controller.release(1.0)
+        assert controller.stats()["expected_cost_ms"] == pytest.approx(1500)
+
+        # Un calcul complet ne tiendrait plus dans le budget: refus immédiat
+        assert controller.acquire() is None
+        start = time.monotonic()
+        assert controller.acquire(time.monotonic() + 1.0) == "deadline"
+        assert time.monotonic() - start < 0.5
+
+
+class TestDegradedRecommendations:
+    """Tests des réponses dégradées du moteur"""
+
+    def test_popular_fallback(self, dataset, saturated):
+        recipes, interactions = dataset
+        result = RecommendationEngine.get_recommendations(
+            recipes, interactions, ['onion', 'garlic'], 60, 5, raise_errors=True)
+
+        assert result.attrs["degraded"] == {"mode": "popular", "reason": "queue_full"}
+        assert len(result) == 5
+        assert (result['minutes'] <= 60).all()
+        # Jamais mis en cache: la requête suivante refait un calcul complet
+        assert recommendation_engine.RESULT_CACHE.stats()["entries"] == 0
+        # (seule la base "popular", commune à toutes les requêtes, est conservée)
+        assert recommendation_engine.COMPONENT_CACHE.stats()["entries"] == 1
+
+        saturated.release()
+        result = RecommendationEngine.get_recommendations(
+            recipes, interactions, ['onion', 'garlic'], 60, 5, raise_errors=True)
+        assert "degraded" not in result.attrs
+
+    def test_lazy_cursor_is_flagged(self, dataset, saturated):
+        recipes, interactions = dataset
+        cursor = RecommendationEngine.get_recommendations(
+            recipes, interactions, ['egg'], None, 5, lazy=True, raise_errors=True)
+
+        assert cursor.degraded["reason"] == "queue_full"
+        assert len(cursor.take(5)) == 5
+
+    @pytest.mark.skipif(not index_available(), reason="scikit-learn non installé")
+    def test_jaccard_only_with_loaded_index(self, dataset, saturated):
+        recipes, interactions = dataset
+        data_version = RecommendationEngine.compute_data_version(recipes, interactions)
+        recipe_index._INDEXES.clear()
+        recipe_index.get_recipe_index(recipes, interactions, data_version)
+        try:
+            result = RecommendationEngine.get_recommendations(
+                recipes, interactions, ['onion', 'garlic'], 60, 5,
+                data_version=data_version, sort_mode="jaccard", raise_errors=True)
+        finally:
+            recipe_index._INDEXES.clear()
+
+        assert result.attrs["degraded"]["mode"] == "jaccard_only"
+        assert (result['minutes'] <= 60).all()
+        assert (result['jaccard'] > 0).all()
+        assert (result['cosine'] == 0).all()
+
+
+@pytest.mark.skipif(not index_available(), reason="scikit-learn non installé")
+class TestJaccardComponents:
+    """Tests du Jaccard par listes inversées"""
+
+    @pytest.mark.parametrize("query", [(['onion', 'garlic'], None), (['egg', 'sugar'], 60),
+                                       (['beef', 'unknown'], 120)])
+    def test_matches_full_scoring(self, dataset, query):
+        index = RecipeIndex.build(*dataset)
+        full, = index.score_batch([query])
+        fast = index.jaccard_components(*query)
+
+        matching = full.jaccard > 0
+        np.testing.assert_array_equal(fast.labels, full.labels[matching])
+        np.testing.assert_allclose(fast.jaccard, full.jaccard[matching], rtol=1e-6)
+        np.testing.assert_array_equal(fast.popularity, full.popularity[matching])
+
+    def test_no_candidate(self, dataset):
+        index = RecipeIndex.build(*dataset)
+        assert index.jaccard_components(['unknown'], None) is None
@@ -0,0 +1,177 @@
+"""
+Tests unitaires pour le manifeste des artefacts
+(preprocessing/artifact_manifest.py, pipeline.verify_streamlit_data et
+validation au chargement du DataManager)
+"""
+
+import json
+from unittest.mock import patch
+
+import pytest
+import pandas as pd
+
+try:
+    import artifact_manifest
+    from artifact_manifest import (build_manifest, main, verify_files, verify_manifest,
+                                   verify_tables)
+    import pipeline
+    from src.managers import data_manager as data_manager_module
+    from src.managers.data_manager import DataManager
+except ImportError:
+    pytest.skip("Module artifact_manifest non accessible", allow_module_level=True)
+
+
+FILES = ["recipes_processed.pkl", "interactions.pkl"]
+
+
+@pytest.fixture
+def artifacts(tmp_path):
+    recipes = pd.DataFrame({'id': [1, 2, 3], 'recipe_id': [1, 2, 3],
+                            'name': ['a', 'b', 'c'],
+                            'normalized_ingredients': [['egg'], ['milk'], []]})
+    interactions = pd.DataFrame({'recipe_id': [1, 1, 3], 'rating': [5, 4, 3]})
+    recipes.to_pickle(tmp_path / FILES[0])
+    interactions.to_pickle(tmp_path / FILES[1])
+    manifest = build_manifest(str(tmp_path), FILES,
+                              {'recipes': (FILES[0], recipes),
+                               'interactions': (FILES[1], interactions)},
+                              source={'dataset_id': 'food-com'})
+    (tmp_path / artifact_manifest.METADATA_FILE).write_text(json.dumps(
+        {'recipes_with_ingredients': 2, 'manifest': manifest}))
+    return tmp_path, manifest, recipes, interactions
+
+
+class TestManifest:
+    """Tests de construction et de validation du manifeste"""
+
+    def test_valid_artifacts(self, artifacts):
+        directory, manifest, recipes, interactions = artifacts
+
+        assert set(manifest['files']) == set(FILES)
+        assert manifest['tables']['recipes']['rows'] == 3
+        assert manifest['tables']['interactions']['columns'] == {'recipe_id': 'int64',
+                                                                 'rating': 'int64'}
+        assert verify_manifest(str(directory), manifest, deep=True,
+                               tables={'recipes': recipes, 'interactions': interactions}) == []
+
+    def test_data_version_follows_content(self, artifacts):
+        directory, manifest, recipes, _ = artifacts
+        same = build_manifest(str(directory), FILES, {})
+        assert same['data_version'] == manifest['data_version']
+
+        recipes.iloc[:2].to_pickle(directory / FILES[0])
+        assert build_manifest(str(directory), FILES, {})['data_version'] != manifest['data_version']
+
+    def test_missing_or_resized_file(self, artifacts):
+        directory, manifest, _, _ = artifacts
+        (directory / FILES[1]).unlink()
+        with open(directory / FILES[0], 'ab') as f:
+            f.write(b'\0')
+
+        problems = verify_files(str(directory), manifest)
+        assert len(problems) == 2
+        assert any("manquant" in problem for problem in problems)
+
+    def test_same_size_corruption_needs_deep(self, artifacts):
+        directory, manifest, _, _ = artifacts
+        path = directory / FILES[1]
+        content = bytearray(path.read_bytes())
+        content[-2] ^= 0xFF
+        path.write_bytes(bytes(content))
+
+        assert verify_files(str(directory), manifest) == []
+        assert verify_files(str(directory), manifest, deep=True) == [
+            f"{FILES[1]}: empreinte SHA-256 différente"]
+
+    def test_tables_mismatch(self, artifacts):
+        _, manifest, recipes, interactions = artifacts
+        problems = verify_tables(manifest, {'recipes': recipes.iloc[:2],
+                                            'interactions': interactions.astype({'rating': float})})
+        assert problems == ["recipes: 2 lignes au lieu de 3",
+                            "interactions: schéma différent du manifeste"]
+
+    def test_unsupported_version(self, artifacts):
+        directory, manifest, _, _ = artifacts
+        assert verify_files(str(directory), {**manifest, 'manifest_version': 99})
+
+
+class TestCli:
+    """Tests de la validation au démarrage (start.sh)"""
+
+    def test_exit_codes(self, artifacts, capsys):
+        directory, _, _, _ = artifacts
+        assert main([str(directory)]) == 0
+        assert "Manifeste valide" in capsys.readouterr().out
+
+        (directory / FILES[0]).unlink()
+        assert main([str(directory)]) == 1
+
+    def test_without_manifest(self, tmp_path):
+        pd.DataFrame({'id': [1]}).to_pickle(tmp_path / FILES[0])
+        assert main([str(tmp_path)]) == 1
+        pd.DataFrame({'recipe_id': [1]}).to_pickle(tmp_path / FILES[1])
+        assert main([str(tmp_path)]) == 0
+
+
+class TestVerifyStreamlitData:
+    """Tests de la vérification du pipeline"""
+
+    def test_uses_manifest_without_reading_pickles(self, artifacts):
+        directory, _, _, _ = artifacts
+        with patch.object(pipeline.pd, 'read_pickle', side_effect=AssertionError("relu")):
+            assert pipeline.verify_streamlit_data(str(directory), deep=True)
+
+    def test_detects_corruption(self, artifacts):
+        directory, _, _, _ = artifacts
+        (directory / FILES[0]).write_bytes(b'tronque')
+        assert not pipeline.verify_streamlit_data(str(directory))
+
+    def test_falls_back_to_full_read(self, artifacts):
+        directory, _, _, _ = artifacts
+        (directory / artifact_manifest.METADATA_FILE).unlink()
+        assert pipeline.verify_streamlit_data(str(directory))
+
+
+class TestDataManagerValidation:
+    """Une version non conforme au manifeste n'est jamais publiée"""
+
+    def setup_method(self):
+        data_manager_module._ARTIFACTS.clear()
+        self.data_manager = DataManager()
+
+    def teardown_method(self):
+        data_manager_module._ARTIFACTS.clear()
+
+    def _point_to(self, directory):
+        self.data_manager.recipes_path = str(directory / FILES[0])
+        self.data_manager.interactions_path = str(directory / FILES[1])
+        self.data_manager.metadata_path = str(directory / artifact_manifest.METADATA_FILE)
+
+    def test_valid_version_published(self, artifacts):
+        directory, _, recipes, _ = artifacts
+        self._point_to(directory)
+
+        recipes_df, _ = self.data_manager.load_artifacts()
+        pd.testing.assert_frame_equal(recipes_df, recipes)
+        assert self.data_manager.get_snapshot() is not None
+
+    def test_file_mismatch_rejected_before_reading(self, artifacts):
+        directory, _, _, _ = artifacts
+        self._point_to(directory)
+        (directory / FILES[1]).unlink()
+        pd.DataFrame({'recipe_id': [1]}).to_pickle(directory / FILES[1])
+
+        with patch('pandas.read_pickle', side_effect=AssertionError("relu")):
+            with pytest.raises(ValueError, match="interactions.pkl: taille"):
+                self.data_manager.load_artifacts()
+        assert self.data_manager.get_snapshot() is None
+
+    def test_table_mismatch_rejected(self, artifacts):
+        directory, manifest, _, _ = artifacts
+        self._point_to(directory)
+        manifest['tables']['recipes']['rows'] = 4
+        (directory / artifact_manifest.METADATA_FILE).write_text(json.dumps({'manifest': manifest}))
+
+        with pytest.raises(ValueError, match="recipes: 3 lignes au lieu de 4"):
+            self.data_manager.load_artifacts()
+        assert self.data_manager.get_snapshot() is None
@@ -4,6 +4,7 @@ Tests complets pour la classe MangeTaMainApp
 
 import pytest
 from unittest.mock import patch, Mock, MagicMock
+import numpy as np
 import pandas as pd
 from src.core.app import MangeTaMainApp
 
@@ -48,6 +49,13 @@ class TestMangeTaMainApp:
         expected = ["chicken", "onion", "garlic"]
         assert result == expected
     
+    def test_normalize_user_ingredients(self):
+        """Test de la normalisation via la carte des ingrédients"""
+        with patch.object(self.app.data_manager, 'load_ingredient_map',
+                          return_value={'large eggs': 'egg', 'eggs': 'egg'}):
+            result = self.app._normalize_user_ingredients(['large eggs', 'onion', 'eggs'])
+        assert result == ['egg', 'onion']
+
     def test_parse_user_ingredients_with_empty_items(self):
         """Test du parsing avec éléments vides"""
         result = self.app._parse_user_ingredients("chicken, , onion, , garlic")
@@ -219,12 +227,14 @@ class TestMangeTaMainApp:
         with patch.object(self.app.ui_components, 'display_main_header'), \
              patch.object(self.app.ui_components, 'display_sidebar_stats'), \
              patch.object(self.app.ui_components, 'display_footer'), \
-             patch.object(self.app.data_manager, 'load_preprocessed_data') as mock_load:
+             patch.object(self.app.data_manager, 'start_background_load', return_value="ready"), \
+             patch.object(self.app.data_manager, 'get_data_version', return_value='v1'), \
+             patch.object(self.app.data_manager, 'get_snapshot') as mock_load:
             
             # Mock des données
             mock_recipes = pd.DataFrame({'recipe_id': [1, 2]})
             mock_interactions = pd.DataFrame({'user_id': [1, 2]})
-            mock_load.return_value = (mock_recipes, mock_interactions)
+            mock_load.return_value = ('v1', mock_recipes, mock_interactions)
             
             # Mock des retours de _handle_user_input_section
             mock_handle_input.return_value = ("chicken", None, 5, True, "intelligent")
@@ -237,6 +247,25 @@ class TestMangeTaMainApp:
             mock_handle_input.assert_called_once()
             mock_handle_recs.assert_called_once()
     
+    @patch('src.core.app.StyleManager.apply_styles')
+    @patch.object(MangeTaMainApp, '_handle_user_input_section')
+    @patch.object(MangeTaMainApp, '_handle_recommendations')
+    def test_run_while_loading_renders_inputs(self, mock_handle_recs, mock_handle_input, mock_styles):
+        """Pendant le chargement: saisie affichée, bouton désactivé, pas de recommandations"""
+        mock_handle_input.return_value = ("chicken", None, 5, False, "intelligent")
+        with patch.object(self.app.ui_components, 'display_main_header'), \
+             patch.object(self.app.ui_components, 'display_sidebar_loading') as mock_sidebar, \
+             patch.object(self.app.ui_components, 'display_footer'), \
+             patch.object(self.app.data_manager, 'start_background_load', return_value="loading"), \
+             patch.object(self.app.data_manager, 'wait_for_artifacts', return_value=False), \
+             patch('streamlit.info'), patch('streamlit.rerun') as mock_rerun:
+            self.app.run()
+
+        mock_handle_input.assert_called_once_with(False)
+        mock_handle_recs.assert_not_called()
+        mock_sidebar.assert_called_once()
+        mock_rerun.assert_called_once()
+
     @patch('streamlit.warning')
     def test_empty_input_warning(self, mock_warning):
         """Test d'avertissement pour entrée vide"""
@@ -331,4 +360,188 @@ class TestMangeTaMainApp:
         
         # Test head pour limiter les résultats
         limited = recommendations.head(2)
-        assert len(limited) == 2
\ No newline at end of file
+        assert len(limited) == 2
+
+class TestRankedResultsSession:
+    """Les réexécutions relisent les caches du moteur, la session ne garde que la requête"""
+
+    def setup_method(self):
+        self.app = MangeTaMainApp()
+
+    @staticmethod
+    def _results(*args, **kwargs):
+        # Page complète de n résultats (args[4]: n_recommendations)
+        return pd.DataFrame({'id': np.arange(args[4])})
+
+    def test_rerun_pages_through_cached_results(self):
+        session = {}
+        with patch('streamlit.session_state', session), \
+                patch('streamlit.markdown'), patch('streamlit.info'), \
+                patch('streamlit.subheader'), patch('streamlit.button'), \
+                patch.object(self.app.data_manager, 'get_data_version', return_value='v1'), \
+                patch.object(self.app.recommendation_engine, 'get_recommendations',
+                             side_effect=self._results) as mock_get_recs, \
+                patch.object(self.app, '_display_recommendations_stats') as mock_display:
+            self.app._handle_recommendations(
+                None, None, "chicken, onion", None, 8, True, "score")
+            # Réexécution après déplacement du slider (bouton non cliqué)
+            self.app._handle_recommendations(
+                None, None, "chicken, onion", None, 12, False, "score")
+            self.app._show_more(12)
+            self.app._handle_recommendations(
+                None, None, "chicken, onion", None, 12, False, "score")
+
+        # Chemin non paresseux: résultats servis par RESULT_CACHE / DISK_CACHE
+        assert all('lazy' not in call.kwargs for call in mock_get_recs.call_args_list)
+        assert [call.args[4] for call in mock_get_recs.call_args_list] == [8, 12, 24]
+        shown = [len(call.args[0]) for call in mock_display.call_args_list]
+        assert shown == [8, 12, 24]
+        assert not any(isinstance(value, pd.DataFrame)
+                       for value in session["ranked_results"].values())
+
+    def test_rerun_served_from_result_cache(self):
+        from src.engines import recommendation_engine
+        recipes_df = pd.DataFrame({
+            'id': [1, 2, 3], 'name': ['a', 'b', 'c'], 'minutes': [10, 20, 30],
+            'normalized_ingredients': [['chicken', 'onion'], ['chicken'], ['beef']],
+        })
+        interactions_df = pd.DataFrame({'recipe_id': [1, 2], 'rating': [5, 4]})
+        with patch('streamlit.session_state', {}), \
+                patch('streamlit.markdown'), patch('streamlit.info'), \
+                patch('streamlit.subheader'), patch('streamlit.button'), \
+                patch.object(self.app.data_manager, 'get_data_version', return_value='v1'), \
+                patch.object(self.app, '_normalize_user_ingredients', side_effect=lambda x: x), \
+                patch.object(self.app, '_display_recommendations_stats'):
+            self.app._handle_recommendations(
+                recipes_df, interactions_df, "chicken, onion", None, 2, True, "score")
+            hits = recommendation_engine.RESULT_CACHE.hits
+            self.app._handle_recommendations(
+                recipes_df, interactions_df, "chicken, onion", None, 2, False, "score")
+
+        assert recommendation_engine.RESULT_CACHE.hits == hits + 1
+
+    def test_engine_error_is_displayed(self):
+        session = {}
+        with patch('streamlit.session_state', session), \
+                patch('streamlit.markdown'), patch('streamlit.info'), \
+                patch('streamlit.subheader'), patch('streamlit.error') as mock_error, \
+                patch.object(self.app.data_manager, 'get_data_version', return_value='v1'), \
+                patch.object(self.app.recommendation_engine, 'get_recommendations',
+                             side_effect=RuntimeError("boom")), \
+                patch.object(self.app, '_display_recommendations_stats') as mock_display:
+            self.app._handle_recommendations(
+                None, None, "chicken", None, 8, True, "score")
+
+        assert "boom" in mock_error.call_args[0][0]
+        mock_display.assert_not_called()
+        assert session == {}
+
+    def test_rerun_with_other_query_shows_nothing(self):
+        session = {}
+        with patch('streamlit.session_state', session), \
+                patch('streamlit.markdown'), patch('streamlit.info'), \
+                patch('streamlit.subheader'), patch('streamlit.button'), \
+                patch.object(self.app.data_manager, 'get_data_version', return_value='v1'), \
+                patch.object(self.app.recommendation_engine, 'get_recommendations',
+                             side_effect=self._results), \
+                patch.object(self.app, '_display_recommendations_stats') as mock_display:
+            self.app._handle_recommendations(
+                None, None, "chicken", None, 8, True, "score")
+            self.app._handle_recommendations(
+                None, None, "beef", None, 8, False, "score")
+
+        assert mock_display.call_count == 1
+
+
+class TestFragmentsAndSessionStats:
+    """Fragment de la zone principale et statistiques calculées une fois"""
+
+    def setup_method(self):
+        self.app = MangeTaMainApp()
+
+    def test_run_fragment_calls_directly_outside_streamlit(self):
+        from src.core.app import run_fragment
+        assert run_fragment(lambda a, b: a + b, 1, 2) == 3
+
+    def test_run_renders_main_section_in_fragment(self):
+        recipes_df = pd.DataFrame({'id': [1]})
+        interactions_df = pd.DataFrame({'recipe_id': [1]})
+        with patch('src.core.app.StyleManager.apply_styles'), \
+                patch('src.core.app.run_fragment') as mock_fragment, \
+                patch.object(self.app.ui_components, 'display_main_header'), \
+                patch.object(self.app.ui_components, 'display_sidebar_stats'), \
+                patch.object(self.app.ui_components, 'display_footer'), \
+                patch.object(self.app.data_manager, 'start_background_load', return_value="ready"), \
+                patch.object(self.app.data_manager, 'get_snapshot',
+                             return_value=('v1', recipes_df, interactions_df)), \
+                patch('streamlit.session_state', {}):
+            self.app.run()
+
+        # Seule la version est conservée dans les arguments du fragment
+        mock_fragment.assert_called_once_with(self.app._render_main, 'v1')
+
+    def test_fragment_rerun_after_swap_reruns_page(self):
+        snapshot = ('v2', pd.DataFrame({'id': [1]}), pd.DataFrame({'recipe_id': [1]}))
+        with patch.object(self.app.data_manager, 'get_snapshot', return_value=snapshot), \
+                patch('streamlit.rerun', side_effect=RuntimeError("rerun")) as mock_rerun, \
+                patch.object(self.app, '_handle_user_input_section') as mock_input, \
+                patch.object(self.app, '_handle_recommendations') as mock_handle:
+            # Réexécution du fragment: version de l'exécution complète précédente
+            with pytest.raises(RuntimeError, match="rerun"):
+                self.app._render_main('v1')
+
+        mock_rerun.assert_called_once()
+        mock_input.assert_not_called()
+        mock_handle.assert_not_called()
+
+    def test_fragment_scores_snapshot_version(self):
+        recipes_df = pd.DataFrame({'id': [1]})
+        interactions_df = pd.DataFrame({'recipe_id': [1]})
+        with patch.object(self.app.data_manager, 'get_snapshot',
+                          return_value=('v1', recipes_df, interactions_df)), \
+                patch.object(self.app, '_handle_user_input_section',
+                             return_value=("egg", None, 5, True, "score")), \
+                patch.object(self.app, '_handle_recommendations') as mock_handle:
+            self.app._render_main('v1')
+
+        assert mock_handle.call_args.args[0] is recipes_df
+        assert mock_handle.call_args.kwargs["data_version"] == 'v1'
+
+    def test_dataset_stats_computed_once_per_session(self):
+        recipes_df = pd.DataFrame({'normalized_ingredients': [['egg'], []]})
+        interactions_df = pd.DataFrame({'recipe_id': [1]})
+        with patch('streamlit.session_state', {}), \
+                patch.object(self.app.data_manager, 'get_data_version', return_value='v1'), \
+                patch.object(self.app.data_manager, 'load_dataset_profile', return_value=None), \
+                patch.object(self.app.ui_components, 'compute_dataset_stats',
+                             wraps=self.app.ui_components.compute_dataset_stats) as compute:
+            first = self.app._session_dataset_stats(recipes_df, interactions_df)
+            second = self.app._session_dataset_stats(recipes_df, interactions_df)
+
+        compute.assert_called_once()
+        assert first is second
+        assert first['recipes_with_ingredients'] == 1
+
+    def test_dataset_stats_use_pipeline_profile(self):
+        recipes_df = pd.DataFrame({'normalized_ingredients': [['egg'], []]})
+        profile = {'recipes': 2, 'interactions': 1, 'ingredient_coverage': 50.0}
+        with patch('streamlit.session_state', {}), \
+                patch.object(self.app.data_manager, 'get_data_version', return_value='v1'), \
+                patch.object(self.app.data_manager, 'load_dataset_profile', return_value=profile), \
+                patch.object(self.app.ui_components, 'compute_dataset_stats') as compute:
+            stats = self.app._session_dataset_stats(recipes_df, pd.DataFrame())
+
+        compute.assert_not_called()
+        assert stats is profile
+
+    def test_stale_profile_falls_back_to_data(self):
+        recipes_df = pd.DataFrame({'normalized_ingredients': [['egg'], []]})
+        with patch('streamlit.session_state', {}), \
+                patch.object(self.app.data_manager, 'get_data_version', return_value='v1'), \
+                patch.object(self.app.data_manager, 'load_dataset_profile',
+                             return_value={'recipes': 10}):
+            stats = self.app._session_dataset_stats(recipes_df, pd.DataFrame())
+
+        assert stats['recipes'] == 2
+        assert stats['ingredient_coverage'] == 50.0
+
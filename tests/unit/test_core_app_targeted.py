@@ -214,7 +214,9 @@ class TestCoreAppMissedLines:
         """Test ligne 218: unpacking de data_result dans run()"""
         with patch('src.core.app.StyleManager.apply_styles'):
             with patch.object(self.app.ui_components, 'display_main_header'):
-                with patch.object(self.app.data_manager, 'load_preprocessed_data') as mock_load:
+                with patch.object(self.app.data_manager, 'get_snapshot') as mock_load, \
+                        patch.object(self.app.data_manager, 'get_data_version', return_value='v1'), \
+                        patch.object(self.app.data_manager, 'start_background_load', return_value="ready"):
                     with patch.object(self.app.ui_components, 'display_sidebar_stats') as mock_sidebar:
                         with patch.object(self.app, '_handle_user_input_section') as mock_input:
                             with patch.object(self.app, '_handle_recommendations') as mock_handle:
@@ -223,7 +225,7 @@ class TestCoreAppMissedLines:
                                     # Mock successful data loading pour déclencher la ligne 218
                                     recipes_df = pd.DataFrame({'recipe_id': [1, 2], 'name': ['Recipe1', 'Recipe2']})
                                     interactions_df = pd.DataFrame({'user_id': [1, 2], 'recipe_id': [1, 2]})
-                                    mock_load.return_value = (recipes_df, interactions_df)
+                                    mock_load.return_value = ('v1', recipes_df, interactions_df)
                                     
                                     mock_input.return_value = ("chicken", None, 5, False, "intelligent")
                                     
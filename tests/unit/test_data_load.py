@@ -0,0 +1,89 @@
+"""
+Tests unitaires pour le cache local des datasets (preprocessing/data_load.py)
+Un répertoire local remplace Kaggle: aucun accès réseau
+"""
+
+import os
+import json
+import pytest
+import pandas as pd
+from unittest.mock import patch
+
+try:
+    import data_load
+    from data_load import fetch_data, load_data, cache_entry_dir, MANIFEST_FILE
+except ImportError:
+    pytest.skip("Module data_load non accessible", allow_module_level=True)
+
+DATASET = "shuyangli94/food-com-recipes-and-user-interactions"
+
+
+@pytest.fixture
+def source_dir(tmp_path):
+    """Répertoire local jouant le rôle du dataset Kaggle"""
+    source = tmp_path / "kaggle"
+    source.mkdir()
+    pd.DataFrame({'id': [1, 2], 'name': ['soup', 'cake']}).to_csv(
+        source / "RAW_recipes.csv", index=False)
+    pd.DataFrame({'recipe_id': [1], 'rating': [5]}).to_csv(
+        source / "RAW_interactions.csv", index=False)
+    (source / "PP_recipes.csv").write_text("unused\n")
+    return str(source)
+
+
+class TestDatasetCache:
+    """Cache local vérifié par checksums"""
+
+    def test_fetch_populates_cache_with_manifest(self, source_dir, tmp_path):
+        cache_dir = str(tmp_path / "cache")
+
+        path = fetch_data(DATASET, version=2, cache_dir=cache_dir, source_dir=source_dir,
+                          files=["RAW_recipes.csv", "RAW_interactions.csv"])
+
+        assert path == cache_entry_dir(cache_dir, DATASET, 2)
+        with open(os.path.join(path, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+        assert sorted(manifest['files']) == ["RAW_interactions.csv", "RAW_recipes.csv"]
+        assert not os.path.exists(os.path.join(path, "PP_recipes.csv"))
+
+    def test_offline_uses_cache_without_network(self, source_dir, tmp_path):
+        cache_dir = str(tmp_path / "cache")
+        fetch_data(DATASET, cache_dir=cache_dir, source_dir=source_dir)
+
+        with patch.object(data_load, '_download', side_effect=AssertionError("réseau")):
+            path = fetch_data(DATASET, cache_dir=cache_dir, offline=True)
+
+        assert os.path.exists(os.path.join(path, "RAW_recipes.csv"))
+
+    def test_offline_without_cache_raises(self, tmp_path):
+        with patch.object(data_load, '_download', side_effect=AssertionError("réseau")):
+            with pytest.raises(FileNotFoundError):
+                fetch_data(DATASET, cache_dir=str(tmp_path / "cache"), offline=True)
+
+    def test_corrupted_entry_is_refetched(self, source_dir, tmp_path):
+        cache_dir = str(tmp_path / "cache")
+        path = fetch_data(DATASET, cache_dir=cache_dir, source_dir=source_dir)
+        with open(os.path.join(path, "RAW_recipes.csv"), 'a') as f:
+            f.write("3,corrupted\n")
+
+        with pytest.raises(FileNotFoundError):
+            fetch_data(DATASET, cache_dir=cache_dir, offline=True)
+
+        path = fetch_data(DATASET, cache_dir=cache_dir, source_dir=source_dir)
+        assert len(pd.read_csv(os.path.join(path, "RAW_recipes.csv"))) == 2
+
+
+class TestColumnarLoading:
+    """Conversion unique des CSV en format binaire"""
+
+    def test_second_load_skips_csv_parsing(self, source_dir):
+        first = load_data(source_dir, ["RAW_recipes.csv"])
+
+        with patch.object(data_load.pd, 'read_csv', side_effect=AssertionError("CSV reparsé")):
+            second = load_data(source_dir, ["RAW_recipes.csv"])
+
+        pd.testing.assert_frame_equal(first["RAW_recipes.csv"], second["RAW_recipes.csv"])
+
+    def test_missing_file_raises(self, source_dir):
+        with pytest.raises(FileNotFoundError):
+            load_data(source_dir, ["missing.csv"])
@@ -6,6 +6,8 @@ import pytest
 from unittest.mock import patch, Mock, MagicMock
 import pandas as pd
 import os
+import threading
+from src.managers import data_manager as data_manager_module
 from src.managers.data_manager import DataManager
 
 
@@ -14,6 +16,7 @@ class TestDataManager:
     
     def setup_method(self):
         """Setup pour chaque test"""
+        data_manager_module._ARTIFACTS.clear()
         self.data_manager = DataManager()
     
     def test_init(self):
@@ -44,4 +47,225 @@ class TestDataManager:
         assert hasattr(self.data_manager, 'recipes_path')
         assert hasattr(self.data_manager, 'interactions_path')
         assert hasattr(self.data_manager, 'load_preprocessed_data')
-        assert callable(self.data_manager.load_preprocessed_data)
\ No newline at end of file
+        assert callable(self.data_manager.load_preprocessed_data)
+    def test_load_ingredient_map_missing_file(self):
+        """Carte absente: normalisation désactivée"""
+        self.data_manager.ingredient_map_path = "/nonexistent/ingr_map.pkl"
+        assert self.data_manager.load_ingredient_map() == {}
+
+    def test_load_ingredient_map_compiled_file(self, tmp_path):
+        """Carte précompilée par le pipeline"""
+        ingredient_map = pytest.importorskip("ingredient_map")
+        csv_path = tmp_path / "ingr_map.csv"
+        pd.DataFrame({'raw_ingr': ['large eggs'], 'replaced': ['egg']}).to_csv(csv_path, index=False)
+        pkl_path = tmp_path / "ingr_map.pkl"
+        ingredient_map.compile_ingredient_map(str(csv_path), str(pkl_path))
+
+        self.data_manager.ingredient_map_path = str(pkl_path)
+        assert self.data_manager.load_ingredient_map() == {'large eggs': 'egg'}
+
+    def test_data_version_changes_with_files(self, tmp_path):
+        """La version des données suit la taille et la date des pickles"""
+        recipes = tmp_path / "recipes.pkl"
+        interactions = tmp_path / "interactions.pkl"
+        recipes.write_bytes(b"a")
+        interactions.write_bytes(b"b")
+        self.data_manager.recipes_path = str(recipes)
+        self.data_manager.interactions_path = str(interactions)
+
+        version = self.data_manager.get_data_version()
+        recipes.write_bytes(b"aa")
+
+        assert version is not None
+        assert self.data_manager.get_data_version() != version
+
+    def test_data_version_missing_files(self):
+        self.data_manager.recipes_path = "/nonexistent/recipes.pkl"
+        assert self.data_manager.get_data_version() is None
+
+    def test_load_dataset_profile(self, tmp_path):
+        """Profil lu dans les métadonnées du pipeline"""
+        metadata_path = tmp_path / "preprocessing_metadata.json"
+        metadata_path.write_text('{"success_rate": 100, "dataset_profile": {"recipes": 3}}')
+        self.data_manager.metadata_path = str(metadata_path)
+        assert self.data_manager.load_dataset_profile() == {"recipes": 3}
+
+    def test_load_dataset_profile_missing_or_invalid(self, tmp_path):
+        self.data_manager.metadata_path = str(tmp_path / "absent.json")
+        assert self.data_manager.load_dataset_profile() is None
+
+        invalid = tmp_path / "invalid.json"
+        invalid.write_text("{not json")
+        self.data_manager.metadata_path = str(invalid)
+        assert self.data_manager.load_dataset_profile() is None
+
+
+class TestBackgroundLoading:
+    """Chargement des artefacts en arrière-plan"""
+
+    def setup_method(self):
+        data_manager_module._ARTIFACTS.clear()
+        data_manager_module._LOAD_ERRORS.clear()
+        self.data_manager = DataManager()
+
+    def teardown_method(self):
+        data_manager_module._ARTIFACTS.clear()
+        data_manager_module._LOAD_ERRORS.clear()
+
+    def _write_artifacts(self, tmp_path):
+        pd.DataFrame({'id': [1, 2, 3]}).to_pickle(tmp_path / "recipes.pkl")
+        pd.DataFrame({'recipe_id': [1, 1]}).to_pickle(tmp_path / "interactions.pkl")
+        self.data_manager.recipes_path = str(tmp_path / "recipes.pkl")
+        self.data_manager.interactions_path = str(tmp_path / "interactions.pkl")
+
+    def test_missing_artifacts(self):
+        self.data_manager.recipes_path = "/nonexistent/recipes.pkl"
+        assert self.data_manager.start_background_load() == "missing"
+
+    def test_background_load_becomes_ready(self, tmp_path):
+        self._write_artifacts(tmp_path)
+
+        assert self.data_manager.start_background_load() == "loading"
+        assert self.data_manager.wait_for_artifacts(timeout=10)
+
+        assert self.data_manager.start_background_load() == "ready"
+        recipes_df, interactions_df = self.data_manager.get_loaded_artifacts()
+        assert len(recipes_df) == 3
+        assert len(interactions_df) == 2
+
+    def test_background_load_is_started_once(self, tmp_path):
+        self._write_artifacts(tmp_path)
+        started = threading.Event()
+        release = threading.Event()
+        real_read = pd.read_pickle
+
+        def slow_read(path):
+            started.set()
+            release.wait(10)
+            return real_read(path)
+
+        with patch('pandas.read_pickle', side_effect=slow_read) as read_pickle:
+            assert self.data_manager.start_background_load() == "loading"
+            started.wait(10)
+            assert self.data_manager.start_background_load() == "loading"
+            assert self.data_manager.get_loaded_artifacts() is None
+            release.set()
+            assert self.data_manager.wait_for_artifacts(timeout=10)
+
+        assert read_pickle.call_count == 2
+
+    def test_background_load_error(self, tmp_path):
+        self._write_artifacts(tmp_path)
+        (tmp_path / "recipes.pkl").write_bytes(b"not a pickle")
+
+        self.data_manager.start_background_load()
+        assert not self.data_manager.wait_for_artifacts(timeout=10)
+
+        assert self.data_manager.start_background_load() == "error"
+        assert self.data_manager.get_load_error()
+
+
+class TestHotSwap:
+    """Bascule à chaud vers une nouvelle version des artefacts"""
+
+    def setup_method(self):
+        data_manager_module._ARTIFACTS.clear()
+        data_manager_module._LOAD_ERRORS.clear()
+        self.data_manager = DataManager()
+
+    def teardown_method(self):
+        data_manager_module._ARTIFACTS.clear()
+        data_manager_module._LOAD_ERRORS.clear()
+
+    def _publish(self, tmp_path, n_recipes, manifest):
+        pd.DataFrame({'id': range(n_recipes)}).to_pickle(tmp_path / "recipes.pkl")
+        pd.DataFrame({'recipe_id': [1]}).to_pickle(tmp_path / "interactions.pkl")
+        (tmp_path / "metadata.json").write_text(manifest)
+        self.data_manager.recipes_path = str(tmp_path / "recipes.pkl")
+        self.data_manager.interactions_path = str(tmp_path / "interactions.pkl")
+        self.data_manager.metadata_path = str(tmp_path / "metadata.json")
+
+    def test_manifest_marks_published_version(self, tmp_path):
+        self._publish(tmp_path, 3, '{"run": 1}')
+        version = self.data_manager.get_manifest_version()
+
+        # Pickles réécrits par le pipeline, manifeste pas encore publié
+        pd.DataFrame({'id': range(5)}).to_pickle(tmp_path / "recipes.pkl")
+        assert self.data_manager.get_manifest_version() == version
+
+        (tmp_path / "metadata.json").write_text('{"run": 2}')
+        assert self.data_manager.get_manifest_version() != version
+
+    def test_old_version_served_while_new_loads(self, tmp_path):
+        self._publish(tmp_path, 3, '{"run": 1}')
+        self.data_manager.load_artifacts()
+        old_version = self.data_manager.get_data_version()
+        self._publish(tmp_path, 5, '{"run": 22}')
+
+        started = threading.Event()
+        release = threading.Event()
+        real_read = pd.read_pickle
+
+        def slow_read(path):
+            started.set()
+            release.wait(10)
+            return real_read(path)
+
+        with patch('pandas.read_pickle', side_effect=slow_read):
+            # Nouvelle version détectée: chargée en arrière-plan, l'ancienne servie
+            assert self.data_manager.start_background_load() == "ready"
+            started.wait(10)
+            version, recipes_df, _ = self.data_manager.get_snapshot()
+            assert version == old_version
+            assert len(recipes_df) == 3
+            release.set()
+            for _ in range(100):
+                if self.data_manager.get_data_version() != old_version:
+                    break
+                threading.Event().wait(0.05)
+
+        version, recipes_df, _ = self.data_manager.get_snapshot()
+        assert version == self.data_manager.get_manifest_version()
+        assert len(recipes_df) == 5
+        # Une seule version gardée en mémoire
+        assert len(data_manager_module._ARTIFACTS) == 1
+
+    def test_swap_notifies_listeners(self, tmp_path, monkeypatch):
+        swaps = []
+        monkeypatch.setattr(data_manager_module, '_SWAP_LISTENERS', [])
+        data_manager_module.add_swap_listener(lambda old, new: swaps.append((old, new)))
+
+        self._publish(tmp_path, 3, '{"run": 1}')
+        self.data_manager.load_artifacts()
+        first = self.data_manager.get_data_version()
+        assert swaps == []
+
+        self._publish(tmp_path, 4, '{"run": 2}')
+        self.data_manager.load_artifacts()
+        assert swaps == [(first, self.data_manager.get_data_version())]
+
+    def test_changed_during_read_is_not_published(self, tmp_path):
+        self._publish(tmp_path, 3, '{"run": 1}')
+        real_read = pd.read_pickle
+        reads = []
+
+        def read_then_republish(path):
+            reads.append(path)
+            if len(reads) == 1:
+                # Le pipeline publie une autre version pendant la lecture
+                (tmp_path / "metadata.json").write_text('{"run": 333}')
+            return real_read(path)
+
+        with patch('pandas.read_pickle', side_effect=read_then_republish):
+            self.data_manager.load_artifacts()
+
+        assert len(reads) == 4
+        assert self.data_manager.get_data_version() == self.data_manager.get_manifest_version()
+
+    def test_removed_artifacts_keep_serving(self, tmp_path):
+        self._publish(tmp_path, 3, '{"run": 1}')
+        self.data_manager.load_artifacts()
+        os.remove(tmp_path / "recipes.pkl")
+
+        assert self.data_manager.start_background_load() == "ready"
+        assert len(self.data_manager.get_loaded_artifacts()[0]) == 3
@@ -0,0 +1,152 @@
+"""
+Tests unitaires pour le module preprocessing/data_prepro.py
+Équivalence entre les scores vectorisés et les implémentations ligne par ligne
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+
+try:
+    from data_prepro import (
+        NutritionPreprocessor,
+        StepsPreprocessor,
+        DescriptionPreprocessor,
+        RecipePreprocessor,
+    )
+except ImportError:
+    pytest.skip("Module data_prepro non accessible", allow_module_level=True)
+
+
+@pytest.fixture
+def raw_recipes():
+    """Petit échantillon au format RAW_recipes.csv"""
+    return pd.DataFrame({
+        'id': [1, 2, 3, 4],
+        'name': ['soup', 'cake', 'salad', 'stew'],
+        'ingredients': [
+            "['carrot', 'onion', 'salt']",
+            "['flour', 'sugar', 'butter', 'egg']",
+            "['lettuce', 'tomato']",
+            "['beef', 'potato', 'onion']",
+        ],
+        'nutrition': [
+            "[120.0, 2.0, 5.0, 300.0, 4.0, 1.0, 10.0]",
+            "[850.0, 40.0, 120.0, 1500.0, 9.0, 30.0, 70.0]",
+            "[45.5, 0.0, 3.0, 20.0, 2.0, 0.0, 4.0]",
+            "[620.0, 25.0, 8.0, 2200.0, 35.0, 12.0, 30.0]",
+        ],
+        'tags': [
+            "['dinner', 'healthy']",
+            "['dessert']",
+            "['vegan', '15-minutes-or-less']",
+            "['main-dish', 'french']",
+        ],
+        'steps': [
+            "['chop the carrot', 'boil slowly for twenty minutes', 'season']",
+            "['mix flour and sugar carefully', 'bake', 'meanwhile whisk the eggs gradually']",
+            "[]",
+            "['brown the beef in a large heavy pot over medium high heat', 'add potato', 'simmer']",
+        ],
+        'n_steps': [3, 3, 0, 3],
+        'description': ['a simple soup', None, 'fresh salad', 'hearty stew'],
+    })
+
+
+class TestVectorizedScores:
+    """Les versions vectorisées doivent reproduire les versions unitaires"""
+
+    def test_health_scores_match_reference(self):
+        nutrition_dicts = [
+            {},
+            {'calories': 120.0, 'sugar': 4.0, 'sodium': 300.0, 'protein': 10.0},
+            {'calories': 2650.0, 'sugar': 250.0, 'sodium': 5000.0, 'protein': 0.0},
+            {'calories': 700.0, 'sugar': 60.0, 'sodium': 1200.0, 'protein': 40.0},
+            {'calories': 100.0},
+        ]
+        expected = [NutritionPreprocessor.compute_health_score(n) for n in nutrition_dicts]
+
+        result = NutritionPreprocessor.compute_health_scores(nutrition_dicts)
+
+        assert result.dtype == np.float32
+        np.testing.assert_allclose(result, expected, atol=1e-6)
+
+    def test_health_scores_empty_batch(self):
+        result = NutritionPreprocessor.compute_health_scores([])
+        assert len(result) == 0
+
+    def test_effort_scores_match_reference(self):
+        steps_lists = [
+            ['chop the carrot', 'boil slowly for twenty minutes'],
+            [],
+            ['stir constantly and carefully', 'meanwhile preheat', 'slowly add milk'],
+            ['a ' * 40],
+        ]
+        n_steps = np.array([2, 0, 3, 25])
+        expected = [StepsPreprocessor.compute_effort_score(n, s)
+                    for n, s in zip(n_steps, steps_lists)]
+
+        avg_lengths, complexity_counts = StepsPreprocessor.compute_step_stats(steps_lists)
+        result = StepsPreprocessor.compute_effort_scores(n_steps, avg_lengths, complexity_counts)
+
+        assert result.dtype == np.float32
+        np.testing.assert_allclose(result, expected, atol=1e-6)
+        assert list(complexity_counts) == [1, 0, 3, 0]
+
+    def test_preprocess_dataframe_writes_float32_scores(self, raw_recipes):
+        preprocessor = RecipePreprocessor()
+
+        processed = preprocessor.preprocess_dataframe(raw_recipes)
+
+        assert processed['health_score'].dtype == np.float32
+        assert processed['effort_score'].dtype == np.float32
+        for (_, row), (_, out) in zip(raw_recipes.iterrows(), processed.iterrows()):
+            reference = preprocessor.preprocess_recipe(row)
+            assert out['health_score'] == pytest.approx(reference.health_score, abs=1e-6)
+            assert out['effort_score'] == pytest.approx(reference.effort_score, abs=1e-6)
+
+
+class TestBatchKeywords:
+    """Extraction des mots-clés au niveau du corpus"""
+
+    def test_batch_matches_per_row_keywords(self):
+        descriptions = [
+            "Grandma's chicken soup: chicken, chicken and more chicken broth!",
+            None,
+            "This is the best recipe for a quick weeknight pasta with pasta sauce",
+            "",
+        ]
+        keywords, matrix, vocabulary = DescriptionPreprocessor.extract_keywords_batch(
+            descriptions, top_n=2)
+
+        assert matrix.shape == (4, len(vocabulary))
+        assert keywords[0][0] == DescriptionPreprocessor.extract_keywords(descriptions[0], 2)[0]
+        assert keywords[1] == [] and keywords[3] == []
+        for batch, text in zip(keywords, descriptions):
+            reference = DescriptionPreprocessor.extract_keywords(text, top_n=10)
+            assert set(batch) <= set(reference)
+        assert 'recipe' not in vocabulary and 'this' not in vocabulary
+
+    def test_ties_are_broken_alphabetically(self):
+        keywords, _, _ = DescriptionPreprocessor.extract_keywords_batch(
+            ["zesty lemon bars", "bars bars lemon"], top_n=2)
+        assert keywords == [['bars', 'lemon'], ['bars', 'lemon']]
+
+    def test_artifacts_round_trip(self, tmp_path):
+        _, matrix, vocabulary = DescriptionPreprocessor.extract_keywords_batch(
+            ["creamy tomato soup", "tomato salad"])
+
+        DescriptionPreprocessor.save_artifacts(matrix, vocabulary, str(tmp_path))
+        loaded_matrix, loaded_vocabulary = DescriptionPreprocessor.load_artifacts(str(tmp_path))
+
+        assert (loaded_matrix != matrix).nnz == 0
+        assert list(loaded_vocabulary) == list(vocabulary)
+
+    def test_preprocess_dataframe_can_defer_keywords(self, raw_recipes):
+        preprocessor = RecipePreprocessor()
+
+        deferred = preprocessor.preprocess_dataframe(raw_recipes, extract_keywords=False)
+        processed = preprocessor.preprocess_dataframe(raw_recipes)
+
+        assert all(k == [] for k in deferred['description_keywords'])
+        assert processed['description_keywords'].iloc[0] == ['simple', 'soup']
@@ -0,0 +1,70 @@
+"""
+Tests unitaires pour le profil du dataset (dataset_profile.py)
+"""
+
+import json
+
+import pytest
+import pandas as pd
+
+try:
+    from dataset_profile import build_dataset_profile, histogram, MINUTES_BINS
+except ImportError:
+    pytest.skip("Module dataset_profile non accessible", allow_module_level=True)
+
+
+@pytest.fixture
+def recipes_df():
+    return pd.DataFrame({
+        'id': [1, 2, 3, 4],
+        'normalized_ingredients': [['egg', 'flour'], ['egg'], [], None],
+        'minutes': [10, 30, 200, 45],
+    })
+
+
+@pytest.fixture
+def interactions_df():
+    return pd.DataFrame({'recipe_id': [1, 1, 2, 99], 'rating': [5, 4, 5, 0]})
+
+
+class TestDatasetProfile:
+    """Comptes, couverture et distributions"""
+
+    def test_counts_and_coverage(self, recipes_df, interactions_df):
+        profile = build_dataset_profile(recipes_df, interactions_df, built_at="2024-01-02T03:04:05")
+
+        assert profile['recipes'] == 4
+        assert profile['interactions'] == 4
+        assert profile['recipes_with_ingredients'] == 2
+        assert profile['ingredient_coverage'] == 50.0
+        assert profile['unique_ingredients'] == 2
+        assert profile['rated_recipes'] == 2
+        assert profile['built_at'] == "2024-01-02T03:04:05"
+
+    def test_distributions(self, recipes_df, interactions_df):
+        profile = build_dataset_profile(recipes_df, interactions_df)
+
+        assert profile['ingredients_per_recipe']['histogram'] == {
+            '0': 2, '1-4': 2, '5-9': 0, '10-14': 0, '15-19': 0, '20+': 0}
+        assert profile['ingredients_per_recipe']['max'] == 2.0
+        assert sum(profile['minutes']['histogram'].values()) == 4
+        assert profile['minutes']['histogram']['180+'] == 1
+        assert profile['ratings']['distribution'] == {'0': 1, '4': 1, '5': 2}
+        assert profile['ratings']['mean'] == 3.5
+
+    def test_profile_is_json_serializable(self, recipes_df, interactions_df):
+        profile = build_dataset_profile(recipes_df, interactions_df)
+        assert json.loads(json.dumps(profile)) == profile
+
+    def test_missing_columns(self):
+        profile = build_dataset_profile(pd.DataFrame({'name': ['a']}), pd.DataFrame())
+
+        assert profile['recipes_with_ingredients'] == 0
+        assert profile['ratings']['mean'] is None
+        assert profile['minutes']['median'] is None
+
+    def test_histogram_ignores_missing_values(self):
+        counts = histogram(pd.Series([5, None, 'x', 20]), MINUTES_BINS)
+        assert counts['0-14'] == 1
+        assert counts['15-29'] == 1
+        assert sum(counts.values()) == 2
@@ -0,0 +1,133 @@
+"""
+Tests unitaires pour le cache disque des résultats
+(src/engines/disk_cache.py)
+"""
+
+import multiprocessing
+
+import pytest
+import pandas as pd
+from unittest.mock import patch
+
+try:
+    from src.engines.disk_cache import DiskCache, open_disk_cache
+    from src.engines import recommendation_engine
+    from src.engines.recommendation_engine import RecommendationEngine
+except ImportError:
+    pytest.skip("Module disk_cache non accessible", allow_module_level=True)
+
+
+class FakeClock:
+    """Horloge contrôlée pour l'ordre LRU et l'expiration"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        self.now += 1
+        return self.now
+
+
+def _write_entries(path, start):
+    cache = DiskCache(path)
+    for i in range(start, start + 20):
+        cache.put(('query', i), pd.DataFrame({'id': [i]}), 'v1')
+
+
+class TestDiskCache:
+    """Persistance, versions, éviction et accès concurrent"""
+
+    def test_survives_reopen(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite")
+        df = pd.DataFrame({'id': [1, 2], 'name': ['a', 'b']})
+        DiskCache(path).put(('onion',), df, 'v1')
+
+        reopened = DiskCache(path)
+
+        pd.testing.assert_frame_equal(reopened.get(('onion',), 'v1'), df)
+        assert reopened.stats()['hits'] == 1
+
+    def test_data_version_is_part_of_the_key(self, tmp_path):
+        cache = DiskCache(str(tmp_path / "cache.sqlite"))
+        cache.put(('onion',), 'old', 'v1')
+
+        assert cache.get(('onion',), 'v2') is None
+        assert cache.get(('onion',), 'v1') == 'old'
+
+    def test_format_version_is_part_of_the_key(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite")
+        DiskCache(path, format_version="code1").put(('onion',), 'old', 'v1')
+
+        assert DiskCache(path, format_version="code2").get(('onion',), 'v1') is None
+        assert DiskCache(path, format_version="code1").get(('onion',), 'v1') == 'old'
+
+    def test_incompatible_entry_discarded(self, tmp_path):
+        cache = DiskCache(str(tmp_path / "cache.sqlite"))
+        cache.put(('onion',), 'old', 'v1')
+
+        # Classe disparue après une mise à jour du code ou de pandas
+        with patch('pickle.loads', side_effect=ModuleNotFoundError("ancien module")):
+            assert cache.get(('onion',), 'v1') is None
+        assert cache.stats()['errors'] == 1
+        assert cache.stats()['entries'] == 0
+
+    def test_size_bounded_lru_eviction(self, tmp_path):
+        cache = DiskCache(str(tmp_path / "cache.sqlite"), max_bytes=250,
+                          clock=FakeClock())
+        cache.put('a', b'x' * 100)
+        cache.put('b', b'x' * 100)
+        cache.get('a')
+        cache.put('c', b'x' * 100)
+
+        assert cache.get('b') is None
+        assert cache.get('a') is not None and cache.get('c') is not None
+        assert cache.stats()['bytes'] <= 250
+
+    def test_ttl(self, tmp_path):
+        clock = FakeClock()
+        cache = DiskCache(str(tmp_path / "cache.sqlite"), ttl=5, clock=clock)
+        cache.put('a', 1)
+        clock.now += 10
+        assert cache.get('a') is None
+
+    def test_concurrent_writers(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite")
+        DiskCache(path)
+        ctx = multiprocessing.get_context("fork")
+        workers = [ctx.Process(target=_write_entries, args=(path, i * 20)) for i in range(3)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(30)
+
+        assert all(worker.exitcode == 0 for worker in workers)
+        assert DiskCache(path).stats()['entries'] == 60
+
+    def test_disabled_without_data_volume(self):
+        assert open_disk_cache("/nonexistent/dir/cache.sqlite") is None
+
+
+class TestEngineDiskCache:
+    """Le cache disque sert les résultats après un redémarrage"""
+
+    def test_results_shared_through_disk(self, tmp_path, monkeypatch):
+        disk = DiskCache(str(tmp_path / "cache.sqlite"))
+        monkeypatch.setattr(recommendation_engine, "DISK_CACHE", disk)
+        recipes = pd.DataFrame({'id': [1], 'name': ['a']})
+        interactions = pd.DataFrame({'recipe_id': [1], 'rating': [5]})
+        components = pd.DataFrame({'jaccard': [0.5], 'cosine': [0.4],
+                                   'mean_rating_norm': [1.0], 'popularity': [1.0]})
+
+        with patch('reco_score.RecipeScorer.score_components',
+                   return_value=components) as score_components:
+            first = RecommendationEngine.get_recommendations(
+                recipes, interactions, ['onion'], None, 5, False, data_version='v1')
+            # Simule un redémarrage: le cache mémoire est perdu
+            recommendation_engine.RESULT_CACHE.clear()
+            recommendation_engine.COMPONENT_CACHE.clear()
+            served = RecommendationEngine.get_recommendations(
+                recipes, interactions, ['onion'], None, 5, False, data_version='v1')
+
+        assert score_components.call_count == 1
+        pd.testing.assert_frame_equal(served, first)
+        assert RecommendationEngine.cache_stats()['disk']['hits'] == 1
@@ -0,0 +1,186 @@
+"""
+Tests unitaires pour le service HTTP de recommandation (src/service)
+"""
+
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import urllib.request
+import urllib.error
+
+import pytest
+import pandas as pd
+
+try:
+    from src.service.http_service import RecommendationService, ServiceError, create_server
+    from src.managers import data_manager
+except ImportError:
+    pytest.skip("Module service non accessible", allow_module_level=True)
+
+
+@pytest.fixture
+def service(tmp_path):
+    """Service pointant vers de petits artefacts temporaires, déjà chargés"""
+    recipes = pd.DataFrame({
+        'id': [1, 2, 3],
+        'name': ['soup', 'pasta', 'cake'],
+        'ingredients': [['chicken', 'onion'], ['pasta', 'tomato'], ['egg', 'flour']],
+        'minutes': [30, 20, 60],
+    })
+    interactions = pd.DataFrame({'recipe_id': [1, 2, 2], 'rating': [5, 4, 3]})
+    recipes.to_pickle(tmp_path / "recipes.pkl")
+    interactions.to_pickle(tmp_path / "interactions.pkl")
+    data_manager._ARTIFACTS.clear()
+    data_manager._LOAD_ERRORS.clear()
+
+    svc = RecommendationService()
+    svc.data_manager.recipes_path = str(tmp_path / "recipes.pkl")
+    svc.data_manager.interactions_path = str(tmp_path / "interactions.pkl")
+    svc.data_manager.ingredient_map_path = str(tmp_path / "missing.pkl")
+    svc.data_manager.load_artifacts()
+    yield svc
+    data_manager._ARTIFACTS.clear()
+
+
+@pytest.fixture
+def server(service):
+    """Serveur HTTP sur un port libre, arrêté en fin de test"""
+    httpd = create_server(service, "127.0.0.1", 0)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def call(url, body=None):
+    """Retourne (code HTTP, JSON) pour un GET (body None) ou un POST"""
+    data = None if body is None else json.dumps(body).encode()
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+class TestRecommendationService:
+    """Validation et appel du moteur, sans serveur"""
+
+    def test_parse_query_defaults(self, service):
+        query = service.parse_query({"ingredients": "Chicken, onion ,"})
+
+        assert query == {"ingredients": ["chicken", "onion"], "time_limit": None,
+                         "n": 8, "sort_mode": "intelligent", "weights": None,
+                         "latency_budget_ms": None}
+
+    @pytest.mark.parametrize("payload", [
+        [], {"ingredients": []}, {"ingredients": [1]},
+        {"ingredients": ["egg"], "n": 0}, {"ingredients": ["egg"], "n": True},
+        {"ingredients": ["egg"], "time_limit": -5},
+        {"ingredients": ["egg"], "sort_mode": "random"},
+        {"ingredients": ["egg"], "weights": {"omega": 1}},
+        {"ingredients": ["egg"], "latency_budget_ms": 0},
+    ])
+    def test_parse_query_rejects_invalid(self, service, payload):
+        with pytest.raises(ServiceError) as error:
+            service.parse_query(payload)
+        assert error.value.status == 400
+
+    def test_recommend(self, service):
+        response = service.recommend({"ingredients": ["chicken", "onion"], "n": 2})
+
+        assert response["count"] == 2
+        assert response["results"][0]["name"] == "soup"
+        assert response["data_version"] == service.data_manager.get_data_version()
+        assert response["degraded"] is None
+
+    def test_health_reports_pending_version(self, service, tmp_path):
+        served = service.data_manager.get_data_version()
+        (tmp_path / "metadata.json").write_text("{}")
+        service.data_manager.metadata_path = str(tmp_path / "metadata.json")
+
+        status, body = service.health()
+
+        # Nouvelle version publiée: chargée en arrière-plan, l'ancienne servie
+        assert status == 200
+        assert body["data_version"] == served
+        assert body["pending_version"] == service.data_manager.get_manifest_version()
+        assert service.data_manager.wait_for_artifacts(timeout=10)
+
+    def test_not_loaded_is_unavailable(self, service):
+        data_manager._ARTIFACTS.clear()
+        with pytest.raises(ServiceError) as error:
+            service.recommend({"ingredients": ["egg"]})
+        assert error.value.status == 503
+
+
+class TestHttpEndpoints:
+    """Endpoints JSON du serveur"""
+
+    def test_healthz(self, server):
+        status, body = call(f"{server}/healthz")
+
+        assert status == 200
+        assert body["status"] == "ok"
+        assert body["recipes"] == 3
+
+    def test_recommend(self, server):
+        status, body = call(f"{server}/recommend",
+                            {"ingredients": ["egg", "flour"], "n": 1, "sort_mode": "jaccard"})
+
+        assert status == 200
+        assert [r["name"] for r in body["results"]] == ["cake"]
+
+    def test_recommend_batch_keeps_order_and_errors(self, server):
+        status, body = call(f"{server}/recommend/batch", {"queries": [
+            {"ingredients": ["pasta"], "n": 1},
+            {"ingredients": []},
+            {"ingredients": ["chicken"], "n": 1},
+        ]})
+
+        assert status == 200
+        first, invalid, last = body["responses"]
+        assert first["results"][0]["name"] == "pasta"
+        assert invalid["status"] == 400
+        assert last["results"][0]["name"] == "soup"
+
+    def test_invalid_requests(self, server):
+        assert call(f"{server}/recommend", {"ingredients": "  "})[0] == 400
+        assert call(f"{server}/recommend/batch", {"queries": []})[0] == 400
+        assert call(f"{server}/unknown")[0] == 404
+
+    def test_engine_errors_are_reported(self, server, service):
+        def failing(*args, **kwargs):
+            raise RuntimeError("scoring indisponible")
+        service.engine.get_recommendations = failing
+
+        status, body = call(f"{server}/recommend", {"ingredients": ["egg"]})
+
+        # Détail de l'erreur journalisé, jamais renvoyé au client
+        assert status == 500
+        assert body["error"] == "Erreur interne du service"
+
+    def test_negative_content_length_rejected(self, server):
+        connection = http.client.HTTPConnection(server[len("http://"):], timeout=5)
+        try:
+            connection.putrequest("POST", "/recommend")
+            connection.putheader("Content-Length", "-1")
+            connection.endheaders()
+            response = connection.getresponse()
+            assert response.status == 400
+        finally:
+            connection.close()
+
+
+class TestHeadless:
+    """Le service ne charge pas Streamlit"""
+
+    def test_streamlit_not_imported(self):
+        code = ("import sys, src.service.http_service; "
+                "sys.exit(any(m.split('.')[0] == 'streamlit' for m in sys.modules))")
+        env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+        assert subprocess.run([sys.executable, "-c", code], env=env).returncode == 0
@@ -0,0 +1,69 @@
+"""
+Budget de temps d'import du point d'entrée Streamlit
+Profil `python -X importtime` exécuté dans un interpréteur neuf
+"""
+
+import os
+import sys
+import subprocess
+from pathlib import Path
+
+import pytest
+
+try:
+    import src
+except ImportError:
+    pytest.skip("Package src non accessible", allow_module_level=True)
+
+APP_DIR = Path(src.__file__).resolve().parent.parent
+
+# Modules lourds qui ne doivent pas être chargés à l'import de l'application
+# (pyarrow et plotly sont sondés par pandas/streamlit eux-mêmes s'ils sont
+# installés: ils ne dépendent pas de notre code)
+DEFERRED_MODULES = ("sklearn", "scipy", "matplotlib", "seaborn")
+
+# Budget (secondes, cumulé) pour `import src.core.app`: large pour les
+# machines de CI lentes, il détecte surtout un import lourd réintroduit
+IMPORT_BUDGET_SECONDS = 3.0
+
+
+def importtime_profile(statement):
+    """Retourne {module: temps cumulé en µs} pour une instruction d'import"""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [str(APP_DIR), env.get("PYTHONPATH", "")]).rstrip(os.pathsep)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=APP_DIR, env=env, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr[-2000:]
+
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        profile[name.strip()] = int(cumulative)
+    return profile
+
+
+class TestImportTime:
+    """Profil d'import de l'application et du module de scoring"""
+
+    def test_app_does_not_import_heavy_modules(self):
+        profile = importtime_profile("import src.core.app")
+
+        loaded = sorted(name for name in profile
+                        if name.split(".")[0] in DEFERRED_MODULES)
+        assert loaded == []
+
+    def test_app_import_budget(self):
+        profile = importtime_profile("import src.core.app")
+
+        assert profile["src.core.app"] / 1e6 < IMPORT_BUDGET_SECONDS
+
+    def test_reco_score_defers_sklearn(self):
+        profile = importtime_profile(
+            "import reco_score; assert reco_score.SKLEARN_AVAILABLE is not None")
+
+        assert "reco_score" in profile
+        assert not any(name.startswith("sklearn") for name in profile)
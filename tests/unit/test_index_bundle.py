@@ -0,0 +1,195 @@
+"""
+Tests unitaires pour le bundle binaire de l'index des recettes
+(preprocessing/index_bundle.py et RecipeIndex.from_bundle)
+"""
+
+import numpy as np
+import pytest
+import pandas as pd
+
+try:
+    import index_bundle
+    from index_bundle import (IndexBundleError, build_index_arrays, read_index_bundle,
+                              write_index_bundle)
+    from src.engines.recipe_index import RecipeIndex, index_available, load_recipe_index
+    from src.engines.shared_index import ScoringWorkerPool
+except ImportError:
+    pytest.skip("Module index_bundle non accessible", allow_module_level=True)
+
+if not index_available():
+    pytest.skip("scikit-learn non installé", allow_module_level=True)
+
+
+VOCABULARY = ['chicken breast', 'onion', 'garlic', 'tomato', 'pasta', 'egg',
+              'flour', 'sugar', 'butter', 'milk', 'salt', 'crème fraîche', 'carrot']
+
+QUERIES = [
+    (['onion', 'garlic'], None),
+    (['egg', 'flour', 'sugar'], 60),
+    (['crème fraîche', 'carrot'], 45),
+    (['pasta'], 25),  # limite sans bitmap précalculé
+]
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    rng = np.random.default_rng(2)
+    recipes = pd.DataFrame({
+        'id': np.arange(150) * 3 + 1,
+        'name': [f"recipe {i}" for i in range(150)],
+        'normalized_ingredients': [list(rng.choice(VOCABULARY, rng.integers(0, 6), replace=False))
+                                   for _ in range(150)],
+        'minutes': rng.integers(5, 200, 150).astype(float),
+    }, index=np.arange(150) + 1000)
+    recipes.loc[1003, 'minutes'] = np.nan
+    interactions = pd.DataFrame({'recipe_id': rng.choice(recipes['id'], 400),
+                                 'rating': rng.integers(1, 6, 400)})
+    return recipes, interactions
+
+
+@pytest.fixture
+def bundle_path(dataset, tmp_path):
+    path = str(tmp_path / index_bundle.BUNDLE_FILE)
+    write_index_bundle(path, *build_index_arrays(*dataset))
+    return path
+
+
+class TestBundleFormat:
+    """Tests de l'écriture et de la lecture du bundle"""
+
+    def test_round_trip(self, dataset, bundle_path):
+        arrays, attrs = build_index_arrays(*dataset)
+        bundle = read_index_bundle(bundle_path)
+
+        assert bundle.header["format_version"] == index_bundle.FORMAT_VERSION
+        assert bundle.header["index_version"] == index_bundle.INDEX_VERSION
+        assert bundle.attrs == attrs
+        assert set(bundle.arrays) == set(arrays)
+        for name, array in arrays.items():
+            np.testing.assert_array_equal(bundle[name], array)
+            assert bundle[name].dtype == array.dtype
+
+    def test_sections_are_mapped_and_aligned(self, bundle_path):
+        bundle = read_index_bundle(bundle_path)
+        for section in bundle.header["sections"]:
+            assert section["offset"] % index_bundle.ALIGNMENT == 0
+            array = bundle[section["name"]]
+            # Vue sur le fichier projeté, en lecture seule (aucune copie)
+            assert isinstance(array.base, np.memmap) or isinstance(array, np.memmap)
+            assert not array.flags.writeable
+
+    def test_strings_round_trip(self):
+        values = ['onion', '', 'crème fraîche', 'sel de Guérande']
+        assert index_bundle.decode_strings(*index_bundle.encode_strings(values)) == values
+
+    def test_time_filter_bitmaps(self, dataset, bundle_path):
+        recipes, _ = dataset
+        bundle = read_index_bundle(bundle_path)
+        minutes = recipes['minutes'].to_numpy()
+
+        for limit, bitmap in zip(bundle["time_filter_limits"], bundle["time_filter_bitmaps"]):
+            expected = minutes <= limit  # NaN exclu
+            np.testing.assert_array_equal(np.unpackbits(bitmap, count=len(minutes)), expected)
+
+
+class TestBundleValidation:
+    """Tests des contrôles d'intégrité et de compatibilité"""
+
+    def _corrupt(self, path, offset, value=b"\xff"):
+        with open(path, 'r+b') as f:
+            f.seek(offset)
+            f.write(value)
+
+    def test_section_checksum(self, bundle_path):
+        section = read_index_bundle(bundle_path).header["sections"][0]
+        self._corrupt(bundle_path, section["offset"])
+
+        with pytest.raises(IndexBundleError, match="Somme de contrôle"):
+            read_index_bundle(bundle_path)
+        # Contrôle désactivable (ouverture sans lecture complète)
+        read_index_bundle(bundle_path, verify=False)
+
+    def test_header_checksum(self, bundle_path):
+        self._corrupt(bundle_path, 20, b"X")
+        with pytest.raises(IndexBundleError, match="En-tête"):
+            read_index_bundle(bundle_path)
+
+    def test_magic(self, bundle_path):
+        self._corrupt(bundle_path, 0, b"NOTINDEX")
+        with pytest.raises(IndexBundleError):
+            read_index_bundle(bundle_path)
+
+    def test_truncated_file(self, bundle_path):
+        size = read_index_bundle(bundle_path).header["sections"][-1]["offset"]
+        with open(bundle_path, 'r+b') as f:
+            f.truncate(size)
+        with pytest.raises(IndexBundleError, match="hors du fichier"):
+            read_index_bundle(bundle_path)
+
+        with open(bundle_path, 'r+b') as f:
+            f.truncate(4)
+        with pytest.raises(IndexBundleError, match="tronqué"):
+            read_index_bundle(bundle_path)
+
+    def test_index_version_mismatch(self, bundle_path, monkeypatch):
+        monkeypatch.setattr(index_bundle, 'INDEX_VERSION', index_bundle.INDEX_VERSION + 1)
+        with pytest.raises(IndexBundleError, match="reconstruire"):
+            read_index_bundle(bundle_path)
+
+
+class TestRecipeIndexFromBundle:
+    """Tests de l'index de scoring adossé au bundle"""
+
+    def test_scores_match_built_index(self, dataset, bundle_path):
+        recipes, interactions = dataset
+        built = RecipeIndex.build(recipes, interactions)
+        mapped = RecipeIndex.from_bundle(bundle_path, recipes)
+
+        assert mapped.vocabulary == built.vocabulary
+        for expected, components in zip(built.score_batch(QUERIES), mapped.score_batch(QUERIES)):
+            np.testing.assert_array_equal(components.labels, expected.labels)
+            np.testing.assert_array_equal(components.jaccard, expected.jaccard)
+            np.testing.assert_array_equal(components.cosine, expected.cosine)
+            np.testing.assert_array_equal(components.mean_rating_norm, expected.mean_rating_norm)
+
+    def test_time_limit_uses_bitmap(self, dataset, bundle_path):
+        recipes, _ = dataset
+        index = RecipeIndex.from_bundle(bundle_path, recipes)
+        components, = index.score_batch([(['onion'], 60)])
+
+        expected = recipes.index[recipes['minutes'] <= 60]
+        np.testing.assert_array_equal(components.labels, expected)
+
+    def test_rejects_other_recipes(self, dataset, bundle_path):
+        recipes, _ = dataset
+        with pytest.raises(IndexBundleError, match="autres recettes"):
+            RecipeIndex.from_bundle(bundle_path, recipes.iloc[::-1])
+
+    def test_load_falls_back_to_build(self, dataset, bundle_path):
+        recipes, interactions = dataset
+        assert getattr(load_recipe_index(recipes, interactions, bundle_path), '_bundle') is not None
+
+        # Bundle d'autres recettes: reconstruit en mémoire
+        subset = recipes.iloc[:50]
+        index = load_recipe_index(subset, interactions, bundle_path)
+        assert len(index) == 50
+        assert getattr(index, '_bundle', None) is None
+
+        # Bundle absent
+        assert len(load_recipe_index(recipes, interactions, bundle_path + ".missing")) == 150
+
+    def test_worker_pool_maps_bundle(self, dataset, bundle_path):
+        recipes, interactions = dataset
+        index = RecipeIndex.from_bundle(bundle_path, recipes)
+        pool = ScoringWorkerPool(index, n_workers=1)
+        try:
+            stats = pool.stats()
+            assert stats["bundle"] == bundle_path
+            assert stats["shared_bytes"] == 0
+
+            for expected, components in zip(index.score_batch(QUERIES), pool.score_batch(QUERIES)):
+                np.testing.assert_array_equal(components.labels, expected.labels)
+                np.testing.assert_allclose(components.jaccard, expected.jaccard)
+                np.testing.assert_allclose(components.cosine, expected.cosine)
+        finally:
+            pool.close()
@@ -0,0 +1,66 @@
+"""
+Tests unitaires pour la carte des ingrédients précompilée (ingredient_map.py)
+"""
+
+import os
+import pickle
+import pytest
+import pandas as pd
+
+try:
+    import ingredient_map
+    from ingredient_map import compile_ingredient_map, load_ingredient_map, compiled_map_path
+except ImportError:
+    pytest.skip("Module ingredient_map non accessible", allow_module_level=True)
+
+
+@pytest.fixture
+def map_csv(tmp_path):
+    """Petit CSV au format ingr_map.csv"""
+    csv_path = tmp_path / "ingr_map.csv"
+    pd.DataFrame({
+        'raw_ingr': ['Mixed Baby Lettuces ', 'large eggs', 'eggs', 'kosher salt'],
+        'replaced': ['lettuce', 'Egg', 'egg', None],
+        'count': [1, 2, 3, 4],
+    }).to_csv(csv_path, index=False)
+    return str(csv_path)
+
+
+class TestIngredientMap:
+    """Compilation et chargement de la carte"""
+
+    def test_compile_matches_row_by_row_loading(self, map_csv):
+        expected = {}
+        for _, row in pd.read_csv(map_csv).iterrows():
+            raw = row['raw_ingr'].lower().strip()
+            normalized = row['replaced'] if isinstance(row['replaced'], str) else raw
+            expected[raw] = normalized.lower().strip()
+
+        assert compile_ingredient_map(map_csv) == expected
+
+    def test_csv_path_uses_compiled_pickle(self, map_csv):
+        mapping = load_ingredient_map(map_csv)
+
+        compiled = compiled_map_path(map_csv)
+        assert os.path.exists(compiled)
+        with open(compiled, 'rb') as f:
+            assert pickle.load(f)['mapping'] == mapping
+        assert load_ingredient_map(compiled) == mapping
+
+    def test_loading_is_memoized_per_process(self, map_csv):
+        first = load_ingredient_map(map_csv)
+        assert load_ingredient_map(map_csv) is first
+
+    def test_incompatible_version_is_rejected(self, tmp_path):
+        path = tmp_path / "old_map.pkl"
+        with open(path, 'wb') as f:
+            pickle.dump({'version': ingredient_map.MAP_FORMAT_VERSION + 1, 'mapping': {}}, f)
+        with pytest.raises(ValueError):
+            load_ingredient_map(str(path))
+
+    def test_preprocessor_normalizes_with_compiled_map(self, map_csv):
+        data_prepro = pytest.importorskip("data_prepro")
+        preprocessor = data_prepro.IngredientPreprocessor(ingr_map_path=map_csv)
+
+        assert preprocessor.normalize_ingredient("Large Eggs") == "egg"
+        assert preprocessor.normalize_ingredient("kosher salt") == "kosher salt"
@@ -0,0 +1,341 @@
+"""
+Tests unitaires pour les insertions de recettes en ligne
+(src/engines/live_index.py, RecommendationEngine.upsert_recipes,
+DataManager.publish_update et POST /recipes)
+"""
+
+import http.client
+import json
+import threading
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+import pandas as pd
+
+try:
+    from src.engines import recipe_index, recommendation_engine
+    from src.engines.live_index import LiveRecipeIndex
+    from src.engines.recipe_index import RecipeIndex, index_available
+    from src.engines.recommendation_engine import RecommendationEngine
+    from src.managers import data_manager as data_manager_module
+    from src.managers.data_manager import DataManager, base_version
+    from src.service.http_service import (RecommendationRequestHandler, RecommendationService,
+                                          ServiceError, create_server)
+    from src.utils.config import SERVICE_CONFIG
+except ImportError:
+    pytest.skip("Module live_index non accessible", allow_module_level=True)
+
+if not index_available():
+    pytest.skip("scikit-learn non installé", allow_module_level=True)
+
+
+VOCABULARY = ['chicken breast', 'onion', 'garlic', 'tomato', 'pasta', 'egg',
+              'flour', 'sugar', 'butter', 'milk', 'salt', 'beef', 'carrot']
+
+QUERIES = [
+    (('garlic', 'onion'), None),
+    (('yuzu', 'egg'), 60),
+    (('beef', 'carrot'), 25),
+]
+
+
+@pytest.fixture
+def dataset():
+    rng = np.random.default_rng(5)
+    recipes = pd.DataFrame({
+        'id': np.arange(120) * 2 + 1,
+        'name': [f"recipe {i}" for i in range(120)],
+        'normalized_ingredients': [list(rng.choice(VOCABULARY, rng.integers(0, 6), replace=False))
+                                   for _ in range(120)],
+        'minutes': rng.choice([10, 20, 40, 90], 120),
+    })
+    interactions = pd.DataFrame({'recipe_id': rng.choice(recipes['id'], 300),
+                                 'rating': rng.integers(1, 6, 300)})
+    return recipes, interactions
+
+
+def _upsert(index, recipes):
+    return index.upsert(recipes.index.to_numpy(), recipes['normalized_ingredients'].tolist(),
+                        recipes['minutes'].to_numpy())
+
+
+def _new_recipes(first_label):
+    return pd.DataFrame({
+        'id': [3, 1001, 1003],
+        'name': ['updated', 'yuzu cake', 'yuzu soup'],
+        'normalized_ingredients': [['beef', 'carrot'], ['yuzu', 'egg', 'sugar'], ['yuzu', 'onion']],
+        'minutes': [20, 45, 15],
+    }, index=[1, first_label, first_label + 1])
+
+
+class TestLiveRecipeIndex:
+    """Segment delta et compaction"""
+
+    def test_inserted_recipes_are_searchable(self, dataset):
+        recipes, interactions = dataset
+        live = _upsert(LiveRecipeIndex.wrap(RecipeIndex.build(recipes, interactions)),
+                       _new_recipes(len(recipes)))
+
+        assert len(live) == len(recipes) + 2
+        assert live.stats() == {"main_recipes": 120, "delta_recipes": 3, "replaced": 1,
+                                "compactions": 0}
+        components = live.score_batch([(('yuzu', 'egg'), 60)])[0]
+        jaccard = dict(zip(components.labels.tolist(), components.jaccard.tolist()))
+        assert jaccard[120] == pytest.approx(2 / 3)
+        # Nouvelle recette sans interaction
+        assert live.mean_rating_norm[120] == 0.5 and live.popularity[120] == 0.0
+
+    def test_updated_recipe_replaces_old_row(self, dataset):
+        recipes, interactions = dataset
+        index = RecipeIndex.build(recipes, interactions)
+        live = _upsert(LiveRecipeIndex.wrap(index), _new_recipes(len(recipes)))
+
+        components = live.score_batch([(('beef', 'carrot'), None)])[0]
+        # Une seule ligne pour la recette modifiée, à sa position d'origine
+        assert components.labels.tolist().count(1) == 1
+        assert components.jaccard[components.labels == 1][0] == 1.0
+        assert live.mean_rating_norm[1] == index.mean_rating_norm[1]
+        assert (np.diff(components.labels) > 0).all()
+
+        degraded = live.jaccard_components(('beef', 'carrot'), None)
+        assert degraded.labels.tolist().count(1) == 1
+
+    @pytest.mark.parametrize("query", QUERIES)
+    def test_matches_compacted_index(self, dataset, query):
+        recipes, interactions = dataset
+        live = _upsert(LiveRecipeIndex.wrap(RecipeIndex.build(recipes, interactions)),
+                       _new_recipes(len(recipes)))
+        compacted = live.compact()
+
+        assert compacted.stats()["delta_recipes"] == 0
+        assert compacted.stats()["compactions"] == 1
+        for live_components, compacted_components in zip(live.score_batch([query]),
+                                                         compacted.score_batch([query])):
+            np.testing.assert_array_equal(live_components.labels, compacted_components.labels)
+            np.testing.assert_array_equal(live_components.jaccard, compacted_components.jaccard)
+            np.testing.assert_allclose(live_components.cosine, compacted_components.cosine,
+                                       atol=1e-6)
+
+    def test_jaccard_matches_full_rebuild(self, dataset):
+        recipes, interactions = dataset
+        new = _new_recipes(len(recipes))
+        updated = pd.concat([recipes.drop(index=1), new]).reindex(
+            recipes.index.append(pd.Index([120, 121])))
+
+        live = _upsert(LiveRecipeIndex.wrap(RecipeIndex.build(recipes, interactions)), new)
+        rebuilt = RecipeIndex.build(updated, interactions)
+        for live_components, rebuilt_components in zip(live.score_batch(QUERIES),
+                                                       rebuilt.score_batch(QUERIES)):
+            np.testing.assert_array_equal(live_components.labels, rebuilt_components.labels)
+            np.testing.assert_array_equal(live_components.jaccard, rebuilt_components.jaccard)
+
+    def test_delta_compacted_at_threshold(self, dataset):
+        recipes, interactions = dataset
+        live = LiveRecipeIndex.wrap(RecipeIndex.build(recipes, interactions))
+        live = live.upsert([120], [['yuzu']], [10], compact_rows=2)
+        assert live.stats()["delta_recipes"] == 1
+
+        live = live.upsert([121], [['yuzu', 'egg']], [10], compact_rows=2)
+        assert live.stats() == {"main_recipes": 122, "delta_recipes": 0, "replaced": 0,
+                                "compactions": 1}
+        assert 'yuzu' in live.vocabulary
+
+        # Mise à jour d'une recette insérée puis compactée: position conservée
+        live = live.upsert([120], [['milk']], [10])
+        assert len(live) == 122
+        assert live.replaced.tolist() == [120]
+
+
+class TestEngineUpsert:
+    """Insertions par le moteur, sans reconstruction de l'index"""
+
+    def test_index_scoring_uses_delta(self, dataset, monkeypatch):
+        recipes, interactions = dataset
+        monkeypatch.setattr(recommendation_engine, 'SHARDED_SCORING', True)
+        recipe_index._INDEXES.clear()
+        try:
+            RecommendationEngine.get_recommendations(
+                recipes, interactions, ['egg'], None, 5, data_version="v1", raise_errors=True)
+
+            with patch.object(RecipeIndex, 'build', side_effect=AssertionError("reconstruit")):
+                updated_df, version = RecommendationEngine.upsert_recipes(
+                    recipes, interactions, _new_recipes(0).reset_index(drop=True), "v1")
+                result = RecommendationEngine.get_recommendations(
+                    updated_df, interactions, ['yuzu', 'egg', 'sugar'], 60, 3, data_version=version,
+                    raise_errors=True)
+
+            assert version.startswith("v1+live")
+            assert result['name'].iloc[0] == 'yuzu cake'
+            assert len(updated_df) == 122
+            assert updated_df.loc[1, 'name'] == 'updated'
+            assert updated_df.index[-2:].tolist() == [120, 121]
+
+            # Bascule: l'index dérivé est gardé, celui de v1 libéré
+            RecommendationEngine.release_data_version("v1", version)
+            assert list(recipe_index._INDEXES) == [f"{version}+index"]
+        finally:
+            recipe_index._INDEXES.clear()
+
+    def test_scorer_path(self, dataset):
+        recipes, interactions = dataset
+        updated_df, version = RecommendationEngine.upsert_recipes(
+            recipes, interactions, _new_recipes(0).reset_index(drop=True), "v1+live4")
+
+        assert base_version(version) == "v1"
+        # Version dérivée du contenu: stable entre processus, jamais réutilisée
+        new = _new_recipes(0).reset_index(drop=True)
+        assert RecommendationEngine.upsert_recipes(recipes, interactions, new, "v1+live4")[1] == version
+        assert RecommendationEngine.upsert_recipes(
+            recipes, interactions, new.iloc[1:], "v1+live4")[1] != version
+        assert RecommendationEngine.upsert_recipes(recipes, interactions, new, "v1")[1] != version
+
+        result = RecommendationEngine.get_recommendations(
+            updated_df, interactions, ['yuzu', 'onion'], None, 1, data_version=version,
+            raise_errors=True)
+        assert result['name'].tolist() == ['yuzu soup']
+
+
+class TestPublishUpdate:
+    """Publication des versions dérivées par le DataManager"""
+
+    def setup_method(self):
+        data_manager_module._ARTIFACTS.clear()
+        self.data_manager = DataManager()
+
+    def teardown_method(self):
+        data_manager_module._ARTIFACTS.clear()
+
+    def test_compare_and_swap(self, dataset, tmp_path):
+        recipes, interactions = dataset
+        recipes.to_pickle(tmp_path / "recipes.pkl")
+        interactions.to_pickle(tmp_path / "interactions.pkl")
+        self.data_manager.recipes_path = str(tmp_path / "recipes.pkl")
+        self.data_manager.interactions_path = str(tmp_path / "interactions.pkl")
+        self.data_manager.metadata_path = str(tmp_path / "metadata.json")
+        self.data_manager.load_artifacts()
+        version = self.data_manager.get_data_version()
+
+        assert self.data_manager.publish_update(version, f"{version}+live1",
+                                                recipes.iloc[:3], interactions)
+        assert not self.data_manager.publish_update(version, f"{version}+live2",
+                                                    recipes, interactions)
+
+        # La version dérivée tient lieu de la version du manifeste: pas de rechargement
+        assert self.data_manager.start_background_load() == "ready"
+        assert len(self.data_manager.load_artifacts()[0]) == 3
+        assert self.data_manager.get_data_version() == f"{version}+live1"
+
+
+class TestRecipesEndpoint:
+    """POST /recipes"""
+
+    @pytest.fixture
+    def service(self, tmp_path):
+        # Recettes reçues prétraitées par RecipePreprocessor (preprocessing/)
+        pytest.importorskip("data_prepro", reason="Module data_prepro non accessible")
+        recipes = pd.DataFrame({
+            'id': [1, 2], 'name': ['soup', 'pasta'], 'minutes': [30, 20],
+            'normalized_ingredients': [['chicken', 'onion'], ['pasta', 'tomato']],
+        })
+        interactions = pd.DataFrame({'recipe_id': [1, 2], 'rating': [5, 4]})
+        recipes.to_pickle(tmp_path / "recipes.pkl")
+        interactions.to_pickle(tmp_path / "interactions.pkl")
+        data_manager_module._ARTIFACTS.clear()
+
+        service = RecommendationService()
+        service.data_manager.recipes_path = str(tmp_path / "recipes.pkl")
+        service.data_manager.interactions_path = str(tmp_path / "interactions.pkl")
+        service.data_manager.metadata_path = str(tmp_path / "metadata.json")
+        service.data_manager.ingredient_map_path = str(tmp_path / "missing.pkl")
+        service.data_manager.load_artifacts()
+        yield service
+        data_manager_module._ARTIFACTS.clear()
+
+    def test_upsert_then_recommend(self, service):
+        response = service.upsert_recipes({"recipes": [
+            {"id": 7, "name": "Yuzu tart", "ingredients": ["yuzu", "butter"], "minutes": 40,
+             "steps": ["mix", "bake"], "tags": ["dessert"], "description": "Bright"},
+            {"id": 2, "name": "Pasta bake", "ingredients": ["pasta", "cheese"], "minutes": 35},
+        ]})
+
+        assert response["inserted"] == 1 and response["updated"] == 1
+        assert response["recipes"] == 3
+        assert base_version(response["data_version"]) != response["data_version"]
+
+        result = service.recommend({"ingredients": ["yuzu", "butter"], "n": 1})
+        assert result["data_version"] == response["data_version"]
+        assert result["results"][0]["name"] == "Yuzu tart"
+        assert service.health()[1].get("pending_version") is None
+
+    @pytest.mark.parametrize("payload", [
+        {}, {"recipes": []},
+        {"recipes": [{"id": "7", "name": "x", "ingredients": ["egg"]}]},
+        {"recipes": [{"id": 7, "name": "x", "ingredients": []}]},
+        {"recipes": [{"id": 7, "name": "x", "ingredients": ["egg"], "nutrition": [1, 2]}]},
+        {"recipes": [{"id": 7, "name": "x", "ingredients": ["egg"]},
+                     {"id": 7, "name": "y", "ingredients": ["milk"]}]},
+    ])
+    def test_rejects_invalid(self, service, payload):
+        with pytest.raises(ServiceError) as error:
+            service.upsert_recipes(payload)
+        assert error.value.status == 400
+
+
+class TestWriteAccess:
+    """Jeton des routes d'écriture"""
+
+    RECIPE = {"recipes": [{"id": 9, "name": "Yuzu jam", "ingredients": ["yuzu", "sugar"]}]}
+
+    @pytest.fixture
+    def server(self, tmp_path):
+        pytest.importorskip("data_prepro", reason="Module data_prepro non accessible")
+        recipes = pd.DataFrame({'id': [1], 'name': ['soup'], 'minutes': [30],
+                                'normalized_ingredients': [['chicken', 'onion']]})
+        recipes.to_pickle(tmp_path / "recipes.pkl")
+        pd.DataFrame({'recipe_id': [1], 'rating': [5]}).to_pickle(tmp_path / "interactions.pkl")
+        data_manager_module._ARTIFACTS.clear()
+
+        service = RecommendationService()
+        service.data_manager.recipes_path = str(tmp_path / "recipes.pkl")
+        service.data_manager.interactions_path = str(tmp_path / "interactions.pkl")
+        service.data_manager.metadata_path = str(tmp_path / "metadata.json")
+        service.data_manager.ingredient_map_path = str(tmp_path / "missing.pkl")
+        service.data_manager.load_artifacts()
+
+        httpd = create_server(service, "127.0.0.1", 0)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        yield f"127.0.0.1:{httpd.server_address[1]}"
+        httpd.shutdown()
+        httpd.server_close()
+        data_manager_module._ARTIFACTS.clear()
+
+    @staticmethod
+    def _post(address, body, token=None):
+        headers = {"Content-Type": "application/json"}
+        if token is not None:
+            headers["Authorization"] = f"Bearer {token}"
+        connection = http.client.HTTPConnection(address, timeout=10)
+        try:
+            connection.request("POST", "/recipes", json.dumps(body), headers)
+            return connection.getresponse().status
+        finally:
+            connection.close()
+
+    def test_token_required_when_configured(self, server, monkeypatch):
+        monkeypatch.setitem(SERVICE_CONFIG, "write_token", "s3cret")
+
+        assert self._post(server, self.RECIPE) == 401
+        assert self._post(server, self.RECIPE, token="wrong") == 401
+        assert self._post(server, self.RECIPE, token="s3cret") == 200
+
+    def test_loopback_only_without_token(self, server, monkeypatch):
+        monkeypatch.setitem(SERVICE_CONFIG, "write_token", None)
+        assert self._post(server, self.RECIPE) == 200
+
+        # Client distant: refusé avant la lecture du corps
+        handler = SimpleNamespace(client_address=("10.0.0.7", 40000), headers={})
+        with pytest.raises(ServiceError) as error:
+            RecommendationRequestHandler._check_write_access(handler)
+        assert error.value.status == 403
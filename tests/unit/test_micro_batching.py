@@ -0,0 +1,141 @@
+"""
+Tests unitaires pour le micro-batching du scoring
+(src/engines/micro_batcher.py et src/engines/recipe_index.py)
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+import pandas as pd
+
+try:
+    from src.engines.micro_batcher import MicroBatcher
+    from src.engines.ranking import ScoreComponents
+    from src.engines import recommendation_engine
+    from src.engines.recommendation_engine import RecommendationEngine
+    from src.engines import recipe_index
+    from src.engines.recipe_index import RecipeIndex
+    from reco_score import RecipeScorer, SKLEARN_AVAILABLE
+except ImportError:
+    pytest.skip("Module micro_batcher non accessible", allow_module_level=True)
+
+
+VOCABULARY = ['chicken breast', 'onion', 'garlic', 'tomato', 'pasta', 'egg',
+              'flour', 'sugar', 'butter', 'milk', 'salt', 'beef', 'carrot']
+
+
+@pytest.fixture
+def dataset():
+    rng = np.random.default_rng(0)
+    recipes = pd.DataFrame({
+        'id': np.arange(300) + 10,
+        'name': [f"recipe {i}" for i in range(300)],
+        'normalized_ingredients': [list(rng.choice(VOCABULARY, rng.integers(0, 7), replace=False))
+                                   for _ in range(300)],
+        'minutes': rng.integers(5, 200, 300),
+    })
+    recipes.loc[3, 'normalized_ingredients'] = None
+    interactions = pd.DataFrame({'recipe_id': rng.integers(10, 310, 800),
+                                 'rating': rng.integers(0, 6, 800)})
+    return recipes, interactions
+
+
+class TestMicroBatcher:
+    """Regroupement des soumissions concurrentes"""
+
+    def test_concurrent_submissions_share_a_batch(self):
+        batches = []
+        batcher = MicroBatcher(lambda items: (batches.append(list(items)), [i * 2 for i in items])[1],
+                               max_batch_size=8, max_wait=0.2)
+
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            results = list(pool.map(batcher.do, range(5)))
+
+        assert results == [0, 2, 4, 6, 8]
+        assert sum(len(batch) for batch in batches) == 5
+        assert len(batches) < 5
+        assert batcher.stats()['items'] == 5
+
+    def test_max_batch_size_is_respected(self):
+        release = threading.Event()
+        sizes = []
+
+        def batch_fn(items):
+            release.wait(5)
+            sizes.append(len(items))
+            return items
+
+        batcher = MicroBatcher(batch_fn, max_batch_size=3, max_wait=0.05)
+        futures = [batcher.submit(i) for i in range(7)]
+        release.set()
+
+        assert [f.result(5) for f in futures] == list(range(7))
+        assert max(sizes) <= 3
+        assert batcher.stats()['largest_batch'] <= 3
+
+    def test_batch_errors_reach_every_caller(self):
+        def batch_fn(items):
+            raise RuntimeError("scoring indisponible")
+
+        batcher = MicroBatcher(batch_fn, max_wait=0.05)
+        futures = [batcher.submit(i) for i in range(3)]
+
+        for future in futures:
+            with pytest.raises(RuntimeError, match="scoring indisponible"):
+                future.result(5)
+
+    def test_invalid_size(self):
+        with pytest.raises(ValueError):
+            MicroBatcher(lambda items: items, max_batch_size=0)
+
+
+@pytest.mark.skipif(not SKLEARN_AVAILABLE, reason="scikit-learn non installé")
+class TestRecipeIndex:
+    """Scoring d'un lot par produits creux"""
+
+    QUERIES = [(['onion', 'garlic', 'chicken breast'], None),
+               (['egg', 'flour', 'sugar'], 60),
+               (['unknown'], None)]
+
+    def test_matches_per_query_scorer(self, dataset):
+        recipes, interactions = dataset
+        index = RecipeIndex.build(recipes, interactions)
+
+        for (ingredients, time_limit), components in zip(self.QUERIES, index.score_batch(self.QUERIES)):
+            reference = ScoreComponents.from_frame(
+                RecipeScorer().score_components(recipes, interactions, ingredients, time_limit))
+            np.testing.assert_array_equal(components.labels, reference.labels)
+            np.testing.assert_allclose(components.jaccard, reference.jaccard, atol=1e-6)
+            np.testing.assert_allclose(components.mean_rating_norm, reference.mean_rating_norm, atol=1e-6)
+            np.testing.assert_allclose(components.popularity, reference.popularity, atol=1e-6)
+            # TF-IDF ajusté une fois sur le corpus complet (et non par requête)
+            np.testing.assert_allclose(components.cosine, reference.cosine, atol=0.05)
+
+    def test_batch_equals_single_queries(self, dataset):
+        index = RecipeIndex.build(*dataset)
+        batch = index.score_batch(self.QUERIES)
+
+        for query, components in zip(self.QUERIES, batch):
+            single, = index.score_batch([query])
+            np.testing.assert_array_equal(single.jaccard, components.jaccard)
+            np.testing.assert_allclose(single.cosine, components.cosine, atol=1e-6)
+
+    def test_engine_uses_batcher(self, dataset, monkeypatch):
+        recipes, interactions = dataset
+        batcher = MicroBatcher(recommendation_engine._score_batch, max_batch_size=8, max_wait=0.05)
+        monkeypatch.setattr(recommendation_engine, 'BATCHER', batcher)
+        recipe_index._INDEXES.clear()
+
+        queries = [['onion', 'garlic'], ['egg', 'flour'], ['beef', 'carrot'], ['pasta']]
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(
+                lambda ingredients: RecommendationEngine.get_recommendations(
+                    recipes, interactions, ingredients, None, 5, raise_errors=True),
+                queries))
+
+        assert all(len(result) == 5 for result in results)
+        assert batcher.stats()['items'] == len(queries)
+        assert RecommendationEngine.cache_stats()['micro_batching']['batches'] >= 1
+        recipe_index._INDEXES.clear()
@@ -0,0 +1,66 @@
+"""
+Tests unitaires pour les exécuteurs du pipeline (serial, threads, processes)
+"""
+
+import pytest
+import pandas as pd
+
+try:
+    import pipeline
+    from pipeline import (
+        SerialExecutor,
+        ThreadExecutor,
+        ProcessExecutor,
+        create_executor,
+        preprocess_chunks,
+    )
+    from bench_executors import make_synthetic_recipes
+except ImportError:
+    pytest.skip("Module pipeline non accessible", allow_module_level=True)
+
+
+class TestCreateExecutor:
+    """Sélection du backend depuis config.yaml"""
+
+    def test_parallel_disabled_uses_serial(self):
+        executor = create_executor({'enable_parallel': False, 'executor': 'processes'})
+        assert isinstance(executor, SerialExecutor)
+        assert executor.n_workers == 1
+
+    @pytest.mark.parametrize("backend, expected", [
+        ("serial", SerialExecutor),
+        ("threads", ThreadExecutor),
+        ("processes", ProcessExecutor),
+    ])
+    def test_backend_selection(self, backend, expected):
+        executor = create_executor({'enable_parallel': True, 'executor': backend})
+        assert type(executor) is expected
+
+    def test_max_cores_limits_workers(self):
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr(pipeline, 'cpu_count', lambda: 32)
+            executor = create_executor({'executor': 'threads', 'max_cores': 3})
+        assert executor.n_workers == 3
+
+    def test_start_method_is_forwarded(self):
+        executor = create_executor({'executor': 'processes', 'start_method': 'spawn'})
+        assert executor.start_method == 'spawn'
+
+    def test_unknown_backend_raises(self):
+        with pytest.raises(ValueError):
+            create_executor({'executor': 'gpu'})
+
+
+class TestIdenticalOutputs:
+    """Tous les backends produisent exactement le même résultat"""
+
+    def test_backends_produce_identical_outputs(self):
+        recipes_df = make_synthetic_recipes(120)
+        outputs = []
+        for executor in [SerialExecutor(), ThreadExecutor(2), ProcessExecutor(2, 'fork')]:
+            chunks = preprocess_chunks(recipes_df, executor, chunk_size=50)
+            outputs.append(pd.concat(chunks, ignore_index=True))
+
+        assert len(outputs[0]) == 120
+        for output in outputs[1:]:
+            assert output.equals(outputs[0])
@@ -0,0 +1,180 @@
+"""
+Tests unitaires pour le re-classement depuis les composantes du score
+(src/engines/ranking.py)
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+from unittest.mock import patch
+
+try:
+    from reco_score import RecipeScorer
+    from src.engines.ranking import RankedCursor, ScoreComponents, top_k_indices
+    from src.engines.recommendation_engine import RecommendationEngine
+except ImportError:
+    pytest.skip("Module ranking non accessible", allow_module_level=True)
+
+
+@pytest.fixture
+def data():
+    """Petit corpus avec interactions"""
+    recipes = pd.DataFrame({
+        'id': [10, 20, 30, 40, 50],
+        'name': ['soup', 'salad', 'stew', 'cake', 'pasta'],
+        'ingredients': [
+            ['onion', 'carrot', 'salt'],
+            ['tomato', 'onion'],
+            ['beef', 'onion', 'potato', 'carrot'],
+            ['flour', 'sugar', 'egg'],
+            ['pasta', 'tomato', 'garlic'],
+        ],
+        'minutes': [30, 10, 120, 60, 20],
+    })
+    interactions = pd.DataFrame({
+        'recipe_id': [10, 10, 20, 30, 40, 40, 40],
+        'rating': [5, 4, 3, 5, 2, 5, 4],
+    })
+    return recipes, interactions
+
+
+class TestTopK:
+    """Sélection des k meilleurs indices"""
+
+    def test_matches_full_sort(self):
+        values = np.random.default_rng(0).random(1000)
+        expected = np.argsort(-values, kind='stable')[:25]
+        np.testing.assert_array_equal(top_k_indices(values, 25), expected)
+
+    def test_ties_use_secondary_then_position(self):
+        primary = np.array([1.0, 0.5, 1.0, 1.0, 0.0])
+        secondary = np.array([0.1, 0.9, 0.3, 0.3, 0.0])
+        assert list(top_k_indices(primary, 2, secondary)) == [2, 3]
+        assert list(top_k_indices(primary, 10)) == [0, 2, 3, 1, 4]
+
+
+class TestScoreComponents:
+    """Équivalence avec RecipeScorer.recommend et re-tri sans recalcul"""
+
+    def test_score_mode_matches_recommend(self, data):
+        recipes, interactions = data
+        scorer = RecipeScorer(alpha=0.4, beta=0.3, gamma=0.2, delta=0.1)
+        expected = scorer.recommend(recipes, interactions, ['onion', 'carrot'], top_n=3)
+
+        components = ScoreComponents.from_frame(
+            scorer.score_components(recipes, interactions, ['onion', 'carrot']))
+        ranked = components.rank("score", RecommendationEngine.SCORER_WEIGHTS, 3)
+
+        assert list(recipes.loc[ranked.index, 'id']) == list(expected['id'])
+        np.testing.assert_allclose(ranked['score'], expected['score'], rtol=1e-6)
+
+    def test_intelligent_mode_is_global(self, data):
+        recipes, interactions = data
+        scorer = RecipeScorer()
+        components = ScoreComponents.from_frame(
+            scorer.score_components(recipes, interactions, ['onion', 'carrot']))
+
+        ranked = components.rank("intelligent", RecommendationEngine.SCORER_WEIGHTS, 5)
+
+        assert ranked['composite_score'].is_monotonic_decreasing
+        assert ranked['normalized_score'].max() == 1.0
+        assert ranked['normalized_score'].min() == 0.0
+
+    def test_unknown_sort_mode(self, data):
+        recipes, interactions = data
+        components = ScoreComponents.from_frame(
+            RecipeScorer().score_components(recipes, interactions, ['onion']))
+        with pytest.raises(ValueError):
+            components.rank("random", RecommendationEngine.SCORER_WEIGHTS, 3)
+
+
+class TestEngineReRanking:
+    """Changer le mode de tri ou les poids ne relance pas le scoring"""
+
+    def test_sort_modes_and_weights_reuse_components(self, data):
+        recipes, interactions = data
+        original = RecipeScorer.score_components
+
+        with patch('reco_score.RecipeScorer.score_components', autospec=True,
+                   side_effect=original) as score_components:
+            results = {
+                mode: RecommendationEngine.get_recommendations(
+                    recipes, interactions, ['onion', 'carrot'], None, 3,
+                    data_version='v1', sort_mode=mode)
+                for mode in ("intelligent", "jaccard", "cosine", "score")
+            }
+            reweighted = RecommendationEngine.get_recommendations(
+                recipes, interactions, ['onion', 'carrot'], None, 3,
+                data_version='v1', sort_mode="score",
+                weights={"alpha": 0.0, "beta": 0.0, "gamma": 1.0, "delta": 0.0})
+
+        assert score_components.call_count == 1
+        assert results['jaccard']['jaccard'].is_monotonic_decreasing
+        assert results['cosine']['cosine'].is_monotonic_decreasing
+        assert 'composite_score' in results['intelligent'].columns
+        # Poids uniquement sur la popularité: la recette la plus commentée d'abord
+        assert reweighted.iloc[0]['id'] == 40
+        assert list(results['score'].columns[:7]) == [
+            'id', 'name', 'jaccard', 'cosine', 'mean_rating_norm', 'popularity', 'score']
+
+
+class TestRankedCursor:
+    """Pagination paresseuse du classement"""
+
+    @pytest.fixture
+    def components(self):
+        rng = np.random.default_rng(1)
+        n = 200
+        return ScoreComponents(np.arange(n), *(rng.random(n).astype(np.float32)
+                                               for _ in range(4)))
+
+    def test_take_matches_rank(self, components):
+        cursor = RankedCursor(components, "score", RecommendationEngine.SCORER_WEIGHTS,
+                              lambda ranked: ranked)
+        expected = components.rank("score", RecommendationEngine.SCORER_WEIGHTS, 12)
+
+        pd.testing.assert_frame_equal(cursor.take(8), expected.head(8))
+        pd.testing.assert_frame_equal(cursor.take(12), expected)
+
+    def test_batches_cover_the_whole_ranking(self, components):
+        cursor = RankedCursor(components, "jaccard", RecommendationEngine.SCORER_WEIGHTS,
+                              lambda ranked: ranked)
+
+        batches = list(cursor.iter_batches(64))
+
+        assert [len(b) for b in batches] == [64, 64, 64, 8]
+        combined = pd.concat(batches)
+        assert combined['jaccard'].is_monotonic_decreasing
+        assert sorted(combined.index) == list(range(200))
+        assert cursor.exhausted
+
+    def test_iteration_is_lazy(self, components):
+        materialized = []
+
+        def materialize(ranked):
+            materialized.append(len(ranked))
+            return ranked
+
+        cursor = RankedCursor(components, "intelligent",
+                              RecommendationEngine.SCORER_WEIGHTS, materialize)
+        first = next(iter(cursor))
+
+        assert materialized == [20]
+        assert first['composite_score'] == cursor.take(1)['composite_score'].iloc[0]
+
+    def test_engine_cursor_does_not_rescore(self, data):
+        recipes, interactions = data
+        original = RecipeScorer.score_components
+
+        with patch('reco_score.RecipeScorer.score_components', autospec=True,
+                   side_effect=original) as score_components:
+            cursor = RecommendationEngine.get_recommendations(
+                recipes, interactions, ['onion'], None, 2,
+                data_version='v1', sort_mode="score", lazy=True)
+            first_page = cursor.take(2)
+            more = cursor.take(4)
+
+        assert score_components.call_count == 1
+        assert len(cursor) == 5
+        pd.testing.assert_frame_equal(more.head(2), first_page)
+        assert 'name' in more.columns
@@ -318,4 +318,43 @@ class TestRecommendationEnginePytest:
 
 if __name__ == '__main__':
     # Run unittest tests
-    unittest.main(verbosity=2)
\ No newline at end of file
+    unittest.main(verbosity=2)
+
+class TestEngineErrorReporting:
+    """Le moteur ne dépend pas de Streamlit: erreurs journalisées ou propagées"""
+
+    def test_engine_does_not_use_streamlit(self):
+        from src.engines import recommendation_engine
+        assert not hasattr(recommendation_engine, 'st')
+
+    def test_errors_are_logged_and_return_empty(self, caplog):
+        with patch('reco_score.RecipeScorer.score_components', side_effect=RuntimeError("boom")):
+            result = RecommendationEngine.get_recommendations(
+                pd.DataFrame({'id': [1]}), pd.DataFrame(), ['egg'], None, 5)
+
+        assert result.empty
+        assert "boom" in caplog.text
+
+    def test_errors_are_raised_on_request(self):
+        with patch('reco_score.RecipeScorer.score_components', side_effect=RuntimeError("boom")):
+            with pytest.raises(RuntimeError, match="boom"):
+                RecommendationEngine.get_recommendations(
+                    pd.DataFrame({'id': [1]}), pd.DataFrame(), ['egg'], None, 5,
+                    raise_errors=True)
+
+
+class TestDataVersionSwap:
+    """Invalidation des caches à la bascule des artefacts"""
+
+    def test_release_data_version_clears_caches(self):
+        from src.engines import recipe_index, recommendation_engine
+
+        recommendation_engine.RESULT_CACHE.put(("q",), pd.DataFrame({'a': [1]}), "v1")
+        recommendation_engine.COMPONENT_CACHE.put(("c",), np.zeros(3), "v1")
+        recipe_index._INDEXES["v1"] = object()
+
+        RecommendationEngine.release_data_version("v1", "v2")
+
+        assert len(recommendation_engine.RESULT_CACHE) == 0
+        assert len(recommendation_engine.COMPONENT_CACHE) == 0
+        assert recipe_index._INDEXES == {}
@@ -0,0 +1,150 @@
+"""
+Tests unitaires pour le cache des résultats de recommandation
+(src/engines/result_cache.py)
+"""
+
+import pytest
+import pandas as pd
+from unittest.mock import patch
+
+try:
+    from src.engines.result_cache import ResultCache, make_query_key
+    from src.engines.recommendation_engine import RecommendationEngine, RESULT_CACHE
+except ImportError:
+    pytest.skip("Module result_cache non accessible", allow_module_level=True)
+
+
+# Sortie type de RecipeScorer.score_components (index = labels des recettes)
+COMPONENTS = pd.DataFrame({'jaccard': [0.5, 0.0], 'cosine': [0.4, 0.0],
+                           'mean_rating_norm': [1.0, 0.5], 'popularity': [1.0, 0.0]})
+
+
+class FakeClock:
+    """Horloge contrôlée pour tester l'expiration"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestQueryKey:
+    """Canonicalisation des clés de requête"""
+
+    def test_ingredient_order_and_case_do_not_matter(self):
+        weights = (0.4, 0.3, 0.2, 0.1)
+        key_a = make_query_key(['Tomato', ' onion'], 30, 10, weights)
+        key_b = make_query_key(['onion', 'tomato', 'tomato'], 30, 10, weights)
+        assert key_a == key_b
+
+    def test_parameters_are_part_of_the_key(self):
+        weights = (0.4, 0.3, 0.2, 0.1)
+        base = make_query_key(['onion'], 30, 10, weights)
+        assert base != make_query_key(['onion'], 60, 10, weights)
+        assert base != make_query_key(['onion'], 30, 5, weights)
+        assert base != make_query_key(['onion'], 30, 10, (0.5, 0.3, 0.1, 0.1))
+        assert base != make_query_key(['onion'], 30, 10, weights, False)
+
+
+class TestResultCache:
+    """LRU, TTL, borne en octets et invalidation par version"""
+
+    def test_lru_eviction_by_entry_count(self):
+        cache = ResultCache(max_entries=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+
+        assert cache.get('b') is None
+        assert cache.get('a') == 1 and cache.get('c') == 3
+        assert cache.stats()['evictions'] == 1
+
+    def test_ttl_expiration(self):
+        clock = FakeClock()
+        cache = ResultCache(ttl=10, clock=clock)
+        cache.put('a', 1)
+
+        clock.now = 9
+        assert cache.get('a') == 1
+        clock.now = 10
+        assert cache.get('a') is None
+        assert cache.stats()['expirations'] == 1
+
+    def test_bytes_bound(self):
+        df = pd.DataFrame({'x': range(1000)})
+        size = int(df.memory_usage(deep=True).sum())
+        cache = ResultCache(max_bytes=int(size * 1.5))
+        cache.put('a', df)
+        cache.put('b', df.copy())
+
+        assert len(cache) == 1
+        assert cache.get('b') is not None
+        assert cache.stats()['bytes'] <= cache.max_bytes
+
+    def test_version_change_invalidates(self):
+        cache = ResultCache()
+        cache.put('a', 1, data_version='v1')
+        assert cache.get('a', 'v1') == 1
+        assert cache.get('a', 'v2') is None
+        assert cache.data_version == 'v2'
+
+    def test_hit_miss_counters(self):
+        cache = ResultCache()
+        cache.get('a')
+        cache.put('a', 1)
+        cache.get('a')
+        stats = cache.stats()
+        assert (stats['hits'], stats['misses'], stats['hit_rate']) == (1, 1, 0.5)
+
+        cache.clear()
+        assert cache.stats()['hits'] == 0 and len(cache) == 0
+
+
+class TestEngineCaching:
+    """Intégration du cache dans RecommendationEngine"""
+
+    @pytest.fixture
+    def data(self):
+        recipes = pd.DataFrame({'id': [1, 2], 'name': ['a', 'b']})
+        interactions = pd.DataFrame({'recipe_id': [1], 'rating': [5]})
+        return recipes, interactions
+
+    def test_second_identical_query_is_served_from_cache(self, data):
+        recipes, interactions = data
+        components = COMPONENTS.copy()
+
+        with patch('reco_score.RecipeScorer.score_components',
+                   return_value=components) as score_components:
+            first = RecommendationEngine.get_recommendations(
+                recipes, interactions, ['onion', 'tomato'], 30, 5, False)
+            second = RecommendationEngine.get_recommendations(
+                recipes, interactions, ['Tomato', 'onion'], 30, 5, False)
+
+        assert score_components.call_count == 1
+        pd.testing.assert_frame_equal(first, second)
+        assert RecommendationEngine.cache_stats()['hits'] == 1
+
+    def test_new_data_version_recomputes(self, data):
+        recipes, interactions = data
+        with patch('reco_score.RecipeScorer.score_components',
+                   return_value=COMPONENTS.copy()) as score_components:
+            RecommendationEngine.get_recommendations(
+                recipes, interactions, ['onion'], 30, 5, False, data_version='v1')
+            RecommendationEngine.get_recommendations(
+                recipes, interactions, ['onion'], 30, 5, False, data_version='v2')
+
+        assert score_components.call_count == 2
+        assert RESULT_CACHE.data_version == 'v2'
+
+    def test_empty_results_are_not_cached(self, data):
+        recipes, interactions = data
+
+        with patch('reco_score.RecipeScorer.score_components',
+                   return_value=COMPONENTS.iloc[:0]):
+            result = RecommendationEngine.get_recommendations(
+                recipes, interactions, ['x'], None, 5)
+
+        assert result.empty
+        assert len(RESULT_CACHE) == 0
@@ -0,0 +1,274 @@
+"""
+Tests unitaires pour le scoring scatter-gather
+(index_bundle.partition_index_arrays, src/engines/scatter_gather.py et
+src/service/shard_service.py)
+"""
+
+import os
+import socket
+import struct
+import subprocess
+import sys
+import threading
+
+import numpy as np
+import pytest
+import pandas as pd
+
+try:
+    from index_bundle import (SHARD_BUNDLE_FILE, build_index_arrays, partition_index_arrays,
+                              read_index_bundle, write_index_bundle)
+    from src.engines import recommendation_engine
+    from src.engines.recipe_index import RecipeIndex, index_available
+    from src.engines.recommendation_engine import RecommendationEngine
+    from src.engines.scatter_gather import (ScatterGatherCoordinator, ShardError, ShardReply,
+                                            ShardScorer, decode_reply, encode_error,
+                                            encode_reply, parse_addresses, recv_frame,
+                                            send_frame)
+    from src.service.shard_service import create_server
+except ImportError:
+    pytest.skip("Module scatter_gather non accessible", allow_module_level=True)
+
+if not index_available():
+    pytest.skip("scikit-learn non installé", allow_module_level=True)
+
+
+APP_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "streamlit-poetry-docker")
+
+VOCABULARY = ['chicken breast', 'onion', 'garlic', 'tomato', 'pasta', 'egg',
+              'flour', 'sugar', 'butter', 'milk', 'salt', 'beef', 'carrot']
+
+WEIGHTS = RecommendationEngine.SCORER_WEIGHTS
+
+QUERIES = [
+    (('garlic', 'onion'), None),
+    (('egg', 'flour', 'sugar'), 60),
+    (('beef', 'carrot'), 25),
+]
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    rng = np.random.default_rng(7)
+    recipes = pd.DataFrame({
+        'id': rng.permutation(900)[:300] + 10,
+        'name': [f"recipe {i}" for i in range(300)],
+        'normalized_ingredients': [list(rng.choice(VOCABULARY, rng.integers(0, 6), replace=False))
+                                   for _ in range(300)],
+        # Peu de valeurs distinctes: nombreuses égalités à départager
+        'minutes': rng.choice([10, 20, 40, 90], 300),
+    }, index=np.arange(300) + 500)
+    interactions = pd.DataFrame({'recipe_id': rng.choice(recipes['id'], 200),
+                                 'rating': rng.integers(4, 6, 200)})
+    return recipes, interactions
+
+
+@pytest.fixture(scope="module")
+def shard_bundles(dataset, tmp_path_factory):
+    directory = tmp_path_factory.mktemp("shards")
+    paths = []
+    for shard, (arrays, attrs) in enumerate(partition_index_arrays(*build_index_arrays(*dataset), 3)):
+        path = str(directory / SHARD_BUNDLE_FILE.format(shard=shard, n_shards=3))
+        write_index_bundle(path, arrays, attrs)
+        paths.append(path)
+    return paths
+
+
+def _serve(scorer, **limits):
+    server = create_server(scorer, **limits)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture(scope="module")
+def shard_servers(shard_bundles):
+    servers = [_serve(ShardScorer.from_bundle(path)) for path in shard_bundles]
+    yield [server.server_address for server in servers]
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def coordinator(shard_servers):
+    coordinator = ScatterGatherCoordinator(shard_servers, timeout=5)
+    yield coordinator
+    coordinator.close()
+
+
+class TestPartition:
+    """Tests des bundles de shards"""
+
+    def test_partition_by_id(self, dataset, shard_bundles):
+        recipes, _ = dataset
+        ids, positions = [], []
+        for shard, path in enumerate(shard_bundles):
+            bundle = read_index_bundle(path)
+            assert (bundle["recipe_ids"] % 3 == shard).all()
+            assert bundle.attrs["corpus_recipes"] == len(recipes)
+            ids.append(bundle["recipe_ids"])
+            positions.append(bundle["positions"])
+
+        positions = np.concatenate(positions)
+        assert sorted(positions.tolist()) == list(range(len(recipes)))
+        np.testing.assert_array_equal(np.concatenate(ids), recipes['id'].to_numpy()[positions])
+
+
+class TestWireFormat:
+    """Tests du format des réponses"""
+
+    def test_reply_round_trip(self):
+        reply = ShardReply(np.array([4, 9]), np.array([0, 7]), np.array([0.5, 0.25], np.float32),
+                           np.zeros(2, np.float32), np.ones(2, np.float32),
+                           np.array([0.1, 0.2], np.float32), 12, -0.5, 1.5)
+        payload = encode_reply(reply)
+        decoded = decode_reply(payload)
+
+        # En-tête puis 32 octets par recette
+        assert len(payload) == 25 + 2 * 32
+        np.testing.assert_array_equal(decoded.ids, reply.ids)
+        np.testing.assert_array_equal(decoded.popularity, reply.popularity)
+        assert (decoded.n_candidates, decoded.score_min, decoded.score_max) == (12, -0.5, 1.5)
+
+    def test_error_reply(self):
+        with pytest.raises(ShardError, match="boom"):
+            decode_reply(encode_error("boom"))
+
+    def test_parse_addresses(self):
+        assert parse_addresses(["a:9100", " 10.0.0.2:9101"]) == [("a", 9100), ("10.0.0.2", 9101)]
+        with pytest.raises(ValueError):
+            parse_addresses(["sans-port"])
+
+
+class TestScatterGather:
+    """Tests de la fusion des top-k des shards"""
+
+    @pytest.mark.parametrize("sort_mode", ["intelligent", "jaccard", "cosine", "score"])
+    @pytest.mark.parametrize("query", QUERIES)
+    def test_matches_full_index(self, dataset, coordinator, sort_mode, query):
+        recipes, interactions = dataset
+        expected = RecipeIndex.build(recipes, interactions).score_batch([query])[0].rank(
+            sort_mode, WEIGHTS, 15)
+
+        gathered = coordinator.gather(*query, sort_mode, WEIGHTS, 15)
+        ranked = gathered.rank(sort_mode, WEIGHTS, 15)
+
+        assert gathered.degraded is None
+        np.testing.assert_array_equal(ranked.index, recipes.loc[expected.index, 'id'])
+        np.testing.assert_allclose(ranked["score"], expected["score"], rtol=1e-6)
+        if sort_mode == "intelligent":
+            np.testing.assert_allclose(ranked["composite_score"], expected["composite_score"],
+                                       rtol=1e-6)
+
+    def test_unreachable_shard_gives_partial_result(self, shard_servers):
+        # Port accepté par le système mais jamais servi: délai dépassé
+        silent = socket.socket()
+        silent.bind(("127.0.0.1", 0))
+        silent.listen()
+        coordinator = ScatterGatherCoordinator(shard_servers[:2] + [silent.getsockname()],
+                                               timeout=0.2)
+        try:
+            gathered = coordinator.gather(('garlic', 'onion'), None, "intelligent", WEIGHTS, 5)
+
+            assert gathered.degraded == {"mode": "partial", "reason": "shard_timeout"}
+            assert (gathered.labels % 3 != 2).all()
+            assert coordinator.stats()["partial"] == 1
+        finally:
+            coordinator.close()
+            silent.close()
+
+    def test_no_shard_answers(self):
+        closed = socket.socket()
+        closed.bind(("127.0.0.1", 0))
+        address = closed.getsockname()
+        closed.close()
+
+        coordinator = ScatterGatherCoordinator([address], timeout=0.2)
+        try:
+            with pytest.raises(ShardError):
+                coordinator.gather(('egg',), None, "score", WEIGHTS, 5)
+            assert coordinator.stats()["failures"]["shard_error"] == 1
+        finally:
+            coordinator.close()
+
+    def test_engine_uses_shards(self, dataset, coordinator, monkeypatch):
+        recipes, interactions = dataset
+        monkeypatch.setattr(recommendation_engine, 'SCATTER_GATHER', coordinator)
+        expected = RecipeIndex.build(recipes, interactions).score_batch(
+            [(('garlic', 'onion'), 60)])[0].rank("intelligent", WEIGHTS, 5)
+
+        result = RecommendationEngine.get_recommendations(
+            recipes, interactions, ['onion', 'garlic'], 60, 5, raise_errors=True)
+        np.testing.assert_array_equal(result.index, expected.index)
+        assert result['name'].tolist() == recipes.loc[expected.index, 'name'].tolist()
+
+        cursor = RecommendationEngine.get_recommendations(
+            recipes, interactions, ['onion', 'garlic'], 60, 5, lazy=True, raise_errors=True)
+        np.testing.assert_array_equal(cursor.take(5).index, expected.index)
+        assert RecommendationEngine.cache_stats()["scatter_gather"]["requests"] >= 2
+
+
+class TestShardServerLimits:
+    """Protection du serveur de shard contre les clients abusifs"""
+
+    @pytest.fixture
+    def serve_limited(self, shard_bundles):
+        servers = []
+
+        def serve(**limits):
+            servers.append(_serve(ShardScorer.from_bundle(shard_bundles[0]), **limits))
+            return servers[-1].server_address
+        yield serve
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+
+    def test_oversized_frame_rejected_before_reading(self, serve_limited):
+        address = serve_limited(max_request_bytes=64, idle_timeout=30)
+        with socket.create_connection(address, timeout=5) as sock:
+            # En-tête annonçant 4 Gio: connexion fermée sans attendre le contenu
+            sock.sendall(struct.pack("<I", 0xFFFFFFFF))
+            assert sock.recv(1) == b""
+
+    def test_recv_frame_max_size(self):
+        left, right = socket.socketpair()
+        with left, right:
+            send_frame(left, b"x" * 10)
+            with pytest.raises(ShardError):
+                recv_frame(right, max_size=8)
+
+    def test_idle_connection_closed(self, serve_limited):
+        address = serve_limited(idle_timeout=0.2)
+        with socket.create_connection(address, timeout=5) as sock:
+            assert sock.recv(1) == b""
+
+
+class TestShardProcesses:
+    """Shards servis par des processus locaux (nœuds simulés)"""
+
+    def test_local_processes(self, dataset, shard_bundles):
+        recipes, interactions = dataset
+        env = {**os.environ, "PYTHONPATH": os.pathsep.join(
+            [APP_DIR, os.path.join(APP_DIR, "..", "preprocessing"), os.environ.get("PYTHONPATH", "")])}
+        processes = [subprocess.Popen(
+            [sys.executable, "-m", "src.service.shard_service", "--bundle", path,
+             "--host", "127.0.0.1", "--port", "0"],
+            cwd=APP_DIR, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+            for path in shard_bundles]
+        try:
+            addresses = parse_addresses(
+                [process.stdout.readline().split()[-1] for process in processes])
+            coordinator = ScatterGatherCoordinator(addresses, timeout=10)
+            try:
+                ranked = coordinator.gather(('egg', 'flour', 'sugar'), 60, "intelligent",
+                                            WEIGHTS, 10).rank("intelligent", WEIGHTS, 10)
+            finally:
+                coordinator.close()
+        finally:
+            for process in processes:
+                process.terminate()
+                process.wait(timeout=10)
+
+        expected = RecipeIndex.build(recipes, interactions).score_batch(
+            [(('egg', 'flour', 'sugar'), 60)])[0].rank("intelligent", WEIGHTS, 10)
+        np.testing.assert_array_equal(ranked.index, recipes.loc[expected.index, 'id'])
@@ -0,0 +1,142 @@
+"""
+Tests unitaires pour le scoring par shards
+(src/engines/sharding.py, ranking.sharded_top_k et RecipeIndex.score_arrays)
+"""
+
+import threading
+
+import numpy as np
+import pytest
+import pandas as pd
+
+try:
+    from src.engines import recipe_index, recommendation_engine, sharding
+    from src.engines.ranking import sharded_top_k, top_k_indices
+    from src.engines.recipe_index import RecipeIndex, index_available
+    from src.engines.recommendation_engine import RecommendationEngine
+    from src.engines.sharding import map_shards, shard_bounds, shard_count
+except ImportError:
+    pytest.skip("Module sharding non accessible", allow_module_level=True)
+
+
+VOCABULARY = ['chicken breast', 'onion', 'garlic', 'tomato', 'pasta', 'egg',
+              'flour', 'sugar', 'butter', 'milk', 'salt', 'beef', 'carrot']
+
+
+@pytest.fixture
+def sharding_enabled(monkeypatch):
+    monkeypatch.setitem(sharding.SHARD_CONFIG, "enabled", True)
+    monkeypatch.setitem(sharding.SHARD_CONFIG, "max_threads", 4)
+    monkeypatch.setitem(sharding.SHARD_CONFIG, "min_shard_size", 100)
+
+
+class TestShardCount:
+    """Tests du découpage en shards"""
+
+    def test_disabled_by_default(self, monkeypatch):
+        monkeypatch.setitem(sharding.SHARD_CONFIG, "enabled", False)
+        assert shard_count(10 ** 6, max_threads=8) == 1
+
+    def test_adapts_to_cores_and_volume(self, sharding_enabled):
+        assert shard_count(50) == 1
+        assert shard_count(250) == 2
+        assert shard_count(10 ** 6) == 4
+        assert shard_count(10 ** 6, max_threads=1) == 1
+
+    def test_bounds_are_contiguous_and_balanced(self):
+        bounds = shard_bounds(10, 3)
+        assert bounds[0][0] == 0 and bounds[-1][1] == 10
+        assert all(stop == start for (_, stop), (start, _) in zip(bounds, bounds[1:]))
+        assert max(stop - start for start, stop in bounds) - min(
+            stop - start for start, stop in bounds) <= 1
+
+        assert shard_bounds(2, 5) == [(0, 1), (1, 2)]
+        assert shard_bounds(0, 4) == [(0, 0)]
+
+    def test_map_shards_runs_in_threads(self, sharding_enabled):
+        names = map_shards(lambda start, stop: threading.current_thread().name,
+                           shard_bounds(100, 3))
+        assert len(names) == 3
+        assert all(name.startswith("scoring-shard") for name in names)
+
+        # Un seul shard: exécuté dans le thread appelant
+        assert map_shards(lambda start, stop: threading.current_thread().name,
+                          shard_bounds(100, 1)) == [threading.current_thread().name]
+
+
+class TestShardedTopK:
+    """Tests de la fusion des top-k partiels"""
+
+    @pytest.mark.parametrize("n_shards", [1, 2, 3, 7])
+    @pytest.mark.parametrize("k", [1, 5, 40, 500])
+    def test_matches_global_top_k(self, n_shards, k):
+        rng = np.random.default_rng(n_shards * 1000 + k)
+        # Nombreuses égalités: départage par secondary puis par position
+        primary = rng.integers(0, 20, 300).astype(float)
+        secondary = rng.integers(0, 3, 300).astype(float)
+
+        np.testing.assert_array_equal(
+            sharded_top_k(primary, k, secondary, n_shards=n_shards),
+            top_k_indices(primary, k, secondary))
+        np.testing.assert_array_equal(
+            sharded_top_k(primary, k, n_shards=n_shards), top_k_indices(primary, k))
+
+    def test_empty(self):
+        assert len(sharded_top_k(np.array([]), 5, n_shards=3)) == 0
+        assert len(sharded_top_k(np.arange(10.0), 0, n_shards=3)) == 0
+
+
+@pytest.mark.skipif(not index_available(), reason="scikit-learn non installé")
+class TestShardedIndexScoring:
+    """Tests du scoring de l'index par shards"""
+
+    QUERIES = [
+        (['onion', 'garlic'], None),
+        (['egg', 'flour', 'sugar'], 60),
+        (['beef', 'carrot'], 25),
+        ([], None),
+    ]
+
+    @pytest.fixture
+    def dataset(self):
+        rng = np.random.default_rng(3)
+        recipes = pd.DataFrame({
+            'id': np.arange(400) + 1,
+            'name': [f"recipe {i}" for i in range(400)],
+            'normalized_ingredients': [list(rng.choice(VOCABULARY, rng.integers(0, 7), replace=False))
+                                       for _ in range(400)],
+            'minutes': rng.integers(5, 200, 400),
+        })
+        interactions = pd.DataFrame({'recipe_id': rng.integers(1, 401, 900),
+                                     'rating': rng.integers(1, 6, 900)})
+        return recipes, interactions
+
+    @pytest.mark.parametrize("n_shards", [2, 3, 8])
+    def test_shards_match_single_pass(self, dataset, n_shards, sharding_enabled):
+        index = RecipeIndex.build(*dataset)
+        expected = index.score_arrays(self.QUERIES, n_shards=1)
+        sharded = index.score_arrays(self.QUERIES, n_shards=n_shards)
+
+        for (positions, jaccard, cosine), (ref_positions, ref_jaccard, ref_cosine) in zip(
+                sharded, expected):
+            if ref_positions is None:
+                assert positions is None
+            else:
+                np.testing.assert_array_equal(positions, ref_positions)
+            np.testing.assert_array_equal(jaccard, ref_jaccard)
+            np.testing.assert_allclose(cosine, ref_cosine, atol=1e-6)
+
+    def test_engine_uses_sharded_index(self, dataset, sharding_enabled, monkeypatch):
+        recipes, interactions = dataset
+        monkeypatch.setattr(recommendation_engine, 'SHARDED_SCORING', True)
+        recipe_index._INDEXES.clear()
+        try:
+            result = RecommendationEngine.get_recommendations(
+                recipes, interactions, ['onion', 'garlic'], 60, 5, raise_errors=True)
+
+            assert len(result) == 5
+            assert (result['minutes'] <= 60).all()
+            assert len(recipe_index._INDEXES) == 1
+            assert RecommendationEngine.cache_stats()["sharded_scoring"] is not None
+        finally:
+            recipe_index._INDEXES.clear()
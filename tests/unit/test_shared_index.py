@@ -0,0 +1,199 @@
+"""
+Tests unitaires pour l'index partagé et les processus de scoring
+(src/engines/shared_index.py)
+"""
+
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+import pandas as pd
+
+try:
+    from src.engines import recommendation_engine, shared_index
+    from src.engines.recommendation_engine import RecommendationEngine
+    from src.engines.recipe_index import RecipeIndex, index_available
+    from src.engines.shared_index import ScoringWorkerPool, SharedRecipeIndex
+except ImportError:
+    pytest.skip("Module shared_index non accessible", allow_module_level=True)
+
+if not index_available():
+    pytest.skip("scikit-learn non installé", allow_module_level=True)
+
+
+VOCABULARY = ['chicken breast', 'onion', 'garlic', 'tomato', 'pasta', 'egg',
+              'flour', 'sugar', 'butter', 'milk', 'salt', 'beef', 'carrot']
+
+QUERIES = [
+    (['onion', 'garlic'], None),
+    (['egg', 'flour', 'sugar'], 60),
+    (['beef', 'carrot', 'unknown ingredient'], None),
+    (['pasta'], 30),
+    ([], None),
+]
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    rng = np.random.default_rng(1)
+    recipes = pd.DataFrame({
+        'id': np.arange(200) + 5,
+        'name': [f"recipe {i}" for i in range(200)],
+        'normalized_ingredients': [list(rng.choice(VOCABULARY, rng.integers(0, 7), replace=False))
+                                   for _ in range(200)],
+        'minutes': rng.integers(5, 200, 200),
+    })
+    interactions = pd.DataFrame({'recipe_id': rng.integers(5, 205, 500),
+                                 'rating': rng.integers(1, 6, 500)})
+    return recipes, interactions
+
+
+@pytest.fixture(scope="module")
+def index(dataset):
+    return RecipeIndex.build(*dataset)
+
+
+@pytest.fixture(scope="module")
+def pool(index):
+    pool = ScoringWorkerPool(index, n_workers=2)
+    yield pool
+    pool.close()
+
+
+class TestSharedRecipeIndex:
+    """Tests de la copie de l'index en mémoire partagée"""
+
+    def test_attach_matches_original(self, index):
+        shared = SharedRecipeIndex(index)
+        try:
+            attached = SharedRecipeIndex.attach(shared.handle, labels=index.labels)
+            np.testing.assert_array_equal(attached.sizes, index.sizes)
+            np.testing.assert_array_equal(attached.minutes, index.minutes)
+            assert (attached.incidence != index.incidence).nnz == 0
+            assert (attached.tfidf != index.tfidf).nnz == 0
+
+            for expected, components in zip(index.score_batch(QUERIES),
+                                            attached.score_batch(QUERIES)):
+                np.testing.assert_array_equal(components.labels, expected.labels)
+                np.testing.assert_array_equal(components.jaccard, expected.jaccard)
+                np.testing.assert_array_equal(components.cosine, expected.cosine)
+            del attached
+        finally:
+            shared.close()
+
+    def test_attach_is_zero_copy(self, index):
+        """Deux attachements voient les mêmes octets (aucune copie)"""
+        shared = SharedRecipeIndex(index)
+        try:
+            first = SharedRecipeIndex.attach(shared.handle)
+            second = SharedRecipeIndex.attach(shared.handle)
+            first.popularity[0] = 42.0
+            first.incidence.data[0] = 7.0
+            assert second.popularity[0] == 42.0
+            assert second.incidence.data[0] == 7.0
+            assert shared.nbytes >= index.incidence.data.nbytes + index.tfidf.data.nbytes
+            del first, second
+        finally:
+            shared.close()
+
+    def test_close_unlinks_blocks(self, index):
+        shared = SharedRecipeIndex(index)
+        names = [spec[0] for spec in shared.handle["arrays"].values() if spec is not None]
+        shared.close()
+
+        for name in names:
+            with pytest.raises(FileNotFoundError):
+                shared_memory.SharedMemory(name=name)
+
+
+class TestScoringWorkerPool:
+    """Tests du pool de processus de scoring"""
+
+    def test_invalid_worker_count(self, index):
+        with pytest.raises(ValueError):
+            ScoringWorkerPool(index, n_workers=0)
+
+    def test_pool_matches_local_index(self, index, pool):
+        results = pool.score_batch(QUERIES)
+
+        assert len(results) == len(QUERIES)
+        for expected, components in zip(index.score_batch(QUERIES), results):
+            np.testing.assert_array_equal(components.labels, expected.labels)
+            np.testing.assert_allclose(components.jaccard, expected.jaccard, atol=1e-6)
+            np.testing.assert_allclose(components.cosine, expected.cosine, atol=1e-6)
+            np.testing.assert_array_equal(components.mean_rating_norm, expected.mean_rating_norm)
+            np.testing.assert_array_equal(components.popularity, expected.popularity)
+
+    def test_pool_stats(self, pool):
+        before = pool.stats()
+        pool.score_batch(QUERIES[:3])
+        stats = pool.stats()
+
+        assert stats["workers"] == 2
+        assert stats["queries"] == before["queries"] + 3
+        assert stats["tasks"] == before["tasks"] + 2
+        assert pool.score_batch([]) == []
+
+    def test_engine_dispatches_to_workers(self, dataset, monkeypatch):
+        recipes, interactions = dataset
+        monkeypatch.setattr(recommendation_engine, 'SCORING_WORKERS', 1)
+        try:
+            result = RecommendationEngine.get_recommendations(
+                recipes, interactions, ['onion', 'garlic'], None, 5, raise_errors=True)
+
+            assert len(result) == 5
+            assert RecommendationEngine.cache_stats()["scoring_workers"]["queries"] == 1
+        finally:
+            shared_index.close_worker_pools()
+        assert RecommendationEngine.cache_stats()["scoring_workers"] is None
+
+
+class TestWorkerPoolRetirement:
+    """Bascule de version: l'ancien pool n'est arrêté qu'après ses scorings en cours"""
+
+    def test_swap_waits_for_in_flight_scoring(self, dataset):
+        recipes, interactions = dataset
+        entered = threading.Barrier(4)
+        release = threading.Event()
+        outcomes = []
+
+        def score():
+            try:
+                with shared_index.acquire_worker_pool(recipes, interactions, "v1", 2) as pool:
+                    entered.wait(30)
+                    release.wait(30)
+                    pool.score_batch(QUERIES)
+                outcomes.append('ok')
+            except Exception as e:
+                outcomes.append(repr(e))
+
+        threads = [threading.Thread(target=score) for _ in range(3)]
+        try:
+            for thread in threads:
+                thread.start()
+            entered.wait(30)
+            old = shared_index._POOLS["v1"]
+
+            with shared_index.acquire_worker_pool(recipes, interactions, "v2", 2) as new:
+                assert new is not old
+            assert not old.closed
+
+            release.set()
+            for thread in threads:
+                thread.join(60)
+
+            assert outcomes == ['ok', 'ok', 'ok']
+            assert old.closed
+            assert not new.closed
+        finally:
+            release.set()
+            shared_index.close_worker_pools()
+
+    def test_idle_pool_closed_on_retire(self, index):
+        pool = ScoringWorkerPool(index, n_workers=1)
+        pool.retire()
+
+        assert pool.closed
+        with pytest.raises(RuntimeError):
+            pool.score_batch(QUERIES)
@@ -0,0 +1,116 @@
+"""
+Tests unitaires pour la coalescence des requêtes concurrentes
+(src/engines/single_flight.py)
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import pandas as pd
+from unittest.mock import patch
+
+try:
+    from src.engines.single_flight import SingleFlight
+    from src.engines.recommendation_engine import RecommendationEngine
+except ImportError:
+    pytest.skip("Module single_flight non accessible", allow_module_level=True)
+
+
+class TestSingleFlight:
+    """Un seul calcul pour des appels concurrents de même clé"""
+
+    def test_concurrent_threads_share_one_computation(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            return 42
+
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            futures = [pool.submit(flight.do, 'key', compute) for _ in range(5)]
+            while flight.stats()['calls'] < 5:
+                pass
+            release.set()
+            results = [f.result(5) for f in futures]
+
+        assert results == [42] * 5
+        assert len(calls) == 1
+        assert flight.stats() == {'calls': 5, 'executions': 1, 'saved': 4, 'in_flight': 0}
+
+    def test_distinct_keys_are_not_coalesced(self):
+        flight = SingleFlight()
+        assert flight.do('a', lambda: 1) == 1
+        assert flight.do('b', lambda: 2) == 2
+        assert flight.stats()['executions'] == 2
+
+    def test_errors_are_shared_and_key_released(self):
+        flight = SingleFlight()
+
+        def fail():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            flight.do('key', fail)
+        assert flight.in_flight() == 0
+        assert flight.do('key', lambda: 'ok') == 'ok'
+
+    def test_asyncio_callers_share_one_computation(self):
+        flight = SingleFlight()
+        calls = []
+        release = threading.Event()
+
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            return 'done'
+
+        async def main():
+            tasks = [asyncio.create_task(flight.do_async('key', compute)) for _ in range(4)]
+            await asyncio.sleep(0.05)
+            release.set()
+            return await asyncio.gather(*tasks)
+
+        assert asyncio.run(main()) == ['done'] * 4
+        assert len(calls) == 1
+        assert flight.stats()['saved'] == 3
+
+
+class TestEngineSingleFlight:
+    """Coalescence dans RecommendationEngine"""
+
+    def test_identical_concurrent_requests_compute_once(self):
+        recipes = pd.DataFrame({'id': [1], 'name': ['a']})
+        interactions = pd.DataFrame({'recipe_id': [1], 'rating': [5]})
+        components = pd.DataFrame({'jaccard': [0.5], 'cosine': [0.4],
+                                   'mean_rating_norm': [1.0], 'popularity': [1.0]})
+        started = threading.Barrier(4, timeout=5)
+        release = threading.Event()
+
+        def slow_recommend(*args, **kwargs):
+            release.wait(5)
+            return components
+
+        def request():
+            started.wait()
+            return RecommendationEngine.get_recommendations(
+                recipes, interactions, ['onion'], None, 5, False, data_version='v1')
+
+        with patch('reco_score.RecipeScorer.score_components',
+                   side_effect=slow_recommend) as score_components:
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                futures = [pool.submit(request) for _ in range(4)]
+                while RecommendationEngine.cache_stats()['single_flight']['calls'] < 4:
+                    if all(f.done() for f in futures):
+                        break
+                release.set()
+                results = [f.result(5) for f in futures]
+
+        assert score_components.call_count == 1
+        for served in results[1:]:
+            pd.testing.assert_frame_equal(served, results[0])
+        assert list(results[0]['id']) == [1]
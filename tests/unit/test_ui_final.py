@@ -90,6 +90,31 @@ class TestUIComponentsFinal:
         mock_header.assert_called()
         mock_metric.assert_called()
     
+    @patch('streamlit.sidebar')
+    @patch('streamlit.expander')
+    @patch('streamlit.header')
+    @patch('streamlit.markdown')
+    @patch('streamlit.metric')
+    @patch('streamlit.info')
+    def test_display_sidebar_stats_from_profile(self, mock_info, mock_metric, mock_markdown,
+                                                mock_header, mock_expander, mock_sidebar):
+        """Sidebar alimentée par le profil précalculé (pas de parcours des recettes)"""
+        profile = {
+            'recipes': 1000, 'interactions': 5000,
+            'recipes_with_ingredients': 990, 'ingredient_coverage': 99.0,
+            'built_at': '2024-03-01T12:30:00',
+            'ratings': {'mean': 4.4, 'distribution': {'4': 10, '5': 30}},
+        }
+        recipes_df = Mock()  # non indexable: le profil évite tout parcours
+
+        UIComponents.display_sidebar_stats(recipes_df, pd.DataFrame(), stats=profile)
+
+        metrics = {call.args[0]: call.args[1] for call in mock_metric.call_args_list}
+        assert metrics["📈 Taux de Couverture"] == "99.0%"
+        assert metrics["🍽️ Recettes Disponibles"] == "1,000"
+        assert "01/03/2024 12:30" in mock_info.call_args[0][0]
+        assert any("75%" in call.args[0] for call in mock_markdown.call_args_list)
+
     @patch('streamlit.markdown')
     def test_display_footer(self, mock_markdown):
         """Test de l'affichage du footer"""
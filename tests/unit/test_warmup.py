@@ -0,0 +1,80 @@
+"""
+Tests unitaires pour le warm-up au démarrage (src/core/warmup.py)
+"""
+
+import json
+
+import pytest
+import pandas as pd
+from unittest.mock import patch
+
+try:
+    from src.core import warmup
+    from src.core.app import MangeTaMainApp
+    from src.engines import recommendation_engine
+    from src.managers import data_manager
+except ImportError:
+    pytest.skip("Module warmup non accessible", allow_module_level=True)
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Application pointant vers de petits artefacts temporaires"""
+    recipes = pd.DataFrame({
+        'id': [1, 2, 3],
+        'name': ['soup', 'pasta', 'cake'],
+        'ingredients': [['chicken', 'onion'], ['pasta', 'tomato'], ['egg', 'flour']],
+        'minutes': [30, 20, 60],
+    })
+    interactions = pd.DataFrame({'recipe_id': [1, 2, 2], 'rating': [5, 4, 3]})
+    recipes.to_pickle(tmp_path / "recipes.pkl")
+    interactions.to_pickle(tmp_path / "interactions.pkl")
+
+    monkeypatch.setitem(warmup.WARMUP_CONFIG, "ready_file", str(tmp_path / "ready"))
+    monkeypatch.setattr(warmup, "_WARMUP_REPORT", None)
+    data_manager._ARTIFACTS.clear()
+
+    application = MangeTaMainApp()
+    application.data_manager.recipes_path = str(tmp_path / "recipes.pkl")
+    application.data_manager.interactions_path = str(tmp_path / "interactions.pkl")
+    application.data_manager.ingredient_map_path = str(tmp_path / "missing.pkl")
+    yield application
+    data_manager._ARTIFACTS.clear()
+
+
+class TestWarmup:
+    """Chargement, requêtes types et fichier de disponibilité"""
+
+    def test_warmup_fills_caches_and_writes_ready_flag(self, app):
+        assert not warmup.is_ready()
+
+        report = warmup.run_warmup(app)
+
+        assert warmup.is_ready()
+        with open(warmup.ready_file_path()) as f:
+            assert json.load(f) == report
+        assert report['recipes'] == 3
+        assert report['queries_warmed'] == len(warmup.WARMUP_CONFIG["queries"])
+        assert len(recommendation_engine.COMPONENT_CACHE) == report['queries_warmed']
+
+    def test_artifacts_are_shared_after_warmup(self, app):
+        warmup.run_warmup(app)
+
+        with patch('pandas.read_pickle') as read_pickle:
+            recipes_df, _ = app.data_manager.load_artifacts()
+
+        read_pickle.assert_not_called()
+        assert len(recipes_df) == 3
+
+    def test_ensure_warm_runs_once(self, app):
+        with patch.object(warmup, 'run_warmup', wraps=warmup.run_warmup) as run:
+            assert warmup.ensure_warm(app)
+            assert warmup.ensure_warm(app)
+        assert run.call_count == 1
+        assert warmup.warmup_report()['recipes'] == 3
+
+    def test_missing_artifacts_are_not_ready(self, app, tmp_path):
+        app.data_manager.recipes_path = str(tmp_path / "absent.pkl")
+
+        assert not warmup.ensure_warm(app)
+        assert not warmup.is_ready()